@@ -0,0 +1,216 @@
+"""
+محرك التحليلات العمودي - Columnar Analytics
+
+تجميعات صفحة الإحصائيات (عدد الأدوية حسب عمود، أعلى N شركة، وسلاسل زمنية
+شهرية) على جدول Arrow يحتوي الأعمدة التي تحتاجها الصفحة فقط، يُقرأ من SQLite
+على دفعات ويُحفظ لكل إصدار بيانات. التجميع نفسه يتم بأحد المحركات:
+- duckdb: استعلام SQL متجه ومتعدد الخيوط على نسخة من جدول Arrow (اختياري)
+- arrow: Table.group_by في pyarrow (Acero، متعدد الخيوط)
+- pandas: المسار السابق على DataFrame الكتالوج الكامل
+
+DRUG_ANALYTICS_ENGINE=auto (الافتراضي) يختار arrow إن توفر وإلا pandas، و duckdb
+عند طلبه صراحة: نسخ الجدول إلى DuckDB يكلف زمنًا مع كل إصدار بيانات ولا يعوضه
+إلا تعدد الأنوية على سجل كبير (python benchmarks/analytics_bench.py).
+كل المحركات تعيد نفس النتيجة: قوائم (المفتاح، القيمة) صغيرة جاهزة للرسم.
+"""
+
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pyarrow اختياري - بدونه يعمل مسار pandas فقط
+    pa = None
+
+try:
+    import duckdb
+except ImportError:  # duckdb اختياري
+    duckdb = None
+
+# ===================================================================
+# الإعدادات
+# ===================================================================
+ENGINE = os.environ.get("DRUG_ANALYTICS_ENGINE", "auto")
+READ_CHUNK_ROWS = 20000
+
+# أعمدة الكتالوج التي تحتاجها صفحة الإحصائيات: الاسم -> (النوع، تعبير SQL)
+# النوع category نص قليل القيم يُخزن مرمزًا بالقاموس (dictionary): التجميع على
+# أرقام صغيرة بدل مقارنة النصوص. مفتاح الشهر يُحسب أثناء القراءة من SQLite
+CATALOG_COLUMNS = {
+    'category_name': ('category', 'category_name'),
+    'drug_type_name': ('category', 'drug_type_name'),
+    'manufacturer_name': ('category', 'manufacturer_name'),
+    'form': ('category', 'form'),
+    'availability': ('category', 'availability'),
+    'created_month': ('category', 'substr(created_at, 1, 7)'),
+    'price': ('real', 'price'),
+}
+
+# مصدر أعمدة الشهر لمحرك pandas الذي يعمل على الكتالوج الكامل
+MONTH_SOURCES = {'created_month': 'created_at'}
+
+def available_engines():
+    engines = []
+    if duckdb is not None and pa is not None:
+        engines.append("duckdb")
+    if pa is not None:
+        engines.append("arrow")
+    engines.append("pandas")
+    return engines
+
+
+def resolve_engine(name=None):
+    """المحرك المطلوب إن كان متوفرًا، وإلا arrow ثم pandas"""
+    name = name or ENGINE
+    engines = available_engines()
+    if name in engines:
+        return name
+    return "arrow" if "arrow" in engines else "pandas"
+
+
+# ===================================================================
+# قراءة الأعمدة المطلوبة إلى Arrow
+# ===================================================================
+def _as_real(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_table(conn, select_sql, columns=CATALOG_COLUMNS, chunk_size=READ_CHUNK_ROWS):
+    """جدول Arrow بالأعمدة المطلوبة فقط من select_sql (يُقرأ على دفعات دون DataFrame وسيط)"""
+    arrow_types = {'category': pa.string(), 'text': pa.string(), 'real': pa.float64(), 'integer': pa.int64()}
+    expressions = ", ".join(f"{expression} AS {name}" for name, (_, expression) in columns.items())
+    cursor = conn.execute(f"SELECT {expressions} FROM ({select_sql})")
+    batches = []
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        arrays = []
+        for i, (kind, _) in enumerate(columns.values()):
+            values = [row[i] for row in rows]
+            if kind in ('category', 'text'):
+                values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+            elif kind == 'real':
+                values = [_as_real(v) for v in values]
+            array = pa.array(values, type=arrow_types[kind])
+            arrays.append(array.dictionary_encode() if kind == 'category' else array)
+        batches.append(pa.RecordBatch.from_arrays(arrays, names=list(columns)))
+    if not batches:
+        schema = pa.schema([
+            (name, pa.dictionary(pa.int32(), pa.string()) if kind == 'category' else arrow_types[kind])
+            for name, (kind, _) in columns.items()
+        ])
+        return schema.empty_table()
+    # قاموس واحد لكل عمود بدل قاموس لكل دفعة
+    return pa.Table.from_batches(batches).unify_dictionaries()
+
+# ===================================================================
+# المحركات
+# ===================================================================
+def _sorted_counts(pairs, limit):
+    # الترتيب حسب العدد تنازليًا ثم المفتاح، ليتطابق الناتج بين المحركات
+    pairs = sorted(pairs, key=lambda p: (-p[1], p[0]))
+    return pairs[:limit] if limit else pairs
+
+
+class PandasAnalytics:
+    """المسار السابق: value_counts و groupby على DataFrame الكتالوج"""
+
+    name = "pandas"
+
+    def __init__(self, df):
+        self.df = df
+
+    def count(self):
+        return len(self.df)
+
+    def value_counts(self, column, limit=None):
+        counts = self.df[column].value_counts()
+        return _sorted_counts([(key, int(count)) for key, count in counts.items()], limit)
+
+    def monthly(self, month_column, value_column=None):
+        """(الشهر YYYY-MM، العدد، متوسط value_column) لكل شهر مرتبة زمنيًا"""
+        date_column = MONTH_SOURCES.get(month_column, month_column)
+        df = self.df[self.df[date_column].notna()]
+        months = df[date_column].astype(str).str[:7]
+        if value_column is None:
+            counts = months.value_counts().sort_index()
+            return [(month, int(count), None) for month, count in counts.items()]
+        import pandas as pd
+        values = pd.to_numeric(df[value_column], errors='coerce')
+        grouped = values.groupby(months).agg(['size', 'mean']).sort_index()
+        return [(month, int(row['size']), None if pd.isna(row['mean']) else float(row['mean']))
+                for month, row in grouped.iterrows()]
+
+
+class ArrowAnalytics:
+    """Table.group_by في pyarrow: تجميع متجه متعدد الخيوط على الأعمدة مباشرة"""
+
+    name = "arrow"
+
+    def __init__(self, table):
+        self.table = table
+
+    def count(self):
+        return self.table.num_rows
+
+    def value_counts(self, column, limit=None):
+        table = self.table.select([column]).filter(pc.is_valid(self.table[column]))
+        counts = table.group_by(column).aggregate([([], "count_all")])
+        return _sorted_counts(list(zip(counts[column].to_pylist(), counts["count_all"].to_pylist())), limit)
+
+    def monthly(self, month_column, value_column=None):
+        valid = self.table.filter(pc.is_valid(self.table[month_column]))
+        aggregations = [([], "count_all")] + ([(value_column, "mean")] if value_column else [])
+        grouped = valid.group_by(month_column).aggregate(aggregations)
+        means = grouped[f"{value_column}_mean"].to_pylist() if value_column else [None] * grouped.num_rows
+        return sorted(zip(grouped[month_column].to_pylist(), grouped["count_all"].to_pylist(), means))
+
+
+class DuckDBAnalytics:
+    """استعلامات DuckDB متجهة على نسخة عمودية من جدول Arrow باستخدام كل أنوية المعالج"""
+
+    name = "duckdb"
+
+    def __init__(self, table, threads=None):
+        self.table = table
+        self.conn = duckdb.connect()
+        self.conn.execute(f"SET threads TO {threads or os.cpu_count() or 1}")
+        # نسخ الجدول إلى تخزين DuckDB العمودي مرة واحدة لكل إصدار: الجداول المسجلة
+        # (register) خاصة بالاتصال ولا تراها نسخ cursor() في الخيوط الأخرى
+        self.conn.register("catalog_arrow", table)
+        self.conn.execute("CREATE TABLE catalog AS SELECT * FROM catalog_arrow")
+        self.conn.unregister("catalog_arrow")
+
+    def count(self):
+        return self.table.num_rows
+
+    def value_counts(self, column, limit=None):
+        # نسخة اتصال لكل استعلام: الكائن مشترك بين جلسات Streamlit في عدة خيوط
+        rows = self.conn.cursor().execute(
+            f'SELECT "{column}", COUNT(*) AS n FROM catalog WHERE "{column}" IS NOT NULL '
+            f'GROUP BY 1 ORDER BY n DESC, 1' + (f" LIMIT {int(limit)}" if limit else "")
+        ).fetchall()
+        return [(key, int(count)) for key, count in rows]
+
+    def monthly(self, month_column, value_column=None):
+        value = f'AVG("{value_column}")' if value_column else "NULL"
+        rows = self.conn.cursor().execute(
+            f'SELECT "{month_column}", COUNT(*), {value} FROM catalog '
+            f'WHERE "{month_column}" IS NOT NULL GROUP BY 1 ORDER BY 1'
+        ).fetchall()
+        return [(month, int(count), None if mean is None else float(mean)) for month, count, mean in rows]
+
+
+def create(engine, source):
+    """محرك بالاسم engine على source (جدول Arrow، أو DataFrame لمحرك pandas)"""
+    if engine == "duckdb":
+        return DuckDBAnalytics(source)
+    if engine == "arrow":
+        return ArrowAnalytics(source)
+    return PandasAnalytics(source)
@@ -0,0 +1,455 @@
+"""
+سجل التدقيق - Audit Log
+
+كل إضافة أو تعديل أو حذف في الأدوية والجداول المرجعية (الفئات، الشركات
+المصنعة، أنواع الأدوية) يُسجل بمحفز في audit_log، فيبقى أثر الحذف من
+delete_medication و delete_category و "حذف جميع الأدوية" وأي مسار آخر:
+- الإضافة والحذف: الأعمدة غير الفارغة للصف كـ JSON مضغوط، والنصوص السريرية
+  بطولها فقط ("text:<عدد الأحرف>") حتى لا يكتب الاستيراد أو "حذف الكل" نسخة
+  ثانية غير مضغوطة من الكتالوج في الشهر الحالي
+- التعديل: الأعمدة المتغيرة فقط {"العمود": [القديم، الجديد]} (updated_at لا يُعد تغييرًا)
+
+التقسيم الشهري: الشهر الحالي في audit_log (فهرس (الكيان، المعرف) للقراءة)،
+والأشهر المكتملة تُختم (seal) في جدول لكل شهر audit_YYYYMM بصف واحد لكل سجل
+يحوي كل تغييراته في الشهر JSON مضغوطًا بـ zlib. حذف شهر قديم DROP TABLE دون
+مسح أو حذف صف بصف، وأرشفته نقل جدوله إلى ملف SQLite مستقل. سجل دواء واحد قراءة
+نطاق من الفهرس + قراءة مفتاح واحد من كل شهر مختوم.
+
+الاستخدام:
+    python audit.py --db drug_database.db history --medication 12
+    python audit.py --db drug_database.db seal
+    python audit.py --db drug_database.db archive --month 2025-01
+    python audit.py --db drug_database.db prune --before 2025-01
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+import zlib
+from datetime import datetime, timezone
+
+from clinical_text import CLINICAL_COLUMNS
+from price_history import NOW_MS
+
+# ===================================================================
+# الإعدادات
+# ===================================================================
+# الجداول المدققة: الاسم -> (الرمز المخزن، التسمية)
+AUDITED_TABLES = {
+    'medications': ('M', "دواء"),
+    'categories': ('C', "فئة"),
+    'manufacturers': ('F', "شركة مصنعة"),
+    'drug_types': ('T', "نوع دواء"),
+}
+ENTITY_CODES = {name: code for name, (code, _) in AUDITED_TABLES.items()}
+ENTITY_LABELS = {code: label for code, label in AUDITED_TABLES.values()}
+OPERATIONS = {'I': "إضافة", 'U': "تعديل", 'D': "حذف"}
+
+# أعمدة لا يُعد تغيرها وحدها تعديلاً (يحدّثها التطبيق مع كل حفظ)
+IGNORED_UPDATE_COLUMNS = ('updated_at',)
+# أعمدة تُسجل بطولها فقط عند الإضافة والحذف (تعديلاتها تُسجل كاملة)
+SUMMARIZED_COLUMNS = CLINICAL_COLUMNS
+COMPRESSION_LEVEL = 9
+ARCHIVE_DIR = os.environ.get("DRUG_AUDIT_ARCHIVE_DIR", "audit_archive")
+
+# ===================================================================
+# مخطط قاعدة البيانات
+# ===================================================================
+AUDIT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY,
+    changed_at INTEGER NOT NULL,        -- مللي ثانية منذ 1970 (UTC)
+    entity CHAR(1) NOT NULL,            -- M دواء، C فئة، F شركة مصنعة، T نوع دواء
+    row_id INTEGER NOT NULL,
+    op CHAR(1) NOT NULL,                -- I إضافة، U تعديل، D حذف
+    changes TEXT NOT NULL               -- JSON
+);
+CREATE INDEX IF NOT EXISTS idx_audit_log_row ON audit_log(entity, row_id, id);
+CREATE INDEX IF NOT EXISTS idx_audit_log_changed_at ON audit_log(changed_at);
+
+-- الأشهر المختومة: جدول audit_YYYYMM لكل شهر ما لم يُؤرشف إلى ملف
+CREATE TABLE IF NOT EXISTS audit_partitions (
+    month INTEGER PRIMARY KEY,          -- YYYYMM
+    records INTEGER NOT NULL,           -- عدد السجلات (صف لكل كيان)
+    entries INTEGER NOT NULL,           -- عدد التغييرات
+    raw_bytes INTEGER NOT NULL,         -- حجم JSON قبل الضغط
+    stored_bytes INTEGER NOT NULL,
+    sealed_at INTEGER NOT NULL,
+    archive_path TEXT                   -- ملف الأرشيف بعد نقل الجدول إليه
+);
+"""
+
+
+def _value(ref):
+    # JSON لا يحمل BLOB: يُسجل حجمه فقط
+    return f"iif(typeof({ref}) = 'blob', 'blob:' || length({ref}), {ref})"
+
+
+def _column(prefix, column):
+    return _value(f'{prefix}."{column}"')
+
+
+def _summary(prefix, column):
+    ref = f'{prefix}."{column}"'
+    return f"iif(typeof({ref}) = 'text', 'text:' || length({ref}), {_value(ref)})"
+
+
+def _trigger_sql(table, code, columns):
+    def row_values(prefix):
+        return ", ".join(
+            f"('{c}', {_summary(prefix, c) if c in SUMMARIZED_COLUMNS else _column(prefix, c)})" for c in columns
+        )
+    diff_values = ", ".join(
+        f"('{c}', {_column('OLD', c)}, {_column('NEW', c)})" for c in columns if c not in IGNORED_UPDATE_COLUMNS
+    )
+    insert = "INSERT INTO audit_log (changed_at, entity, row_id, op, changes)"
+    return f"""
+CREATE TRIGGER audit_{table}_insert
+AFTER INSERT ON {table}
+FOR EACH ROW
+BEGIN
+    {insert}
+    SELECT {NOW_MS}, '{code}', NEW.id, 'I', json_group_object(column1, column2)
+    FROM (VALUES {row_values('NEW')}) WHERE column2 IS NOT NULL;
+END;
+
+CREATE TRIGGER audit_{table}_update
+AFTER UPDATE ON {table}
+FOR EACH ROW
+BEGIN
+    {insert}
+    SELECT {NOW_MS}, '{code}', NEW.id, 'U', changes FROM (
+        SELECT json_group_object(column1, json_array(column2, column3)) AS changes, COUNT(*) AS n
+        FROM (VALUES {diff_values}) WHERE column2 IS NOT column3
+    ) WHERE n > 0;
+END;
+
+CREATE TRIGGER audit_{table}_delete
+AFTER DELETE ON {table}
+FOR EACH ROW
+BEGIN
+    {insert}
+    SELECT {NOW_MS}, '{code}', OLD.id, 'D', json_group_object(column1, column2)
+    FROM (VALUES {row_values('OLD')}) WHERE column2 IS NOT NULL;
+END;
+"""
+
+
+def install_triggers(conn):
+    """(إعادة) إنشاء محفزات التدقيق من أعمدة الجداول الحالية
+
+    تُستدعى في الترحيل وبعد أي ترحيل لاحق يضيف أعمدة إلى جدول مدقق.
+    """
+    for table, (code, _) in AUDITED_TABLES.items():
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if not columns:
+            continue
+        for event in ('insert', 'update', 'delete'):
+            conn.execute(f"DROP TRIGGER IF EXISTS audit_{table}_{event}")
+        for statement in _trigger_sql(table, code, columns).split("END;"):
+            if statement.strip():
+                conn.execute(statement + "END;")
+
+
+def create_audit_log(conn):
+    """الترحيل رقم 7: الجداول والمحفزات"""
+    for statement in AUDIT_SCHEMA.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    install_triggers(conn)
+
+
+# ===================================================================
+# الختم الشهري والحذف والأرشفة
+# ===================================================================
+def _month_start_ms(month):
+    return int(datetime(month // 100, month % 100, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _next_month(month):
+    return month + 89 if month % 100 == 12 else month + 1
+
+
+def _month_of(ms):
+    moment = datetime.fromtimestamp(ms / 1000, timezone.utc)
+    return moment.year * 100 + moment.month
+
+
+def months_ago(count, now_ms=None):
+    """الشهر (YYYYMM) قبل count شهرًا من الشهر الحالي"""
+    current = _month_of(now_ms if now_ms is not None else int(time.time() * 1000))
+    index = (current // 100) * 12 + current % 100 - 1 - count
+    return (index // 12) * 100 + index % 12 + 1
+
+
+def parse_month(text):
+    """YYYY-MM أو YYYYMM -> YYYYMM"""
+    text = str(text).strip().replace("-", "").replace("/", "")
+    month = int(text)
+    if not 1 <= month % 100 <= 12:
+        raise ValueError(f"شهر غير صالح: {text}")
+    return month
+
+
+def month_label(month):
+    return f"{month // 100:04d}-{month % 100:02d}"
+
+
+def _partition(month):
+    return f"audit_{month}"
+
+
+# جدول الشهر المختوم (في قاعدة البيانات أو في ملف الأرشيف): صف لكل سجل بكل تغييراته
+_PARTITION_COLUMNS = ("(entity CHAR(1) NOT NULL, row_id INTEGER NOT NULL, entries BLOB NOT NULL, "
+                      "PRIMARY KEY (entity, row_id)) WITHOUT ROWID")
+
+
+def _pack(entries):
+    raw = json.dumps(entries, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return zlib.compress(raw, COMPRESSION_LEVEL), len(raw)
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+def seal_month(conn, month):
+    """نقل تغييرات شهر من audit_log إلى جدوله المضغوط وإرجاع عدد التغييرات المنقولة"""
+    start, end = _month_start_ms(month), _month_start_ms(_next_month(month))
+    rows = conn.execute(
+        "SELECT entity, row_id, changed_at, op, changes FROM audit_log "
+        "WHERE changed_at >= ? AND changed_at < ? ORDER BY entity, row_id, id",
+        (start, end)
+    ).fetchall()
+    if not rows:
+        return 0
+
+    records = {}
+    for entity, row_id, changed_at, op, changes in rows:
+        records.setdefault((entity, row_id), []).append([changed_at, op, json.loads(changes)])
+    table = _partition(month)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table} {_PARTITION_COLUMNS}")
+    # تغييرات متأخرة لشهر مختوم (ساعة رجعت للخلف): دمجها مع ما خُتم سابقًا
+    replaced_raw = 0
+    for (entity, row_id), entries in records.items():
+        existing = conn.execute(
+            f"SELECT entries FROM {table} WHERE entity = ? AND row_id = ?", (entity, row_id)
+        ).fetchone()
+        if existing:
+            raw = zlib.decompress(existing[0])
+            replaced_raw += len(raw)
+            records[(entity, row_id)] = sorted(json.loads(raw) + entries, key=lambda e: e[0])
+    packed = [(entity, row_id, *_pack(entries)) for (entity, row_id), entries in records.items()]
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {table} (entity, row_id, entries) VALUES (?, ?, ?)",
+        [(entity, row_id, blob) for entity, row_id, blob, _ in packed]
+    )
+    conn.execute("DELETE FROM audit_log WHERE changed_at >= ? AND changed_at < ?", (start, end))
+
+    records_count, stored_bytes = conn.execute(
+        f"SELECT COUNT(*), COALESCE(SUM(length(entries)), 0) FROM {table}"
+    ).fetchone()
+    entries_count, raw_bytes = conn.execute(
+        "SELECT entries, raw_bytes FROM audit_partitions WHERE month = ?", (month,)
+    ).fetchone() or (0, 0)
+    conn.execute(
+        "INSERT OR REPLACE INTO audit_partitions "
+        "(month, records, entries, raw_bytes, stored_bytes, sealed_at, archive_path) VALUES (?, ?, ?, ?, ?, ?, NULL)",
+        (month, records_count, entries_count + len(rows), raw_bytes - replaced_raw + sum(p[3] for p in packed),
+         stored_bytes, int(time.time() * 1000))
+    )
+    return len(rows)
+
+
+def seal_completed_months(conn, now_ms=None):
+    """ختم كل الأشهر المكتملة في audit_log وإرجاع [(الشهر، عدد التغييرات)]"""
+    current = _month_of(now_ms if now_ms is not None else int(time.time() * 1000))
+    first = conn.execute("SELECT MIN(changed_at) FROM audit_log").fetchone()[0]
+    if first is None:
+        return []
+    sealed = []
+    month = _month_of(first)
+    while month < current:
+        count = seal_month(conn, month)
+        if count:
+            sealed.append((month, count))
+        month = _next_month(month)
+    return sealed
+
+
+def archive_month(conn, month, archive_dir=ARCHIVE_DIR):
+    """نقل جدول شهر مختوم إلى ملف SQLite مستقل ثم حذفه من قاعدة البيانات"""
+    table = _partition(month)
+    row = conn.execute("SELECT archive_path FROM audit_partitions WHERE month = ?", (month,)).fetchone()
+    if row is None:
+        raise ValueError(f"الشهر {month_label(month)} غير مختوم")
+    if row[0]:
+        return row[0]
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"audit-{month}.db")
+    archive = sqlite3.connect(path)
+    try:
+        with archive:
+            archive.execute(f"DROP TABLE IF EXISTS {table}")
+            archive.execute(f"CREATE TABLE {table} {_PARTITION_COLUMNS}")
+            archive.executemany(f"INSERT INTO {table} VALUES (?, ?, ?)",
+                                conn.execute(f"SELECT entity, row_id, entries FROM {table}"))
+    finally:
+        archive.close()
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute("UPDATE audit_partitions SET archive_path = ? WHERE month = ?", (path, month))
+    return path
+
+
+def prune_before(conn, month):
+    """حذف الأشهر المختومة قبل month (DROP TABLE لكل شهر) وإرجاع الأشهر المحذوفة
+
+    ملفات الأرشيف لا تُحذف: سجلها في audit_partitions فقط يُزال.
+    """
+    months = [row[0] for row in conn.execute(
+        "SELECT month FROM audit_partitions WHERE month < ? ORDER BY month", (month,)
+    )]
+    for old in months:
+        conn.execute(f"DROP TABLE IF EXISTS {_partition(old)}")
+    conn.execute("DELETE FROM audit_partitions WHERE month < ?", (month,))
+    return months
+
+
+# ===================================================================
+# القراءة
+# ===================================================================
+def _entry(changed_at, op, changes, entity=None, row_id=None):
+    return {
+        'changed_at': datetime.fromtimestamp(changed_at / 1000).strftime('%Y-%m-%d %H:%M:%S'),
+        'entity': entity, 'row_id': row_id, 'op': op, 'changes': changes,
+    }
+
+
+def history(conn, entity, row_id, include_archived=False):
+    """كل تغييرات سجل واحد (الأحدث أولاً) من الشهر الحالي والأشهر المختومة
+
+    entity: اسم الجدول (medications ...) أو رمزه.
+    """
+    code = ENTITY_CODES.get(entity, entity)
+    entries = [
+        [changed_at, op, json.loads(changes)] for changed_at, op, changes in conn.execute(
+            "SELECT changed_at, op, changes FROM audit_log WHERE entity = ? AND row_id = ? ORDER BY id",
+            (code, int(row_id))
+        )
+    ]
+    for month, archive_path in conn.execute("SELECT month, archive_path FROM audit_partitions ORDER BY month"):
+        if archive_path is None:
+            source = conn
+        elif include_archived and os.path.exists(archive_path):
+            source = sqlite3.connect(f"file:{archive_path}?mode=ro", uri=True)
+        else:
+            continue
+        try:
+            row = source.execute(
+                f"SELECT entries FROM {_partition(month)} WHERE entity = ? AND row_id = ?", (code, int(row_id))
+            ).fetchone()
+        finally:
+            if source is not conn:
+                source.close()
+        if row:
+            entries.extend(_unpack(row[0]))
+    entries.sort(key=lambda e: e[0], reverse=True)
+    return [_entry(changed_at, op, changes, code, int(row_id)) for changed_at, op, changes in entries]
+
+
+def recent(conn, limit=100, op=None, entity=None):
+    """آخر التغييرات في الشهر الحالي (الأحدث أولاً)، مع تصفية اختيارية بالعملية والكيان"""
+    where, params = [], []
+    if op is not None:
+        where.append("op = ?")
+        params.append(op)
+    if entity is not None:
+        where.append("entity = ?")
+        params.append(ENTITY_CODES.get(entity, entity))
+    rows = conn.execute(
+        "SELECT changed_at, op, changes, entity, row_id FROM audit_log"
+        + (f" WHERE {' AND '.join(where)}" if where else "") + " ORDER BY id DESC LIMIT ?",
+        params + [int(limit)]
+    ).fetchall()
+    return [_entry(changed_at, op, json.loads(changes), entity, row_id)
+            for changed_at, op, changes, entity, row_id in rows]
+
+
+def partitions(conn):
+    """الأشهر المختومة مع أحجامها قبل الضغط وبعده"""
+    return [
+        {'month': month_label(month), 'records': records, 'entries': entries, 'raw_bytes': raw_bytes,
+         'stored_bytes': stored_bytes, 'archive_path': archive_path}
+        for month, records, entries, raw_bytes, stored_bytes, archive_path in conn.execute(
+            "SELECT month, records, entries, raw_bytes, stored_bytes, archive_path FROM audit_partitions ORDER BY month"
+        )
+    ]
+
+
+def summary(conn):
+    """عدد التغييرات وحجمها في الشهر الحالي وفي الأشهر المختومة"""
+    hot_entries, hot_bytes = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(length(changes)), 0) FROM audit_log"
+    ).fetchone()
+    sealed = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(entries), 0), COALESCE(SUM(raw_bytes), 0), "
+        "COALESCE(SUM(stored_bytes), 0) FROM audit_partitions WHERE archive_path IS NULL"
+    ).fetchone()
+    return {'hot_entries': hot_entries, 'hot_bytes': hot_bytes, 'months': sealed[0], 'sealed_entries': sealed[1],
+            'sealed_raw_bytes': sealed[2], 'sealed_bytes': sealed[3]}
+
+
+def describe(entry):
+    """وصف مختصر للتغيير: الأعمدة المعدلة مع القيم، أو الاسم عند الإضافة والحذف"""
+    changes = entry['changes']
+    if entry['op'] == 'U':
+        return "، ".join(f"{column}: من {old} إلى {new}" for column, (old, new) in changes.items())
+    name = changes.get('trade_name') or changes.get('generic_name') or changes.get('name_ar') or changes.get('name')
+    return f"{name or ''} ({len(changes)} حقل)"
+
+
+# ===================================================================
+# سطر الأوامر
+# ===================================================================
+def main():
+    parser = argparse.ArgumentParser(description="سجل التدقيق: ختم الأشهر المكتملة، الأرشفة، الحذف والاستعلام")
+    parser.add_argument('--db', default=os.environ.get("DRUG_DB_PATH", "drug_database.db"))
+    sub = parser.add_subparsers(dest='command', required=True)
+    show = sub.add_parser('history', help="تغييرات سجل واحد")
+    show.add_argument('--entity', choices=list(AUDITED_TABLES), default='medications')
+    show.add_argument('--medication', '--id', dest='row_id', type=int, required=True)
+    show.add_argument('--archived', action='store_true', help="تضمين الأشهر المؤرشفة")
+    sub.add_parser('seal', help="ختم الأشهر المكتملة")
+    archive = sub.add_parser('archive', help="نقل شهر مختوم إلى ملف")
+    archive.add_argument('--month', required=True, help="YYYY-MM")
+    archive.add_argument('--dir', default=ARCHIVE_DIR)
+    prune = sub.add_parser('prune', help="حذف الأشهر المختومة قبل شهر")
+    prune.add_argument('--before', required=True, help="YYYY-MM")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.command == 'history':
+            for entry in history(conn, args.entity, args.row_id, args.archived):
+                print(f"{entry['changed_at']}  {OPERATIONS[entry['op']]}  {describe(entry)}")
+            return
+        with conn:
+            if args.command == 'seal':
+                for month, count in seal_completed_months(conn):
+                    print(f"🔒 {month_label(month)}: {count:,} تغيير")
+            elif args.command == 'archive':
+                print(f"📦 {archive_month(conn, parse_month(args.month), args.dir)}")
+            else:
+                months = prune_before(conn, parse_month(args.before))
+                print(f"🗑️ {len(months)} شهر: {', '.join(month_label(m) for m in months)}")
+        for partition in partitions(conn):
+            print(f"  {partition['month']}  {partition['entries']:>8,} تغيير  {partition['raw_bytes'] / 1024:>8.0f} KB "
+                  f"-> {partition['stored_bytes'] / 1024:>6.0f} KB  {partition['archive_path'] or ''}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
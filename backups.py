@@ -0,0 +1,432 @@
+"""
+النسخ الاحتياطي واللقطات الزمنية - Online Backups & Point-in-Time Snapshots
+
+لقطة متسقة من قاعدة البيانات أثناء عمل التطبيق عبر Backup API في خطوات صغيرة
+من خيط خلفي، مع توقف قصير بين الخطوات حتى لا تنافس صفحات Streamlit على
+القرص والمعالج. في وضع WAL يثبّت اتصال المصدر معاملة قراءة واحدة طوال النسخ:
+الكتابة من الاتصالات الأخرى تستمر في ملف WAL ولا تعيد النسخ من البداية،
+واللقطة تمثل لحظة بدء تلك المعاملة.
+
+كل لقطة ملف مستقل (journal_mode=DELETE) بجانبه ملف JSON بالبيانات الوصفية:
+وقت اللقطة، الحجم، الزمن، إصدار المخطط والبيانات، نتيجة PRAGMA integrity_check
+و SHA-256 لاكتشاف تلف الملف لاحقًا. الاحتفاظ: آخر keep_last لقطة وأحدث لقطة
+من كل يوم لآخر keep_daily يوم. لقطات الأمان قبل الاستعادة أو الحذف الكامل
+(SAFETY_LABELS) لها احتفاظ مستقل: كل ما عمره أقل من keep_safety_days يوم وأحدثها
+دائمًا، حتى لا تحذف اللقطات الدورية نقطة التراجع الوحيدة بعد استعادة.
+
+الاستعادة تتم على اتصال الكتابة نفسه (WriteQueue.execute_exclusive): نسخة مؤقتة
+من اللقطة تُرحّل إلى آخر إصدار مخطط ويُرفع فيها data_version فوق الإصدار الحالي،
+ثم تُنسخ فوق قاعدة البيانات الحية في خطوة واحدة. الذاكرات المؤقتة في كل العمليات
+ترى إصدارًا جديدًا فتعيد التحميل كاملاً.
+
+الاستخدام:
+    python backups.py create --db drug_database.db --dir backups
+    python backups.py list --dir backups
+    python backups.py verify backups/drug_database-20250101-120000-manual.db
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+import metrics
+import migrations
+from change_feed import get_data_version
+
+# ===================================================================
+# الإعدادات الافتراضية
+# ===================================================================
+PAGES_PER_STEP = 256          # صفحات تُنسخ في كل خطوة (1 MB بحجم الصفحة الافتراضي)
+STEP_PAUSE_SECONDS = 0.002    # توقف بين الخطوات يترك القرص والمعالج لطلبات الصفحات
+KEEP_LAST = 24
+KEEP_DAILY = 7
+KEEP_SAFETY_DAYS = 30
+SAFETY_LABELS = ("pre-restore", "pre-delete")
+STAMP_FORMAT = "%Y%m%d-%H%M%S"
+
+
+# ===================================================================
+# النسخ والفحص
+# ===================================================================
+def _pin_snapshot(source):
+    """تثبيت معاملة قراءة على المصدر في وضع WAL (لا تمنع الكتابة من الاتصالات الأخرى)
+
+    في وضع rollback journal تمنع معاملة القراءة المفتوحة أي كتابة، فلا تُثبّت
+    وقد يعيد Backup API النسخ إذا تغير المصدر بين خطوتين.
+    """
+    if source.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+        return False
+    source.execute("BEGIN")
+    source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+    return True
+
+
+def copy_snapshot(db_path, target_path, pages=PAGES_PER_STEP, pause=STEP_PAUSE_SECONDS, progress=None):
+    """نسخ قاعدة البيانات إلى target_path في خطوات وإرجاع (عدد الصفحات، عدد الخطوات)
+
+    progress(remaining, total) تُستدعى بعد كل خطوة.
+    """
+    source = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, isolation_level=None)
+    target = sqlite3.connect(target_path)
+    steps = [0, 0]
+
+    def on_step(status, remaining, total):
+        steps[0] += 1
+        steps[1] = total
+        if progress is not None:
+            progress(remaining, total)
+        if remaining and pause:
+            time.sleep(pause)
+
+    try:
+        _pin_snapshot(source)
+        source.backup(target, pages=pages, progress=on_step)
+        # ملف اللقطة مستقل: لا يحتاج ملف WAL بجانبه عند نقله أو فتحه
+        target.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        target.close()
+        source.close()
+    return steps[1], steps[0]
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def inspect_snapshot(path):
+    """فحص سلامة اللقطة وقراءة بياناتها الوصفية (على الملف المنسوخ وليس الحي)"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+        integrity = "ok" if [r[0] for r in rows] == ["ok"] else "; ".join(r[0] for r in rows[:5])
+        info = {
+            'integrity': integrity,
+            'schema_version': migrations.get_schema_version(conn),
+            'page_size': conn.execute("PRAGMA page_size").fetchone()[0],
+        }
+        try:
+            info['data_version'] = get_data_version(conn)[0]
+            info['medications'] = conn.execute("SELECT COUNT(*) FROM medications").fetchone()[0]
+        except sqlite3.OperationalError:
+            info['data_version'] = None
+            info['medications'] = None
+        return info
+    finally:
+        conn.close()
+
+
+def _manifest_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def read_manifest(path):
+    try:
+        with open(_manifest_path(path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def create_backup(db_path, backup_dir, label="manual", pages=PAGES_PER_STEP, pause=STEP_PAUSE_SECONDS,
+                  progress=None):
+    """إنشاء لقطة مفحوصة في backup_dir وإرجاع بياناتها الوصفية"""
+    started = time.perf_counter()
+    created_at = datetime.now()
+    os.makedirs(backup_dir, exist_ok=True)
+    stem = f"{os.path.splitext(os.path.basename(db_path))[0]}-{created_at.strftime(STAMP_FORMAT)}-{label}"
+    name = f"{stem}.db"
+    suffix = 1
+    while os.path.exists(os.path.join(backup_dir, name)):
+        suffix += 1
+        name = f"{stem}-{suffix}.db"
+    path = os.path.join(backup_dir, name)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        page_count, steps = copy_snapshot(db_path, tmp_path, pages, pause, progress)
+        copy_seconds = time.perf_counter() - started
+        info = inspect_snapshot(tmp_path)
+        if info['integrity'] != "ok":
+            raise sqlite3.DatabaseError(f"فشل فحص سلامة اللقطة: {info['integrity']}")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        metrics.BACKUP_RUNS.inc(label, "error")
+        raise
+
+    manifest = {
+        'file': name,
+        'label': label,
+        'created_at': created_at.isoformat(timespec='milliseconds'),
+        'bytes': os.path.getsize(path),
+        'pages': page_count,
+        'steps': steps,
+        'copy_seconds': round(copy_seconds, 3),
+        'seconds': round(time.perf_counter() - started, 3),
+        'sha256': file_sha256(path),
+        **info,
+    }
+    with open(_manifest_path(path), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    metrics.BACKUP_SECONDS.observe(manifest['seconds'], label)
+    metrics.BACKUP_RUNS.inc(label, "ok")
+    return manifest
+
+
+def verify_backup(path):
+    """إعادة فحص لقطة محفوظة: تطابق SHA-256 مع البيانات الوصفية ثم integrity_check"""
+    manifest = read_manifest(path)
+    if manifest is None:
+        return {'ok': False, 'error': "لا يوجد ملف بيانات وصفية للقطة"}
+    if file_sha256(path) != manifest['sha256']:
+        return {'ok': False, 'error': "المحتوى لا يطابق SHA-256 المسجل (الملف تالف أو معدل)"}
+    info = inspect_snapshot(path)
+    if info['integrity'] != "ok":
+        return {'ok': False, 'error': info['integrity']}
+    return {'ok': True, 'error': None}
+
+
+# ===================================================================
+# القائمة والاحتفاظ
+# ===================================================================
+def list_backups(backup_dir):
+    """البيانات الوصفية لكل اللقطات (الأحدث أولاً) مع المسار الكامل في 'path'"""
+    entries = []
+    try:
+        names = os.listdir(backup_dir)
+    except FileNotFoundError:
+        return entries
+    for name in names:
+        if not name.endswith(".db"):
+            continue
+        path = os.path.join(backup_dir, name)
+        manifest = read_manifest(path)
+        if manifest is not None:
+            entries.append({**manifest, 'path': path})
+    return sorted(entries, key=lambda e: e['created_at'], reverse=True)
+
+
+def select_retained(entries, keep_last=KEEP_LAST, keep_daily=KEEP_DAILY, keep_safety_days=KEEP_SAFETY_DAYS,
+                    now=None):
+    """أسماء اللقطات المحتفظ بها
+
+    الدورية واليدوية: آخر keep_last، وأحدث لقطة من كل يوم لآخر keep_daily يوم.
+    لقطات الأمان: كل ما أُنشئ خلال آخر keep_safety_days يوم، وأحدثها دائمًا.
+    """
+    ordered = sorted(entries, key=lambda e: e['created_at'], reverse=True)
+    safety = [e for e in ordered if e.get('label') in SAFETY_LABELS]
+    regular = [e for e in ordered if e.get('label') not in SAFETY_LABELS]
+
+    retained = {e['file'] for e in regular[:keep_last]}
+    days = []
+    for entry in regular:
+        day = entry['created_at'][:10]
+        if day not in days:
+            days.append(day)
+            if len(days) > keep_daily:
+                break
+            retained.add(entry['file'])
+
+    now = now or datetime.now()
+    retained.update(e['file'] for e in safety[:1])
+    retained.update(e['file'] for e in safety
+                    if (now - datetime.fromisoformat(e['created_at'])).days < keep_safety_days)
+    return retained
+
+
+def prune_backups(backup_dir, keep_last=KEEP_LAST, keep_daily=KEEP_DAILY, keep_safety_days=KEEP_SAFETY_DAYS):
+    """حذف اللقطات خارج سياسة الاحتفاظ وإرجاع أسمائها"""
+    entries = list_backups(backup_dir)
+    retained = select_retained(entries, keep_last, keep_daily, keep_safety_days)
+    removed = []
+    for entry in entries:
+        if entry['file'] in retained:
+            continue
+        for path in (entry['path'], _manifest_path(entry['path'])):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        removed.append(entry['file'])
+    return removed
+
+
+# ===================================================================
+# الاستعادة
+# ===================================================================
+def prepare_restore(snapshot_path, work_path, current_version):
+    """نسخة عمل من اللقطة مرحّلة لآخر مخطط وبإصدار بيانات أعلى من current_version
+
+    current_version: (version, lookup_version, min_version) من قاعدة البيانات الحية.
+    رفع الإصدار (ومعه min_version) يجبر كل ذاكرة مؤقتة على تحميل كامل بدل تطبيق
+    سجل تغييرات لا يخص البيانات المستعادة.
+    """
+    check = verify_backup(snapshot_path)
+    if not check['ok']:
+        raise sqlite3.DatabaseError(f"لا يمكن الاستعادة من لقطة غير سليمة: {check['error']}")
+    conn = sqlite3.connect(snapshot_path)
+    work = sqlite3.connect(work_path)
+    try:
+        conn.backup(work)
+    finally:
+        conn.close()
+    try:
+        if migrations.get_schema_version(work) > migrations.LATEST_VERSION:
+            raise RuntimeError("اللقطة من إصدار أحدث من التطبيق")
+        migrations.migrate(work)
+        restored = get_data_version(work)
+        version = max(current_version[0], restored[0]) + 1
+        lookup_version = max(current_version[1], restored[1]) + 1
+        work.execute(
+            "UPDATE data_version SET version = ?, lookup_version = ?, min_version = ? WHERE id = 1",
+            (version, lookup_version, version),
+        )
+        work.commit()
+    finally:
+        work.close()
+    return version
+
+
+def restore_into(conn, snapshot_path):
+    """استبدال محتوى الاتصال conn (اتصال الكتابة، خارج أي معاملة) بمحتوى اللقطة"""
+    work_path = f"{snapshot_path}.restore-{os.getpid()}"
+    try:
+        version = prepare_restore(snapshot_path, work_path, get_data_version(conn))
+        source = sqlite3.connect(f"file:{work_path}?mode=ro", uri=True)
+        try:
+            # خطوة واحدة: القراء يرون المحتوى القديم أو الجديد كاملاً
+            source.backup(conn)
+        finally:
+            source.close()
+        # الصفحات المنسوخة تحمل ترويسة اللقطة (journal_mode=DELETE)
+        conn.execute("PRAGMA journal_mode = WAL")
+    finally:
+        for path in (work_path, work_path + "-journal"):
+            if os.path.exists(path):
+                os.remove(path)
+    return version
+
+
+# ===================================================================
+# خيط النسخ الاحتياطي
+# ===================================================================
+class BackupManager:
+    """خيط خلفي واحد ينشئ اللقطات عند الطلب وبشكل دوري كل interval ثانية"""
+
+    def __init__(self, db_path, backup_dir, interval=None, keep_last=KEEP_LAST, keep_daily=KEEP_DAILY,
+                 keep_safety_days=KEEP_SAFETY_DAYS, pages=PAGES_PER_STEP, pause=STEP_PAUSE_SECONDS):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.interval = interval
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        self.keep_safety_days = keep_safety_days
+        self.pages = pages
+        self.pause = pause
+        self.progress = None      # {'label', 'remaining', 'total', 'started'} أثناء النسخ
+        self.last_result = None
+        self.last_error = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-backup", daemon=True)
+        self._thread.start()
+        metrics.BACKUP_LAST_SUCCESS.callback = self._last_success
+
+    def request(self, label="manual"):
+        """طلب لقطة وإرجاع Future بالبيانات الوصفية (لا ينتظر انتهاء النسخ)"""
+        future = Future()
+        self._queue.put((label, future))
+        return future
+
+    def list(self):
+        return list_backups(self.backup_dir)
+
+    def _last_success(self):
+        latest = next(iter(self.list()), None)
+        if latest is None:
+            return {}
+        return {(): datetime.fromisoformat(latest['created_at']).timestamp()}
+
+    def _on_progress(self, remaining, total):
+        self.progress['remaining'] = remaining
+        self.progress['total'] = total
+
+    def _backup(self, label):
+        self.progress = {'label': label, 'remaining': None, 'total': None, 'started': time.time()}
+        try:
+            result = create_backup(self.db_path, self.backup_dir, label, self.pages, self.pause,
+                                   progress=self._on_progress)
+            result['pruned'] = prune_backups(self.backup_dir, self.keep_last, self.keep_daily,
+                                             self.keep_safety_days)
+            self.last_result, self.last_error = result, None
+            return result
+        except Exception as e:
+            self.last_error = str(e)
+            raise
+        finally:
+            self.progress = None
+
+    def _run(self):
+        next_run = time.monotonic() + self.interval if self.interval else None
+        while True:
+            timeout = max(next_run - time.monotonic(), 0) if next_run is not None else None
+            try:
+                label, future = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                label, future = "scheduled", None
+            if label == "scheduled":
+                next_run = time.monotonic() + self.interval
+            if future is not None and not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = self._backup(label)
+            except Exception as e:
+                if future is not None:
+                    future.set_exception(e)
+                continue
+            if future is not None:
+                future.set_result(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="لقطات قاعدة البيانات: إنشاء وعرض وفحص وتقليم")
+    parser.add_argument('command', choices=['create', 'list', 'verify', 'prune'])
+    parser.add_argument('path', nargs='?', help="مسار اللقطة (للأمر verify)")
+    parser.add_argument('--db', default=os.environ.get("DRUG_DB_PATH", "drug_database.db"))
+    parser.add_argument('--dir', default=os.environ.get("DRUG_BACKUP_DIR", "backups"))
+    parser.add_argument('--label', default="manual")
+    parser.add_argument('--keep-last', type=int, default=KEEP_LAST)
+    parser.add_argument('--keep-daily', type=int, default=KEEP_DAILY)
+    parser.add_argument('--keep-safety-days', type=int, default=KEEP_SAFETY_DAYS)
+    args = parser.parse_args()
+
+    if args.command == 'create':
+        result = create_backup(args.db, args.dir, args.label)
+        print(f"✅ {result['file']} ({result['bytes'] / 1024 / 1024:.1f} MB، {result['pages']} صفحة في "
+              f"{result['steps']} خطوة) في {result['seconds']:.2f} ث - integrity_check: {result['integrity']}")
+        for name in prune_backups(args.dir, args.keep_last, args.keep_daily, args.keep_safety_days):
+            print(f"  🗑️ {name}")
+    elif args.command == 'list':
+        for entry in list_backups(args.dir):
+            print(f"{entry['created_at'][:19]}  {entry['label']:<12} {entry['bytes'] / 1024:>10.0f} KB  "
+                  f"{entry['medications']} دواء  {entry['file']}")
+    elif args.command == 'verify':
+        check = verify_backup(args.path)
+        print("✅ سليمة" if check['ok'] else f"❌ {check['error']}")
+    else:
+        for name in prune_backups(args.dir, args.keep_last, args.keep_daily, args.keep_safety_days):
+            print(f"🗑️ {name}")
+
+
+if __name__ == '__main__':
+    main()
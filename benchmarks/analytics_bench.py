@@ -0,0 +1,132 @@
+"""
+قياس محركات التحليلات - Analytics Engine Benchmark
+
+يقارن مسار pandas الحالي لصفحة الإحصائيات (DataFrame الكتالوج الكامل ثم
+value_counts) مع محركي Arrow و DuckDB (الأعمدة المطلوبة فقط). لكل محرك:
+زمن التحميل من SQLite (أول تشغيل بعد تغير البيانات) وزمن تجميعات الصفحة
+(التشغيلات التالية). --scale يكرر الصفوف في الذاكرة لقياس التجميع على أحجام
+سجل تاريخي أكبر دون توليد قاعدة بيانات بهذا الحجم. يتحقق أيضًا من تطابق
+نتائج المحركات.
+
+الاستخدام:
+    python benchmarks/analytics_bench.py --sizes 10000,50000
+    python benchmarks/analytics_bench.py --sizes 50000 --scale 20 --out bench_analytics.json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd  # noqa: E402
+
+import analytics  # noqa: E402
+from database import MEDICATIONS_SELECT  # noqa: E402
+
+from generate_data import DEFAULT_SEED, ensure_generated  # noqa: E402
+
+
+def page_queries(engine):
+    """نفس تجميعات show_statistics_page"""
+    return {
+        'category': engine.value_counts('category_name'),
+        'form': engine.value_counts('form'),
+        'top_manufacturers': engine.value_counts('manufacturer_name', limit=10),
+        'availability': engine.value_counts('availability'),
+        'monthly': engine.monthly('created_month', 'price'),
+    }
+
+
+def load_source(name, db_path, scale):
+    """تحميل مصدر المحرك من SQLite وإرجاع (المصدر، زمن التحميل بالثواني)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        started = time.perf_counter()
+        if name == "pandas":
+            source = pd.read_sql_query(MEDICATIONS_SELECT, conn)
+        else:
+            source = analytics.load_table(conn, MEDICATIONS_SELECT)
+        elapsed = time.perf_counter() - started
+    finally:
+        conn.close()
+    if scale > 1:
+        if name == "pandas":
+            source = pd.concat([source] * scale, ignore_index=True)
+        else:
+            import pyarrow as pa
+            source = pa.concat_tables([source] * scale)
+    return source, elapsed
+
+
+def _normalize(results):
+    # المتوسطات العشرية تختلف في آخر الخانات بين المحركات
+    normalized = dict(results)
+    normalized['monthly'] = [(m, n, None if v is None else round(v, 6)) for m, n, v in results['monthly']]
+    return normalized
+
+
+def bench_engine(name, db_path, scale, repeat):
+    source, load_seconds = load_source(name, db_path, scale)
+    started = time.perf_counter()
+    engine = analytics.create(name, source)
+    setup_seconds = time.perf_counter() - started
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = page_queries(engine)
+        timings.append(time.perf_counter() - started)
+    return {
+        'engine': name,
+        'rows': engine.count(),
+        'load_ms': round(load_seconds * 1000, 1),
+        'setup_ms': round(setup_seconds * 1000, 1),
+        'aggregate_ms': round(statistics.median(timings) * 1000, 2),
+        'aggregate_min_ms': round(min(timings) * 1000, 2),
+    }, _normalize(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="مقارنة محركات تجميعات صفحة الإحصائيات")
+    parser.add_argument('--sizes', default="10000,50000", help="أحجام الكتالوج المولد مفصولة بفواصل")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--scale', type=int, default=1, help="تكرار الصفوف في الذاكرة لمحاكاة سجل أكبر")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--engines', default=",".join(analytics.available_engines()))
+    parser.add_argument('--out', help="ملف JSON للنتائج")
+    args = parser.parse_args()
+
+    engines = [e for e in args.engines.split(",") if e in analytics.available_engines()]
+    print(f"⚙️ المحركات المتوفرة: {', '.join(engines)} - أنوية المعالج: {os.cpu_count()}")
+    report = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        db_path = ensure_generated(size, args.seed)
+        print(f"\n📊 {size:,} دواء × {args.scale}")
+        print(f"{'المحرك':<10}{'الصفوف':>12}{'التحميل ms':>14}{'التهيئة ms':>14}{'التجميع ms':>14}")
+        reference = None
+        for name in engines:
+            result, outputs = bench_engine(name, db_path, args.scale, args.repeat)
+            if reference is None:
+                reference = outputs
+            result['matches_reference'] = outputs == reference
+            result['size'] = size
+            result['scale'] = args.scale
+            report.append(result)
+            marker = "" if result['matches_reference'] else "  ⚠️ نتائج مختلفة"
+            print(f"{name:<10}{result['rows']:>12,}{result['load_ms']:>14.1f}{result['setup_ms']:>14.1f}"
+                  f"{result['aggregate_ms']:>14.2f}{marker}")
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.out}")
+
+
+if __name__ == '__main__':
+    main()
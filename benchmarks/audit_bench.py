@@ -0,0 +1,208 @@
+"""
+قياس سجل التدقيق - Audit Log Benchmark
+
+على نسخة من قاعدة بيانات مولدة:
+1. كلفة المحفزات: تعديلات UPDATE على دفعات (سعر، توفر، ملاحظات) مع محفزات
+   التدقيق ودونها، وإضافة وحذف أدوية
+2. توزيع التغييرات الناتجة على --months شهرًا ثم ختمها: زمن الختم والحجم قبل
+   الضغط وبعده
+3. سجل دواء واحد: من الفهرس والأشهر المختومة مقابل مسح السجل كاملًا
+4. حذف أقدم شهر: DROP TABLE لجدول الشهر مقابل DELETE للصفوف نفسها من سجل غير مقسم
+
+الاستخدام:
+    python benchmarks/audit_bench.py --size 10000 --updates 200000
+    python benchmarks/audit_bench.py --size 50000 --updates 1000000 --months 24 --out bench_audit.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import audit  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+from generate_data import DEFAULT_SEED, ensure_generated  # noqa: E402
+
+BATCH_ROWS = 10000
+MS_PER_MONTH = 30 * 86400000
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, round(statistics.median(timings) * 1000, 3)
+
+
+def prepare(source_db, path):
+    shutil.copy(source_db, path)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    migrate(conn)
+    return conn
+
+
+# ===================================================================
+# الكتابة
+# ===================================================================
+def bench_updates(conn, ids, count, rng):
+    """تعديلات متنوعة على دفعات وإرجاع عدد التعديلات في الثانية"""
+    statements = [
+        ("UPDATE medications SET price = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+         lambda: round(rng.uniform(0.5, 100), 3)),
+        ("UPDATE medications SET availability = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+         lambda: rng.choice(["متوفر", "غير متوفر"])),
+        ("UPDATE medications SET pharmacist_notes = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+         lambda: f"مراجعة رقم {rng.randint(1, 10**6)}: يُصرف بوصفة طبية"),
+    ]
+    started = time.perf_counter()
+    for start in range(0, count, BATCH_ROWS):
+        sql, value = rng.choice(statements)
+        batch = [(value(), rng.choice(ids)) for _ in range(min(BATCH_ROWS, count - start))]
+        with conn:
+            conn.executemany(sql, batch)
+    return count / (time.perf_counter() - started)
+
+
+def bench_insert_delete(conn, count):
+    """نسخ count دواء ثم حذفها وإرجاع (إضافة/ث، حذف/ث)"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(medications)") if row[1] != 'id']
+    started = time.perf_counter()
+    with conn:
+        conn.execute(
+            f"INSERT INTO medications ({', '.join(columns)}) "
+            f"SELECT {', '.join(columns)} FROM medications ORDER BY id LIMIT ?", (count,)
+        )
+    inserted = time.perf_counter() - started
+    first = conn.execute("SELECT MAX(id) FROM medications").fetchone()[0] - count
+    started = time.perf_counter()
+    with conn:
+        conn.execute("DELETE FROM medications WHERE id > ?", (first,))
+    return count / inserted, count / (time.perf_counter() - started)
+
+
+def drop_audit_triggers(conn):
+    for table in audit.AUDITED_TABLES:
+        for event in ('insert', 'update', 'delete'):
+            conn.execute(f"DROP TRIGGER IF EXISTS audit_{table}_{event}")
+
+
+# ===================================================================
+# التشغيل
+# ===================================================================
+def main():
+    parser = argparse.ArgumentParser(description="كلفة محفزات التدقيق، الختم الشهري المضغوط، والقراءة والحذف")
+    parser.add_argument('--size', type=int, default=10000, help="حجم الكتالوج المولد")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--updates', type=int, default=200000)
+    parser.add_argument('--inserts', type=int, default=5000, help="أدوية تُنسخ ثم تُحذف")
+    parser.add_argument('--months', type=int, default=12, help="عدد الأشهر التي تُوزع عليها التغييرات")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', help="ملف JSON للنتائج")
+    args = parser.parse_args()
+
+    source_db = ensure_generated(args.size, args.seed)
+    workdir = tempfile.mkdtemp(prefix="audit-bench-")
+    report = {'size': args.size, 'updates': args.updates, 'months': args.months}
+    try:
+        # 1. كلفة المحفزات
+        print(f"🧪 {args.size:,} دواء - {args.updates:,} تعديل")
+        print(f"{'':<14}{'تعديل/ث':>12}{'إضافة/ث':>12}{'حذف/ث':>12}")
+        for label in ('without', 'with'):
+            conn = prepare(source_db, os.path.join(workdir, f'{label}.db'))
+            if label == 'without':
+                drop_audit_triggers(conn)
+            ids = [row[0] for row in conn.execute("SELECT id FROM medications")]
+            rng = random.Random(args.seed)
+            updates = bench_updates(conn, ids, args.updates, rng)
+            inserts, deletes = bench_insert_delete(conn, args.inserts)
+            report[f'{label}_audit'] = {'updates_per_second': round(updates), 'inserts_per_second': round(inserts),
+                                        'deletes_per_second': round(deletes)}
+            print(f"{label:<14}{updates:>12,.0f}{inserts:>12,.0f}{deletes:>12,.0f}")
+            if label == 'without':
+                conn.close()
+
+        # 2. توزيع التغييرات على الأشهر الماضية ثم الختم
+        now_ms = int(time.time() * 1000)
+        entries = conn.execute("SELECT COUNT(*) FROM audit_log").fetchone()[0]
+        with conn:
+            conn.execute(
+                "UPDATE audit_log SET changed_at = ? - (? - id) * ? / ?",
+                (now_ms - MS_PER_MONTH // 2, entries, args.months * MS_PER_MONTH, entries)
+            )
+        hot_bytes = conn.execute("SELECT SUM(length(changes)) FROM audit_log").fetchone()[0]
+        medication_id = conn.execute(
+            "SELECT row_id FROM audit_log WHERE entity = 'M' GROUP BY row_id ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()[0]
+        unsealed, unsealed_ms = timed(lambda: audit.history(conn, 'medications', medication_id), args.repeat)
+        _, scan_ms = timed(lambda: conn.execute(
+            "SELECT changed_at, op, changes FROM audit_log NOT INDEXED WHERE entity = 'M' AND row_id = ? ORDER BY id",
+            (medication_id,)).fetchall(), max(1, args.repeat // 2))
+
+        # نسخة غير مقسمة لمقارنة حذف أقدم شهر
+        unpartitioned = os.path.join(workdir, 'unpartitioned.db')
+        conn.execute("VACUUM INTO ?", (unpartitioned,))
+
+        started = time.perf_counter()
+        with conn:
+            sealed = audit.seal_completed_months(conn, now_ms)
+        seal_seconds = time.perf_counter() - started
+        summary = audit.summary(conn)
+        sealed_history, sealed_ms = timed(lambda: audit.history(conn, 'medications', medication_id), args.repeat)
+        report.update({
+            'entries': entries, 'hot_json_mb': round(hot_bytes / 1024 / 1024, 1),
+            'sealed_months': len(sealed), 'seal_seconds': round(seal_seconds, 2),
+            'sealed_raw_mb': round(summary['sealed_raw_bytes'] / 1024 / 1024, 1),
+            'sealed_mb': round(summary['sealed_bytes'] / 1024 / 1024, 1),
+            'history_entries': len(sealed_history), 'history_matches': len(sealed_history) == len(unsealed),
+            'history_unsealed_ms': unsealed_ms, 'history_sealed_ms': sealed_ms, 'history_full_scan_ms': scan_ms,
+        })
+        print(f"\n🔒 ختم {len(sealed)} شهر ({entries:,} تغيير) في {seal_seconds:.2f} ث: "
+              f"JSON {report['hot_json_mb']} MB -> {report['sealed_mb']} MB مضغوطًا "
+              f"({summary['sealed_raw_bytes'] / max(summary['sealed_bytes'], 1):.1f}x)")
+        print(f"🔎 سجل الدواء {medication_id} ({len(sealed_history)} تغيير): قبل الختم {unsealed_ms:.2f} ms، "
+              f"بعد الختم {sealed_ms:.2f} ms، مسح السجل كاملًا {scan_ms:.1f} ms")
+
+        # 4. حذف أقدم شهر
+        oldest = sealed[0][0]
+        started = time.perf_counter()
+        with conn:
+            audit.prune_before(conn, audit._next_month(oldest))
+        drop_ms = (time.perf_counter() - started) * 1000
+        conn.close()
+        flat = sqlite3.connect(unpartitioned)
+        started = time.perf_counter()
+        with flat:
+            deleted = flat.execute(
+                "DELETE FROM audit_log WHERE changed_at < ?", (audit._month_start_ms(audit._next_month(oldest)),)
+            ).rowcount
+        delete_ms = (time.perf_counter() - started) * 1000
+        flat.close()
+        report.update({'prune_drop_ms': round(drop_ms, 1), 'prune_delete_ms': round(delete_ms, 1),
+                       'pruned_entries': deleted})
+        print(f"🗑️ حذف شهر {audit.month_label(oldest)} ({deleted:,} تغيير): DROP TABLE {drop_ms:.1f} ms "
+              f"مقابل DELETE {delete_ms:.1f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+قياس أثر النسخ الاحتياطي - Backup Impact Benchmark
+
+يشغل قراءً (استعلام دواء بالمعرف وتصفية حسب الفئة) وكاتبًا عبر طابور الكتابة
+على قاعدة بيانات مولدة، ويقيس زمن كل طلب مرتين: دون نسخ احتياطي، ثم أثناء
+إنشاء لقطة بإعدادات مختلفة لعدد الصفحات في كل خطوة والتوقف بين الخطوات.
+النتيجة لكل إعداد: زمن اللقطة وعدد الخطوات والمئينات p50/p95/p99/max لزمن
+القراءة والكتابة قبل النسخ وأثناءه.
+
+الاستخدام:
+    python benchmarks/backup_bench.py --size 50000
+    python benchmarks/backup_bench.py --size 50000 --configs=-1:0,256:0.002 --out bench_backup.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import backups  # noqa: E402
+from database import MEDICATIONS_SELECT  # noqa: E402
+from db_writer import WriteQueue  # noqa: E402
+
+from generate_data import DEFAULT_SEED, ensure_generated  # noqa: E402
+
+DEFAULT_CONFIGS = "-1:0,1024:0,256:0.002,64:0.002"
+
+
+# ===================================================================
+# الحمل
+# ===================================================================
+class Workload:
+    """قراء وكاتب يسجلون (وقت البدء، الزمن) لكل طلب حتى الإيقاف"""
+
+    def __init__(self, db_path, readers):
+        self.db_path = db_path
+        self.readers = readers
+        self.samples = {'read': [], 'write': []}
+        self._stop = threading.Event()
+        self._threads = []
+        conn = sqlite3.connect(db_path)
+        self.ids = [row[0] for row in conn.execute("SELECT id FROM medications").fetchall()]
+        self.categories = [row[0] for row in conn.execute("SELECT id FROM categories").fetchall()]
+        conn.close()
+        self.writer = WriteQueue(db_path)
+
+    def _read_loop(self, seed):
+        rng = random.Random(seed)
+        conn = sqlite3.connect(self.db_path)
+        samples = []
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            if rng.random() < 0.5:
+                conn.execute(f"{MEDICATIONS_SELECT} WHERE m.id = ?", (rng.choice(self.ids),)).fetchall()
+            else:
+                conn.execute(f"{MEDICATIONS_SELECT} WHERE m.category_id = ? ORDER BY m.id DESC LIMIT 50",
+                             (rng.choice(self.categories),)).fetchall()
+            samples.append((started, time.perf_counter() - started))
+        conn.close()
+        self.samples['read'].extend(samples)
+
+    def _write_loop(self):
+        rng = random.Random(0)
+        samples = []
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            medication_id = rng.choice(self.ids)
+            self.writer.execute(lambda conn: conn.execute(
+                "UPDATE medications SET updated_at = CURRENT_TIMESTAMP WHERE id = ?", (medication_id,)
+            ))
+            samples.append((started, time.perf_counter() - started))
+            time.sleep(0.005)
+        self.samples['write'].extend(samples)
+
+    def start(self):
+        self._threads = [threading.Thread(target=self._read_loop, args=(i,)) for i in range(self.readers)]
+        self._threads.append(threading.Thread(target=self._write_loop))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self.writer.close()
+
+    def window(self, kind, start, end):
+        return [latency for started, latency in self.samples[kind] if start <= started < end]
+
+
+def percentiles(values):
+    if not values:
+        return {'count': 0}
+    values = sorted(values)
+
+    def at(q):
+        return round(values[min(int(q * len(values)), len(values) - 1)] * 1000, 2)
+
+    return {'count': len(values), 'p50': at(0.50), 'p95': at(0.95), 'p99': at(0.99), 'max': round(values[-1] * 1000, 2)}
+
+
+# ===================================================================
+# التشغيل
+# ===================================================================
+def run_config(source_db, workdir, pages, pause, readers, baseline_seconds):
+    db_path = os.path.join(workdir, 'live.db')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    shutil.copy(source_db, db_path)
+
+    workload = Workload(db_path, readers)
+    workload.start()
+    try:
+        time.sleep(0.5)   # تسخين
+        baseline_start = time.perf_counter()
+        time.sleep(baseline_seconds)
+        backup_start = time.perf_counter()
+        result = backups.create_backup(db_path, os.path.join(workdir, 'backups'), 'bench', pages, pause)
+        backup_end = time.perf_counter()
+    finally:
+        workload.stop()
+
+    return {
+        'pages_per_step': pages,
+        'pause_seconds': pause,
+        'backup_seconds': round(backup_end - backup_start, 3),
+        'copy_seconds': result['copy_seconds'],
+        'steps': result['steps'],
+        'pages': result['pages'],
+        'integrity': result['integrity'],
+        'read_baseline_ms': percentiles(workload.window('read', baseline_start, backup_start)),
+        'read_during_ms': percentiles(workload.window('read', backup_start, backup_end)),
+        'write_baseline_ms': percentiles(workload.window('write', baseline_start, backup_start)),
+        'write_during_ms': percentiles(workload.window('write', backup_start, backup_end)),
+    }
+
+
+def parse_configs(text):
+    configs = []
+    for item in text.split(','):
+        pages, _, pause = item.partition(':')
+        configs.append((int(pages), float(pause or 0)))
+    return configs
+
+
+def print_result(result):
+    pages = "الكل" if result['pages_per_step'] < 0 else result['pages_per_step']
+    print(f"\n📦 {pages} صفحة/خطوة، توقف {result['pause_seconds'] * 1000:g} ms: "
+          f"{result['backup_seconds']:.2f} ث في {result['steps']} خطوة ({result['pages']} صفحة) - {result['integrity']}")
+    for kind, label in (('read', "قراءة"), ('write', "كتابة")):
+        base, during = result[f'{kind}_baseline_ms'], result[f'{kind}_during_ms']
+        if not base['count'] or not during['count']:
+            continue
+        print(f"  {label:<6} p50 {base['p50']:>7.2f} → {during['p50']:>7.2f}   "
+              f"p95 {base['p95']:>7.2f} → {during['p95']:>7.2f}   "
+              f"p99 {base['p99']:>7.2f} → {during['p99']:>7.2f}   "
+              f"max {base['max']:>7.2f} → {during['max']:>7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="زمن اللقطة وأثرها على زمن القراءة والكتابة")
+    parser.add_argument('--size', type=int, default=50000, help="حجم الكتالوج المولد")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--configs', default=DEFAULT_CONFIGS,
+                        help="إعدادات pages:pause مفصولة بفواصل (-1 = كل الصفحات في خطوة واحدة)")
+    parser.add_argument('--readers', type=int, default=2, help="عدد خيوط القراءة")
+    parser.add_argument('--baseline-seconds', type=float, default=2.0, help="مدة القياس دون نسخ")
+    parser.add_argument('--out', help="ملف JSON للنتائج")
+    args = parser.parse_args()
+
+    source_db = ensure_generated(args.size, args.seed)
+    workdir = tempfile.mkdtemp(prefix="backup-bench-")
+    results = []
+    try:
+        print(f"🧪 {args.size:,} دواء، {args.readers} قارئ + كاتب واحد")
+        for pages, pause in parse_configs(args.configs):
+            result = run_config(source_db, workdir, pages, pause, args.readers, args.baseline_seconds)
+            results.append(result)
+            print_result(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'size': args.size, 'readers': args.readers, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.out}")
+
+
+if __name__ == '__main__':
+    main()
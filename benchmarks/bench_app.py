@@ -0,0 +1,277 @@
+"""
+حزمة قياس الأداء - Benchmark Suite
+
+تقيس كل دالة بيانات في database.py وكل صفحة في موجه main() (عبر AppTest) على
+قواعد بيانات مولدة بأحجام مختلفة، وتسجل لكل خطوة: زمن التنفيذ، ذروة
+الذاكرة (tracemalloc) وعدد استعلامات SQL. النتائج تحفظ في ملف JSON يمكن
+مقارنته مع تشغيل سابق.
+
+الاستخدام:
+    python benchmarks/bench_app.py --sizes 1000,10000 --out bench.json
+    python benchmarks/bench_app.py --sizes 1000 --baseline bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import streamlit as st  # noqa: E402
+
+import database  # noqa: E402
+
+from generate_data import DEFAULT_SEED, ensure_generated  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, 'app.py')
+REGRESSION_THRESHOLD = 0.20   # تراجع أكبر من 20% يعتبر انحدارًا في الأداء
+
+
+# ===================================================================
+# عداد الاستعلامات
+# ===================================================================
+class QueryCounter:
+    """يعد أوامر SQL المنفذة على جميع الاتصالات (بما فيها خيط الكتابة)"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._connect = sqlite3.connect
+
+    def _trace(self, statement):
+        # أوامر المحفزات تظهر كتعليقات "-- TRIGGER" ولا تحسب كاستعلامات مستقلة
+        if not statement.lstrip().startswith('--'):
+            with self._lock:
+                self.count += 1
+
+    def install(self):
+        counter = self
+
+        def connect(*args, **kwargs):
+            conn = counter._connect(*args, **kwargs)
+            conn.set_trace_callback(counter._trace)
+            return conn
+
+        sqlite3.connect = connect
+
+    def uninstall(self):
+        sqlite3.connect = self._connect
+
+
+def measure(fn, counter, repeat=1):
+    """تنفيذ fn عدة مرات وإرجاع متوسط الزمن وذروة الذاكرة وعدد الاستعلامات"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    queries_before = counter.count
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'wall_ms': round(elapsed / repeat * 1000, 3),
+        'peak_mb': round(peak / 1024 / 1024, 3),
+        'queries': round((counter.count - queries_before) / repeat, 1),
+    }
+
+
+# ===================================================================
+# دوال البيانات
+# ===================================================================
+def bench_data_functions(db, counter):
+    """قياس دوال القراءة والكتابة في database.py على نسخة مؤقتة من قاعدة البيانات"""
+    results = {}
+
+    def clear_caches():
+        db.get_medications_cache.clear()
+        db.get_snapshot_catalog.clear()
+
+    clear_caches()
+    results['get_all_medications (cold)'] = measure(db.get_all_medications, counter)
+    results['get_all_medications (warm)'] = measure(db.get_all_medications, counter, repeat=5)
+    for name in ('get_categories', 'get_drug_types', 'get_manufacturers', 'get_age_weight_estimates', 'get_table_counts'):
+        results[name] = measure(getattr(db, name), counter, repeat=5)
+
+    sample = db.get_all_medications().head(200)
+    ids = [int(i) for i in sample['id']]
+
+    results['add_medication'] = measure(
+        lambda: db.add_medication({'generic_name': 'benchmark', 'trade_name': 'Bench', 'price': 1.0}),
+        counter, repeat=50,
+    )
+    results['get_all_medications (after writes)'] = measure(db.get_all_medications, counter)
+    results['update_medication'] = measure(
+        lambda: db.update_medication(ids[0], {'price': 2.5}), counter, repeat=50
+    )
+    results['delete_medication'] = measure(lambda: db.delete_medication(ids.pop()), counter, repeat=50)
+
+    results['add_manufacturer'] = measure(
+        lambda: db.add_manufacturer(f"bench-{time.perf_counter_ns()}", 'شركة', 'Jordan'), counter, repeat=20
+    )
+    bench_mfrs = db.get_manufacturers()
+    bench_mfrs = bench_mfrs[bench_mfrs['name'].str.startswith('bench-')]['id'].astype(int).tolist()
+    results['update_rows_bulk (20 manufacturers)'] = measure(
+        lambda: db.update_rows_bulk('manufacturers', {i: {'country': 'UAE'} for i in bench_mfrs}), counter
+    )
+    results['delete_manufacturers (20)'] = measure(lambda: db.delete_manufacturers(bench_mfrs), counter)
+
+    snapshot = db.get_all_medications()[['id'] + db.MEDICATION_GRID_COLUMNS].head(1000)
+    updates = {int(i): {'price': 9.99} for i in snapshot['id']}
+    # التكرارات تكتب نفس السعر، فالقيم الأصلية بعد أول حفظ هي السعر الجديد
+    db.save_medications_bulk(updates)
+    originals = {medication_id: dict(row, price=9.99)
+                 for medication_id, row in db.grid_originals(snapshot, list(updates)).items()}
+    results['save_medications_bulk (1000 price updates)'] = measure(
+        lambda: db.save_medications_bulk(updates, originals=originals), counter
+    )
+    results['delete_all_medications'] = measure(db.delete_all_medications, counter)
+    clear_caches()
+    return results
+
+
+# ===================================================================
+# الصفحات عبر AppTest
+# ===================================================================
+def bench_pages(counter, timeout):
+    """عرض كل صفحة من موجه main() عبر AppTest وقياسها"""
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    results['(first run)'] = measure(at.run, counter)
+    pages = at.sidebar.radio[0].options
+    for page in pages:
+        radio = at.sidebar.radio[0]
+
+        def render():
+            radio.set_value(page)
+            at.run()
+
+        results[page] = measure(render, counter)
+        if at.exception:
+            results[page]['error'] = at.exception[0].message
+    return results
+
+
+# ===================================================================
+# التشغيل والمقارنة
+# ===================================================================
+def run_size(size, seed, timeout, skip_pages):
+    source = ensure_generated(size, seed)
+    workdir = tempfile.mkdtemp(prefix=f"bench-{size}-")
+    db_path = os.path.join(workdir, 'drug_database.db')
+    shutil.copy(source, db_path)
+    os.environ['DRUG_DB_PATH'] = db_path
+    # database تبقى محملة بين الأحجام وتشغيلات AppTest: تحديث المسار فيها مباشرة
+    database.DB_PATH = db_path
+    # الموارد المخزنة (طابور الكتابة، الذاكرة المؤقتة) مرتبطة بمسار قاعدة البيانات السابقة
+    st.cache_resource.clear()
+
+    counter = QueryCounter()
+    counter.install()
+    try:
+        result = {'pages': {}}
+        if not skip_pages:
+            result['pages'] = bench_pages(counter, timeout)
+
+        # دوال البيانات على نسخة جديدة لأن بعضها يحذف البيانات
+        db_path = os.path.join(workdir, 'functions.db')
+        shutil.copy(source, db_path)
+        os.environ['DRUG_DB_PATH'] = db_path
+        database.DB_PATH = db_path
+        st.cache_resource.clear()
+        database.init_database()
+        result['functions'] = bench_data_functions(database, counter)
+        database.get_writer().close()
+        database.get_writer.clear()
+    finally:
+        counter.uninstall()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """مقارنة النتائج بملف أساس وطباعة الفروقات؛ يعيد عدد الانحدارات"""
+    regressions = 0
+    for size, groups in current['results'].items():
+        base_groups = baseline.get('results', {}).get(size)
+        if not base_groups:
+            continue
+        print(f"\n=== {size} دواء: مقارنة مع {baseline['meta'].get('timestamp')} ===")
+        for group, entries in groups.items():
+            for name, metrics in entries.items():
+                base = base_groups.get(group, {}).get(name)
+                if not base or not base.get('wall_ms'):
+                    continue
+                change = (metrics['wall_ms'] - base['wall_ms']) / base['wall_ms']
+                flag = ''
+                if change > threshold:
+                    flag = '  ⚠️ انحدار'
+                    regressions += 1
+                print(f"  {name:<45} {base['wall_ms']:>10.1f} → {metrics['wall_ms']:>10.1f} ms "
+                      f"({change:+.0%}){flag}")
+    return regressions
+
+
+def print_results(results):
+    for size, groups in results.items():
+        print(f"\n=== {size} دواء ===")
+        for group, entries in groups.items():
+            for name, metrics in entries.items():
+                print(f"  [{group}] {name:<45} {metrics['wall_ms']:>10.1f} ms "
+                      f"{metrics['peak_mb']:>9.2f} MB {metrics['queries']:>7} queries"
+                      + (f"  ❌ {metrics['error']}" if 'error' in metrics else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس أداء طبقة البيانات والصفحات")
+    parser.add_argument('--sizes', default='1000,10000', help="أحجام الكتالوج مفصولة بفواصل (مثال: 1000,10000,100000,1000000)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--out', default='bench.json', help="ملف JSON للنتائج")
+    parser.add_argument('--baseline', help="ملف JSON سابق للمقارنة")
+    parser.add_argument('--timeout', type=float, default=600, help="مهلة عرض الصفحة الواحدة في AppTest (ثوانٍ)")
+    parser.add_argument('--skip-pages', action='store_true', help="قياس دوال البيانات فقط")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    results = {}
+    for size in [int(s) for s in args.sizes.split(',')]:
+        print(f"⏱️  قياس {size:,} دواء...")
+        results[str(size)] = run_size(size, args.seed, args.timeout, args.skip_pages)
+
+    output = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    print_results(results)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(output, baseline)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
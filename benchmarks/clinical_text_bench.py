@@ -0,0 +1,152 @@
+"""
+قياس ضغط النصوص السريرية - Clinical Text Compression Benchmark
+
+على نسخة من قاعدة بيانات مولدة، قبل الضغط وبعده (مع VACUUM في الحالتين):
+1. حجم الملف
+2. تحميل الكتالوج كاملاً (MEDICATIONS_SELECT كما تحمله ذاكرة الأدوية) وحجم
+   DataFrame في الذاكرة
+3. قراءة تفاصيل دواء واحد: صف الدواء + فك ضغط نصوصه
+4. تصدير CSV (يفك ضغط نصوص كل دفعة)
+ثم زمن الضغط ونسبة الضغط مع القاموس المسبق ودونه.
+
+الاستخدام:
+    python benchmarks/clinical_text_bench.py --size 10000
+    python benchmarks/clinical_text_bench.py --size 50000 --out bench_clinical_text.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import clinical_text  # noqa: E402
+import exports  # noqa: E402
+from database import MEDICATIONS_SELECT  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+from generate_data import DEFAULT_SEED, ensure_generated  # noqa: E402
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, round(statistics.median(timings) * 1000, 3)
+
+
+def file_mb(path):
+    return round(os.path.getsize(path) / 1024 / 1024, 1)
+
+
+def measure(path, workdir, ids, repeat):
+    """قياسات القراءة على ملف قاعدة البيانات path"""
+    conn = sqlite3.connect(path)
+    try:
+        df, load_ms = timed(lambda: pd.read_sql_query(MEDICATIONS_SELECT + "ORDER BY m.id DESC", conn), repeat)
+        memory = df.memory_usage(deep=True).sum()
+        del df
+
+        def details():
+            for medication_id in ids:
+                conn.execute("SELECT * FROM medications WHERE id = ?", (medication_id,)).fetchone()
+                clinical_text.load(conn, medication_id)
+        _, details_ms = timed(details, repeat)
+
+        out = os.path.join(workdir, 'export.csv')
+        _, export_ms = timed(lambda: exports.export_catalog(conn, out, 'csv'), 1)
+    finally:
+        conn.close()
+    return {
+        'file_mb': file_mb(path),
+        'catalog_load_ms': load_ms,
+        'catalog_memory_mb': round(memory / 1024 / 1024, 1),
+        'details_ms': round(details_ms / len(ids), 3),
+        'export_csv_ms': export_ms,
+    }
+
+
+def compress_copy(source, path, dictionary):
+    """نسخة مضغوطة (بقاموس مسبق أو دونه) وإرجاع (الإحصائيات، الزمن)"""
+    shutil.copy(source, path)
+    conn = sqlite3.connect(path)
+    try:
+        started = time.perf_counter()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stats = clinical_text.compress(conn, dictionary=dictionary)
+        seconds = time.perf_counter() - started
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return stats, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ضغط النصوص السريرية: الحجم، تحميل الكتالوج، التفاصيل والتصدير")
+    parser.add_argument('--size', type=int, default=10000, help="حجم الكتالوج المولد")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--details', type=int, default=200, help="عدد الأدوية في قياس التفاصيل")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', help="ملف JSON للنتائج")
+    args = parser.parse_args()
+
+    source_db = ensure_generated(args.size, args.seed)
+    workdir = tempfile.mkdtemp(prefix="clinical-text-bench-")
+    report = {'size': args.size}
+    try:
+        plain = os.path.join(workdir, 'plain.db')
+        shutil.copy(source_db, plain)
+        conn = sqlite3.connect(plain)
+        migrate(conn)
+        ids = random.Random(args.seed).sample([row[0] for row in conn.execute("SELECT id FROM medications")],
+                                              min(args.details, args.size))
+        conn.execute("VACUUM")
+        conn.close()
+
+        results = {}
+        for label, dictionary in (('zlib', False), ('dictionary', True)):
+            path = os.path.join(workdir, f'{label}.db')
+            stats, seconds = compress_copy(plain, path, dictionary)
+            results[label] = {'compress_seconds': round(seconds, 2), 'fields': stats['fields'],
+                              'ratio': round(stats['raw_bytes'] / max(stats['stored_bytes'], 1), 1)}
+        conn = sqlite3.connect(os.path.join(workdir, 'dictionary.db'))
+        report['report'] = {k: v for k, v in clinical_text.report(conn).items() if k != 'by_field'}
+        conn.close()
+
+        print(f"🧪 {args.size:,} دواء - {results['dictionary']['fields']:,} حقل مضغوط")
+        for label, result in results.items():
+            print(f"  {label:<12} ضغط {result['compress_seconds']:.2f} ث، نسبة {result['ratio']:.1f}x")
+        report['compress'] = results
+
+        print(f"\n{'':<14}{'الملف MB':>10}{'تحميل ms':>11}{'ذاكرة MB':>11}{'تفاصيل ms':>11}{'CSV ms':>10}")
+        for label, path in (('plain', plain), ('zlib', os.path.join(workdir, 'zlib.db')),
+                            ('dictionary', os.path.join(workdir, 'dictionary.db'))):
+            result = measure(path, workdir, ids, args.repeat)
+            report[label] = result
+            print(f"{label:<14}{result['file_mb']:>10}{result['catalog_load_ms']:>11.0f}"
+                  f"{result['catalog_memory_mb']:>11}{result['details_ms']:>11.3f}{result['export_csv_ms']:>10.0f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+قياس كشف الأدوية المكررة - Duplicate Detection Benchmark
+
+على نسخة من قاعدة بيانات مولدة تُضاف --duplicates نسخة معدلة من أدوية موجودة كما
+تظهر في الإدخال اليدوي والاستيراد: مسافات وحالة أحرف وشرطات في الاسم التجاري،
+صيغة أخرى للتركيز (120mg/5ml <- 24 mg/ml)، وأسماء عربية بإملاء مختلف (أ/ا، ة/ه،
+التشكيل). ثم:
+1. بناء الفهرس (التطبيع وتوقيعات MinHash) وتقييم الأزواج المرشحة
+2. الاسترجاع والدقة مقابل الأزواج المضافة عند --threshold
+3. مقارنة كل زوج بكل زوج على عينة ثم تقدير زمنها للكتالوج كاملاً
+4. فحص ما قبل الإضافة (similar) لدواء واحد
+5. دمج كل المكررات المضافة
+
+الاستخدام:
+    python benchmarks/dedup_bench.py --size 10000 --duplicates 500
+    python benchmarks/dedup_bench.py --size 50000 --duplicates 2000 --out bench_dedup.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import dedup  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+from generate_data import DEFAULT_SEED, ensure_generated  # noqa: E402
+
+ARABIC_NAMES = ['أدول', 'بروفينال', 'أموكسيل', 'زيثرو', 'لوسيك', 'نيكسيوم', 'فولتارين', 'فلاجيل', 'موتيليوم']
+ARABIC_SUFFIXES = ['', ' شراب', ' للأطفال', ' فورت', ' بلس']
+# صيغ أخرى لتركيزات المولد بنفس القيمة
+CONCENTRATION_VARIANTS = {
+    '100mg/1ml': ['100 mg/ml', '0.1 g/ml'], '120mg/5ml': ['24 mg/ml', '120 MG / 5 ML'],
+    '250mg/5ml': ['50mg/ml', '250 mg/5 ml'], '500mg': ['500 mg', '0.5g'], '1g': ['1000mg', '1 gm'],
+    '20 mg': ['20mg'], '2.5 mg/ml': ['2,5 mg/ml', '2.5mg/1ml'], '200 mg / 5 ml': ['40 mg/ml', '200mg/5ml'],
+}
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, round(statistics.median(timings) * 1000, 3)
+
+
+def respell(name, rng):
+    """إملاء عربي آخر للاسم نفسه"""
+    variants = [name.replace('أ', 'ا'), name.replace('ة', 'ه'), name.replace('ي', 'ى'),
+                name.replace('و', 'ُو'), name.replace('ا', 'ـا')]
+    return rng.choice([v for v in variants if v != name] or [name + 'َ'])
+
+
+def mangle(trade, rng):
+    """اسم تجاري بمسافات أو حالة أحرف أو شرطات مختلفة"""
+    return rng.choice([
+        trade.upper(), trade.lower(), trade.replace(' ', '  '), trade.replace(' ', '-', 1),
+        trade.replace(' ', '', 1), f" {trade} ",
+    ])
+
+
+def inject_duplicates(conn, count, rng):
+    """نسخ معدلة من count دواء وإرجاع الأزواج (الأصل، النسخة)"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(medications)") if row[1] != 'id']
+    ids = rng.sample([row[0] for row in conn.execute("SELECT id FROM medications")], count)
+    pairs = []
+    with conn:
+        for i, medication_id in enumerate(ids):
+            row = dict(zip(columns, conn.execute(
+                f"SELECT {', '.join(columns)} FROM medications WHERE id = ?", (medication_id,)).fetchone()))
+            if i % 4 == 0:
+                # الأصل باسم عربي والنسخة بإملاء آخر
+                arabic = f"{rng.choice(ARABIC_NAMES)}{rng.choice(ARABIC_SUFFIXES)} {medication_id}"
+                conn.execute("UPDATE medications SET trade_name = ? WHERE id = ?", (arabic, medication_id))
+                row['trade_name'] = respell(arabic, rng)
+            else:
+                row['trade_name'] = mangle(row['trade_name'], rng)
+            if rng.random() < 0.5 and row['concentration'] in CONCENTRATION_VARIANTS:
+                row['concentration'] = rng.choice(CONCENTRATION_VARIANTS[row['concentration']])
+            if rng.random() < 0.3:
+                row['generic_name'] = row['generic_name'].upper() + ' '
+            row['barcode'] = None
+            cursor = conn.execute(f"INSERT INTO medications ({', '.join(columns)}) VALUES "
+                                  f"({', '.join('?' * len(columns))})", [row[c] for c in columns])
+            pairs.append((medication_id, cursor.lastrowid))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="كشف الأدوية المكررة: الزمن، الاسترجاع والدقة، والدمج")
+    parser.add_argument('--size', type=int, default=10000, help="حجم الكتالوج المولد")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--duplicates', type=int, default=500)
+    parser.add_argument('--threshold', type=float, default=dedup.DEFAULT_THRESHOLD)
+    parser.add_argument('--sample', type=int, default=2000, help="عينة مقارنة كل زوج بكل زوج")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', help="ملف JSON للنتائج")
+    args = parser.parse_args()
+
+    source_db = ensure_generated(args.size, args.seed)
+    workdir = tempfile.mkdtemp(prefix="dedup-bench-")
+    rng = random.Random(args.seed)
+    report = {'size': args.size, 'duplicates': args.duplicates, 'threshold': args.threshold}
+    try:
+        path = os.path.join(workdir, 'dedup.db')
+        shutil.copy(source_db, path)
+        conn = sqlite3.connect(path)
+        migrate(conn)
+        truth = inject_duplicates(conn, args.duplicates, rng)
+
+        # 1. البناء والتقييم
+        started = time.perf_counter()
+        index = dedup.load_index(conn)
+        build = time.perf_counter() - started
+        started = time.perf_counter()
+        candidates = len(index.candidate_pairs())
+        edges = index.edges()
+        scoring = time.perf_counter() - started
+        groups, groups_ms = timed(lambda: index.groups(args.threshold), args.repeat)
+        report.update({'medications': len(index), 'build_seconds': round(build, 2), 'candidate_pairs': candidates,
+                       'edges': len(edges), 'scoring_seconds': round(scoring, 2), 'groups_ms': groups_ms})
+        print(f"🧪 {len(index):,} دواء ({args.duplicates:,} نسخة مضافة)")
+        print(f"🔑 الفهرس {build:.2f} ث، {candidates:,} زوج مرشح من {len(index) ** 2 // 2:,} "
+              f"قُيّمت في {scoring:.2f} ث، المجموعات عند {args.threshold} في {groups_ms:.1f} ms")
+
+        # 2. الاسترجاع والدقة
+        group_of = {i: n for n, group in enumerate(groups) for i in group['ids']}
+        found = sum(1 for a, b in truth if a in group_of and group_of.get(a) == group_of.get(b))
+        expected = {tuple(sorted(pair)) for pair in truth}
+        predicted = [pair for group in groups for pair in group['pairs']]
+        correct = sum(1 for a, b, _ in predicted if (a, b) in expected)
+        report.update({'groups': len(groups), 'recall': round(found / max(len(truth), 1), 3),
+                       'precision': round(correct / max(len(predicted), 1), 3)})
+        print(f"🎯 {len(groups):,} مجموعة: الاسترجاع {report['recall']:.1%} "
+              f"({found:,} من {len(truth):,})، الدقة {report['precision']:.1%} ({correct:,} من {len(predicted):,} زوج)")
+
+        # 3. كل زوج بكل زوج على عينة
+        sample = min(args.sample, len(index))
+        positions = range(sample)
+
+        def all_pairs():
+            hits = 0
+            grams = [dedup._record_trigrams(index.records[p]) for p in positions]
+            for a in positions:
+                for b in range(a + 1, sample):
+                    if index._compatible(index.records[a], index.records[b]) and \
+                            index._score(grams[a], grams[b]) >= args.threshold:
+                        hits += 1
+            return hits
+        _, brute_ms = timed(all_pairs, 1)
+        estimate = brute_ms / 1000 * (len(index) / sample) ** 2
+        report.update({'all_pairs_sample': sample, 'all_pairs_sample_seconds': round(brute_ms / 1000, 2),
+                       'all_pairs_estimated_seconds': round(estimate, 1)})
+        print(f"🐢 كل زوج بكل زوج: {sample:,} دواء في {brute_ms / 1000:.2f} ث -> تقدير {estimate:,.0f} ث "
+              f"للكتالوج مقابل {build + scoring:.2f} ث")
+
+        # 4. فحص ما قبل الإضافة
+        queries = [dict(zip(dedup.INDEX_COLUMNS, row)) for row in conn.execute(
+            f"SELECT {', '.join(dedup.INDEX_COLUMNS)} FROM medications WHERE id IN "
+            f"({', '.join(str(a) for a, _ in truth[:200])})")]
+        for query in queries:
+            query['trade_name'] = mangle(query['trade_name'] or '', rng)
+        matched, similar_ms = timed(lambda: sum(1 for q in queries if index.similar(q, args.threshold)), args.repeat)
+        report.update({'similar_ms': round(similar_ms / len(queries), 3),
+                       'similar_hit_rate': round(matched / len(queries), 3)})
+        print(f"➕ فحص دواء جديد: {similar_ms / len(queries):.2f} ms (وجد مشابهًا لـ {matched} من {len(queries)})، "
+              f"وإعادة بناء الفهرس بعد كل تغيير {build:.2f} ث")
+
+        # 5. الدمج
+        started = time.perf_counter()
+        merged = 0
+        with conn:
+            for keep_id, duplicate_id in truth:
+                merged += dedup.merge(conn, keep_id, [duplicate_id])['merged']
+        merge_seconds = time.perf_counter() - started
+        remaining = conn.execute("SELECT COUNT(*) FROM medications").fetchone()[0]
+        conn.close()
+        report.update({'merged': merged, 'merge_ms': round(merge_seconds * 1000 / max(merged, 1), 3),
+                       'remaining': remaining})
+        print(f"🔗 دمج {merged:,} نسخة في {merge_seconds:.2f} ث ({report['merge_ms']:.2f} ms لكل دمج)، "
+              f"بقي {remaining:,} دواء")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.out}")
+
+
+if __name__ == '__main__':
+    main()
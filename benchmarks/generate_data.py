@@ -0,0 +1,214 @@
+"""
+مولد بيانات تجريبية - Synthetic Catalog Generator
+
+ينشئ قاعدة بيانات بنفس مخطط التطبيق ويملؤها بكتالوج واقعي بحجم محدد
+(أسماء عربية وإنجليزية، شركات مصنعة، ونصوص طبية طويلة). التوليد حتمي:
+نفس البذرة (seed) ونفس الحجم ينتجان نفس البيانات دائمًا.
+
+الاستخدام:
+    python benchmarks/generate_data.py --size 10000
+    python benchmarks/generate_data.py --size 100000 --db drug_database.db --force
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from migrations import migrate  # noqa: E402
+
+DATA_DIR = os.path.join(ROOT, 'benchmarks', 'data')
+DEFAULT_SEED = 20241226
+INSERT_CHUNK = 5000
+
+# ===================================================================
+# مفردات التوليد
+# ===================================================================
+GENERIC_NAMES = [
+    'paracetamol', 'ibuprofen', 'amoxicillin', 'azithromycin', 'cetirizine', 'loratadine',
+    'omeprazole', 'esomeprazole', 'metformin', 'amlodipine', 'atorvastatin', 'salbutamol',
+    'prednisolone', 'dexamethasone', 'ceftriaxone', 'cefuroxime', 'clarithromycin', 'domperidone',
+    'metronidazole', 'diclofenac', 'naproxen', 'montelukast', 'levothyroxine', 'losartan',
+    'ferrous sulfate', 'folic acid', 'vitamin D3', 'zinc sulfate', 'ondansetron', 'ranitidine',
+]
+TRADE_PREFIXES = ['Adol', 'Profinal', 'Amoxil', 'Zithro', 'Zyrtec', 'Clarity', 'Losec', 'Nexium',
+                  'Glucophage', 'Norvasc', 'Lipitor', 'Ventolin', 'Predo', 'Dexa', 'Rocephin',
+                  'Zinnat', 'Klacid', 'Motilium', 'Flagyl', 'Voltaren', 'Singulair', 'Euthyrox']
+TRADE_SUFFIXES = ['', ' Forte', ' Plus', ' Junior', ' Extra', ' SR', ' XR', ' Kids', ' 500', ' Max']
+FORMS = ["oral drops", "suspension", "suppository", "tablet", "capsule", "syrup",
+         "injection", "cream", "ointment", "gel", "powder"]
+ROUTES = ["oral", "IV", "IM", "SC", "topical", "rectal", "inhalation"]
+CONCENTRATIONS = ['100mg/1ml', '120mg/5ml', '250mg/5ml', '500mg', '1g', '5mg', '10mg', '20 mg',
+                  '40mg', '0.1%', '1%', '2.5 mg/ml', '200 mg / 5 ml', '875mg/125mg']
+AVAILABILITY = ['متوفر', 'متوفر', 'متوفر', 'غير متوفر', 'نادر']
+COUNTRIES = [('Jordan', 'الأردن'), ('Saudi Arabia', 'السعودية'), ('Egypt', 'مصر'),
+             ('UAE', 'الإمارات'), ('Germany', 'ألمانيا'), ('France', 'فرنسا'),
+             ('India', 'الهند'), ('Switzerland', 'سويسرا'), ('UK', 'بريطانيا')]
+MANUFACTURER_ROOTS = [('Hikma', 'حكمة'), ('Dar Al Dawa', 'دار الدواء'), ('SPIMACO', 'سبيماكو'),
+                      ('Julphar', 'جلفار'), ('Tabuk', 'تبوك'), ('Pharma International', 'الدولية للأدوية'),
+                      ('Jamjoom', 'جمجوم'), ('Amman Pharma', 'عمان للأدوية'), ('Novartis', 'نوفارتس'),
+                      ('Sanofi', 'سانوفي'), ('GSK', 'جي إس كي'), ('Pfizer', 'فايزر')]
+WAREHOUSES = ['المستودع الرئيسي', 'مستودع الشمال', 'مستودع الجنوب', 'مستودع عمان', 'مستودع إربد']
+
+# جمل طبية عربية وإنجليزية لبناء نصوص طويلة
+ARABIC_SENTENCES = [
+    'يستخدم كخافض للحرارة ومسكن للآلام الخفيفة والمتوسطة.',
+    'لا يستخدم في حالات فرط الحساسية للمادة الفعالة أو لأي من مكونات المستحضر.',
+    'قد يسبب غثيانًا أو طفحًا جلديًا أو اضطرابات في الجهاز الهضمي.',
+    'يجب استشارة الطبيب قبل الاستخدام أثناء الحمل والرضاعة.',
+    'يستخدم بحذر لدى مرضى القصور الكلوي أو الكبدي مع مراقبة وظائف الكبد.',
+    'في حالة الجرعة الزائدة يجب التوجه فورًا إلى أقرب مركز طوارئ.',
+    'يحفظ في درجة حرارة الغرفة بعيدًا عن الرطوبة وأشعة الشمس المباشرة.',
+    'تجنب استخدامه مع مضادات التخثر دون إشراف طبي.',
+]
+ENGLISH_SENTENCES = [
+    'Indicated for the symptomatic relief of mild to moderate pain and fever.',
+    'Contraindicated in patients with known hypersensitivity to any component.',
+    'Monitor renal function in elderly patients and in prolonged therapy.',
+    'Concomitant use with warfarin may increase the risk of bleeding.',
+    'Overdose may cause hepatic necrosis; administer N-acetylcysteine promptly.',
+]
+TEXT_FIELDS = ['indications', 'contraindications', 'side_effects', 'drug_interactions',
+               'warnings', 'precautions', 'overdose_management', 'notes', 'pharmacist_notes']
+
+
+def long_text(rng, min_sentences=3, max_sentences=12):
+    """نص طبي طويل يخلط الجمل العربية والإنجليزية"""
+    count = rng.randint(min_sentences, max_sentences)
+    return ' '.join(
+        rng.choice(ARABIC_SENTENCES if rng.random() < 0.7 else ENGLISH_SENTENCES)
+        for _ in range(count)
+    )
+
+
+def make_medication(rng, index, category_ids, drug_type_ids, manufacturer_ids):
+    """توليد صف دواء واحد"""
+    generic = rng.choice(GENERIC_NAMES)
+    price = round(rng.uniform(0.5, 85.0), 2)
+    row = {
+        'generic_name': generic,
+        'trade_name': f"{rng.choice(TRADE_PREFIXES)}{rng.choice(TRADE_SUFFIXES)} {index}",
+        'category_id': rng.choice(category_ids),
+        'drug_type_id': rng.choice(drug_type_ids),
+        'manufacturer_id': rng.choice(manufacturer_ids),
+        'concentration': rng.choice(CONCENTRATIONS),
+        'form': rng.choice(FORMS),
+        'active_ingredient': generic.title(),
+        'composition': f"Each unit contains: {generic.title()} {rng.choice(CONCENTRATIONS)}",
+        'min_age_months': rng.choice([None, 1, 6, 12, 24, 72]),
+        'max_age_months': rng.choice([None, 36, 144, 180]),
+        'age_limit_text': rng.choice([None, 'من شهر إلى 3 سنوات', 'فوق 12 سنة', 'جميع الأعمار']),
+        'max_single_dose': rng.choice(['2 ml', '5 ml', '1 tablet', '500 mg', None]),
+        'dose_calculation': rng.choice(['10-15 mg/kg/dose every 6 hours', '20 mg/kg/day', None]),
+        'max_daily_dose': rng.choice(['60mg/kg/day', '4 g/day', '40 mg/day', None]),
+        'frequency': rng.choice(['every 6 hours', 'twice daily', 'once daily', 'every 8 hours']),
+        'duration': rng.choice(['5-7 days', '10 days', '3 days', None]),
+        'administration_route': rng.choice(ROUTES),
+        'pregnancy_category': rng.choice([None, 'A', 'B', 'C', 'D', 'X']),
+        'storage_conditions': 'يحفظ في درجة حرارة أقل من 25 درجة مئوية',
+        'shelf_life': rng.choice(['2 سنوات', '3 سنوات', '18 شهر', '24 months']),
+        'storage_after_opening': rng.choice(['يستخدم خلال شهر', '14 يوم', None]),
+        'warehouse_name': rng.choice(WAREHOUSES),
+        'package_info': rng.choice(['15ml bottle', '100ml bottle', '20 tablets', '10 ampoules']),
+        'package_size': rng.choice(['15ml', '100ml', '20', '10']),
+        'price': price,
+        'price_with_tax': round(price * 1.16, 2),
+        'availability': rng.choice(AVAILABILITY),
+        'barcode': f"{rng.randrange(10**12, 10**13)}",
+        'manufacturing_country': rng.choice(COUNTRIES)[0],
+        'marketing_country': 'Jordan',
+        'license_number': f"{rng.randrange(10000, 99999)}/{rng.randrange(2015, 2025)}",
+    }
+    for field in TEXT_FIELDS:
+        row[field] = long_text(rng)
+    return row
+
+
+# ===================================================================
+# إنشاء قاعدة البيانات
+# ===================================================================
+def default_db_path(size, seed=DEFAULT_SEED):
+    return os.path.join(DATA_DIR, f"bench-{size}-{seed}.db")
+
+
+def generate(db_path, size, seed=DEFAULT_SEED, manufacturers=None, verbose=True):
+    """إنشاء قاعدة بيانات جديدة في db_path وملؤها بـ size دواء"""
+    rng = random.Random(seed)
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    # التوليد فقط: تعطيل المزامنة لتسريع الكتابة
+    conn.execute("PRAGMA synchronous = OFF")
+
+    manufacturer_count = manufacturers or max(20, min(2000, size // 50))
+    conn.executemany(
+        "INSERT INTO manufacturers (name, name_ar, country, country_ar) VALUES (?, ?, ?, ?)",
+        [
+            (f"{root} {i}", f"{root_ar} {i}", *rng.choice(COUNTRIES))
+            for i, (root, root_ar) in (
+                (i, MANUFACTURER_ROOTS[i % len(MANUFACTURER_ROOTS)]) for i in range(manufacturer_count)
+            )
+        ],
+    )
+    category_ids = [row[0] for row in conn.execute("SELECT id FROM categories")]
+    drug_type_ids = [row[0] for row in conn.execute("SELECT id FROM drug_types")]
+    manufacturer_ids = [row[0] for row in conn.execute("SELECT id FROM manufacturers")]
+    conn.commit()
+
+    started = time.perf_counter()
+    columns = None
+    for start in range(0, size, INSERT_CHUNK):
+        rows = [
+            make_medication(rng, index, category_ids, drug_type_ids, manufacturer_ids)
+            for index in range(start, min(size, start + INSERT_CHUNK))
+        ]
+        columns = columns or list(rows[0].keys())
+        conn.executemany(
+            f"INSERT INTO medications ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            [[row[column] for column in columns] for row in rows],
+        )
+        conn.commit()
+        if verbose:
+            print(f"\r  {min(size, start + INSERT_CHUNK):>9,} / {size:,}", end='', flush=True)
+
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    if verbose:
+        size_mb = os.path.getsize(db_path) / 1024 / 1024
+        print(f"\n  ✅ {db_path} ({size_mb:.1f} MB) في {time.perf_counter() - started:.1f} ث")
+    return db_path
+
+
+def ensure_generated(size, seed=DEFAULT_SEED, verbose=True):
+    """إرجاع مسار قاعدة بيانات مولدة مسبقًا لهذا الحجم أو توليدها"""
+    db_path = default_db_path(size, seed)
+    if not os.path.exists(db_path):
+        generate(db_path, size, seed, verbose=verbose)
+    return db_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="توليد كتالوج أدوية تجريبي")
+    parser.add_argument('--size', type=int, default=10000, help="عدد الأدوية")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--db', help="مسار قاعدة البيانات (افتراضيًا benchmarks/data/bench-<size>-<seed>.db)")
+    parser.add_argument('--force', action='store_true', help="الكتابة فوق قاعدة بيانات موجودة")
+    args = parser.parse_args()
+
+    db_path = args.db or default_db_path(args.size, args.seed)
+    if os.path.exists(db_path) and not args.force:
+        parser.error(f"{db_path} موجود - استخدم --force للكتابة فوقه")
+    generate(db_path, args.size, args.seed)
+
+
+if __name__ == '__main__':
+    main()
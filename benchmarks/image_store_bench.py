@@ -0,0 +1,158 @@
+"""
+قياس مخزن الصور - Image Store Benchmark
+
+على --images صورة JPEG مولدة (صور كاميرا بحجم --width x --height، ونسخ مكررة
+بمسارات مختلفة كما تتكرر صورة العلبة لأكثر من دواء):
+1. الحجم المرسل إلى المتصفح: الصور الأصلية مقابل مصغرات الجدول والتفاصيل
+2. أول عرض (نسخ + بصمة + تصغير) مقابل الإصابة في المخزن، والتصغير مع draft ودونه
+3. عمود الصور في الجدول: data URIs لأول GRID_IMAGE_ROWS صورة
+4. حد المصغرات: عرض كل الأحجام على دفعات بحد صغير (مصغرات الدفعة الحالية لا
+   تُحذف، فقد يتجاوز المجموع الحد بحجم دفعة واحدة فقط)
+
+الاستخدام:
+    python benchmarks/image_store_bench.py --images 200
+    python benchmarks/image_store_bench.py --images 1000 --out bench_images.json
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from PIL import Image, ImageDraw, ImageOps
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import image_store  # noqa: E402
+from views.medications import GRID_IMAGE_ROWS  # noqa: E402
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, round(statistics.median(timings) * 1000, 3)
+
+
+def make_images(root, count, width, height, seed):
+    """صور JPEG مولدة (تدرج وأشكال وضجيج) وإرجاع مساراتها النسبية، ربعها نسخ مكررة"""
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root, "images"), exist_ok=True)
+    noise = Image.effect_noise((width, height), 40).convert("RGB")
+    paths = []
+    for index in range(count):
+        path = f"images/med_{index:05d}.jpg"
+        if paths and rng.random() < 0.25:
+            shutil.copy(os.path.join(root, rng.choice(paths)), os.path.join(root, path))
+        else:
+            image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+            draw = ImageDraw.Draw(image)
+            for _ in range(12):
+                x, y = rng.randrange(width), rng.randrange(height)
+                draw.ellipse((x, y, x + width // 5, y + height // 5),
+                             fill=tuple(rng.randrange(256) for _ in range(3)))
+            Image.blend(image, noise, 0.15).save(os.path.join(root, path), "JPEG", quality=88)
+        paths.append(path)
+    return paths
+
+
+def render(store, sha, size, draft):
+    # نفس خطوات ImageStore._render مع draft أو دونه (exif_transpose يفك الصورة كاملة بدونه)
+    with Image.open(store._object_path(sha)) as image:
+        if draft:
+            image.draft('RGB', (size * 2, size * 2))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        image.save(io.BytesIO(), image_store.THUMBNAIL_FORMAT, quality=image_store.THUMBNAIL_QUALITY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="مخزن الصور: الحجم المرسل، أول عرض مقابل الإصابة، وحد المصغرات")
+    parser.add_argument('--images', type=int, default=200)
+    parser.add_argument('--width', type=int, default=3000)
+    parser.add_argument('--height', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', help="ملف JSON للنتائج")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="image-store-bench-")
+    report = {'images': args.images, 'width': args.width, 'height': args.height,
+              'format': image_store.THUMBNAIL_FORMAT}
+    try:
+        root = os.path.join(workdir, "root")
+        started = time.perf_counter()
+        paths = make_images(root, args.images, args.width, args.height, args.seed)
+        original_bytes = sum(os.path.getsize(os.path.join(root, path)) for path in paths)
+        print(f"🧪 {args.images:,} صورة {args.width}x{args.height} ({original_bytes / 1024 / 1024:.1f} MB) "
+              f"مولدة في {time.perf_counter() - started:.1f} ث - {image_store.THUMBNAIL_FORMAT}")
+
+        # 1 و2. أول عرض مقابل الإصابة لكل حجم
+        store = image_store.ImageStore(os.path.join(workdir, "store"), root)
+        print(f"\n{'الحجم':<10}{'أول عرض ms/صورة':>18}{'إصابة ms/صورة':>16}{'المرسل MB':>12}{'التوفير':>10}")
+        for size in (image_store.GRID_SIZE, image_store.GALLERY_SIZE, image_store.DETAIL_SIZE):
+            started = time.perf_counter()
+            thumbnails = store.thumbnails(paths, size)
+            first_ms = (time.perf_counter() - started) * 1000 / len(paths)
+            _, hit_ms = timed(lambda: store.thumbnails(paths, size), args.repeat)
+            sent = sum(os.path.getsize(thumbnails[path]) for path in paths)
+            report[f'size_{size}'] = {'first_ms_per_image': round(first_ms, 2),
+                                      'hit_ms_per_image': round(hit_ms / len(paths), 3),
+                                      'sent_mb': round(sent / 1024 / 1024, 2),
+                                      'saving': round(original_bytes / max(sent, 1), 1)}
+            print(f"{size:<10}{first_ms:>18.2f}{hit_ms / len(paths):>16.3f}"
+                  f"{sent / 1024 / 1024:>12.2f}{original_bytes / max(sent, 1):>9.0f}x")
+        stats = store.stats()
+        report['objects'] = stats['objects']
+        print(f"📦 {len(paths):,} مسار -> {stats['objects']:,} ملف في المخزن (النسخ المكررة تُخزن وتُصغّر مرة واحدة)")
+
+        # draft: فك ترميز JPEG بدقة أقل
+        conn = store._connect()
+        sha = store.resolve(conn, paths[0])
+        conn.close()
+        _, draft_ms = timed(lambda: render(store, sha, image_store.DETAIL_SIZE, True), args.repeat)
+        _, full_ms = timed(lambda: render(store, sha, image_store.DETAIL_SIZE, False), args.repeat)
+        report.update({'render_draft_ms': draft_ms, 'render_full_decode_ms': full_ms})
+        print(f"🖼️ تصغير صورة إلى {image_store.DETAIL_SIZE}: draft {draft_ms:.1f} ms مقابل فك كامل {full_ms:.1f} ms")
+
+        # 3. عمود الصور في الجدول
+        head = paths[:GRID_IMAGE_ROWS]
+        uris, grid_ms = timed(lambda: store.data_uris(head, image_store.GRID_SIZE), args.repeat)
+        page_kb = sum(len(uri) for uri in uris.values()) / 1024
+        report.update({'grid_rows': len(head), 'grid_ms': grid_ms, 'grid_page_kb': round(page_kb, 1)})
+        print(f"📋 عمود الصور لـ {len(head)} صف: {grid_ms:.1f} ms، {page_kb:.0f} KB داخل الصفحة")
+
+        # 4. حد المصغرات: نصف حجم مصغرات التفاصيل
+        budget = report[f'size_{image_store.DETAIL_SIZE}']['sent_mb'] * 1024 * 1024 / 2
+        small = image_store.ImageStore(os.path.join(workdir, "small"), root, max_bytes=int(budget))
+        peak = 0
+        for size in (image_store.GRID_SIZE, image_store.GALLERY_SIZE, image_store.DETAIL_SIZE, 320):
+            for start in range(0, len(paths), 10):
+                small.thumbnails(paths[start:start + 10], size)
+                peak = max(peak, small.stats()['thumbnail_bytes'])
+        on_disk = sum(os.path.getsize(os.path.join(folder, name))
+                      for folder, _, names in os.walk(os.path.join(workdir, "small", "thumbs")) for name in names)
+        report.update({'budget_mb': round(budget / 1024 / 1024, 2), 'peak_mb': round(peak / 1024 / 1024, 2),
+                       'thumbs_on_disk_mb': round(on_disk / 1024 / 1024, 2)})
+        print(f"🗑️ حد {budget / 1024 / 1024:.2f} MB: أعلى مجموع {peak / 1024 / 1024:.2f} MB، "
+              f"على القرص {on_disk / 1024 / 1024:.2f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+قياس دفتر المخزون - Stock Ledger Ingestion Benchmark
+
+يحاكي نقطة بيع ترسل أحداث صرف (مع استلام دوري) على نسخة من قاعدة بيانات
+مولدة، ويقارن:
+- row: كل حدث عملية مستقلة في طابور الكتابة بانتظار نتيجتها (معاملة لكل حدث)
+- buffer: MovementBuffer يجمع الأحداث ويكتب كل دفعة بأمر executemany واحد
+
+النتيجة لكل وضع: الأحداث في الثانية، عدد المعاملات، وعدد مرات تغير التوفر
+(زيادات إصدار البيانات) مقابل عدد الأحداث.
+
+الاستخدام:
+    python benchmarks/inventory_bench.py --size 10000 --events 5000
+    python benchmarks/inventory_bench.py --size 50000 --events 100000 --modes buffer --out bench_inventory.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import inventory  # noqa: E402
+from change_feed import get_data_version  # noqa: E402
+from db_writer import WriteQueue  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+from generate_data import DEFAULT_SEED, ensure_generated  # noqa: E402
+
+
+def make_events(conn, count, seed):
+    """أحداث صرف بالباركود مع استلام لكل دواء قبل أول صرف له"""
+    rng = random.Random(seed)
+    barcodes = [row[0] for row in conn.execute("SELECT barcode FROM medications WHERE barcode IS NOT NULL")]
+    # 20% من الأصناف تمثل معظم المبيعات
+    popular = barcodes[:max(1, len(barcodes) // 5)]
+    received = set()
+    events = []
+    for i in range(count):
+        barcode = rng.choice(popular) if rng.random() < 0.8 else rng.choice(barcodes)
+        if barcode not in received:
+            received.add(barcode)
+            events.append({'barcode': barcode, 'kind': 'receipt', 'quantity': rng.randint(5, 50),
+                           'reference': f"GRN-{i}"})
+        events.append({'barcode': barcode, 'kind': 'dispense', 'quantity': rng.randint(1, 3),
+                       'reference': f"POS-{i}"})
+    return events
+
+
+def run_mode(mode, source_db, workdir, events):
+    db_path = os.path.join(workdir, f'{mode}.db')
+    shutil.copy(source_db, db_path)
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    version_before = get_data_version(conn)[0]
+    conn.close()
+
+    writer = WriteQueue(db_path)
+    started = time.perf_counter()
+    if mode == 'row':
+        for event in events:
+            writer.execute(lambda c, e=event: inventory.record_movements(c, [e]))
+    else:
+        buffer = inventory.MovementBuffer(writer.submit)
+        for event in events:
+            buffer.add(event)
+        buffer.close()
+    elapsed = time.perf_counter() - started
+    transactions = writer.stats['batches']
+    writer.close()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        movements = conn.execute("SELECT COUNT(*) FROM stock_movements").fetchone()[0]
+        version_bumps = get_data_version(conn)[0] - version_before
+    finally:
+        conn.close()
+    return {
+        'mode': mode,
+        'events': len(events),
+        'seconds': round(elapsed, 3),
+        'events_per_second': round(len(events) / elapsed),
+        'transactions': transactions,
+        'movements': movements,
+        'data_version_bumps': version_bumps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="إدخال أحداث نقطة البيع: معاملة لكل حدث مقابل دفعات")
+    parser.add_argument('--size', type=int, default=10000, help="حجم الكتالوج المولد")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--events', type=int, default=5000, help="عدد أحداث الصرف")
+    parser.add_argument('--modes', default="row,buffer")
+    parser.add_argument('--out', help="ملف JSON للنتائج")
+    args = parser.parse_args()
+
+    source_db = ensure_generated(args.size, args.seed)
+    conn = sqlite3.connect(source_db)
+    events = make_events(conn, args.events, args.seed)
+    conn.close()
+    workdir = tempfile.mkdtemp(prefix="inventory-bench-")
+    results = []
+    try:
+        print(f"🧪 {args.size:,} دواء، {len(events):,} حدث")
+        print(f"{'الوضع':<8}{'حدث/ث':>12}{'الزمن ث':>10}{'المعاملات':>12}{'الحركات':>10}{'تغيرات التوفر':>16}")
+        for mode in args.modes.split(','):
+            result = run_mode(mode, source_db, workdir, events)
+            results.append(result)
+            print(f"{mode:<8}{result['events_per_second']:>12,}{result['seconds']:>10.2f}{result['transactions']:>12,}"
+                  f"{result['movements']:>10,}{result['data_version_bumps']:>16,}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'size': args.size, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.out}")
+
+
+if __name__ == '__main__':
+    main()
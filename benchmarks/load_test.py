@@ -0,0 +1,331 @@
+"""
+اختبار التحميل بجلسات متزامنة - Concurrent Session Load Generator
+
+يحاكي N جلسة مستخدم متزامنة عبر AppTest، تنفذ كل جلسة سيناريو عمل متكررًا
+(بحث، فتح تفاصيل دواء، إضافة دواء، حذف، عرض الإحصائيات)، ثم يطبع لكل دالة
+صفحة في موجه main() زمن الاستجابة p50/p95/p99 ونسبة الأخطاء.
+
+الوضع process يشغل كل جلسة في عملية مستقلة تعرض الصفحات كاملة عبر AppTest
+(مثل عدة خوادم خلف موزع أحمال تتنافس على قفل الكتابة). AppTest لا يدعم
+التشغيل من عدة خيوط، لذلك الوضع thread يشغل الجلسات كخيوط داخل عملية واحدة
+تستدعي دوال البيانات التي تستدعيها كل صفحة مباشرة (مثل خادم Streamlit واحد
+يتشارك طابور الكتابة والذاكرة المؤقتة)، دون كلفة عرض الواجهة.
+
+الاستخدام:
+    python benchmarks/load_test.py --sessions 10 --iterations 5 --size 10000
+    python benchmarks/load_test.py --sessions 50 --mode thread --out load.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_data import DEFAULT_SEED, GENERIC_NAMES, ensure_generated  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, 'app.py')
+
+# عناوين الصفحات في موجه main() ودوال العرض المقابلة لها
+PAGE_FUNCTIONS = {
+    "🏠 الصفحة الرئيسية": 'show_home_page',
+    "💊 عرض الأدوية": 'show_medications_page',
+    "✏️ التعديل الجماعي للأدوية": 'show_medications_bulk_edit_page',
+    "➕ إضافة دواء جديد": 'show_add_medication_page',
+    "🏭 إدارة الشركات المصنعة": 'show_manufacturers_page',
+    "📂 إدارة الفئات": 'show_categories_page',
+    "🔢 إدارة أنواع الأدوية": 'show_drug_types_page',
+    "📊 تقديرات الأوزان": 'show_weight_estimates_page',
+    "📈 الإحصائيات": 'show_statistics_page',
+    "🗄️ عرض قاعدة البيانات": 'show_database_viewer_page',
+    "📥 استيراد من Excel": 'show_import_page',
+}
+
+
+# ===================================================================
+# سيناريو الجلسة
+# ===================================================================
+class Session:
+    """جلسة مستخدم واحدة تعرض الصفحات عبر AppTest وتسجل زمن كل خطوة"""
+
+    def __init__(self, session_id, timeout, rng):
+        from streamlit.testing.v1 import AppTest
+
+        self.session_id = session_id
+        self.rng = rng
+        self.samples = []   # (page_function, action, seconds, error)
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+    def _record(self, page, action, fn):
+        started = time.perf_counter()
+        error = None
+        try:
+            error = fn()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.samples.append((PAGE_FUNCTIONS.get(page, page), action, time.perf_counter() - started, error))
+
+    def _step(self, page, action, interact=None):
+        def render():
+            radio = self.at.sidebar.radio[0]
+            if radio.value != page:
+                radio.set_value(page)
+            if interact is not None:
+                self.at.run()
+                interact()
+            return self._run()
+        self._record(page, action, render)
+
+    def _run(self):
+        self.at.run()
+        return self.at.exception[0].message if self.at.exception else None
+
+    def _widget(self, widgets, label_part):
+        return next(w for w in widgets if label_part in w.label)
+
+    def start(self):
+        self._record('(first run)', 'load', self._run)
+
+    def _select_medication(self, select):
+        # القائمة تعرض التسميات عبر format_func=labels.get، والقيمة هي معرف الدواء
+        ids = list(select.format_func.__self__) if select.options else []
+        if ids:
+            select.set_value(ids[self.rng.randrange(min(len(ids), 50))])
+
+    # ---------------------------------------------------------------
+    # الخطوات
+    # ---------------------------------------------------------------
+    def search(self):
+        term = self.rng.choice(GENERIC_NAMES)[:5]
+        self._step("💊 عرض الأدوية", 'search',
+                   lambda: self._widget(self.at.text_input, "بحث").set_value(term))
+
+    def open_details(self):
+        def interact():
+            select = self._widget(self.at.selectbox, "تفاصيل")
+            self._select_medication(select)
+        self._step("💊 عرض الأدوية", 'details', interact)
+
+    def add_medication(self):
+        name = f"load-test {self.session_id}-{self.rng.randrange(10**6)}"
+
+        def interact():
+            self._widget(self.at.text_input, "generic_name").set_value(name)
+            self._widget(self.at.button, "حفظ الدواء").click()
+        self._step("➕ إضافة دواء جديد", 'add', interact)
+
+    def delete_medication(self):
+        def interact():
+            select = self._widget(self.at.selectbox, "تفاصيل")
+            self._select_medication(select)
+            self.at.run()
+            # النقرة الأولى تطلب التأكيد والثانية تحذف
+            self._widget(self.at.button, "حذف الدواء").click()
+            self.at.run()
+            self._widget(self.at.button, "حذف الدواء").click()
+        self._step("💊 عرض الأدوية", 'delete', interact)
+
+    def statistics(self):
+        self._step("📈 الإحصائيات", 'view')
+
+    def home(self):
+        self._step("🏠 الصفحة الرئيسية", 'view')
+
+    def run(self, iterations):
+        self.start()
+        for _ in range(iterations):
+            self.home()
+            self.search()
+            self.open_details()
+            self.add_medication()
+            self.delete_medication()
+            self.statistics()
+        return self.samples
+
+
+class DataSession(Session):
+    """جلسة تنفذ نفس السيناريو باستدعاء دوال البيانات التي تستدعيها كل صفحة"""
+
+    def __init__(self, session_id, timeout, rng):
+        import database
+
+        self.session_id = session_id
+        self.rng = rng
+        self.samples = []
+        self.db = database
+
+    def _step(self, page, action, interact=None):
+        def call():
+            # أي استثناء يسجل كخطأ، والقيمة المعادة من دوال البيانات ليست رسالة خطأ
+            interact()
+        self._record(page, action, call)
+
+    def start(self):
+        self._step('(first run)', 'load', self.db.init_database)
+
+    def _pick_id(self):
+        df = self.db.get_all_medications()
+        return int(df['id'].iloc[self.rng.randrange(min(len(df), 50))]) if len(df) else None
+
+    def search(self):
+        term = self.rng.choice(GENERIC_NAMES)[:5]
+
+        def query():
+            self.db.get_categories()
+            df = self.db.get_all_medications()
+            df[df['generic_name'].str.contains(term, case=False, na=False)
+               | df['trade_name'].str.contains(term, case=False, na=False)]
+        self._step("💊 عرض الأدوية", 'search', query)
+
+    def open_details(self):
+        def query():
+            self._pick_id()
+            self.db.get_categories()
+            self.db.get_drug_types()
+            self.db.get_manufacturers()
+        self._step("💊 عرض الأدوية", 'details', query)
+
+    def add_medication(self):
+        name = f"load-test {self.session_id}-{self.rng.randrange(10**6)}"
+        self._step("➕ إضافة دواء جديد", 'add',
+                   lambda: self.db.add_medication({'generic_name': name, 'availability': 'متوفر'}))
+
+    def delete_medication(self):
+        def query():
+            medication_id = self._pick_id()
+            if medication_id is not None:
+                self.db.delete_medication(medication_id)
+        self._step("💊 عرض الأدوية", 'delete', query)
+
+    def statistics(self):
+        def query():
+            df = self.db.get_all_medications()
+            for column in ('category_name', 'form', 'manufacturer_name', 'availability'):
+                df[column].value_counts()
+        self._step("📈 الإحصائيات", 'view', query)
+
+    def home(self):
+        def query():
+            self.db.get_all_medications()
+            self.db.get_categories()
+            self.db.get_drug_types()
+            self.db.get_manufacturers()
+        self._step("🏠 الصفحة الرئيسية", 'view', query)
+
+
+def run_session(session_id, iterations, timeout, seed, db_path, session_class=Session):
+    """تشغيل جلسة واحدة وإرجاع عيناتها (يعمل في خيط أو عملية مستقلة)"""
+    os.environ['DRUG_DB_PATH'] = db_path
+    logging.disable(logging.WARNING)
+    try:
+        session = session_class(session_id, timeout, random.Random(seed + session_id))
+        return session.run(iterations)
+    except Exception:
+        return [('(session)', 'crash', 0.0, traceback.format_exc(limit=3))]
+
+
+# ===================================================================
+# التقرير
+# ===================================================================
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    groups = defaultdict(list)
+    for page_function, action, seconds, error in samples:
+        groups[(page_function, action)].append((seconds, error))
+
+    report = {}
+    for (page_function, action), entries in sorted(groups.items()):
+        latencies = sorted(seconds * 1000 for seconds, error in entries if error is None)
+        errors = [error for _, error in entries if error is not None]
+        report[f"{page_function}:{action}"] = {
+            'count': len(entries),
+            'errors': len(errors),
+            'error_rate': round(len(errors) / len(entries), 4),
+            'p50_ms': round(percentile(latencies, 0.50), 1),
+            'p95_ms': round(percentile(latencies, 0.95), 1),
+            'p99_ms': round(percentile(latencies, 0.99), 1),
+            'max_ms': round(latencies[-1], 1) if latencies else 0.0,
+            'sample_error': errors[0][:300] if errors else None,
+        }
+    total = len(samples)
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+        'pages': report,
+    }
+
+
+def print_report(summary):
+    print(f"\n{'الصفحة:الإجراء':<48}{'عدد':>6}{'أخطاء':>8}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, stats in summary['pages'].items():
+        print(f"{name:<48}{stats['count']:>6}{stats['error_rate']:>8.1%}"
+              f"{stats['p50_ms']:>10.0f}{stats['p95_ms']:>10.0f}{stats['p99_ms']:>10.0f}")
+        if stats['sample_error']:
+            print(f"    ❌ {stats['sample_error'].splitlines()[0]}")
+    print(f"\nالطلبات: {summary['requests']} في {summary['elapsed_s']} ث "
+          f"({summary['throughput_rps']} طلب/ث)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="اختبار تحميل بجلسات متزامنة")
+    parser.add_argument('--sessions', type=int, default=10, help="عدد الجلسات المتزامنة")
+    parser.add_argument('--iterations', type=int, default=3, help="عدد تكرارات السيناريو لكل جلسة")
+    parser.add_argument('--size', type=int, default=1000, help="حجم الكتالوج المولد")
+    parser.add_argument('--mode', choices=['process', 'thread'], default='process',
+                        help="process: صفحات كاملة عبر AppTest، thread: دوال البيانات في عملية واحدة")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--out', help="ملف JSON للنتائج")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    workdir = tempfile.mkdtemp(prefix="load-test-")
+    db_path = os.path.join(workdir, 'drug_database.db')
+    shutil.copy(ensure_generated(args.size, args.seed), db_path)
+
+    print(f"🚦 {args.sessions} جلسة × {args.iterations} تكرار ({args.mode}) على {args.size:,} دواء")
+    session_args = [(i, args.iterations, args.timeout, args.seed, db_path) for i in range(args.sessions)]
+    started = time.perf_counter()
+    try:
+        if args.mode == 'thread':
+            os.environ['DRUG_DB_PATH'] = db_path
+            with ThreadPoolExecutor(args.sessions) as pool:
+                results = list(pool.map(lambda a: run_session(*a, session_class=DataSession), session_args))
+        else:
+            with multiprocessing.get_context('spawn').Pool(args.sessions) as pool:
+                results = pool.starmap(run_session, session_args)
+    finally:
+        elapsed = time.perf_counter() - started
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    samples = [sample for session_samples in results for sample in session_samples]
+    summary = summarize(samples, elapsed)
+    summary['config'] = vars(args)
+    print_report(summary)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"💾 {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+قياس التشغيلات وتواريخ الانتهاء - Lots & Expiry Benchmark
+
+على نسخة من قاعدة بيانات مولدة:
+1. أحداث استلام بتشغيلات وصرف دون تشغيلة عبر record_movements على دفعات
+   (توزيع FEFO على التشغيلات)، ويقيس الأحداث في الثانية
+2. تشغيلات صناعية بعدد --lots تُكتب في stock_lots مباشرة، معظمها مستهلك
+   (--consumed) كما يحدث مع تراكم الاستلامات
+3. زمن "تنتهي خلال N يوم" من الفهرس الجزئي مقابل مسح الجدول كاملًا
+   (NOT INDEXED)، مع التحقق من تطابق النتيجتين
+
+الاستخدام:
+    python benchmarks/lots_bench.py --size 10000 --lots 300000
+    python benchmarks/lots_bench.py --size 50000 --lots 1000000 --out bench_lots.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import inventory  # noqa: E402
+import lots  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+from generate_data import DEFAULT_SEED, ensure_generated  # noqa: E402
+
+BATCH_ROWS = 10000
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, round(statistics.median(timings) * 1000, 3)
+
+
+def full_scan(conn, days):
+    """نفس نتيجة lots.expiring بمسح stock_lots كاملًا دون الفهرس"""
+    today = date.today()
+    return conn.execute(
+        "SELECT l.id, l.medication_id, m.trade_name, m.generic_name, l.warehouse_id, w.name, l.lot_number, "
+        "l.expiry_date, l.quantity, "
+        "CAST(julianday(l.expiry_date) - julianday('now', 'localtime', 'start of day') AS INTEGER) "
+        "FROM stock_lots AS l NOT INDEXED JOIN medications m ON m.id = l.medication_id "
+        "JOIN warehouses w ON w.id = l.warehouse_id "
+        "WHERE l.quantity > 0 AND l.expiry_date >= ? AND l.expiry_date <= ? ORDER BY l.expiry_date, l.id",
+        (today.isoformat(), (today + timedelta(days=days)).isoformat())
+    ).fetchall()
+
+
+# ===================================================================
+# الكتابة
+# ===================================================================
+def bench_ingest(conn, ids, count, rng):
+    """استلام بتشغيلة لكل دواء ثم صرف دون تشغيلة، على دفعات FLUSH_EVENTS"""
+    today = date.today()
+    events = []
+    for i in range(count):
+        medication_id = rng.choice(ids)
+        if rng.random() < 0.2:
+            expiry = today + timedelta(days=rng.randint(-30, 720))
+            events.append({'medication_id': medication_id, 'kind': 'receipt', 'quantity': rng.randint(10, 100),
+                           'lot': f"B{i}", 'expiry': expiry.isoformat(), 'reference': f"GRN-{i}"})
+        else:
+            events.append({'medication_id': medication_id, 'kind': 'dispense', 'quantity': rng.randint(1, 5),
+                           'reference': f"POS-{i}"})
+    started = time.perf_counter()
+    for start in range(0, count, inventory.FLUSH_EVENTS):
+        with conn:
+            inventory.record_movements(conn, events[start:start + inventory.FLUSH_EVENTS])
+    return count / (time.perf_counter() - started)
+
+
+def load_lots(conn, ids, warehouse_ids, count, consumed, rng):
+    """تشغيلات صناعية بتواريخ انتهاء على ثلاث سنوات حول اليوم، نسبة consumed منها مستهلكة"""
+    today = date.today()
+    now_ms = int(time.time() * 1000)
+    started = time.perf_counter()
+    for start in range(0, count, BATCH_ROWS):
+        batch = []
+        for i in range(start, min(count, start + BATCH_ROWS)):
+            expiry = today + timedelta(days=rng.randint(-365, 730))
+            quantity = 0 if rng.random() < consumed else rng.randint(1, 200)
+            batch.append((rng.choice(ids), rng.choice(warehouse_ids), f"S{i}", expiry.isoformat(), quantity, now_ms))
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO stock_lots (medication_id, warehouse_id, lot_number, expiry_date, quantity, received_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", batch
+            )
+        print(f"\r  {min(count, start + BATCH_ROWS):>10,} / {count:,}", end='', flush=True)
+    print()
+    return count / (time.perf_counter() - started)
+
+
+# ===================================================================
+# التشغيل
+# ===================================================================
+def main():
+    parser = argparse.ArgumentParser(description="توزيع FEFO وزمن استعلام التشغيلات التي تنتهي قريبًا")
+    parser.add_argument('--size', type=int, default=10000, help="حجم الكتالوج المولد")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--events', type=int, default=20000, help="أحداث الاستلام والصرف عبر record_movements")
+    parser.add_argument('--lots', type=int, default=300000, help="التشغيلات الصناعية")
+    parser.add_argument('--consumed', type=float, default=0.9, help="نسبة التشغيلات المستهلكة (كمية 0)")
+    parser.add_argument('--days', default="30,90,365")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', help="ملف JSON للنتائج")
+    args = parser.parse_args()
+
+    source_db = ensure_generated(args.size, args.seed)
+    workdir = tempfile.mkdtemp(prefix="lots-bench-")
+    db_path = os.path.join(workdir, 'lots.db')
+    shutil.copy(source_db, db_path)
+    rng = random.Random(args.seed)
+    report = {'size': args.size, 'lots': args.lots, 'consumed': args.consumed}
+    try:
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        migrate(conn)
+        ids = [row[0] for row in conn.execute("SELECT id FROM medications")]
+        print(f"🧪 {args.size:,} دواء")
+
+        report['ingest_events_per_second'] = round(bench_ingest(conn, ids, args.events, rng))
+        movements = conn.execute("SELECT COUNT(*) FROM stock_movements").fetchone()[0]
+        print(f"📥 record_movements مع FEFO: {report['ingest_events_per_second']:,} حدث/ث "
+              f"({args.events:,} حدث -> {movements:,} حركة)")
+
+        warehouse_ids = [row[0] for row in conn.execute("SELECT id FROM warehouses")]
+        report['insert_lots_per_second'] = round(load_lots(conn, ids, warehouse_ids, args.lots, args.consumed, rng))
+        total, open_lots = conn.execute("SELECT COUNT(*), COUNT(*) FILTER (WHERE quantity > 0) FROM stock_lots").fetchone()
+        report['total_lots'], report['open_lots'] = total, open_lots
+        report['db_mb'] = round(os.path.getsize(db_path) / 1024 / 1024, 1)
+        print(f"💾 {total:,} تشغيلة ({open_lots:,} بكمية) - حجم الملف {report['db_mb']} MB")
+
+        plan = " | ".join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM stock_lots_view WHERE expiry_date <= ? AND expiry_date >= ? "
+            "ORDER BY expiry_date, id", ('2100-01-01', '2000-01-01')))
+        report['plan'] = plan
+        print(f"🔎 {plan}")
+
+        report['queries'] = []
+        print(f"\n{'الأيام':>8}{'التشغيلات':>12}{'الفهرس ms':>12}{'المسح الكامل ms':>18}")
+        for days in (int(d) for d in args.days.split(',')):
+            indexed, indexed_ms = timed(lambda: lots.expiring(conn, days), args.repeat)
+            scanned, scan_ms = timed(lambda: full_scan(conn, days), max(1, args.repeat // 2))
+            matches = indexed == scanned
+            report['queries'].append({'days': days, 'lots': len(indexed), 'indexed_ms': indexed_ms,
+                                      'full_scan_ms': scan_ms, 'matches_scan': matches})
+            marker = "" if matches else "  ⚠️ نتائج مختلفة"
+            print(f"{days:>8}{len(indexed):>12,}{indexed_ms:>12.2f}{scan_ms:>18.1f}{marker}")
+        conn.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.out}")
+
+
+if __name__ == '__main__':
+    main()
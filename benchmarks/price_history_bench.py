@@ -0,0 +1,177 @@
+"""
+قياس سجل الأسعار - Price History Benchmark
+
+على نسخة من قاعدة بيانات مولدة:
+1. تغييرات أسعار عبر UPDATE على medications (المسار الفعلي: محفز السجل ثم
+   محفز التجميعات) على دفعات داخل معاملة، ويقيس عدد النقاط في الثانية
+2. سجل تاريخي صناعي بعدد --points نقطة موزعة على --years سنة، يُكتب في
+   price_history مباشرة (محفز التجميعات يعمل كالمعتاد)
+3. زمن رسم الاتجاه لدواء وفئة وشركة: من جداول التجميع مقابل GROUP BY على
+   السجل الخام، مع التحقق من تطابق النتيجتين
+
+الاستخدام:
+    python benchmarks/price_history_bench.py --size 10000 --points 1000000
+    python benchmarks/price_history_bench.py --size 50000 --points 3000000 --out bench_prices.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import price_history  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+from generate_data import DEFAULT_SEED, ensure_generated  # noqa: E402
+
+BATCH_ROWS = 10000
+MS_PER_YEAR = 365 * price_history.MS_PER_DAY
+
+# GROUP BY على السجل الخام: ما يلزم دون جداول التجميع
+RAW_TREND = {
+    'medication': "WHERE h.medication_id = ?",
+    'category': "JOIN medications m ON m.id = h.medication_id WHERE m.category_id = ?",
+    'manufacturer': "JOIN medications m ON m.id = h.medication_id WHERE m.manufacturer_id = ?",
+}
+
+
+def raw_trend(conn, dimension, key_id):
+    rows = conn.execute(
+        "SELECT CAST(strftime('%Y%m', h.changed_at / 1000, 'unixepoch') AS INTEGER) AS month, "
+        "COUNT(*), SUM(h.price_fils), MIN(h.price_fils), MAX(h.price_fils) "
+        f"FROM price_history h {RAW_TREND[dimension]} AND h.price_fils IS NOT NULL "
+        "GROUP BY month ORDER BY month",
+        (key_id,)
+    ).fetchall()
+    return [(price_history.period_label('month', month), n, total / price_history.FILS_PER_DINAR / n,
+             low / price_history.FILS_PER_DINAR, high / price_history.FILS_PER_DINAR)
+            for month, n, total, low, high in rows]
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, round(statistics.median(timings) * 1000, 3)
+
+
+# ===================================================================
+# الكتابة
+# ===================================================================
+def bench_updates(conn, ids, count, rng):
+    """تغييرات أسعار عبر UPDATE على دفعات وإرجاع عدد النقاط في الثانية"""
+    started = time.perf_counter()
+    for start in range(0, count, BATCH_ROWS):
+        batch = [(round(rng.uniform(0.5, 100), 3), rng.choice(ids))
+                 for _ in range(min(BATCH_ROWS, count - start))]
+        with conn:
+            conn.executemany("UPDATE medications SET price = ? WHERE id = ?", batch)
+    return count / (time.perf_counter() - started)
+
+
+def load_history(conn, ids, count, years, rng):
+    """سجل صناعي بأوقات متزايدة موزعة على years سنة حتى الآن"""
+    now_ms = int(time.time() * 1000)
+    step = max(1, int(years * MS_PER_YEAR / count))
+    first = now_ms - years * MS_PER_YEAR
+    started = time.perf_counter()
+    for start in range(0, count, BATCH_ROWS):
+        batch = []
+        for i in range(start, min(count, start + BATCH_ROWS)):
+            price = rng.randint(500, 100000)
+            batch.append((rng.choice(ids), first + i * step, price, price * 116 // 100))
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO price_history (medication_id, changed_at, price_fils, price_with_tax_fils) "
+                "VALUES (?, ?, ?, ?)", batch
+            )
+        print(f"\r  {min(count, start + BATCH_ROWS):>10,} / {count:,}", end='', flush=True)
+    print()
+    return count / (time.perf_counter() - started)
+
+
+# ===================================================================
+# التشغيل
+# ===================================================================
+def main():
+    parser = argparse.ArgumentParser(description="كتابة سجل الأسعار وزمن رسوم الاتجاه")
+    parser.add_argument('--size', type=int, default=10000, help="حجم الكتالوج المولد")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--points', type=int, default=1000000, help="نقاط السجل الصناعي")
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--updates', type=int, default=50000, help="تغييرات الأسعار عبر UPDATE")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', help="ملف JSON للنتائج")
+    args = parser.parse_args()
+
+    source_db = ensure_generated(args.size, args.seed)
+    workdir = tempfile.mkdtemp(prefix="price-bench-")
+    db_path = os.path.join(workdir, 'prices.db')
+    shutil.copy(source_db, db_path)
+    rng = random.Random(args.seed)
+    report = {'size': args.size, 'points': args.points, 'years': args.years}
+    try:
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        started = time.perf_counter()
+        migrate(conn)
+        report['migrate_seconds'] = round(time.perf_counter() - started, 2)
+        ids = [row[0] for row in conn.execute("SELECT id FROM medications")]
+        print(f"🧪 {args.size:,} دواء - الترحيل وبذر السجل {report['migrate_seconds']} ث")
+
+        report['update_points_per_second'] = round(bench_updates(conn, ids, args.updates, rng))
+        print(f"✏️ UPDATE price: {report['update_points_per_second']:,} نقطة/ث ({args.updates:,} تغيير)")
+        report['insert_points_per_second'] = round(load_history(conn, ids, args.points, args.years, rng))
+        print(f"📥 السجل الصناعي: {report['insert_points_per_second']:,} نقطة/ث")
+
+        total = conn.execute("SELECT COUNT(*) FROM price_history").fetchone()[0]
+        report['history_points'] = total
+        report['db_mb'] = round(os.path.getsize(db_path) / 1024 / 1024, 1)
+        print(f"💾 {total:,} نقطة - حجم الملف {report['db_mb']} MB")
+
+        # أكثر دواء/فئة/شركة نقاطًا: أسوأ حالة للمسح الخام
+        keys = {
+            'medication': "SELECT medication_id FROM price_history GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1",
+            'category': "SELECT category_id FROM medications GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1",
+            'manufacturer': "SELECT manufacturer_id FROM medications GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1",
+        }
+        report['queries'] = []
+        print(f"\n{'البعد':<14}{'الأشهر':>8}{'التجميعات ms':>16}{'المسح الخام ms':>18}{'اليومي ms':>12}")
+        for dimension, sql in keys.items():
+            key_id = conn.execute(sql).fetchone()[0]
+            aggregated, aggregate_ms = timed(
+                lambda: price_history.trend(conn, dimension, key_id, 'month'), args.repeat)
+            _, daily_ms = timed(lambda: price_history.trend(conn, dimension, key_id, 'day'), args.repeat)
+            raw, raw_ms = timed(lambda: raw_trend(conn, dimension, key_id), max(1, args.repeat // 2))
+            matches = [row[:5] for row in aggregated] == [
+                (label, n, mean, low, high) for label, n, mean, low, high in raw
+            ]
+            report['queries'].append({'dimension': dimension, 'key_id': key_id, 'months': len(aggregated),
+                                      'aggregate_ms': aggregate_ms, 'daily_ms': daily_ms, 'raw_ms': raw_ms,
+                                      'matches_raw': matches})
+            marker = "" if matches else "  ⚠️ نتائج مختلفة"
+            print(f"{dimension:<14}{len(aggregated):>8}{aggregate_ms:>16.3f}{raw_ms:>18.1f}{daily_ms:>12.3f}{marker}")
+        conn.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+قياس زمن بدء التشغيل - Cold Start Benchmark
+
+يقيس زمن أول عرض للصفحة الرئيسية (time-to-first-render) في عملية Python جديدة
+في كل تكرار، فتشمل النتيجة كلفة استيراد app.py والوحدات التي يحتاجها أول
+تشغيل. يسجل أيضًا المكتبات الثقيلة ووحدات الصفحات التي تم استيرادها حتى تلك
+اللحظة، وزمن أول انتقال إلى صفحة أخرى (استيراد وحدتها من views/ عند الطلب).
+
+الاستخدام:
+    python benchmarks/startup_bench.py --repeat 5 --out startup.json
+    python benchmarks/startup_bench.py --repeat 5 --baseline startup.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+APP_PATH = os.path.join(ROOT, 'app.py')
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'openpyxl')
+DEFAULT_NEXT_PAGE = "💊 عرض الأدوية"
+REGRESSION_THRESHOLD = 0.20   # تراجع أكبر من 20% في الوسيط يعتبر انحدارًا
+
+
+# ===================================================================
+# القياس داخل العملية الجديدة
+# ===================================================================
+def measure_child(next_page, timeout):
+    """يعمل داخل عملية جديدة ويطبع النتيجة كـ JSON على stdout"""
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    streamlit_ready = time.perf_counter()
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.run()
+    first_render = time.perf_counter()
+    result = {
+        'streamlit_import_ms': (streamlit_ready - started) * 1000,
+        'first_render_ms': (first_render - streamlit_ready) * 1000,
+        'total_ms': (first_render - started) * 1000,
+        'error': at.exception[0].message if at.exception else None,
+        'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules],
+        'page_modules': sorted(name for name in sys.modules if name.startswith('views.')),
+    }
+
+    if next_page:
+        at.sidebar.radio[0].set_value(next_page)
+        navigation_started = time.perf_counter()
+        at.run()
+        result['next_page'] = next_page
+        result['next_page_ms'] = (time.perf_counter() - navigation_started) * 1000
+        if at.exception and not result['error']:
+            result['error'] = at.exception[0].message
+
+    print(json.dumps(result, ensure_ascii=False))
+
+
+def run_once(db_path, next_page, timeout):
+    env = dict(os.environ, DRUG_DB_PATH=db_path)
+    args = [sys.executable, os.path.abspath(__file__), '--child', '--timeout', str(timeout)]
+    if next_page:
+        args += ['--next-page', next_page]
+    completed = subprocess.run(args, env=env, cwd=ROOT, capture_output=True, text=True, timeout=timeout * 2)
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "فشل القياس")
+    return json.loads(lines[-1])
+
+
+# ===================================================================
+# التقرير
+# ===================================================================
+def summarize(runs):
+    summary = {}
+    for key in ('streamlit_import_ms', 'first_render_ms', 'total_ms', 'next_page_ms'):
+        values = sorted(run[key] for run in runs if key in run)
+        if values:
+            summary[key] = {
+                'median': round(statistics.median(values), 1),
+                'min': round(values[0], 1),
+                'max': round(values[-1], 1),
+            }
+    last = runs[-1]
+    summary['heavy_modules'] = last['heavy_modules']
+    summary['page_modules'] = last['page_modules']
+    summary['errors'] = [run['error'] for run in runs if run.get('error')]
+    return summary
+
+
+def print_summary(summary):
+    labels = {
+        'streamlit_import_ms': "استيراد Streamlit",
+        'first_render_ms': "أول عرض للصفحة الرئيسية",
+        'total_ms': "الإجمالي حتى أول عرض",
+        'next_page_ms': "أول انتقال إلى صفحة أخرى",
+    }
+    print(f"\n{'المرحلة':<32}{'الوسيط':>10}{'الأدنى':>10}{'الأعلى':>10}")
+    for key, label in labels.items():
+        if key in summary:
+            stats = summary[key]
+            print(f"{label:<32}{stats['median']:>10.0f}{stats['min']:>10.0f}{stats['max']:>10.0f}")
+    print(f"\nالمكتبات الثقيلة المحملة عند أول عرض: {', '.join(summary['heavy_modules']) or 'لا شيء'}")
+    print(f"وحدات الصفحات المحملة: {', '.join(summary['page_modules']) or 'لا شيء'}")
+    for error in summary['errors'][:3]:
+        print(f"❌ {error}")
+
+
+def compare(summary, baseline, threshold=REGRESSION_THRESHOLD):
+    """مقارنة الوسيط مع ملف أساس؛ يعيد عدد الانحدارات"""
+    regressions = 0
+    print("\n📊 المقارنة مع الأساس:")
+    for key in ('first_render_ms', 'total_ms', 'next_page_ms'):
+        if key not in summary or key not in baseline:
+            continue
+        old, new = baseline[key]['median'], summary[key]['median']
+        change = (new - old) / old if old else 0.0
+        marker = "🔴" if change > threshold else "🟢" if change < -threshold else "⚪"
+        regressions += change > threshold
+        print(f"  {marker} {key}: {old:.0f} → {new:.0f} ms ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس زمن أول عرض للصفحة الرئيسية في عملية جديدة")
+    parser.add_argument('--repeat', type=int, default=5, help="عدد العمليات الجديدة المقاسة")
+    parser.add_argument('--size', type=int, default=1000, help="حجم الكتالوج المولد")
+    parser.add_argument('--seed', type=int, help="بذرة المولد (الافتراضي نفس بذرة generate_data)")
+    parser.add_argument('--next-page', default=DEFAULT_NEXT_PAGE,
+                        help="صفحة يُقاس أول انتقال إليها بعد الرئيسية (نص فارغ لتخطيها)")
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--out', help="ملف JSON للنتائج")
+    parser.add_argument('--baseline', help="ملف JSON سابق للمقارنة (رمز خروج 1 عند الانحدار)")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure_child(args.next_page, args.timeout)
+        return
+
+    # مولد البيانات يستورد الترحيلات (ومعها pandas في النسخ السابقة): يُستورد في العملية
+    # الرئيسية فقط حتى لا يسبق ساعة القياس في العملية المقاسة
+    from generate_data import DEFAULT_SEED, ensure_generated
+    seed = DEFAULT_SEED if args.seed is None else args.seed
+
+    workdir = tempfile.mkdtemp(prefix="startup-bench-")
+    try:
+        db_path = os.path.join(workdir, 'drug_database.db')
+        shutil.copy(ensure_generated(args.size, seed), db_path)
+        # تشغيل أول غير مقاس: تطبيق الترحيلات وتسخين ذاكرة نظام الملفات
+        run_once(db_path, None, args.timeout)
+
+        print(f"🚀 {args.repeat} تشغيل بارد على {args.size:,} دواء")
+        runs = []
+        for i in range(args.repeat):
+            run = run_once(db_path, args.next_page, args.timeout)
+            runs.append(run)
+            print(f"  {i + 1}: {run['total_ms']:.0f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = summarize(runs)
+    print_summary(summary)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'size': args.size, 'repeat': args.repeat, **summary}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.out}")
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(summary, baseline):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+لقطة الكتالوج المشتركة - Shared Memory-Mapped Catalog Snapshot
+
+عند تشغيل عدة عمليات Streamlit، تحتفظ كل عملية بنسخة خاصة من جدول الأدوية.
+هذه الوحدة تكتب الكتالوج المدمج إلى ملف Arrow IPC غير مضغوط لكل إصدار بيانات،
+وتقوم كل عملية بربطه بالذاكرة (memory-map) دون نسخ، فتتشارك جميع العمليات
+نفس صفحات الذاكرة من ذاكرة نظام التشغيل المؤقتة ويبدأ العامل الجديد فورًا.
+"""
+
+import os
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pyarrow اختياري - بدونه تعمل الصفحات من قاعدة البيانات مباشرة
+    pa = None
+
+from change_feed import get_data_version
+
+# ===================================================================
+# الإعدادات
+# ===================================================================
+CURRENT_POINTER = "CURRENT"      # ملف يحتوي اسم آخر لقطة مكتملة
+BUILD_LOCK = "build.lock"        # يمنع بناء نفس اللقطة من أكثر من عملية
+KEEP_SNAPSHOTS = 3               # عدد اللقطات القديمة المحتفظ بها للعمليات التي ما زالت تستخدمها
+STALE_LOCK_SECONDS = 300         # قفل بناء أقدم من هذه المدة يعتبر متروكًا من عملية توقفت
+
+
+def is_available():
+    """هل مكتبة pyarrow متوفرة"""
+    return pa is not None
+
+
+def _snapshot_name(version):
+    return f"catalog-v{version:012d}.arrow"
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _lock_identity(stat):
+    # رقم inode وحده قد يُعاد استخدامه لقفل جديد بعد الحذف
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _remove_lock(lock_path, identity):
+    """حذف القفل فقط إذا كان هو نفسه القفل identity
+
+    القفل يُنقل أولاً باسم فريد (rename ذري) ثم يُقارن، فإذا كانت عملية أخرى قد
+    أنشأت قفلاً جديدًا بعد الفحص يُعاد إلى مكانه بدل حذفه.
+    """
+    claimed = f"{lock_path}.remove-{os.getpid()}-{threading.get_ident()}"
+    try:
+        os.rename(lock_path, claimed)
+    except FileNotFoundError:
+        return
+    if _lock_identity(os.stat(claimed)) != identity:
+        try:
+            os.link(claimed, lock_path)
+        except FileExistsError:
+            pass
+    os.remove(claimed)
+
+
+def read_current_pointer(directory):
+    """قراءة (version, path) لآخر لقطة مكتملة أو None"""
+    try:
+        with open(os.path.join(directory, CURRENT_POINTER), 'r', encoding='utf-8') as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    version = int(name[len("catalog-v"):-len(".arrow")])
+    return version, os.path.join(directory, name)
+
+
+# ===================================================================
+# بناء اللقطة
+# ===================================================================
+def build_snapshot(conn, select_sql, directory, order_by="ORDER BY m.id DESC"):
+    """كتابة لقطة للإصدار الحالي إذا لم تكن موجودة وإرجاع (version, path)
+
+    يعيد None إذا كانت عملية أخرى تبني لقطة في نفس الوقت.
+    """
+    os.makedirs(directory, exist_ok=True)
+    lock_path = os.path.join(directory, BUILD_LOCK)
+    try:
+        stat = os.stat(lock_path)
+        if time.time() - stat.st_mtime > STALE_LOCK_SECONDS:
+            _remove_lock(lock_path, _lock_identity(stat))
+    except OSError:
+        pass
+    try:
+        lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return None
+    os.write(lock_fd, str(os.getpid()).encode())
+    identity = _lock_identity(os.fstat(lock_fd))
+
+    try:
+        # قراءة الإصدار والبيانات داخل نفس معاملة القراءة
+        conn.execute("BEGIN")
+        try:
+            version = get_data_version(conn)[0]
+            path = os.path.join(directory, _snapshot_name(version))
+            if not os.path.exists(path):
+                df = pd.read_sql_query(f"{select_sql}\n{order_by}", conn)
+        finally:
+            conn.rollback()
+
+        if not os.path.exists(path):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            tmp_path = f"{path}.tmp-{os.getpid()}"
+            # بدون ضغط حتى يمكن قراءة الأعمدة مباشرة من الملف المربوط بالذاكرة
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+
+        _write_atomic(os.path.join(directory, CURRENT_POINTER), os.path.basename(path))
+        _prune_snapshots(directory)
+        return version, path
+    finally:
+        os.close(lock_fd)
+        # إذا اعتُبر القفل متروكًا أثناء بناء طويل فقد يكون القفل الحالي لعملية أخرى
+        _remove_lock(lock_path, identity)
+
+
+def _prune_snapshots(directory):
+    """حذف اللقطات الأقدم (العمليات التي ربطتها بالذاكرة تحتفظ بها حتى تحررها)"""
+    snapshots = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith("catalog-v") and name.endswith(".arrow")
+    )
+    for name in snapshots[:-KEEP_SNAPSHOTS]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+# ===================================================================
+# قراءة اللقطة
+# ===================================================================
+def load_snapshot(path):
+    """ربط ملف اللقطة بالذاكرة وإرجاع جدول Arrow دون نسخ البيانات"""
+    source = pa.memory_map(path, 'r')
+    return pa.ipc.open_file(source).read_all()
+
+
+def snapshot_to_pandas(table):
+    """تحويل الجدول إلى DataFrame تعتمد أعمدته على ذاكرة Arrow نفسها (ArrowDtype)"""
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+class SnapshotCatalog:
+    """كتالوج الأدوية من آخر لقطة مربوطة بالذاكرة
+
+    يقارن إصدار اللقطة بإصدار قاعدة البيانات في كل طلب (قراءة صف واحد)،
+    وعند التأخر يبني العامل لقطة جديدة أو يعيد None ليستخدم المستدعي
+    قاعدة البيانات مباشرة إذا كانت عملية أخرى تبنيها.
+    """
+
+    def __init__(self, directory, select_sql, order_by="ORDER BY m.id DESC"):
+        self.directory = directory
+        self.select_sql = select_sql
+        self.order_by = order_by
+        self.version = None
+        self.df = None
+        self.stats = {'hits': 0, 'remaps': 0, 'builds': 0, 'fallbacks': 0}
+        self._lock = threading.Lock()
+
+    def get(self, conn):
+        """إرجاع DataFrame للإصدار الحالي أو None عند عدم توفر لقطة محدثة"""
+        with self._lock:
+            db_version = get_data_version(conn)[0]
+            if self.version == db_version:
+                self.stats['hits'] += 1
+                return self.df
+
+            current = read_current_pointer(self.directory)
+            if current is None or current[0] != db_version:
+                built = build_snapshot(conn, self.select_sql, self.directory, self.order_by)
+                if built is None:
+                    self.stats['fallbacks'] += 1
+                    return None
+                self.stats['builds'] += 1
+                current = built
+
+            version, path = current
+            self.df = snapshot_to_pandas(load_snapshot(path))
+            self.version = version
+            self.stats['remaps'] += 1
+            return self.df
@@ -0,0 +1,254 @@
+"""
+سجل التغييرات - Change Feed
+
+رقم إصدار عام للبيانات يزداد مع كل تعديل على الأدوية أو الجداول المرجعية،
+وجدول medication_changes يحفظ آخر إصدار تغير فيه كل دواء (مع علامة حذف
+للأدوية المحذوفة - tombstones). يسمح ذلك للذاكرات المؤقتة في هذه العملية
+وفي العمليات الأخرى بجلب الصفوف المتغيرة فقط منذ إصدار معين وتطبيقها على
+DataFrame الموجود في الذاكرة بدلاً من إعادة تحميل الجدول كاملاً.
+"""
+
+import threading
+from collections import namedtuple
+
+# pandas يُستورد داخل الدوال التي تحتاجه: الترحيلات وموجه الصفحات يستوردون هذه
+# الوحدة عند بدء التشغيل من أجل نصوص المخطط ورقم الإصدار فقط
+
+# سجلات الحذف (tombstones) الأقدم من هذه المدة تُحذف، والذاكرة المؤقتة التي لم
+# تتزامن منذ ذلك الحين تقوم بتحميل كامل
+TOMBSTONE_RETENTION_DAYS = 7
+
+# ===================================================================
+# مخطط قاعدة البيانات
+# ===================================================================
+# محفز update_medication_timestamp ينفذ UPDATE متداخلاً يغير updated_at فقط، وهذا
+# المحفز يعمل له أيضًا: الشرط يقصر رفع الإصدار على التعديل الخارجي (مرة لكل تعديل)
+CHANGE_UPDATE_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS medications_change_update
+AFTER UPDATE ON medications
+FOR EACH ROW
+WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE id = 1;
+    INSERT OR REPLACE INTO medication_changes (medication_id, version, op)
+    VALUES (NEW.id, (SELECT version FROM data_version WHERE id = 1), 'U');
+END;
+"""
+
+CHANGE_FEED_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL DEFAULT 0,         -- يزداد مع كل تغيير
+    lookup_version INTEGER NOT NULL DEFAULT 0,  -- يزداد مع تغييرات الجداول المرجعية فقط
+    min_version INTEGER NOT NULL DEFAULT 0      -- أقدم إصدار ما زال سجله محفوظًا
+);
+INSERT OR IGNORE INTO data_version (id) VALUES (1);
+
+-- آخر تغيير لكل دواء: op = 'I' إضافة، 'U' تعديل، 'D' حذف (tombstone)
+CREATE TABLE IF NOT EXISTS medication_changes (
+    medication_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL,
+    op CHAR(1) NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_medication_changes_version ON medication_changes(version);
+
+CREATE VIEW IF NOT EXISTS medication_tombstones AS
+SELECT medication_id, version, changed_at AS deleted_at
+FROM medication_changes WHERE op = 'D';
+
+CREATE TRIGGER IF NOT EXISTS medications_change_insert
+AFTER INSERT ON medications
+FOR EACH ROW
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE id = 1;
+    INSERT OR REPLACE INTO medication_changes (medication_id, version, op)
+    VALUES (NEW.id, (SELECT version FROM data_version WHERE id = 1), 'I');
+END;
+
+{CHANGE_UPDATE_TRIGGER}
+CREATE TRIGGER IF NOT EXISTS medications_change_delete
+AFTER DELETE ON medications
+FOR EACH ROW
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE id = 1;
+    INSERT OR REPLACE INTO medication_changes (medication_id, version, op)
+    VALUES (OLD.id, (SELECT version FROM data_version WHERE id = 1), 'D');
+END;
+"""
+
+# الجداول المرجعية: أي تغيير فيها يغير الأعمدة المدمجة (الأسماء) لعدد كبير من
+# الأدوية، لذلك يكفي زيادة lookup_version لتقوم الذاكرات المؤقتة بتحميل كامل
+LOOKUP_TABLES = ('categories', 'drug_types', 'manufacturers')
+
+LOOKUP_TRIGGERS = "\n".join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS {table}_change_{event.lower()}
+AFTER {event} ON {table}
+FOR EACH ROW
+BEGIN
+    UPDATE data_version SET version = version + 1, lookup_version = lookup_version + 1 WHERE id = 1;
+END;
+"""
+    for table in LOOKUP_TABLES
+    for event in ('INSERT', 'UPDATE', 'DELETE')
+)
+
+# يُطبق المخطط أعلاه عبر الترحيل رقم 2 في migrations.py
+
+
+# ===================================================================
+# قراءة التغييرات
+# ===================================================================
+ChangeSet = namedtuple('ChangeSet', ['version', 'lookup_version', 'upserts', 'deleted_ids', 'full_reload'])
+
+
+def get_data_version(conn):
+    """قراءة الإصدار الحالي (version, lookup_version, min_version) بقراءة صف واحد"""
+    row = conn.execute(
+        "SELECT version, lookup_version, min_version FROM data_version WHERE id = 1"
+    ).fetchone()
+    return tuple(row) if row else (0, 0, 0)
+
+
+def get_changes_since(conn, since_version, select_sql, since_lookup_version=None):
+    """جلب الأدوية التي تغيرت بعد since_version والمعرفات المحذوفة
+
+    select_sql: استعلام SELECT للأدوية (مع الأسماء المدمجة) دون WHERE أو ORDER BY،
+    ويجب أن يستخدم الاسم المستعار m لجدول medications.
+    full_reload يكون True إذا تم حذف جزء من السجل أقدم من since_version أو تغيرت
+    الجداول المرجعية منذ since_lookup_version، وعندها يجب التحميل الكامل.
+    """
+    version, lookup_version, min_version = get_data_version(conn)
+    full_reload = since_version < min_version or (
+        since_lookup_version is not None and since_lookup_version != lookup_version
+    )
+    if full_reload:
+        return ChangeSet(version, lookup_version, None, [], True)
+
+    import pandas as pd
+    upserts = pd.read_sql_query(
+        f"""{select_sql}
+        WHERE m.id IN (
+            SELECT medication_id FROM medication_changes
+            WHERE version > ? AND version <= ? AND op != 'D'
+        )""",
+        conn,
+        params=(since_version, version),
+    )
+    deleted_ids = [row[0] for row in conn.execute(
+        "SELECT medication_id FROM medication_changes WHERE version > ? AND version <= ? AND op = 'D'",
+        (since_version, version),
+    ).fetchall()]
+    return ChangeSet(version, lookup_version, upserts, deleted_ids, False)
+
+
+def apply_changes(df, changes):
+    """تطبيق مجموعة تغييرات على DataFrame (مرتب تنازليًا حسب id) وإرجاع نسخة جديدة"""
+    stale_ids = set(changes.deleted_ids)
+    if changes.upserts is not None and len(changes.upserts) > 0:
+        stale_ids.update(changes.upserts['id'].tolist())
+
+    kept = df[~df['id'].isin(stale_ids)] if stale_ids else df
+    if changes.upserts is not None and len(changes.upserts) > 0:
+        upserts = changes.upserts
+        # توحيد أنواع الأعمدة مع النسخة الحالية (الأعمدة الفارغة تُقرأ كـ object)
+        for column, dtype in df.dtypes.items():
+            if column in upserts and upserts[column].dtype != dtype:
+                try:
+                    upserts[column] = upserts[column].astype(dtype)
+                except (TypeError, ValueError):
+                    pass
+        import pandas as pd
+        kept = pd.concat([kept, upserts], ignore_index=True)
+    return kept.sort_values('id', ascending=False, ignore_index=True)
+
+
+def prune_tombstones(conn, days=TOMBSTONE_RETENTION_DAYS):
+    """حذف سجلات الحذف الأقدم من days يوم (صيانة دورية في طابور الكتابة)
+
+    الإصدارات تزداد مع الزمن، فأكبر إصدار لسجل حذف قديم هو الحد الفاصل.
+    يعيد الإصدار الذي حُذف ما قبله أو None.
+    """
+    before = conn.execute(
+        "SELECT MAX(version) FROM medication_changes WHERE op = 'D' AND changed_at < datetime('now', ?)",
+        (f"-{days} days",)
+    ).fetchone()[0]
+    if before is None:
+        return None
+    prune_changes(conn, before + 1)
+    return before + 1
+
+
+def prune_changes(conn, before_version):
+    """حذف سجلات الحذف (tombstones) الأقدم من before_version
+
+    المستهلكون الذين لم يتزامنوا منذ ذلك الإصدار سيقومون بتحميل كامل.
+    """
+    conn.execute(
+        "DELETE FROM medication_changes WHERE op = 'D' AND version < ?", (before_version,)
+    )
+    conn.execute(
+        "UPDATE data_version SET min_version = MAX(min_version, ?) WHERE id = 1", (before_version,)
+    )
+
+
+# ===================================================================
+# ذاكرة مؤقتة تتحدث تدريجيًا
+# ===================================================================
+class MedicationCache:
+    """نسخة من جدول الأدوية في الذاكرة تُحدّث بتطبيق التغييرات فقط
+
+    كل استدعاء لـ get يقرأ صف الإصدار فقط؛ إذا لم يتغير تعاد النسخة الحالية،
+    وإلا تُجلب الصفوف المتغيرة وتطبق على النسخة الموجودة.
+    """
+
+    def __init__(self, select_sql, order_by="ORDER BY m.id DESC"):
+        self.select_sql = select_sql
+        self.order_by = order_by
+        self.df = None
+        self.version = None
+        self.lookup_version = None
+        self.stats = {'hits': 0, 'deltas': 0, 'full_reloads': 0, 'rows_loaded': 0}
+        self._lock = threading.Lock()
+
+    def get(self, conn):
+        """إرجاع DataFrame محدث (يجب عدم تعديله في المكان لأنه مشترك)"""
+        with self._lock:
+            if self.df is None:
+                self._full_reload(conn)
+                return self.df
+
+            # قراءة الإصدار والتغييرات داخل نفس معاملة القراءة لضمان تطابقهما
+            conn.execute("BEGIN")
+            try:
+                version, lookup_version, _ = get_data_version(conn)
+                if version == self.version:
+                    self.stats['hits'] += 1
+                    return self.df
+                changes = get_changes_since(conn, self.version, self.select_sql, self.lookup_version)
+            finally:
+                conn.rollback()
+
+            if changes.full_reload:
+                self._full_reload(conn)
+            else:
+                self.df = apply_changes(self.df, changes)
+                self.version = changes.version
+                self.stats['deltas'] += 1
+                self.stats['rows_loaded'] += len(changes.upserts)
+            return self.df
+
+    def _full_reload(self, conn):
+        import pandas as pd
+        # قراءة الإصدار والبيانات داخل نفس معاملة القراءة لضمان تطابقهما
+        conn.execute("BEGIN")
+        try:
+            version, lookup_version, _ = get_data_version(conn)
+            self.df = pd.read_sql_query(f"{self.select_sql}\n{self.order_by}", conn)
+        finally:
+            conn.rollback()
+        self.version = version
+        self.lookup_version = lookup_version
+        self.stats['full_reloads'] += 1
+        self.stats['rows_loaded'] += len(self.df)
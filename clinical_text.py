@@ -0,0 +1,429 @@
+"""
+ضغط النصوص السريرية - Clinical Text Compression
+
+النصوص السريرية الطويلة في medications (دواعي الاستعمال، المحاذير، الآثار
+الجانبية، الملاحظات...) هي معظم حجم الجدول ومعظم ما يقرؤه SELECT m.* عند تحميل
+الكتالوج، بينما لا تُعرض إلا في تفاصيل دواء واحد وفي التصدير. الضغط (compress)
+ينقل كل نص منها أطول من MIN_BYTES إلى medication_texts مضغوطًا بـ zlib مع قاموس
+مسبق (preset dictionary) مبني من نصوص الكتالوج نفسه، ويترك عموده فارغًا (NULL):
+- الكتالوج في الذاكرة ولقطته المشتركة لا يحملان هذه النصوص
+- تفاصيل الدواء تفك ضغط حقول الدواء المعروض فقط (load)، والتصدير حقول كل دفعة (fill_rows)
+- أي كتابة على حقل (حتى NULL) تحذف بالمحفز نسخته المضغوطة، فيبقى النص الأحدث
+  في عموده هو المعروض حتى الضغط التالي
+
+SQLite لا يضغط داخل المحفزات، لذلك يتم الضغط على دفعات: عند بدء التطبيق إذا كان
+DRUG_COMPRESS_TEXT مفعلاً، ومن صفحة عرض قاعدة البيانات أو سطر الأوامر. فك الضغط
+(expand) يعيد النصوص إلى أعمدتها. الصفحات المحررة لا تعود لنظام الملفات إلا بعد
+VACUUM (الخيار --vacuum).
+
+الاستخدام:
+    python clinical_text.py --db drug_database.db report
+    python clinical_text.py --db drug_database.db compress --vacuum
+    python clinical_text.py --db drug_database.db expand
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+
+# ===================================================================
+# الإعدادات
+# ===================================================================
+# الأعمدة التي لا تُعرض إلا في تفاصيل الدواء والتصدير
+CLINICAL_COLUMNS = (
+    'indications', 'contraindications', 'side_effects', 'drug_interactions', 'warnings',
+    'precautions', 'overdose_management', 'pregnancy_safety', 'lactation_safety', 'notes', 'pharmacist_notes',
+)
+MIN_BYTES = 64                  # النصوص الأقصر تبقى في عمودها (لا يوفر ضغطها شيئًا يذكر)
+COMPRESSION_LEVEL = 9
+DICTIONARY_BYTES = 32 * 1024    # نافذة zlib: ما زاد عنها من القاموس لا يُستخدم
+DICTIONARY_SAMPLES = 2000
+MIN_DICTIONARY_SAMPLES = 100    # كتالوج أصغر: القاموس أكبر مما يوفره، فيُضغط دونه
+BATCH_ROWS = 2000
+
+# محفزات لا يجب أن يشغلها نقل النص بين العمود وجدوله: ليس تعديلاً على الدواء، ولا
+# يجب أن يرفع إصدار البيانات ويسجل تغييرًا لكل دواء (سجل التغييرات)
+SUSPENDED_TRIGGERS = ('update_medication_timestamp', 'audit_medications_update', 'medications_change_update')
+
+# ===================================================================
+# مخطط قاعدة البيانات
+# ===================================================================
+CLINICAL_TEXT_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS text_dictionaries (
+    id INTEGER PRIMARY KEY,
+    zdict BLOB NOT NULL,
+    samples INTEGER NOT NULL,           -- عدد النصوص التي بُني منها
+    created_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS medication_texts (
+    medication_id INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    dictionary_id INTEGER,              -- NULL: zlib دون قاموس
+    raw_bytes INTEGER NOT NULL,         -- حجم النص بترميز UTF-8
+    memory_bytes INTEGER NOT NULL,      -- حجم النص كسلسلة Python في الكتالوج (sys.getsizeof)
+    body BLOB NOT NULL,
+    PRIMARY KEY (medication_id, field)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS medication_texts_delete
+AFTER DELETE ON medications
+FOR EACH ROW
+BEGIN
+    DELETE FROM medication_texts WHERE medication_id = OLD.id;
+END;
+"""
+
+# أي كتابة على حقل تلغي نسخته المضغوطة، حتى كتابة NULL: عمود الحقل المضغوط فارغ
+# أصلاً، فالمقارنة بالقيمة القديمة لا تكشف تفريغه وكانت النسخة المضغوطة تعود للظهور
+CLINICAL_TEXT_TRIGGERS = "DROP TRIGGER IF EXISTS medication_texts_update;\n" + "\n".join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS medication_texts_update_{column}
+AFTER UPDATE OF {column} ON medications
+FOR EACH ROW
+BEGIN
+    DELETE FROM medication_texts WHERE medication_id = NEW.id AND field = '{column}';
+END;
+"""
+    for column in CLINICAL_COLUMNS
+)
+
+
+@contextmanager
+def _suspended_triggers(conn, names=SUSPENDED_TRIGGERS):
+    # الحذف وإعادة الإنشاء داخل نفس المعاملة: لا يرى أي اتصال آخر غيابها
+    placeholders = ", ".join("?" for _ in names)
+    saved = conn.execute(
+        f"SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})", names
+    ).fetchall()
+    for name in names:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    try:
+        yield
+    finally:
+        for (sql,) in saved:
+            conn.execute(sql)
+
+
+# ===================================================================
+# الضغط وفك الضغط
+# ===================================================================
+# deflate خام دون ترويسة zlib: أصغر بستة بايتات لكل حقل، والقاموس يُضبط عند الإنشاء
+# مباشرة بدل انتظار طلبه من الترويسة (فك الضغط بقاموس أسرع بعدة أضعاف)
+def _compress(raw, zdict):
+    if zdict is None:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    else:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    return compressor.compress(raw) + compressor.flush()
+
+
+def _decompress(body, zdict):
+    if zdict is None:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    else:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=zdict)
+    return (decompressor.decompress(body) + decompressor.flush()).decode('utf-8')
+
+
+def _dictionaries(conn):
+    return dict(conn.execute("SELECT id, zdict FROM text_dictionaries"))
+
+
+def _inflate(rows, dictionaries):
+    """(medication_id, field, dictionary_id, body) -> {medication_id: {field: text}}"""
+    texts = {}
+    for medication_id, field, dictionary_id, body in rows:
+        zdict = dictionaries[dictionary_id] if dictionary_id is not None else None
+        texts.setdefault(medication_id, {})[field] = _decompress(body, zdict)
+    return texts
+
+
+def train_dictionary(conn, samples=DICTIONARY_SAMPLES):
+    """بناء قاموس مسبق من عينة نصوص الكتالوج (في أعمدتها أو مضغوطة) وحفظه
+
+    النصوص الأكثر تكرارًا في نهاية القاموس (zlib يرمز المسافات القريبة بعدد بتات أقل).
+    تعيد (المعرف، القاموس) أو (None، None) إذا كانت النصوص أقل من MIN_DICTIONARY_SAMPLES.
+    """
+    inline = " UNION ALL ".join(
+        f"SELECT {c} FROM medications WHERE length(CAST({c} AS BLOB)) >= {MIN_BYTES}" for c in CLINICAL_COLUMNS
+    )
+    texts = [text for (text,) in conn.execute(f"SELECT * FROM ({inline}) ORDER BY random() LIMIT ?", (samples,))]
+    if len(texts) < samples:
+        stored = conn.execute(
+            "SELECT medication_id, field, dictionary_id, body FROM medication_texts ORDER BY random() LIMIT ?",
+            (samples - len(texts),)
+        ).fetchall()
+        texts += [text for fields in _inflate(stored, _dictionaries(conn)).values() for text in fields.values()]
+    texts = [text for text in texts if isinstance(text, str)]
+    if len(texts) < MIN_DICTIONARY_SAMPLES:
+        return None, None
+    ordered = [text for text, _ in reversed(Counter(texts).most_common())]
+    zdict = "\n".join(ordered).encode('utf-8')[-DICTIONARY_BYTES:]
+    cursor = conn.execute(
+        "INSERT INTO text_dictionaries (zdict, samples, created_at) VALUES (?, ?, ?)",
+        (zdict, len(texts), int(time.time() * 1000))
+    )
+    return cursor.lastrowid, zdict
+
+
+def _recompress(conn, dictionary_id, zdict, batch_rows):
+    """إعادة ضغط النصوص المضغوطة بقاموس آخر (أو دونه) بالقاموس الحالي"""
+    dictionaries = _dictionaries(conn)
+    last = (0, '')
+    count = 0
+    while True:
+        rows = conn.execute(
+            "SELECT medication_id, field, dictionary_id, body FROM medication_texts "
+            "WHERE (medication_id, field) > (?, ?) AND dictionary_id IS NOT ? "
+            "ORDER BY medication_id, field LIMIT ?", (*last, dictionary_id, batch_rows)
+        ).fetchall()
+        if not rows:
+            return count
+        updates = []
+        for medication_id, field, old_id, body in rows:
+            text = _decompress(body, dictionaries[old_id] if old_id is not None else None)
+            updates.append((dictionary_id, _compress(text.encode('utf-8'), zdict), medication_id, field))
+        conn.executemany(
+            "UPDATE medication_texts SET dictionary_id = ?, body = ? WHERE medication_id = ? AND field = ?", updates
+        )
+        count += len(rows)
+        last = rows[-1][:2]
+
+
+def compress(conn, min_bytes=MIN_BYTES, retrain=False, dictionary=True, batch_rows=BATCH_ROWS):
+    """نقل النصوص السريرية الطويلة من أعمدتها إلى medication_texts مضغوطة
+
+    تُحفظ النسخة المضغوطة فقط إذا كانت أصغر من النص. retrain يبني قاموسًا جديدًا
+    ويعيد ضغط النصوص المضغوطة سابقًا به (ومع dictionary=False يعيد ضغطها دون قاموس).
+    تعيد إحصائيات الدفعة.
+    """
+    if not dictionary:
+        latest = None, None
+    else:
+        latest = conn.execute("SELECT id, zdict FROM text_dictionaries ORDER BY id DESC LIMIT 1").fetchone()
+        if latest is None or retrain:
+            latest = train_dictionary(conn)
+    dictionary_id, zdict = latest
+    stats = {'fields': 0, 'raw_bytes': 0, 'stored_bytes': 0, 'recompressed': 0, 'dictionary_id': dictionary_id}
+    columns = ", ".join(CLINICAL_COLUMNS)
+    any_long = " OR ".join(f"length(CAST({c} AS BLOB)) >= :min_bytes" for c in CLINICAL_COLUMNS)
+
+    with _suspended_triggers(conn):
+        if retrain:
+            stats['recompressed'] = _recompress(conn, dictionary_id, zdict, batch_rows)
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                f"SELECT id, {columns} FROM medications WHERE id > :last_id AND ({any_long}) ORDER BY id LIMIT :limit",
+                {'last_id': last_id, 'min_bytes': min_bytes, 'limit': batch_rows}
+            ).fetchall()
+            if not rows:
+                break
+            groups = {}
+            entries = []
+            for medication_id, *values in rows:
+                fields = []
+                for column, text in zip(CLINICAL_COLUMNS, values):
+                    if not isinstance(text, str):
+                        continue
+                    raw = text.encode('utf-8')
+                    if len(raw) < min_bytes:
+                        continue
+                    body = _compress(raw, zdict)
+                    if len(body) >= len(raw):
+                        continue
+                    fields.append(column)
+                    entries.append((medication_id, column, dictionary_id, len(raw), sys.getsizeof(text), body))
+                    stats['raw_bytes'] += len(raw)
+                    stats['stored_bytes'] += len(body)
+                if fields:
+                    groups.setdefault(tuple(fields), []).append((medication_id,))
+            # تفريغ الأعمدة أولاً: محفز التعديل يحذف النسخة المضغوطة للحقل الذي يتغير
+            for fields, ids in groups.items():
+                conn.executemany(
+                    f"UPDATE medications SET {', '.join(f'{c} = NULL' for c in fields)} WHERE id = ?", ids
+                )
+            conn.executemany("INSERT OR REPLACE INTO medication_texts VALUES (?, ?, ?, ?, ?, ?)", entries)
+            stats['fields'] += len(entries)
+            last_id = rows[-1][0]
+
+    conn.execute(
+        "DELETE FROM text_dictionaries WHERE id IS NOT ? AND id NOT IN "
+        "(SELECT dictionary_id FROM medication_texts WHERE dictionary_id IS NOT NULL)", (dictionary_id,)
+    )
+    return stats
+
+
+def expand(conn, batch_rows=BATCH_ROWS):
+    """إعادة كل النصوص المضغوطة إلى أعمدتها في medications وإرجاع عدد الحقول"""
+    dictionaries = _dictionaries(conn)
+    last_id = 0
+    count = 0
+    with _suspended_triggers(conn):
+        while True:
+            ids = [row[0] for row in conn.execute(
+                "SELECT DISTINCT medication_id FROM medication_texts WHERE medication_id > ? "
+                "ORDER BY medication_id LIMIT ?", (last_id, batch_rows)
+            )]
+            if not ids:
+                break
+            rows = conn.execute(
+                "SELECT medication_id, field, dictionary_id, body FROM medication_texts "
+                "WHERE medication_id BETWEEN ? AND ?", (ids[0], ids[-1])
+            ).fetchall()
+            groups = {}
+            for medication_id, fields in _inflate(rows, dictionaries).items():
+                groups.setdefault(tuple(fields), []).append((*fields.values(), medication_id))
+            # المحفز يحذف النسخة المضغوطة لكل حقل يعود إلى عموده
+            for fields, params in groups.items():
+                conn.executemany(f"UPDATE medications SET {', '.join(f'{c} = ?' for c in fields)} WHERE id = ?", params)
+            count += len(rows)
+            last_id = ids[-1]
+    if count:
+        # سجل التغييرات معلق: إصدار واحد يجبر الذاكرات المؤقتة على تحميل كامل مرة واحدة
+        # (الضغط لا يحتاجه: النص المعروض لم يتغير، والكتالوج المحمل يحمل النص نفسه)
+        conn.execute("UPDATE data_version SET version = version + 1, min_version = version + 1 WHERE id = 1")
+    conn.execute("DELETE FROM text_dictionaries WHERE id NOT IN "
+                 "(SELECT dictionary_id FROM medication_texts WHERE dictionary_id IS NOT NULL)")
+    return count
+
+
+# ===================================================================
+# القراءة
+# ===================================================================
+def load(conn, medication_id):
+    """النصوص المضغوطة لدواء واحد {field: text} (قراءة نطاق من المفتاح الأساسي)"""
+    rows = conn.execute(
+        "SELECT medication_id, field, dictionary_id, body FROM medication_texts WHERE medication_id = ?",
+        (int(medication_id),)
+    ).fetchall()
+    if not rows:
+        return {}
+    used = {row[2] for row in rows if row[2] is not None}
+    dictionaries = {i: zdict for i, zdict in _dictionaries(conn).items() if i in used}
+    return _inflate(rows, dictionaries)[int(medication_id)]
+
+
+def fill_rows(conn, columns, rows):
+    """إعادة النصوص المضغوطة إلى صفوف مقروءة من medications أو medications_full_view
+
+    columns أسماء أعمدة الصفوف (يجب أن تتضمن id). الصفوف متتالية المعرفات في
+    التصدير، لذلك تكفي قراءة نطاق واحد من medication_texts لكل دفعة.
+    """
+    positions = {c: columns.index(c) for c in CLINICAL_COLUMNS if c in columns}
+    if not rows or not positions:
+        return rows
+    id_index = columns.index('id')
+    ids = [row[id_index] for row in rows]
+    stored = conn.execute(
+        "SELECT medication_id, field, dictionary_id, body FROM medication_texts WHERE medication_id BETWEEN ? AND ?",
+        (min(ids), max(ids))
+    ).fetchall()
+    if not stored:
+        return rows
+    texts = _inflate(stored, _dictionaries(conn))
+    filled = []
+    for row in rows:
+        fields = texts.get(row[id_index])
+        if fields:
+            row = list(row)
+            for field, text in fields.items():
+                if field in positions:
+                    row[positions[field]] = text
+        filled.append(row)
+    return filled
+
+
+def report(conn):
+    """التوفير في الملف وفي الذاكرة، إجمالاً ولكل حقل
+
+    memory_saved_bytes: حجم النصوص المضغوطة كسلاسل Python، أي ما لا يحمله كل
+    DataFrame للكتالوج في الذاكرة. free_bytes: صفحات حرة تعود للملف بعد VACUUM.
+    """
+    by_field = [
+        {'field': field, 'count': count, 'raw_bytes': raw, 'stored_bytes': stored, 'memory_bytes': memory}
+        for field, count, raw, stored, memory in conn.execute(
+            "SELECT field, COUNT(*), SUM(raw_bytes), SUM(length(body)), SUM(memory_bytes) "
+            "FROM medication_texts GROUP BY field ORDER BY SUM(raw_bytes) DESC"
+        )
+    ]
+    inline = " + ".join(f"COALESCE(SUM(length(CAST({c} AS BLOB))), 0)" for c in CLINICAL_COLUMNS)
+    inline_bytes = conn.execute(f"SELECT {inline} FROM medications").fetchone()[0]
+    dictionaries, dictionary_bytes = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(length(zdict)), 0) FROM text_dictionaries"
+    ).fetchone()
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    raw_bytes = sum(f['raw_bytes'] for f in by_field)
+    stored_bytes = sum(f['stored_bytes'] for f in by_field) + dictionary_bytes
+    return {
+        'fields': sum(f['count'] for f in by_field),
+        'raw_bytes': raw_bytes,
+        'stored_bytes': stored_bytes,
+        'disk_saved_bytes': raw_bytes - stored_bytes,
+        'memory_saved_bytes': sum(f['memory_bytes'] for f in by_field),
+        'inline_bytes': inline_bytes,
+        'dictionaries': dictionaries,
+        'dictionary_bytes': dictionary_bytes,
+        'free_bytes': page_size * free_pages,
+        'by_field': by_field,
+    }
+
+
+# ===================================================================
+# سطر الأوامر
+# ===================================================================
+def _print_report(stats):
+    mb = 1024 * 1024
+    print(f"🗜️ {stats['fields']:,} حقل مضغوط: {stats['raw_bytes'] / mb:.1f} MB -> {stats['stored_bytes'] / mb:.1f} MB "
+          f"(منها القاموس {stats['dictionary_bytes'] / 1024:.0f} KB)")
+    print(f"   توفير الملف {stats['disk_saved_bytes'] / mb:.1f} MB، توفير الذاكرة لكل نسخة من الكتالوج "
+          f"{stats['memory_saved_bytes'] / mb:.1f} MB")
+    print(f"   نصوص غير مضغوطة {stats['inline_bytes'] / mb:.1f} MB، صفحات حرة {stats['free_bytes'] / mb:.1f} MB (VACUUM)")
+    for field in stats['by_field']:
+        print(f"  {field['field']:<22}{field['count']:>8,}  {field['raw_bytes'] / 1024:>9.0f} KB "
+              f"-> {field['stored_bytes'] / 1024:>8.0f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ضغط النصوص السريرية في medications وفكه وتقرير التوفير")
+    parser.add_argument('--db', default=os.environ.get("DRUG_DB_PATH", "drug_database.db"))
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('report', help="التوفير في الملف والذاكرة")
+    packing = sub.add_parser('compress', help="ضغط النصوص الطويلة")
+    packing.add_argument('--min-bytes', type=int, default=MIN_BYTES)
+    packing.add_argument('--retrain', action='store_true', help="بناء قاموس جديد وإعادة ضغط كل النصوص به")
+    packing.add_argument('--no-dictionary', dest='dictionary', action='store_false', help="zlib دون قاموس مسبق")
+    packing.add_argument('--vacuum', action='store_true', help="إعادة الصفحات المحررة لنظام الملفات")
+    unpacking = sub.add_parser('expand', help="إعادة النصوص إلى أعمدتها")
+    unpacking.add_argument('--vacuum', action='store_true')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.command != 'report':
+            started = time.perf_counter()
+            with conn:
+                # المحفزات الموقوفة تُحذف داخل المعاملة: لا يكتب أحد دونها
+                conn.execute("BEGIN IMMEDIATE")
+                if args.command == 'compress':
+                    stats = compress(conn, args.min_bytes, args.retrain, args.dictionary)
+                    print(f"✅ {stats['fields']:,} حقل ({stats['raw_bytes'] / 1024:,.0f} KB -> "
+                          f"{stats['stored_bytes'] / 1024:,.0f} KB) في {time.perf_counter() - started:.1f} ث")
+                else:
+                    print(f"✅ {expand(conn):,} حقل في {time.perf_counter() - started:.1f} ث")
+            if args.vacuum:
+                conn.execute("VACUUM")
+        _print_report(report(conn))
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
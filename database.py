@@ -0,0 +1,798 @@
+"""
+طبقة البيانات - Data Layer
+
+الاتصال بقاعدة البيانات، طابور الكتابة، ذاكرات الأدوية المؤقتة ودوال القراءة
+والكتابة التي تستخدمها وحدات الصفحات في views/. يستوردها موجه app.py عند كل
+تشغيل، لذلك لا تستورد pandas أو الوحدات التي تعتمد عليه إلا داخل الدوال التي
+تحتاجها.
+"""
+
+import os
+import sqlite3
+
+import streamlit as st
+
+import audit
+import clinical_text
+import dedup
+import inventory
+import lots
+import migrations
+import price_history
+from change_feed import MedicationCache, get_data_version, prune_tombstones
+from db_writer import WriteQueue
+from page_profiler import profiled
+from query_stats import InstrumentedConnection
+
+# ===================================================================
+# الاتصال بقاعدة البيانات
+# ===================================================================
+DB_PATH = os.environ.get("DRUG_DB_PATH", "drug_database.db")
+
+# مجلد لقطات الكتالوج المشتركة بين عمليات Streamlit (اختياري)
+# مثال: DRUG_SNAPSHOT_DIR=snapshots streamlit run app.py
+SNAPSHOT_DIR = os.environ.get("DRUG_SNAPSHOT_DIR")
+
+# وضع القراءة فقط لأجهزة الاستعلام (kiosk): الملف يُفتح كملف ثابت (immutable) دون
+# أقفال، ولا تُعرض إلا صفحات العرض. يجب أن يشير DRUG_DB_PATH إلى نسخة منشورة
+# (python replica.py) وليس إلى ملف يكتب فيه تطبيق الإدارة
+# مثال: DRUG_READ_ONLY=1 DRUG_DB_PATH=replica/drug_database.db streamlit run app.py
+READ_ONLY = os.environ.get("DRUG_READ_ONLY", "").lower() in ("1", "true", "yes")
+READ_ONLY_MMAP_BYTES = 256 * 1024 * 1024   # القراءة من ذاكرة نظام الملفات المشتركة بين العمليات
+READ_ONLY_CACHE_KIB = 64 * 1024            # ذاكرة صفحات الاتصال أثناء تحميل الكتالوج
+
+# لقطات النسخ الاحتياطي (python backups.py): كل DRUG_BACKUP_INTERVAL_HOURS ساعة من
+# خيط خلفي إذا كانت القيمة أكبر من صفر، وعند الطلب من صفحة عرض قاعدة البيانات
+# مثال: DRUG_BACKUP_INTERVAL_HOURS=6 DRUG_BACKUP_KEEP=24 streamlit run app.py
+BACKUP_DIR = os.environ.get("DRUG_BACKUP_DIR", "backups")
+BACKUP_INTERVAL_HOURS = float(os.environ.get("DRUG_BACKUP_INTERVAL_HOURS", "0") or 0)
+BACKUP_KEEP_LAST = int(os.environ.get("DRUG_BACKUP_KEEP", "24"))
+BACKUP_KEEP_DAILY = int(os.environ.get("DRUG_BACKUP_KEEP_DAILY", "7"))
+# لقطات الأمان (قبل الاستعادة أو الحذف الكامل) تُحفظ هذا العدد من الأيام
+BACKUP_KEEP_SAFETY_DAYS = int(os.environ.get("DRUG_BACKUP_KEEP_SAFETY_DAYS", "30"))
+
+# ملفات تصدير الكتالوج (CSV / XLSX / Parquet) المحفوظة حسب إصدار البيانات
+EXPORT_DIR = os.environ.get("DRUG_EXPORT_DIR", "exports")
+
+# سجل التدقيق (audit.py): الأشهر المكتملة تُختم مضغوطة عند بدء التشغيل ثم كل ساعة مع
+# صيانة طابور الكتابة (خادم يعمل عبر بداية شهر يختم الشهر المنتهي)، وإذا كانت
+# DRUG_AUDIT_KEEP_MONTHS أكبر من صفر تُحذف الأشهر المختومة الأقدم منها
+# مثال: DRUG_AUDIT_KEEP_MONTHS=24 streamlit run app.py
+AUDIT_ARCHIVE_DIR = os.environ.get("DRUG_AUDIT_ARCHIVE_DIR", "audit_archive")
+AUDIT_KEEP_MONTHS = int(os.environ.get("DRUG_AUDIT_KEEP_MONTHS", "0") or 0)
+
+# ضغط النصوص السريرية (clinical_text.py) عند بدء كل عملية: النصوص الجديدة أو المعدلة
+# منذ آخر ضغط تُنقل إلى medication_texts (يمكن الضغط أيضًا من صفحة عرض قاعدة البيانات)
+# مثال: DRUG_COMPRESS_TEXT=1 streamlit run app.py
+COMPRESS_TEXT = os.environ.get("DRUG_COMPRESS_TEXT", "").lower() in ("1", "true", "yes")
+
+# مخزن الصور (image_store.py): نسخ الصور حسب المحتوى ومصغراتها في DRUG_IMAGE_STORE_DIR،
+# ومسارات الصور النسبية في medications تُقرأ من DRUG_IMAGE_ROOT
+# مثال: DRUG_IMAGE_ROOT=/srv/drug-images DRUG_THUMBNAIL_CACHE_MB=512 streamlit run app.py
+IMAGE_STORE_DIR = os.environ.get("DRUG_IMAGE_STORE_DIR", "image_store")
+IMAGE_ROOT = os.environ.get("DRUG_IMAGE_ROOT", ".")
+THUMBNAIL_CACHE_MB = float(os.environ.get("DRUG_THUMBNAIL_CACHE_MB", "256") or 256)
+
+def get_db_connection():
+    """إنشاء اتصال بقاعدة البيانات"""
+    if READ_ONLY:
+        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro&immutable=1", uri=True, factory=InstrumentedConnection)
+        conn.execute(f"PRAGMA mmap_size = {READ_ONLY_MMAP_BYTES}")
+        conn.execute(f"PRAGMA cache_size = -{READ_ONLY_CACHE_KIB}")
+        conn.execute("PRAGMA query_only = 1")
+    else:
+        conn = sqlite3.connect(DB_PATH, factory=InstrumentedConnection)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+@st.cache_resource
+def get_writer():
+    """طابور الكتابة المشترك بين جميع الجلسات داخل نفس العملية (مع الصيانة الدورية)"""
+    return WriteQueue(DB_PATH, factory=InstrumentedConnection, maintenance=(prune_tombstones, _seal_audit))
+
+def init_database():
+    """تهيئة قاعدة البيانات وتطبيق ترحيلات المخطط المعلقة"""
+    if READ_ONLY:
+        check_replica()
+        return False
+    created = not os.path.exists(DB_PATH)
+    prepare_database()
+    seal_audit_log()
+    if COMPRESS_TEXT:
+        compress_clinical_text_on_start()
+    return created
+
+@st.cache_resource
+def prepare_database():
+    """تطبيق ترحيلات المخطط مرة واحدة لكل عملية (قراءة PRAGMA واحدة إذا كان المخطط محدثًا)"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return migrations.migrate(conn)
+    finally:
+        conn.close()
+
+@st.cache_resource
+def seal_audit_log():
+    """ختم أشهر سجل التدقيق المكتملة (وحذف الأقدم من AUDIT_KEEP_MONTHS) عند بدء العملية
+
+    بعدها يتكرر الختم كل ساعة في الصيانة الدورية لطابور الكتابة (get_writer).
+    """
+    return get_writer().execute(_seal_audit)
+
+def _seal_audit(conn):
+    sealed = audit.seal_completed_months(conn)
+    if AUDIT_KEEP_MONTHS > 0:
+        audit.prune_before(conn, audit.months_ago(AUDIT_KEEP_MONTHS))
+    return sealed
+
+@st.cache_resource
+def compress_clinical_text_on_start():
+    """ضغط النصوص السريرية غير المضغوطة مرة لكل عملية"""
+    return compress_clinical_text()
+
+@st.cache_resource
+def get_backup_manager():
+    """خيط اللقطات المشترك بين جميع الجلسات داخل نفس العملية"""
+    import backups
+    interval = BACKUP_INTERVAL_HOURS * 3600 if BACKUP_INTERVAL_HOURS > 0 else None
+    return backups.BackupManager(DB_PATH, BACKUP_DIR, interval=interval,
+                                 keep_last=BACKUP_KEEP_LAST, keep_daily=BACKUP_KEEP_DAILY,
+                                 keep_safety_days=BACKUP_KEEP_SAFETY_DAYS)
+
+@st.cache_resource
+def get_export_cache():
+    """ملفات التصدير وخيوط بنائها المشتركة بين جميع الجلسات داخل نفس العملية"""
+    import exports
+    return exports.ExportCache(EXPORT_DIR, get_db_connection)
+
+@st.cache_resource
+def get_image_store():
+    """مخزن الصور ومصغراتها المشترك بين جميع الجلسات داخل نفس العملية"""
+    import image_store
+    return image_store.ImageStore(IMAGE_STORE_DIR, IMAGE_ROOT, max_bytes=int(THUMBNAIL_CACHE_MB * 1024 * 1024))
+
+def restore_backup(snapshot_path):
+    """استعادة لقطة فوق قاعدة البيانات الحية بعد أخذ لقطة احتياطية للحالة الحالية
+
+    تعيد (البيانات الوصفية للقطة ما قبل الاستعادة، إصدار البيانات الجديد).
+    """
+    import backups
+    safety = get_backup_manager().request("pre-restore").result()
+    version = get_writer().execute_exclusive(lambda conn: backups.restore_into(conn, snapshot_path))
+    return safety, version
+
+@st.cache_resource
+def check_replica():
+    """التحقق من نسخة القراءة: لا يمكن ترحيلها هنا، لذلك يجب نشرها بمخطط محدث"""
+    if not os.path.exists(DB_PATH):
+        raise FileNotFoundError(f"نسخة القراءة غير موجودة: {DB_PATH} (انشرها بـ python replica.py)")
+    conn = get_db_connection()
+    try:
+        version = migrations.get_schema_version(conn)
+    finally:
+        conn.close()
+    if version < migrations.LATEST_VERSION:
+        raise RuntimeError(
+            f"نسخة القراءة بإصدار مخطط {version} والتطبيق يتطلب {migrations.LATEST_VERSION}: "
+            "أعد نشرها من قاعدة بيانات محدثة"
+        )
+    return version
+
+# ===================================================================
+# دوال قاعدة البيانات
+# ===================================================================
+
+# استعلام الأدوية مع الأسماء المدمجة (بدون WHERE أو ORDER BY) - يستخدمه سجل التغييرات
+MEDICATIONS_SELECT = """
+    SELECT 
+        m.*,
+        c.name_ar as category_name,
+        dt.name_ar as drug_type_name,
+        mf.name as manufacturer_name
+    FROM medications m
+    LEFT JOIN categories c ON m.category_id = c.id
+    LEFT JOIN drug_types dt ON m.drug_type_id = dt.id
+    LEFT JOIN manufacturers mf ON m.manufacturer_id = mf.id
+"""
+
+@st.cache_resource
+def get_medications_cache():
+    """نسخة الأدوية المشتركة في الذاكرة والتي تُحدّث بالتغييرات فقط"""
+    return MedicationCache(MEDICATIONS_SELECT, order_by="ORDER BY m.id DESC")
+
+@st.cache_resource
+def get_snapshot_catalog():
+    """كتالوج الأدوية المربوط بالذاكرة من ملف Arrow المشترك (إذا كان مفعلاً)"""
+    if not SNAPSHOT_DIR:
+        return None
+    import catalog_snapshot
+    if catalog_snapshot.is_available():
+        return catalog_snapshot.SnapshotCatalog(SNAPSHOT_DIR, MEDICATIONS_SELECT, order_by="ORDER BY m.id DESC")
+    return None
+
+def read_dataframe(query, params=()):
+    """تنفيذ استعلام قراءة وإرجاع النتيجة كـ DataFrame"""
+    import pandas as pd
+    conn = get_db_connection()
+    try:
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+@profiled
+def get_all_medications():
+    """جلب جميع الأدوية مع المعلومات الكاملة"""
+    conn = get_db_connection()
+    try:
+        snapshot = get_snapshot_catalog()
+        if snapshot is not None:
+            df = snapshot.get(conn)
+            if df is None:
+                # عملية أخرى تبني اللقطة الآن: قراءة مباشرة دون الاحتفاظ بنسخة
+                import pandas as pd
+                df = pd.read_sql_query(MEDICATIONS_SELECT + "ORDER BY m.id DESC", conn)
+        else:
+            df = get_medications_cache().get(conn)
+    finally:
+        conn.close()
+    # نسخة سطحية حتى لا تؤثر الأعمدة المضافة في الصفحات على النسخة المشتركة
+    return df.copy(deep=False)
+
+@profiled
+def get_categories():
+    """جلب جميع الفئات"""
+    return read_dataframe("SELECT * FROM categories")
+
+@profiled
+def get_drug_types():
+    """جلب جميع أنواع الأدوية"""
+    return read_dataframe("SELECT * FROM drug_types")
+
+@profiled
+def get_manufacturers():
+    """جلب جميع الشركات المصنعة"""
+    return read_dataframe("SELECT * FROM manufacturers")
+
+@profiled
+def get_age_weight_estimates():
+    """جلب تقديرات الأوزان حسب العمر"""
+    return read_dataframe("SELECT * FROM age_weight_estimates ORDER BY age_months")
+
+# الجداول التي تعرض الصفحة الرئيسية عدد سجلاتها
+COUNTED_TABLES = ('medications', 'categories', 'drug_types', 'manufacturers')
+
+@profiled
+def get_table_counts():
+    """عدد السجلات في كل جدول باستعلام COUNT واحد (دون تحميل الكتالوج أو pandas)"""
+    conn = get_db_connection()
+    try:
+        row = conn.execute(
+            "SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {table})" for table in COUNTED_TABLES)
+        ).fetchone()
+    finally:
+        conn.close()
+    return dict(zip(COUNTED_TABLES, row))
+
+@st.cache_resource(max_entries=2)
+def _get_analytics_engine(engine, version):
+    """محرك التحليلات على جدول Arrow بأعمدة صفحة الإحصائيات لإصدار بيانات واحد"""
+    import analytics
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        table = analytics.load_table(conn, MEDICATIONS_SELECT)
+    finally:
+        conn.close()
+    return analytics.create(engine, table)
+
+@profiled
+def get_analytics():
+    """محرك التحليلات المختار (DRUG_ANALYTICS_ENGINE) على الكتالوج الحالي"""
+    import analytics
+    engine = analytics.resolve_engine()
+    if engine == "pandas":
+        return analytics.create(engine, get_all_medications())
+    return _get_analytics_engine(engine, get_catalog_version())
+
+@profiled
+def get_price_trend(dimension, key_id, period='month'):
+    """اتجاه سعر دواء أو فئة أو شركة من التجميعات اليومية/الشهرية (قراءة نطاق واحد)"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return price_history.trend(conn, dimension, key_id, period)
+    finally:
+        conn.close()
+
+@profiled
+def get_price_history(medication_id, limit=100):
+    """آخر نقاط السعر المسجلة لدواء (الأحدث أولاً)"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return price_history.medication_history(conn, medication_id, limit)
+    finally:
+        conn.close()
+
+@profiled
+def get_warehouses():
+    """جلب جميع المستودعات"""
+    return read_dataframe("SELECT * FROM warehouses ORDER BY name")
+
+@profiled
+def get_stock_summary():
+    """إجمالي المخزون وعدد الأدوية المتوفرة والنافدة"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return inventory.summary(conn)
+    finally:
+        conn.close()
+
+@profiled
+def get_stock_on_hand(medication_id=None, warehouse_id=None, limit=None):
+    """الكميات المتوفرة لكل دواء ومستودع (الأقل كمية أولاً)"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return inventory.on_hand(conn, medication_id, warehouse_id, limit)
+    finally:
+        conn.close()
+
+@profiled
+def get_stock_movements(medication_id=None, limit=100):
+    """آخر حركات المخزون"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return inventory.recent_movements(conn, medication_id, limit)
+    finally:
+        conn.close()
+
+@profiled
+def get_expiring_lots(days, warehouse_id=None, include_expired=False, limit=None):
+    """التشغيلات ذات الكمية التي تنتهي صلاحيتها خلال days يوم (الأقرب أولاً)"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return lots.expiring(conn, days, warehouse_id, include_expired, limit)
+    finally:
+        conn.close()
+
+@profiled
+def get_expiry_summary(days):
+    """عدد وكميات التشغيلات المنتهية والتي تنتهي خلال days يوم"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return lots.expiry_summary(conn, days)
+    finally:
+        conn.close()
+
+@profiled
+def get_medication_lots(medication_id):
+    """تشغيلات دواء بكمية متبقية وتواريخ انتهائها"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return lots.medication_lots(conn, medication_id)
+    finally:
+        conn.close()
+
+@profiled
+def get_audit_history(entity, row_id, include_archived=False):
+    """كل تغييرات سجل واحد (الأحدث أولاً) من سجل التدقيق"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return audit.history(conn, entity, row_id, include_archived)
+    finally:
+        conn.close()
+
+@profiled
+def get_audit_recent(limit=200, op=None, entity=None):
+    """آخر تغييرات الشهر الحالي في سجل التدقيق"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return audit.recent(conn, limit, op, entity)
+    finally:
+        conn.close()
+
+def get_audit_partitions():
+    """ملخص سجل التدقيق والأشهر المختومة"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return audit.summary(conn), audit.partitions(conn)
+    finally:
+        conn.close()
+
+@profiled
+def get_medication_texts(medication_id):
+    """النصوص السريرية المضغوطة لدواء واحد بعد فك ضغطها {field: text}"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return clinical_text.load(conn, medication_id)
+    finally:
+        conn.close()
+
+@profiled
+def get_clinical_text_report():
+    """التوفير في الملف والذاكرة من ضغط النصوص السريرية"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return clinical_text.report(conn)
+    finally:
+        conn.close()
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _get_duplicate_index(version):
+    """فهرس كشف المكررات لإصدار البيانات version (يُبنى من جديد بعد أي تغيير على الكتالوج)"""
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        return dedup.load_index(conn)
+    finally:
+        conn.close()
+
+@profiled
+def find_duplicate_groups(threshold=dedup.DEFAULT_THRESHOLD):
+    """مجموعات الأدوية المكررة المرشحة عدا ما أكد المراجع أنه ليس مكررًا"""
+    index = _get_duplicate_index(get_catalog_version())
+    conn = get_db_connection()
+    conn.row_factory = None
+    try:
+        dismissed = dedup.dismissed_pairs(conn)
+    finally:
+        conn.close()
+    return index.groups(threshold, dismissed)
+
+@profiled
+def find_similar_medications(data, threshold=dedup.DEFAULT_THRESHOLD):
+    """[(id، التشابه)] للأدوية المشابهة لدواء قبل إضافته"""
+    return _get_duplicate_index(get_catalog_version()).similar(data, threshold)
+
+def get_catalog_version():
+    """رقم إصدار البيانات الحالي (قراءة صف واحد) - مفتاح للنتائج المشتقة من الكتالوج"""
+    conn = get_db_connection()
+    try:
+        return get_data_version(conn)[0]
+    finally:
+        conn.close()
+
+def add_medication(data, allow_similar=False):
+    """إضافة دواء جديد (SimilarMedicationError إذا وُجدت أدوية مشابهة ما لم يكن allow_similar)"""
+    if not allow_similar:
+        check_similar_medications([data])
+    columns = ', '.join(data.keys())
+    placeholders = ', '.join(['?' for _ in data])
+    query = f"INSERT INTO medications ({columns}) VALUES ({placeholders})"
+    
+    get_writer().execute(lambda conn: conn.execute(query, list(data.values())).rowcount)
+    return True
+
+def add_manufacturer(name, name_ar, country):
+    """إضافة شركة مصنعة جديدة"""
+    get_writer().execute(lambda conn: conn.execute(
+        "INSERT INTO manufacturers (name, name_ar, country) VALUES (?, ?, ?)",
+        (name, name_ar, country)
+    ).rowcount)
+    return True
+
+def add_category(name, name_ar, description=""):
+    """إضافة فئة جديدة"""
+    get_writer().execute(lambda conn: conn.execute(
+        "INSERT INTO categories (name, name_ar, description) VALUES (?, ?, ?)",
+        (name, name_ar, description)
+    ).rowcount)
+    return True
+
+def add_drug_type(name, name_ar, description=""):
+    """إضافة نوع دواء جديد"""
+    get_writer().execute(lambda conn: conn.execute(
+        "INSERT INTO drug_types (name, name_ar, description) VALUES (?, ?, ?)",
+        (name, name_ar, description)
+    ).rowcount)
+    return True
+
+def update_medication(medication_id, data):
+    """تحديث بيانات دواء"""
+    set_clause = ', '.join([f"{key} = ?" for key in data.keys()])
+    query = f"UPDATE medications SET {set_clause} WHERE id = ?"
+    
+    get_writer().execute(lambda conn: conn.execute(query, list(data.values()) + [medication_id]).rowcount)
+    return True
+
+def record_stock_movements(events):
+    """كتابة دفعة حركات مخزون كعملية واحدة في طابور الكتابة: (المسجلة، المكررة، المرفوضة)"""
+    return get_writer().execute(lambda conn: inventory.record_movements(conn, events))
+
+def archive_audit_month(month):
+    """نقل شهر مختوم من سجل التدقيق إلى ملف في AUDIT_ARCHIVE_DIR"""
+    return get_writer().execute(lambda conn: audit.archive_month(conn, audit.parse_month(month), AUDIT_ARCHIVE_DIR))
+
+def prune_audit_before(month):
+    """حذف أشهر سجل التدقيق المختومة قبل month"""
+    return get_writer().execute(lambda conn: audit.prune_before(conn, audit.parse_month(month)))
+
+def compress_clinical_text(retrain=False):
+    """ضغط النصوص السريرية الطويلة غير المضغوطة (retrain: قاموس جديد لكل النصوص)"""
+    return get_writer().execute(lambda conn: clinical_text.compress(conn, retrain=retrain))
+
+def expand_clinical_text():
+    """إعادة النصوص السريرية المضغوطة إلى أعمدتها"""
+    return get_writer().execute(clinical_text.expand)
+
+def merge_medications(keep_id, duplicate_ids):
+    """دمج الأدوية المكررة في keep_id (نقل المخزون وإكمال الحقول ثم حذفها)"""
+    return get_writer().execute(lambda conn: dedup.merge(conn, keep_id, duplicate_ids))
+
+def dismiss_duplicates(medication_ids):
+    """تسجيل أن مجموعة أدوية ليست مكررة فلا تظهر في المراجعة مجددًا"""
+    return get_writer().execute(lambda conn: dedup.dismiss(conn, medication_ids))
+
+def delete_medication(medication_id):
+    """حذف دواء"""
+    get_writer().execute(lambda conn: conn.execute(
+        "DELETE FROM medications WHERE id = ?", (medication_id,)
+    ).rowcount)
+    return True
+
+def delete_category(category_id):
+    """حذف فئة"""
+    get_writer().execute(lambda conn: conn.execute(
+        "DELETE FROM categories WHERE id = ?", (category_id,)
+    ).rowcount)
+    return True
+
+def delete_drug_type(drug_type_id):
+    """حذف نوع دواء"""
+    get_writer().execute(lambda conn: conn.execute(
+        "DELETE FROM drug_types WHERE id = ?", (drug_type_id,)
+    ).rowcount)
+    return True
+
+def delete_manufacturer(manufacturer_id):
+    """حذف شركة مصنعة"""
+    get_writer().execute(lambda conn: conn.execute(
+        "DELETE FROM manufacturers WHERE id = ?", (manufacturer_id,)
+    ).rowcount)
+    return True
+
+def delete_all_medications():
+    """حذف جميع الأدوية"""
+    return get_writer().execute(lambda conn: conn.execute("DELETE FROM medications").rowcount)
+
+# ===================================================================
+# عمليات جماعية (Bulk Operations)
+# ===================================================================
+
+# الجداول المرجعية التي تدعم الحذف والتعديل الجماعي والأعمدة القابلة للتعديل فيها
+BULK_EDITABLE_COLUMNS = {
+    'categories': ['name', 'name_ar', 'description'],
+    'drug_types': ['name', 'name_ar', 'description'],
+    'manufacturers': ['name', 'name_ar', 'country'],
+}
+
+def delete_rows_bulk(table, row_ids):
+    """حذف عدة سجلات من جدول مرجعي في معاملة واحدة (executemany)"""
+    if table not in BULK_EDITABLE_COLUMNS:
+        raise ValueError(f"الجدول {table} لا يدعم الحذف الجماعي")
+    params = [(int(row_id),) for row_id in row_ids]
+    if not params:
+        return 0
+
+    # rowcount وليس len(params): سجلات حذفتها جلسة أخرى لا تُحسب
+    return get_writer().execute(lambda conn: conn.executemany(f"DELETE FROM {table} WHERE id = ?", params).rowcount)
+
+def update_rows_bulk(table, changes):
+    """تحديث عدة سجلات من جدول مرجعي في معاملة واحدة
+
+    changes: قاموس {id: {column: value}} يحتوي فقط على الأعمدة المعدلة
+    """
+    allowed = BULK_EDITABLE_COLUMNS.get(table)
+    if allowed is None:
+        raise ValueError(f"الجدول {table} لا يدعم التعديل الجماعي")
+
+    # تجميع الصفوف حسب مجموعة الأعمدة المعدلة لاستخدام executemany لكل مجموعة
+    groups = {}
+    for row_id, values in changes.items():
+        columns = tuple(sorted(values))
+        unknown = set(columns) - set(allowed)
+        if unknown:
+            raise ValueError(f"أعمدة غير مسموح بتعديلها: {', '.join(sorted(unknown))}")
+        groups.setdefault(columns, []).append(
+            [values[column] for column in columns] + [int(row_id)]
+        )
+    if not groups:
+        return 0
+
+    def write(conn):
+        updated = 0
+        for columns, params in groups.items():
+            set_clause = ', '.join([f"{column} = ?" for column in columns])
+            updated += conn.executemany(f"UPDATE {table} SET {set_clause} WHERE id = ?", params).rowcount
+        return updated
+
+    # rowcount وليس len(changes): سجلات حذفتها جلسة أخرى لا تُحسب
+    return get_writer().execute(write)
+
+def delete_categories(category_ids):
+    """حذف مجموعة فئات دفعة واحدة"""
+    return delete_rows_bulk('categories', category_ids)
+
+def delete_drug_types(drug_type_ids):
+    """حذف مجموعة أنواع أدوية دفعة واحدة"""
+    return delete_rows_bulk('drug_types', drug_type_ids)
+
+def delete_manufacturers(manufacturer_ids):
+    """حذف مجموعة شركات مصنعة دفعة واحدة"""
+    return delete_rows_bulk('manufacturers', manufacturer_ids)
+
+# أعمدة الأدوية المعروضة في المحرر الجماعي والقابلة للتعديل
+MEDICATION_GRID_COLUMNS = [
+    'generic_name', 'trade_name', 'concentration', 'form', 'active_ingredient',
+    'package_size', 'price', 'price_with_tax', 'availability', 'barcode', 'warehouse_name',
+]
+
+# معرفات كل استعلام IN في فحص التعارض (أقل بكثير من SQLITE_MAX_VARIABLE_NUMBER)
+STALE_CHECK_CHUNK = 500
+
+class SimilarMedicationError(Exception):
+    """صفوف جديدة تشبه أدوية موجودة: matches قاموس {رقم الصف: [(id، التشابه)]}"""
+
+    def __init__(self, matches):
+        self.matches = matches
+        super().__init__(
+            f"{len(matches)} دواء جديد يشبه أدوية موجودة في الكتالوج، تأكد أنه ليس مكررًا"
+        )
+
+def check_similar_medications(rows):
+    """فحص المكررات قبل الإضافة لكل صف جديد: مسار مشترك لنموذج الإضافة والمحرر الجماعي"""
+    matches = {}
+    for index, row in enumerate(rows):
+        similar = find_similar_medications(row)
+        if similar:
+            matches[index] = similar
+    if matches:
+        raise SimilarMedicationError(matches)
+
+class StaleMedicationError(Exception):
+    """تعارض تحديث: تم تعديل أو حذف الأدوية من جلسة أخرى بعد تحميلها"""
+
+    def __init__(self, medication_ids):
+        self.medication_ids = sorted(medication_ids)
+        super().__init__(
+            "تم تعديل الأدوية التالية من مستخدم آخر بعد تحميلها، يرجى إعادة التحميل: "
+            + ', '.join(str(i) for i in self.medication_ids)
+        )
+
+def diff_medications(snapshot, edited, columns=MEDICATION_GRID_COLUMNS):
+    """حساب الفروقات على مستوى الخلية بين اللقطة المحملة والجدول المعدل
+
+    يعيد (updates, inserts, deletes) حيث updates قاموس {id: {column: value}}
+    يحتوي فقط على الأعمدة التي تغيرت فعلاً.
+    """
+    import pandas as pd
+
+    def clean(value):
+        if pd.isna(value):
+            return None
+        return value.item() if hasattr(value, 'item') else value
+
+    existing = edited[edited['id'].notna()].astype({'id': 'int64'}).set_index('id')
+    snapshot = snapshot.astype({'id': 'int64'})
+    original = snapshot.set_index('id').loc[existing.index.intersection(snapshot['id'])]
+
+    updates = {}
+    for column in columns:
+        # المقارنة ككائنات حتى لا تؤثر أنواع الأعمدة (numpy أو Arrow) على النتيجة
+        old = original[column].astype(object)
+        old = old.where(old.notna(), None)
+        new = existing.loc[original.index, column].astype(object)
+        new = new.where(new.notna(), None)
+        changed = ~((old == new) | (old.isna() & new.isna()))
+        for medication_id, value in new[changed].items():
+            updates.setdefault(int(medication_id), {})[column] = clean(value)
+
+    inserts = [
+        {column: clean(row[column]) for column in columns}
+        for _, row in edited[edited['id'].isna()].iterrows()
+    ]
+    deletes = sorted(set(snapshot['id'].astype(int)) - set(existing.index))
+    return updates, inserts, deletes
+
+def grid_originals(snapshot, medication_ids, columns=MEDICATION_GRID_COLUMNS):
+    """قيم الأعمدة كما حُملت في اللقطة للأدوية medication_ids: {id: {column: value}}"""
+    import pandas as pd
+
+    rows = snapshot.astype({'id': 'int64'}).set_index('id').loc[list(medication_ids), columns]
+    return {
+        int(medication_id): {
+            column: None if pd.isna(value) else (value.item() if hasattr(value, 'item') else value)
+            for column, value in row.items()
+        }
+        for medication_id, row in rows.iterrows()
+    }
+
+def _same_value(old, new):
+    if old is None or new is None:
+        return old is None and new is None
+    if isinstance(old, (int, float)) and isinstance(new, (int, float)):
+        return float(old) == float(new)
+    return str(old) == str(new)
+
+def save_medications_bulk(updates, inserts=(), deletes=(), originals=None, allow_similar=False):
+    """حفظ تعديلات المحرر الجماعي في معاملة واحدة مع تحكم تفاؤلي بالتزامن
+
+    الصفوف الجديدة تُفحص أولاً كما في نموذج الإضافة: SimilarMedicationError إذا
+    شابه أي منها دواءً موجودًا، ما لم يكن allow_similar (تأكيد المستخدم).
+
+    originals: قاموس {id: {column: value}} بقيم الخلايا كما كانت عند التحميل
+    (grid_originals). إذا اختلفت أي قيمة منها في قاعدة البيانات لأي دواء معدل
+    أو محذوف، أو حُذف الدواء، يتم التراجع عن المعاملة بالكامل. المقارنة بالقيم
+    وليس بـ updated_at لأن دقته ثانية واحدة فلا يكشف تعديلاً في نفس الثانية.
+    """
+    if inserts and not allow_similar:
+        check_similar_medications(inserts)
+    originals = originals or {}
+    touched = sorted(set(updates) | set(deletes))
+
+    def write(conn):
+        # طابور الكتابة يحجز قفل الكتابة (BEGIN IMMEDIATE) قبل تنفيذ العملية،
+        # لذلك لا يمكن أن يتغير أي صف بين التحقق والتحديث
+        if touched:
+            columns = sorted({column for medication_id in touched for column in originals.get(medication_id, {})})
+            current = {}
+            # على دفعات: IN بمعرفات كثيرة يتجاوز حد متغيرات SQLite
+            for start in range(0, len(touched), STALE_CHECK_CHUNK):
+                chunk = touched[start:start + STALE_CHECK_CHUNK]
+                placeholders = ', '.join(['?' for _ in chunk])
+                current.update(
+                    (row[0], dict(zip(columns, row[1:])))
+                    for row in conn.execute(
+                        f"SELECT {', '.join(['id'] + columns)} FROM medications WHERE id IN ({placeholders})",
+                        chunk
+                    )
+                )
+            stale = [
+                medication_id for medication_id in touched
+                if medication_id not in current
+                or any(not _same_value(value, current[medication_id][column])
+                       for column, value in originals.get(medication_id, {}).items())
+            ]
+            if stale:
+                raise StaleMedicationError(stale)
+
+        # تجميع الصفوف حسب الأعمدة المعدلة لكتابة الأعمدة المتغيرة فقط
+        groups = {}
+        for medication_id, values in updates.items():
+            columns = tuple(sorted(values))
+            groups.setdefault(columns, []).append(
+                [values[column] for column in columns] + [medication_id]
+            )
+        for columns, params in groups.items():
+            set_clause = ', '.join([f"{column} = ?" for column in columns])
+            conn.executemany(f"UPDATE medications SET {set_clause} WHERE id = ?", params)
+
+        # الأعمدة الفارغة في الصفوف الجديدة لا تُكتب: تبقى القيمة الافتراضية للمخطط
+        # والتوفر المشتق من المخزون
+        insert_groups = {}
+        for row in inserts:
+            columns = tuple(column for column, value in row.items() if value is not None)
+            insert_groups.setdefault(columns, []).append([row[column] for column in columns])
+        for columns, params in insert_groups.items():
+            placeholders = ', '.join(['?' for _ in columns])
+            conn.executemany(f"INSERT INTO medications ({', '.join(columns)}) VALUES ({placeholders})", params)
+
+        if deletes:
+            conn.executemany(
+                "DELETE FROM medications WHERE id = ?",
+                [(int(medication_id),) for medication_id in deletes]
+            )
+
+    get_writer().execute(write)
+    return len(updates), len(inserts), len(deletes)
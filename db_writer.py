@@ -0,0 +1,225 @@
+"""
+طابور الكتابة الموحد - Single-Writer Queue
+
+جميع عمليات الكتابة على قاعدة البيانات تمر عبر خيط (thread) واحد يملك
+اتصال الكتابة. العمليات التي تصل خلال نافذة زمنية قصيرة تُجمع في معاملة
+واحدة، وكل عملية تحصل على Future تعيد نتيجتها أو الخطأ الخاص بها.
+"""
+
+import contextvars
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+# ===================================================================
+# الإعدادات الافتراضية
+# ===================================================================
+BATCH_WINDOW_SECONDS = 0.005   # مدة انتظار العمليات الإضافية بعد أول عملية في الدفعة
+MAX_BATCH_SIZE = 256           # الحد الأقصى لعدد العمليات في معاملة واحدة
+BUSY_TIMEOUT_MS = 10000        # مهلة انتظار القفل عند وجود كاتب من عملية أخرى
+OPTIMIZE_INTERVAL_SECONDS = 3600   # تشغيل PRAGMA optimize دوريًا لتحديث إحصائيات ANALYZE عند الحاجة
+
+_STOP = object()
+
+
+class _Exclusive:
+    """عملية تعمل على اتصال الكتابة خارج معاملة الدفعة (مثل الاستعادة عبر Backup API)"""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+
+class WriteQueue:
+    """خيط كتابة واحد يجمع العمليات المتزامنة في معاملات مجمعة
+
+    كل عملية هي دالة تستقبل الاتصال وتنفذ أوامرها عليه دون BEGIN/COMMIT،
+    وتعمل داخل SAVEPOINT خاص بها: فشل عملية لا يلغي باقي عمليات الدفعة.
+    """
+
+    def __init__(self, db_path, batch_window=BATCH_WINDOW_SECONDS, max_batch=MAX_BATCH_SIZE,
+                 factory=sqlite3.Connection, optimize_interval=OPTIMIZE_INTERVAL_SECONDS, maintenance=()):
+        self.db_path = db_path
+        # دوال fn(conn) تعمل مع PRAGMA optimize الدوري، كل منها في معاملتها
+        self.maintenance = tuple(maintenance)
+        self.factory = factory
+        self.optimize_interval = optimize_interval
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.stats = {'batches': 0, 'jobs': 0, 'failed_jobs': 0, 'largest_batch': 0, 'optimize_runs': 0,
+                      'maintenance_runs': 0, 'maintenance_errors': 0}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    # ---------------------------------------------------------------
+    # واجهة الاستخدام
+    # ---------------------------------------------------------------
+    def submit(self, fn):
+        """إضافة عملية كتابة إلى الطابور وإرجاع Future بنتيجتها"""
+        future = Future()
+        # سياق المستدعي (مثل الصفحة الحالية) ينتقل مع العملية إلى خيط الكتابة
+        context = contextvars.copy_context()
+        self._queue.put((lambda conn: context.run(fn, conn), future))
+        return future
+
+    def execute(self, fn, timeout=None):
+        """تنفيذ عملية كتابة وانتظار نتيجتها (تعيد الخطأ الأصلي عند الفشل)"""
+        return self.submit(fn).result(timeout)
+
+    def execute_exclusive(self, fn, timeout=None):
+        """تنفيذ دالة على اتصال الكتابة وحدها بين الدفعات، دون BEGIN أو SAVEPOINT
+
+        تستخدم للعمليات التي لا تعمل داخل معاملة (Backup API إلى قاعدة البيانات)،
+        وتدير الدالة معاملاتها بنفسها.
+        """
+        future = Future()
+        context = contextvars.copy_context()
+        self._queue.put((_Exclusive(lambda conn: context.run(fn, conn)), future))
+        return future.result(timeout)
+
+    def close(self):
+        """إيقاف الخيط بعد تنفيذ العمليات المتبقية في الطابور"""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    # ---------------------------------------------------------------
+    # خيط الكتابة
+    # ---------------------------------------------------------------
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, isolation_level=None, factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        # وضع WAL يسمح للقراء بالعمل أثناء الكتابة دون انتظار القفل
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        # ANALYZE الذي قد يشغله PRAGMA optimize يقرأ عينة محدودة من كل فهرس
+        conn.execute("PRAGMA analysis_limit = 1000")
+        return conn
+
+    def _optimize(self, conn):
+        """PRAGMA optimize يعيد ANALYZE فقط للجداول التي تغيرت كثيرًا منذ آخر تحليل"""
+        try:
+            conn.execute("PRAGMA optimize")
+            self.stats['optimize_runs'] += 1
+        except sqlite3.Error:
+            pass
+
+    def _maintain(self, conn):
+        """الصيانة الدورية المسجلة (خطأ إحداها لا يوقف خيط الكتابة ولا باقيها)"""
+        for fn in self.maintenance:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                fn(conn)
+                conn.execute("COMMIT")
+                self.stats['maintenance_runs'] += 1
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                self.stats['maintenance_errors'] += 1
+
+    def _collect_batch(self, first):
+        """جمع العمليات التي تصل خلال نافذة الدفعة"""
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is _STOP:
+                break
+        return batch
+
+    def _run(self):
+        conn = self._connect()
+        next_optimize = time.monotonic() + self.optimize_interval
+        try:
+            while True:
+                try:
+                    first = self._queue.get(timeout=max(next_optimize - time.monotonic(), 0))
+                except queue.Empty:
+                    first = None
+                if time.monotonic() >= next_optimize:
+                    # صيانة دورية بين الدفعات على نفس اتصال الكتابة
+                    self._maintain(conn)
+                    self._optimize(conn)
+                    next_optimize = time.monotonic() + self.optimize_interval
+                if first is None:
+                    continue
+                batch = self._collect_batch(first)
+                stop = batch[-1] is _STOP
+                jobs = []
+                for item in batch:
+                    if item is _STOP:
+                        continue
+                    if isinstance(item[0], _Exclusive):
+                        # العمليات السابقة لها في الطابور تُثبت أولاً
+                        if jobs:
+                            self._run_batch(conn, jobs)
+                            jobs = []
+                        self._run_exclusive(conn, item)
+                    else:
+                        jobs.append(item)
+                if jobs:
+                    self._run_batch(conn, jobs)
+                if stop:
+                    self._optimize(conn)
+                    break
+        finally:
+            conn.close()
+
+    def _run_exclusive(self, conn, item):
+        exclusive, future = item
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = exclusive.fn(conn)
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self.stats['failed_jobs'] += 1
+            future.set_exception(e)
+            return
+        self.stats['jobs'] += 1
+        future.set_result(result)
+
+    def _run_batch(self, conn, jobs):
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, future in jobs:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT job")
+                try:
+                    result = fn(conn)
+                    conn.execute("RELEASE job")
+                    outcomes.append((future, result, None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    outcomes.append((future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # فشل بدء المعاملة أو تثبيتها: جميع عمليات الدفعة تفشل بنفس الخطأ
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for fn, future in jobs:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats['batches'] += 1
+        self.stats['jobs'] += len(outcomes)
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(outcomes))
+        # النتائج تُسلم بعد تثبيت المعاملة فقط
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                self.stats['failed_jobs'] += 1
+                future.set_exception(error)
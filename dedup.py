@@ -0,0 +1,475 @@
+"""
+الأدوية المكررة - Near-Duplicate Detection
+
+الإدخال اليدوي واستيراد قوائم أكثر من مورد ينتج الدواء نفسه بأكثر من صف يختلف
+في المسافات أو حالة الأحرف أو الإملاء العربي (أ/إ/ا، ة/ه، ى/ي، التشكيل) أو صيغة
+التركيز (100mg/1ml، 100 mg / ml، 0.1 g/ml، ١٠٠ ملغ/مل). الكشف على ثلاث خطوات:
+1. تطبيع الأسماء والمادة الفعالة ثم حذف المسافات منها، وتحويل التركيز إلى صيغة
+   موحدة (mg/ml)
+2. مفاتيح تجميع: نطاقات توقيع MinHash لثلاثيات أحرف الاسم (LSH)، فلا يُقارن إلا
+   الصفوف التي تشترك في نطاق: زمن قريب من الخطي بدل مقارنة كل زوج
+3. التحقق من كل زوج مرشح بتشابه Jaccard الفعلي لثلاثيات الاسم التجاري (والاسم
+   العلمي إذا غاب التجاري عن أحدهما) والمادة الفعالة، ورفض الأزواج التي يختلف فيها
+   التركيز أو الشكل الصيدلاني أو الأرقام في الاسم (Adol 12 و Adol 123)
+
+الأزواج التي يؤكد المراجع أنها ليست مكررة تُحفظ في duplicate_dismissals فلا تظهر
+مجددًا. الدمج ينقل المخزون والتشغيلات والنصوص المضغوطة إلى الدواء المُبقى عليه،
+ويكمل حقوله الفارغة من المكررات ثم يحذفها (وتسجل محفزات التدقيق كل ذلك).
+
+الاستخدام:
+    python dedup.py --db drug_database.db scan --threshold 0.8
+    python dedup.py --db drug_database.db merge --keep 12 --ids 57 98
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import namedtuple
+
+# ===================================================================
+# الإعدادات
+# ===================================================================
+DEFAULT_THRESHOLD = 0.8
+MIN_THRESHOLD = 0.6             # أقل حد يمكن طلبه: أزواج الفهرس تُقيّم مرة واحدة عند هذا الحد
+NAME_WEIGHT = 0.7               # الباقي لتشابه المادة الفعالة
+PERMUTATIONS = 32               # طول توقيع MinHash
+BANDS = 8                       # 8 نطاقات × 4 قيم: زوج بتشابه 0.6 يلتقي في نطاق باحتمال 0.65، و 0.8 باحتمال 0.98
+MAX_BUCKET = 50                 # نطاق يشترك فيه أكثر من هذا العدد: مقارنة كل صف بجيرانه فقط
+WINDOW = 10                     # عدد الجيران بعد الترتيب بالاسم في المفاتيح الكبيرة
+SIMILAR_LIMIT = 5
+_PRIME = (1 << 31) - 1
+_SEED = 20241226
+
+INDEX_COLUMNS = ('id', 'generic_name', 'trade_name', 'active_ingredient', 'concentration', 'form')
+
+DEDUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS duplicate_dismissals (
+    first_id INTEGER NOT NULL,          -- الأصغر من المعرفين
+    second_id INTEGER NOT NULL,
+    dismissed_at INTEGER NOT NULL,
+    PRIMARY KEY (first_id, second_id)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS medications_dismissals_delete
+AFTER DELETE ON medications
+FOR EACH ROW
+BEGIN
+    DELETE FROM duplicate_dismissals WHERE first_id = OLD.id;
+    DELETE FROM duplicate_dismissals WHERE second_id = OLD.id;
+END;
+
+CREATE INDEX IF NOT EXISTS idx_duplicate_dismissals_second ON duplicate_dismissals(second_id);
+"""
+
+# يُطبق المخطط أعلاه عبر الترحيل رقم 9 في migrations.py
+
+# ===================================================================
+# التطبيع
+# ===================================================================
+_DIACRITICS = re.compile(r"[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")   # التشكيل والتطويل
+_FOLD = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ى': 'ي', 'ئ': 'ي', 'ی': 'ي', 'ؤ': 'و', 'ة': 'ه',
+    'ک': 'ك', 'گ': 'ك', '٫': '.', '٬': ',', 'µ': 'u', 'μ': 'u',
+    **{chr(0x0660 + d): str(d) for d in range(10)}, **{chr(0x06f0 + d): str(d) for d in range(10)},
+})
+_TOKEN = re.compile(r"\d+(?:\.\d+)?|[^\W\d_]+")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+# الوحدة -> (النوع، المعامل إلى mg أو ml)
+_UNITS = {
+    **dict.fromkeys(('mcg', 'ug', 'microgram', 'ميكروغرام', 'مكغ'), ('mass', 0.001)),
+    **dict.fromkeys(('mg', 'milligram', 'ملغ', 'مغ', 'ملغم', 'ملجم', 'مجم'), ('mass', 1)),
+    **dict.fromkeys(('g', 'gm', 'gram', 'غ', 'غم', 'جم', 'غرام', 'جرام'), ('mass', 1000)),
+    **dict.fromkeys(('ml', 'مل', 'ملل'), ('volume', 1)),
+    **dict.fromkeys(('l', 'لتر'), ('volume', 1000)),
+    **dict.fromkeys(('iu', 'unit', 'units', 'وحده'), ('unit', 1)),
+    '%': ('percent', 1),
+}
+_AMOUNT = re.compile(r"(\d+(?:\.\d+)?)\s*([a-z%\u0621-\u064a]+)?")
+_VOLUME = re.compile(r"(\d+(?:\.\d+)?)?\s*([a-z\u0621-\u064a]+)")
+
+
+def _fold(text):
+    """NFKC وحالة الأحرف وتوحيد الحروف العربية والأرقام والفاصلة العشرية"""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = _DIACRITICS.sub('', text).translate(_FOLD)
+    return re.sub(r"(?<=\d),(?=\d)", '.', text)
+
+
+def normalize(text):
+    """نص مطبّع للمقارنة: كلمات وأرقام مفصولة بمسافة واحدة ('Adol-500mg' -> 'adol 500 mg')"""
+    if not isinstance(text, str):
+        return ''
+    return ' '.join(_TOKEN.findall(_fold(text)))
+
+
+def _number(value):
+    return f"{round(value, 6):g}"
+
+
+def concentration_key(text):
+    """صيغة موحدة للتركيز: '200 mg / 5 ml' و '40mg/1ml' -> '40mg/ml'، '1g' -> '1000mg'"""
+    if not isinstance(text, str) or not text.strip():
+        return ''
+    parts = [part.strip() for part in _fold(text).split('/')]
+    volume = None
+    if len(parts) > 1:
+        match = _VOLUME.fullmatch(parts[-1])
+        if match and _UNITS.get(match.group(2), ('',))[0] == 'volume':
+            volume = float(match.group(1) or 1) * _UNITS[match.group(2)][1]
+            parts = parts[:-1]
+    amounts = []
+    for number, unit in _AMOUNT.findall(' '.join(parts)):
+        kind, factor = _UNITS.get(unit, (unit, 1))
+        value = float(number) * factor
+        if kind == 'mass':
+            amounts.append(f"{_number(value / volume)}mg/ml" if volume else f"{_number(value)}mg")
+        elif kind == 'volume':
+            amounts.append(f"{_number(value)}ml")
+        elif kind == 'percent':
+            amounts.append(f"{_number(value)}%")
+        else:
+            amounts.append(f"{_number(value)}{unit}" + (f"/{_number(volume)}ml" if volume else ''))
+    return '+'.join(amounts)
+
+
+def _trigrams(text):
+    padded = f" {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _record_trigrams(record):
+    return _trigrams(record.name), _trigrams(record.trade) if record.trade else None, _trigrams(record.ingredient)
+
+
+def _jaccard(first, second):
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+# ===================================================================
+# الفهرس
+# ===================================================================
+# name: الاسم التجاري والعلمي دون مسافات (مفتاح التجميع)، trade: الاسم التجاري دون مسافات
+Record = namedtuple('Record', 'id name trade numbers ingredient concentration form')
+
+
+def make_record(row):
+    """ميزات المقارنة لصف بأعمدة INDEX_COLUMNS (dict أو Series أو tuple)"""
+    if not hasattr(row, 'get'):
+        row = dict(zip(INDEX_COLUMNS, row))
+    generic = normalize(row.get('generic_name'))
+    trade = normalize(row.get('trade_name'))
+    return Record(
+        id=row.get('id'),
+        name=(trade + generic).replace(' ', ''),
+        trade=trade.replace(' ', ''),
+        numbers=frozenset(_NUMBER.findall(f"{trade} {generic}")),
+        ingredient=(normalize(row.get('active_ingredient')) or generic).replace(' ', ''),
+        concentration=concentration_key(row.get('concentration')),
+        form=normalize(row.get('form')),
+    )
+
+
+def _coefficients():
+    import numpy as np
+    rng = np.random.default_rng(_SEED)
+    return (rng.integers(1, _PRIME, PERMUTATIONS, dtype=np.uint64),
+            rng.integers(0, _PRIME, PERMUTATIONS, dtype=np.uint64))
+
+
+def _signatures(names, chunk=4096):
+    """توقيعات MinHash (len(names) × PERMUTATIONS) لثلاثيات أحرف الأسماء
+
+    ثلاثيات كل الأسماء تُحسب معًا من نقاط الترميز (UTF-32) دون حلقة Python
+    لكل ثلاثية: الأسماء تُضم بفاصل \\0 وتُستبعد الثلاثيات التي تعبره.
+    """
+    import numpy as np
+    multipliers, offsets = _coefficients()
+    signatures = np.empty((len(names), PERMUTATIONS), dtype=np.uint64)
+    for start in range(0, len(names), chunk):
+        padded = [f" {name} " for name in names[start:start + chunk]]
+        points = np.frombuffer("\0".join(padded).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        grams = (points[:-2] * 0x9E3779B1 + points[1:-1] * 0x85EBCA77 + points[2:]) % _PRIME
+        valid = (points[:-2] != 0) & (points[1:-1] != 0) & (points[2:] != 0)
+        lengths = np.fromiter((len(p) + 1 for p in padded), dtype=np.int64, count=len(padded))
+        owner = np.repeat(np.arange(len(padded)), lengths)[:len(grams)][valid]
+        grams = grams[valid]
+        # أول ثلاثية لكل اسم (كل اسم مبطن فيه ثلاثية واحدة على الأقل)
+        first = np.searchsorted(owner, np.arange(len(padded)))
+        hashed = (multipliers[:, None] * grams[None, :] + offsets[:, None]) % _PRIME
+        signatures[start:start + len(padded)] = np.minimum.reduceat(hashed, first, axis=1).T
+    return signatures
+
+
+class DuplicateIndex:
+    """ميزات الأدوية وتوقيعاتها لكشف المكررات والبحث عن مشابه لدواء جديد"""
+
+    def __init__(self, rows):
+        self.records = [make_record(row) for row in rows]
+        self.records = [record for record in self.records if record.name]
+        self._signatures = _signatures([record.name for record in self.records])
+        self._trigrams = {}
+        self._edges = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def _grams(self, position):
+        grams = self._trigrams.get(position)
+        if grams is None:
+            record = self.records[position]
+            grams = self._trigrams[position] = _record_trigrams(record)
+        return grams
+
+    @staticmethod
+    def _compatible(first, second):
+        # حقل فارغ في أحد الصفين لا يمنع التطابق، وقيمتان مختلفتان تمنعانه
+        return all(not a or not b or a == b for a, b in (
+            (first.concentration, second.concentration), (first.form, second.form),
+            (first.numbers, second.numbers),
+        ))
+
+    @staticmethod
+    def _score(first_grams, second_grams):
+        # الاسم التجاري إذا وُجد في الصفين (الاسم العلمي المشترك لا يجعل Adol و Panadol متشابهين)
+        name = 1 if first_grams[1] and second_grams[1] else 0
+        return (NAME_WEIGHT * _jaccard(first_grams[name], second_grams[name])
+                + (1 - NAME_WEIGHT) * _jaccard(first_grams[2], second_grams[2]))
+
+    def _buckets(self):
+        """مجموعات المواقع التي تشترك في نطاق من توقيع MinHash"""
+        import numpy as np
+        rows = PERMUTATIONS // BANDS
+        for band in range(BANDS):
+            keys = np.ascontiguousarray(self._signatures[:, band * rows:(band + 1) * rows])
+            keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * rows))).ravel()
+            order = np.argsort(keys, kind='stable')
+            ordered = keys[order]
+            bounds = np.flatnonzero(ordered[1:] != ordered[:-1]) + 1
+            for bucket in np.split(order, bounds):
+                if len(bucket) > 1:
+                    yield bucket.tolist()
+
+    def candidate_pairs(self):
+        """أزواج المواقع المرشحة (i < j) من مفاتيح التجميع"""
+        pairs = set()
+        for bucket in self._buckets():
+            if len(bucket) > MAX_BUCKET:
+                # نطاق شائع جدًا: كل صف مع WINDOW جيرانه بعد الترتيب بالاسم
+                bucket = sorted(bucket, key=lambda position: self.records[position].name)
+                pairs.update((min(a, b), max(a, b)) for i, a in enumerate(bucket)
+                             for b in bucket[i + 1:i + 1 + WINDOW])
+            else:
+                pairs.update((min(a, b), max(a, b)) for i, a in enumerate(bucket) for b in bucket[i + 1:])
+        return pairs
+
+    def edges(self):
+        """[(id، id، التشابه)] لكل زوج متوافق بتشابه MIN_THRESHOLD فأكثر (يُحسب مرة واحدة للفهرس)"""
+        if self._edges is None:
+            edges = []
+            for a, b in self.candidate_pairs():
+                first, second = self.records[a], self.records[b]
+                if self._compatible(first, second):
+                    score = self._score(self._grams(a), self._grams(b))
+                    if score >= MIN_THRESHOLD:
+                        edges.append((min(first.id, second.id), max(first.id, second.id), round(score, 3)))
+            self._edges = edges
+            self._trigrams = {}
+        return self._edges
+
+    def groups(self, threshold=DEFAULT_THRESHOLD, dismissed=()):
+        """مجموعات المكررات المرشحة: [{'ids', 'score', 'pairs'}] الأعلى تشابهًا أولاً"""
+        parent = {}
+
+        def find(x):
+            while parent.get(x, x) != x:
+                parent[x] = parent.get(parent[x], parent[x])
+                x = parent[x]
+            return x
+
+        edges = [edge for edge in self.edges() if edge[2] >= threshold and edge[:2] not in dismissed]
+        for a, b, _ in edges:
+            parent[find(a)] = find(b)
+        grouped = {}
+        for edge in edges:
+            grouped.setdefault(find(edge[0]), []).append(edge)
+        result = [{'ids': sorted({i for pair in pairs for i in pair[:2]}),
+                   'score': max(pair[2] for pair in pairs), 'pairs': sorted(pairs)}
+                  for pairs in grouped.values()]
+        return sorted(result, key=lambda group: (-group['score'], group['ids'][0]))
+
+    def similar(self, medication, threshold=DEFAULT_THRESHOLD, limit=SIMILAR_LIMIT):
+        """[(id، التشابه)] لأدوية الفهرس المشابهة لدواء جديد (قبل إضافته)"""
+        import numpy as np
+        record = make_record(medication)
+        if not record.name or not self.records:
+            return []
+        signature = _signatures([record.name])[0]
+        rows = PERMUTATIONS // BANDS
+        matches = (self._signatures == signature).reshape(len(self.records), BANDS, rows).all(axis=2).any(axis=1)
+        grams = _record_trigrams(record)
+        found = []
+        for position in np.flatnonzero(matches).tolist():
+            if self._compatible(record, self.records[position]):
+                score = self._score(grams, self._grams(position))
+                if score >= threshold:
+                    found.append((self.records[position].id, round(score, 3)))
+        return sorted(found, key=lambda item: -item[1])[:limit]
+
+
+def load_index(conn):
+    """فهرس المكررات لكل أدوية قاعدة البيانات"""
+    return DuplicateIndex(conn.execute(f"SELECT {', '.join(INDEX_COLUMNS)} FROM medications").fetchall())
+
+
+# ===================================================================
+# المراجعة والدمج
+# ===================================================================
+def dismissed_pairs(conn):
+    """الأزواج (الأصغر، الأكبر) التي أكد المراجع أنها ليست مكررة"""
+    return set(conn.execute("SELECT first_id, second_id FROM duplicate_dismissals").fetchall())
+
+
+def dismiss(conn, ids):
+    """تسجيل أن أدوية المجموعة ids ليست مكررة (كل زوج منها) وإرجاع عدد الأزواج"""
+    ids = sorted({int(i) for i in ids})
+    pairs = [(a, b, int(time.time())) for i, a in enumerate(ids) for b in ids[i + 1:]]
+    conn.executemany("INSERT OR IGNORE INTO duplicate_dismissals VALUES (?, ?, ?)", pairs)
+    return len(pairs)
+
+
+# أعمدة لا تُكمل من المكررات عند الدمج
+_MERGE_SKIP = {'id', 'created_at', 'updated_at'}
+
+
+def merge(conn, keep_id, duplicate_ids):
+    """دمج المكررات duplicate_ids في keep_id داخل معاملة الاتصال وإرجاع ملخص
+
+    - الحقول الفارغة في keep_id تُكمل من أول مكرر فيه قيمة، والنصوص السريرية
+      المضغوطة تُنقل كما هي (حقل مضغوط في keep_id لا يُلمس)
+    - حركات المخزون والتشغيلات والكميات المتوفرة تنتقل إلى keep_id، وتُجمع
+      كميات التشغيلة الواحدة أو المستودع الواحد
+    - سجل الأسعار وسجل التدقيق يبقيان على المعرفات المحذوفة كما عند الحذف
+    """
+    keep_id = int(keep_id)
+    duplicate_ids = [int(i) for i in duplicate_ids if int(i) != keep_id]
+    if not duplicate_ids:
+        return {'merged': 0, 'filled': 0, 'movements': 0, 'lots': 0}
+    marks = ', '.join('?' * len(duplicate_ids))
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(medications)")]
+    keep = conn.execute("SELECT * FROM medications WHERE id = ?", (keep_id,)).fetchone()
+    if keep is None:
+        raise ValueError(f"الدواء {keep_id} غير موجود")
+    keep = dict(zip(columns, keep))
+    order = {medication_id: i for i, medication_id in enumerate(duplicate_ids)}
+    duplicates = sorted(conn.execute(f"SELECT * FROM medications WHERE id IN ({marks})", duplicate_ids).fetchall(),
+                        key=lambda row: order[row[0]])
+    if len(duplicates) != len(duplicate_ids):
+        raise ValueError("بعض الأدوية المكررة غير موجودة")
+
+    # الحقول: نص مضغوط في keep_id يعني أن الحقل ليس فارغًا
+    compressed = {field for field, in conn.execute(
+        "SELECT field FROM medication_texts WHERE medication_id = ?", (keep_id,))}
+    filled = {}
+    moved_texts = []
+    for row in duplicates:
+        duplicate = dict(zip(columns, row))
+        duplicate_texts = {field for field, in conn.execute(
+            "SELECT field FROM medication_texts WHERE medication_id = ?", (duplicate['id'],))}
+        for column in columns:
+            if column in _MERGE_SKIP or column in filled or keep[column] is not None or column in compressed:
+                continue
+            if column in duplicate_texts:
+                moved_texts.append((keep_id, duplicate['id'], column))
+                compressed.add(column)
+            elif duplicate[column] is not None:
+                filled[column] = duplicate[column]
+    if filled:
+        conn.execute(f"UPDATE medications SET {', '.join(f'{c} = ?' for c in filled)} WHERE id = ?",
+                     list(filled.values()) + [keep_id])
+    conn.executemany("UPDATE medication_texts SET medication_id = ? WHERE medication_id = ? AND field = ?",
+                     moved_texts)
+
+    # التشغيلات: نفس رقم التشغيلة في نفس المستودع تُجمع في تشغيلة keep_id
+    lots_moved = conn.execute(
+        f"UPDATE OR IGNORE stock_lots SET medication_id = ? WHERE medication_id IN ({marks})", [keep_id] + duplicate_ids
+    ).rowcount
+    for lot_id, warehouse_id, lot_number, quantity in conn.execute(
+        f"SELECT id, warehouse_id, lot_number, quantity FROM stock_lots WHERE medication_id IN ({marks})",
+        duplicate_ids
+    ).fetchall():
+        target = conn.execute(
+            "SELECT id FROM stock_lots WHERE medication_id = ? AND warehouse_id = ? AND lot_number = ?",
+            (keep_id, warehouse_id, lot_number)
+        ).fetchone()[0]
+        conn.execute("UPDATE stock_lots SET quantity = quantity + ? WHERE id = ?", (quantity, target))
+        conn.execute("UPDATE stock_movements SET lot_id = ? WHERE lot_id = ?", (target, lot_id))
+        conn.execute("DELETE FROM stock_lots WHERE id = ?", (lot_id,))
+        lots_moved += 1
+
+    # الكميات المتوفرة: UPDATE ثم INSERT كما في محفز الحركات (محفزات التوفر تعمل على keep_id)
+    on_hand = conn.execute(
+        f"SELECT warehouse_id, SUM(quantity), MAX(last_movement_at) FROM stock_on_hand "
+        f"WHERE medication_id IN ({marks}) GROUP BY warehouse_id", duplicate_ids
+    ).fetchall()
+    for warehouse_id, quantity, last_movement_at in on_hand:
+        updated = conn.execute(
+            "UPDATE stock_on_hand SET quantity = quantity + ?, last_movement_at = MAX(last_movement_at, ?) "
+            "WHERE medication_id = ? AND warehouse_id = ?", (quantity, last_movement_at, keep_id, warehouse_id)
+        ).rowcount
+        if not updated:
+            conn.execute("INSERT INTO stock_on_hand (medication_id, warehouse_id, quantity, last_movement_at) "
+                         "VALUES (?, ?, ?, ?)", (keep_id, warehouse_id, quantity, last_movement_at))
+    movements = conn.execute(
+        f"UPDATE stock_movements SET medication_id = ? WHERE medication_id IN ({marks})", [keep_id] + duplicate_ids
+    ).rowcount
+
+    # الحذف يطلق محفزات التدقيق وسجل التغييرات وحذف النصوص والكميات والاستثناءات
+    merged = conn.execute(f"DELETE FROM medications WHERE id IN ({marks})", duplicate_ids).rowcount
+    return {'merged': merged, 'filled': len(filled) + len(moved_texts), 'movements': movements, 'lots': lots_moved}
+
+
+# ===================================================================
+# سطر الأوامر
+# ===================================================================
+def main():
+    parser = argparse.ArgumentParser(description="كشف الأدوية المكررة ودمجها")
+    parser.add_argument('--db', default=os.environ.get("DRUG_DB_PATH", "drug_database.db"))
+    sub = parser.add_subparsers(dest='command', required=True)
+    scanning = sub.add_parser('scan', help="مجموعات المكررات المرشحة")
+    scanning.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    scanning.add_argument('--limit', type=int, default=50)
+    merging = sub.add_parser('merge', help="دمج المكررات في دواء واحد")
+    merging.add_argument('--keep', type=int, required=True)
+    merging.add_argument('--ids', type=int, nargs='+', required=True)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.command == 'scan':
+            started = time.perf_counter()
+            index = load_index(conn)
+            groups = index.groups(args.threshold, dismissed_pairs(conn))
+            print(f"🧬 {len(groups):,} مجموعة ({sum(len(g['ids']) for g in groups):,} دواء) من {len(index):,} "
+                  f"في {time.perf_counter() - started:.2f} ث")
+            names = dict(conn.execute("SELECT id, COALESCE(trade_name, generic_name) || ' - ' || "
+                                      "COALESCE(concentration, '') FROM medications"))
+            for group in groups[:args.limit]:
+                print(f"  {group['score']:.2f}  " + "  |  ".join(f"{i}: {names[i]}" for i in group['ids']))
+        else:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                result = merge(conn, args.keep, args.ids)
+            print(f"✅ دمج {result['merged']} في {args.keep}: {result['filled']} حقل مكمل، "
+                  f"{result['movements']} حركة و {result['lots']} تشغيلة منقولة")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+"""
+تصدير الكتالوج - Streaming Catalog Export
+
+يقرأ medications_full_view على دفعات (fetchmany) ويكتب كل دفعة مباشرة إلى
+الملف (مع النصوص السريرية المضغوطة في medication_texts بعد فك ضغطها)، فتبقى
+الذاكرة محدودة بحجم الدفعة مهما كبر الكتالوج:
+- CSV بترميز UTF-8 مع BOM (ليفتحه Excel بالعربية بشكل صحيح)
+- XLSX عبر openpyxl بوضع الكتابة فقط (write_only) الذي لا يحتفظ بالخلايا
+  (يبقى جدول النصوص المشتركة في الذاكرة، وهو الأبطأ: XML بلغة Python)
+- Parquet عبر pyarrow.parquet.ParquetWriter، مجموعة صفوف لكل دفعة (اختياري)
+
+الملف الناتج يُحفظ باسم يتضمن رقم إصدار البيانات (data_version) المقروء في نفس
+معاملة القراءة، فيُعاد استخدامه لكل تنزيل لاحق حتى يتغير الكتالوج.
+
+الاستخدام:
+    python exports.py csv --db drug_database.db --out medications.csv
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import clinical_text
+import metrics
+from change_feed import get_data_version
+
+# ===================================================================
+# الإعدادات
+# ===================================================================
+EXPORT_VIEW = "medications_full_view"
+EXPORT_CHUNK_ROWS = 1000        # صفوف كل دفعة قراءة/كتابة (نصوص الأدوية السريرية طويلة)
+BACKGROUND_EXPORT_ROWS = 20000  # كتالوج أكبر من هذا يُصدّر في خيط خلفي بدل التنزيل المباشر
+
+FORMATS = {
+    'csv': {'label': "CSV", 'extension': "csv", 'mime': "text/csv"},
+    'xlsx': {'label': "Excel (XLSX)", 'extension': "xlsx",
+             'mime': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+    'parquet': {'label': "Parquet", 'extension': "parquet", 'mime': "application/vnd.apache.parquet"},
+}
+
+
+def available_formats():
+    """الصيغ المتاحة (Parquet يحتاج pyarrow)"""
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return [fmt for fmt in FORMATS if fmt != 'parquet']
+    return list(FORMATS)
+
+
+# ===================================================================
+# كتابة الصيغ
+# ===================================================================
+def _write_csv(path, columns, chunks, types):
+    # utf-8-sig: علامة BOM يحتاجها Excel لقراءة العربية من CSV
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for chunk in chunks:
+            writer.writerows(chunk)
+
+
+def _write_xlsx(path, columns, chunks, types):
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("medications")
+    sheet.append(columns)
+    for chunk in chunks:
+        for row in chunk:
+            # محارف التحكم غير مسموحة في XML الخاص بـ XLSX
+            sheet.append([ILLEGAL_CHARACTERS_RE.sub("", value) if isinstance(value, str) else value
+                          for value in row])
+    workbook.save(path)
+
+
+def _write_parquet(path, columns, chunks, types):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {'integer': pa.int64(), 'real': pa.float64(), 'text': pa.string()}
+    schema = pa.schema([(column, arrow_types[types[column]]) for column in columns])
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            arrays = []
+            for i, column in enumerate(columns):
+                values = [row[i] for row in chunk]
+                if types[column] == 'text':
+                    values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+                arrays.append(pa.array(values, type=schema.field(i).type))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+
+WRITERS = {'csv': _write_csv, 'xlsx': _write_xlsx, 'parquet': _write_parquet}
+
+
+# ===================================================================
+# القراءة على دفعات
+# ===================================================================
+def column_types(conn, view=EXPORT_VIEW):
+    """نوع ثابت لكل عمود (integer/real/text) لصيغ الأعمدة المحددة النوع مثل Parquet
+
+    SQLite لا يفرض الأنواع: العمود الرقمي الذي يحتوي أي قيمة نصية يُصدّر كنص.
+    """
+    declared = conn.execute(f"PRAGMA table_info({view})").fetchall()
+    types = {}
+    for _, name, decl_type, *_ in declared:
+        decl_type = (decl_type or "").upper()
+        if "INT" in decl_type or "BOOL" in decl_type:
+            types[name] = 'integer'
+        elif any(word in decl_type for word in ("REAL", "DEC", "NUM", "FLOA", "DOUB")):
+            types[name] = 'real'
+        else:
+            types[name] = 'text'
+    numeric = [name for name, kind in types.items() if kind != 'text']
+    if numeric:
+        checks = ", ".join(
+            f"MAX(typeof({name}) NOT IN ('integer', 'real', 'null')), MAX(typeof({name}) = 'real')"
+            for name in numeric
+        )
+        flags = conn.execute(f"SELECT {checks} FROM {view}").fetchone()
+        for i, name in enumerate(numeric):
+            has_text, has_real = flags[2 * i], flags[2 * i + 1]
+            if has_text:
+                types[name] = 'text'
+            elif has_real and types[name] == 'integer':
+                types[name] = 'real'
+    return types
+
+
+def export_catalog(conn, path, fmt, chunk_size=EXPORT_CHUNK_ROWS, progress=None):
+    """كتابة الكتالوج إلى path بالصيغة fmt وإرجاع (إصدار البيانات، عدد الصفوف)
+
+    الإصدار والصفوف يُقرآن داخل نفس معاملة القراءة. progress(rows) بعد كل دفعة.
+    """
+    conn.row_factory = None
+    written = [0]
+    conn.execute("BEGIN")
+    try:
+        version = get_data_version(conn)[0]
+        types = column_types(conn)
+        cursor = conn.execute(f"SELECT * FROM {EXPORT_VIEW} ORDER BY id")
+        columns = [d[0] for d in cursor.description]
+
+        def chunks():
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                # النصوص السريرية المضغوطة تُفك لكل دفعة فقط
+                yield clinical_text.fill_rows(conn, columns, rows)
+                written[0] += len(rows)
+                if progress is not None:
+                    progress(written[0])
+
+        WRITERS[fmt](path, columns, chunks(), types)
+    finally:
+        conn.rollback()
+    return version, written[0]
+
+
+# ===================================================================
+# ملفات التصدير المحفوظة حسب إصدار البيانات
+# ===================================================================
+class ExportCache:
+    """ملف تصدير واحد لكل صيغة وإصدار بيانات، يُبنى مباشرة أو في خيط خلفي"""
+
+    def __init__(self, directory, connect, max_workers=2):
+        self.directory = directory
+        self.connect = connect
+        self.progress = {}          # fmt -> عدد الصفوف المكتوبة أثناء البناء الخلفي
+        self.last_error = {}
+        self._builds = {}           # fmt -> Future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="catalog-export")
+
+    def path_for(self, fmt, version):
+        return os.path.join(self.directory, f"medications-v{version:012d}.{FORMATS[fmt]['extension']}")
+
+    def current_version(self):
+        conn = self.connect()
+        try:
+            return get_data_version(conn)[0]
+        finally:
+            conn.close()
+
+    def cached_path(self, fmt, version=None):
+        """مسار ملف التصدير للإصدار الحالي إن وُجد (قراءة صف الإصدار فقط)"""
+        if version is None:
+            version = self.current_version()
+        path = self.path_for(fmt, version)
+        return path if os.path.exists(path) else None
+
+    def build(self, fmt):
+        """بناء ملف الإصدار الحالي (أو إعادة الموجود) وإرجاع مساره"""
+        path = self.cached_path(fmt)
+        if path is not None:
+            return path
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = os.path.join(self.directory, f".export-{fmt}-{os.getpid()}-{threading.get_ident()}.tmp")
+        started = time.perf_counter()
+        conn = self.connect()
+        try:
+            version, rows = export_catalog(conn, tmp_path, fmt,
+                                           progress=lambda n: self.progress.__setitem__(fmt, n))
+            path = self.path_for(fmt, version)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            conn.close()
+        metrics.EXPORT_ROWS.inc(fmt, amount=rows)
+        metrics.EXPORT_SECONDS.inc(fmt, amount=time.perf_counter() - started)
+        self._prune(fmt, keep=path)
+        return path
+
+    def start(self, fmt):
+        """بدء البناء في خيط خلفي (مرة واحدة لكل صيغة في نفس الوقت)"""
+        with self._lock:
+            future = self._builds.get(fmt)
+            if future is not None and not future.done():
+                return future
+            self.progress[fmt] = 0
+            self.last_error.pop(fmt, None)
+            future = self._executor.submit(self._build_background, fmt)
+            self._builds[fmt] = future
+            return future
+
+    def _build_background(self, fmt):
+        try:
+            return self.build(fmt)
+        except Exception as e:
+            self.last_error[fmt] = str(e)
+            raise
+
+    def is_building(self, fmt):
+        future = self._builds.get(fmt)
+        return future is not None and not future.done()
+
+    def _prune(self, fmt, keep):
+        """حذف ملفات الإصدارات السابقة لنفس الصيغة"""
+        suffix = f".{FORMATS[fmt]['extension']}"
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith("medications-v") and name.endswith(suffix) and path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="تصدير الكتالوج على دفعات إلى CSV أو XLSX أو Parquet")
+    parser.add_argument('format', choices=list(FORMATS))
+    parser.add_argument('--db', default=os.environ.get("DRUG_DB_PATH", "drug_database.db"))
+    parser.add_argument('--out', help="مسار الملف (افتراضيًا medications.<الصيغة>)")
+    parser.add_argument('--chunk', type=int, default=EXPORT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    out = args.out or f"medications.{FORMATS[args.format]['extension']}"
+    started = time.perf_counter()
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        version, rows = export_catalog(conn, out, args.format, args.chunk)
+    finally:
+        conn.close()
+    print(f"✅ {out}: {rows:,} صف (إصدار البيانات {version}) في {time.perf_counter() - started:.2f} ث "
+          f"- {os.path.getsize(out) / 1024 / 1024:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
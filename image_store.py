@@ -0,0 +1,361 @@
+"""
+مخزن الصور - Content-Addressed Image Store
+
+حقول الصور في medications (image_path، box_image_path، leaflet_path،
+additional_images) مسارات نصية لملفات على القرص. هذا المخزن يعرضها مصغرة:
+- كل ملف يُنسخ عند أول طلب إلى objects/ab/<sha256> حسب محتواه: الصورة نفسها
+  بمسارين أو لدوائين تُخزن وتُصغّر مرة واحدة، واستبدال الملف الأصلي ينتج محتوى
+  جديدًا لا يختلط بمصغرات القديم
+- فهرس index.db داخل المخزن: المسار -> (الحجم، وقت التعديل، sha256) فلا تُحسب
+  البصمة من جديد إلا إذا تغير الملف، وأبعاد كل صورة، والمصغرات وآخر استخدام لها
+- المصغرات (WebP، أو JPEG إذا لم تدعمه Pillow) تُنشأ عند الطلب لكل حجم في thumbs/
+  ويُحذف الأقل استخدامًا منها (LRU) عندما يتجاوز مجموعها max_bytes
+
+الصفحات لا تعرض إلا المصغرات، فلا تُرسل الصور الأصلية الكبيرة إلى المتصفح.
+المخزن منفصل عن قاعدة البيانات فيعمل في وضع القراءة فقط أيضًا (إذا كان مجلده قابلاً للكتابة).
+
+الاستخدام:
+    python image_store.py --store image_store import --db drug_database.db --sizes 64 480
+    python image_store.py --store image_store stats
+    python image_store.py --store image_store evict --max-mb 100
+"""
+
+import argparse
+import base64
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+# ===================================================================
+# الإعدادات
+# ===================================================================
+# حقول المسار الواحد في medications وحقل القائمة (مفصولة بفواصل أو أسطر)
+IMAGE_FIELDS = ('image_path', 'box_image_path', 'leaflet_path')
+LIST_FIELD = 'additional_images'
+
+GRID_SIZE = 64          # عمود الصور في جدول الأدوية
+GALLERY_SIZE = 160      # الصور الإضافية في التفاصيل
+DETAIL_SIZE = 480       # الصورة الرئيسية في التفاصيل
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+EVICT_TO = 0.9          # الحذف حتى 90% من الحد فلا يتكرر مع كل مصغرة جديدة
+TOUCH_SECONDS = 60      # دقة "آخر استخدام": لا كتابة في الفهرس لكل عرض
+HASH_CHUNK = 1024 * 1024
+
+THUMBNAIL_FORMAT, THUMBNAIL_MIME = ("WEBP", "image/webp") if features.check('webp') else ("JPEG", "image/jpeg")
+THUMBNAIL_QUALITY = 80
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,              -- المسار كما هو مكتوب في medications
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS objects (
+    sha256 TEXT PRIMARY KEY,
+    bytes INTEGER NOT NULL,
+    width INTEGER,                      -- NULL: ليس صورة (مثل نشرة PDF)
+    height INTEGER,
+    format TEXT,
+    created_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS thumbnails (
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    last_used INTEGER NOT NULL,
+    PRIMARY KEY (sha256, size)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_thumbnails_last_used ON thumbnails(last_used);
+"""
+
+
+def split_paths(value):
+    """مسارات حقل additional_images (فواصل عربية أو إنجليزية أو أسطر)"""
+    if not isinstance(value, str):
+        return []
+    return [path.strip() for path in re.split(r"[,،;\n]", value) if path.strip()]
+
+
+def medication_paths(medication):
+    """[(الحقل، المسار)] لكل صور الدواء من صف (dict أو Series)"""
+    paths = []
+    for field in IMAGE_FIELDS:
+        value = medication.get(field)
+        if isinstance(value, str) and value.strip():
+            paths.append((field, value.strip()))
+    paths += [(LIST_FIELD, path) for path in split_paths(medication.get(LIST_FIELD))]
+    return paths
+
+
+def _write_atomic(path, write):
+    # ملف مؤقت في نفس المجلد ثم os.replace: لا يقرأ أحد ملفًا نصف مكتوب
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+# ===================================================================
+# المخزن
+# ===================================================================
+class ImageStore:
+    """ملفات الصور حسب المحتوى ومصغراتها، مشتركة بين الجلسات والعمليات"""
+
+    def __init__(self, directory, root=".", max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.root = root                # أساس المسارات النسبية في medications
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(INDEX_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(os.path.join(self.directory, "index.db"), timeout=10)
+        conn.isolation_level = None
+        return conn
+
+    def _object_path(self, sha):
+        return os.path.join(self.directory, "objects", sha[:2], sha)
+
+    def _thumbnail_path(self, sha, size):
+        extension = "webp" if THUMBNAIL_FORMAT == "WEBP" else "jpg"
+        return os.path.join(self.directory, "thumbs", sha[:2], f"{sha}-{size}.{extension}")
+
+    # -----------------------------------------------------------------
+    # المحتوى
+    # -----------------------------------------------------------------
+    def resolve(self, conn, path):
+        """sha256 لمحتوى الملف path (ونسخه إلى المخزن عند أول مرة)، أو None إذا لم يوجد"""
+        full_path = path if os.path.isabs(path) else os.path.join(self.root, path)
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            return None
+        known = conn.execute(
+            "SELECT sha256 FROM sources WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, stat.st_size, stat.st_mtime_ns)
+        ).fetchone()
+        if known and os.path.exists(self._object_path(known[0])):
+            return known[0]
+
+        digest = hashlib.sha256()
+        with open(full_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+        sha = digest.hexdigest()
+        target = self._object_path(sha)
+        if not os.path.exists(target):
+            with open(full_path, 'rb') as source:
+                _write_atomic(target, lambda f: shutil.copyfileobj(source, f, HASH_CHUNK))
+        try:
+            with Image.open(target) as image:
+                width, height, fmt = image.width, image.height, image.format
+        except (UnidentifiedImageError, OSError):
+            width = height = fmt = None
+        conn.execute(
+            "INSERT OR IGNORE INTO objects (sha256, bytes, width, height, format, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (sha, stat.st_size, width, height, fmt, int(time.time()))
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO sources (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime_ns, sha)
+        )
+        return sha
+
+    def _render(self, sha, size):
+        """إنشاء مصغرة بحجم size (الضلع الأطول) وإرجاع حجم ملفها"""
+        with Image.open(self._object_path(sha)) as image:
+            # JPEG: فك الترميز مباشرة بدقة أقل (أسرع بكثير من فك الصورة كاملة ثم تصغيرها)
+            image.draft('RGB', (size * 2, size * 2))
+            image = ImageOps.exif_transpose(image)
+            if THUMBNAIL_FORMAT == "JPEG" or image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if THUMBNAIL_FORMAT == "WEBP" and "A" in image.getbands() else "RGB")
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            target = self._thumbnail_path(sha, size)
+            _write_atomic(target, lambda f: image.save(f, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY))
+        return os.path.getsize(target)
+
+    def thumbnails(self, paths, size):
+        """ملفات المصغرات لقائمة مسارات {path: ملف أو None}
+
+        الإنشاء خارج أي معاملة (قد يستغرق وقتًا مع الصور الكبيرة)، ثم تسجيل
+        المصغرات الجديدة وآخر استخدام والحذف عند تجاوز الحد في معاملة قصيرة واحدة.
+        """
+        now = int(time.time())
+        result = {}
+        created = []
+        used = []
+        conn = self._connect()
+        try:
+            for path in paths:
+                if path in result:
+                    continue
+                sha = self.resolve(conn, path)
+                row = conn.execute("SELECT width FROM objects WHERE sha256 = ?", (sha,)).fetchone() if sha else None
+                if row is None or row[0] is None:
+                    result[path] = None
+                    continue
+                target = self._thumbnail_path(sha, size)
+                if os.path.exists(target):
+                    used.append((now, sha, size, now - TOUCH_SECONDS))
+                else:
+                    try:
+                        created.append((sha, size, self._render(sha, size), now))
+                    except (UnidentifiedImageError, OSError):
+                        result[path] = None
+                        continue
+                result[path] = target
+            if created or used:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany("INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?, ?)", created)
+                    conn.executemany(
+                        "UPDATE thumbnails SET last_used = ? WHERE sha256 = ? AND size = ? AND last_used < ?", used
+                    )
+                    if created:
+                        self.evict(conn, used_before=now)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        finally:
+            conn.close()
+        return result
+
+    def thumbnail(self, path, size=DETAIL_SIZE):
+        """ملف مصغرة صورة واحدة أو None"""
+        return self.thumbnails([path], size)[path]
+
+    def data_uris(self, paths, size=GRID_SIZE):
+        """{path: data URI} لعمود الصور في الجداول (st.column_config.ImageColumn)"""
+        uris = {}
+        for path, thumbnail in self.thumbnails(paths, size).items():
+            if thumbnail is None:
+                continue
+            try:
+                with open(thumbnail, 'rb') as f:
+                    encoded = base64.b64encode(f.read()).decode('ascii')
+            except OSError:
+                # حذفتها عملية أخرى للتو: تُنشأ في العرض التالي
+                continue
+            uris[path] = f"data:{THUMBNAIL_MIME};base64,{encoded}"
+        return uris
+
+    # -----------------------------------------------------------------
+    # الحذف والإحصائيات
+    # -----------------------------------------------------------------
+    def evict(self, conn, max_bytes=None, used_before=None):
+        """حذف المصغرات الأقل استخدامًا حتى EVICT_TO من الحد وإرجاع عددها
+
+        used_before: لا تُحذف المصغرات المستخدمة منذ هذا الوقت (مثل مصغرات العرض الحالي).
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM thumbnails").fetchone()[0]
+        if total <= max_bytes:
+            return 0
+        target = max_bytes * EVICT_TO
+        removed = []
+        for sha, size, written in conn.execute(
+            "SELECT sha256, size, bytes FROM thumbnails WHERE last_used < ? ORDER BY last_used",
+            (used_before if used_before is not None else time.time() + 1,)
+        ):
+            if total <= target:
+                break
+            removed.append((sha, size))
+            total -= written
+        for sha, size in removed:
+            try:
+                os.remove(self._thumbnail_path(sha, size))
+            except FileNotFoundError:
+                pass
+        conn.executemany("DELETE FROM thumbnails WHERE sha256 = ? AND size = ?", removed)
+        return len(removed)
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            sources = conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+            objects, object_bytes, images = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0), COUNT(width) FROM objects"
+            ).fetchone()
+            thumbnails, thumbnail_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM thumbnails"
+            ).fetchone()
+        finally:
+            conn.close()
+        return {'sources': sources, 'objects': objects, 'images': images, 'object_bytes': object_bytes,
+                'thumbnails': thumbnails, 'thumbnail_bytes': thumbnail_bytes, 'max_bytes': self.max_bytes}
+
+
+# ===================================================================
+# سطر الأوامر
+# ===================================================================
+def import_catalog(store, db_path, sizes=()):
+    """نسخ صور كل الأدوية إلى المخزن (وإنشاء مصغراتها بالأحجام sizes) وإرجاع (المسارات، الموجودة)"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        columns = ", ".join(IMAGE_FIELDS + (LIST_FIELD,))
+        paths = sorted({path for row in conn.execute(f"SELECT {columns} FROM medications")
+                        for _, path in medication_paths(row)})
+    finally:
+        conn.close()
+    index = store._connect()
+    try:
+        found = sum(1 for path in paths if store.resolve(index, path))
+    finally:
+        index.close()
+    for size in sizes:
+        store.thumbnails(paths, size)
+    return len(paths), found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="مخزن الصور حسب المحتوى ومصغراتها")
+    parser.add_argument('--store', default=os.environ.get("DRUG_IMAGE_STORE_DIR", "image_store"))
+    parser.add_argument('--root', default=os.environ.get("DRUG_IMAGE_ROOT", "."), help="أساس المسارات النسبية")
+    sub = parser.add_subparsers(dest='command', required=True)
+    importing = sub.add_parser('import', help="نسخ صور الأدوية إلى المخزن")
+    importing.add_argument('--db', default=os.environ.get("DRUG_DB_PATH", "drug_database.db"))
+    importing.add_argument('--sizes', type=int, nargs='*', default=[], help="أحجام مصغرات تُنشأ مسبقًا")
+    sub.add_parser('stats', help="حجم المخزن والمصغرات")
+    evicting = sub.add_parser('evict', help="حذف المصغرات الأقل استخدامًا")
+    evicting.add_argument('--max-mb', type=float, required=True)
+    args = parser.parse_args()
+
+    store = ImageStore(args.store, args.root)
+    if args.command == 'import':
+        started = time.perf_counter()
+        total, found = import_catalog(store, args.db, args.sizes)
+        print(f"✅ {found:,} / {total:,} مسار موجود في {time.perf_counter() - started:.1f} ث")
+    elif args.command == 'evict':
+        conn = store._connect()
+        try:
+            print(f"🗑️ {store.evict(conn, int(args.max_mb * 1024 * 1024)):,} مصغرة")
+        finally:
+            conn.close()
+    stats = store.stats()
+    print(f"🖼️ {stats['objects']:,} ملف ({stats['images']:,} صورة، {stats['object_bytes'] / 1024 / 1024:.1f} MB) "
+          f"من {stats['sources']:,} مسار - {stats['thumbnails']:,} مصغرة "
+          f"({stats['thumbnail_bytes'] / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+مستشار الفهارس - Index Advisor
+
+يعيد تشغيل بصمات الاستعلامات المسجلة (من سجل الاستعلامات البطيئة أو من
+إحصائيات query_stats) عبر EXPLAIN QUERY PLAN دون تنفيذها، ويبلغ عن:
+- المسح الكامل لجدول عليه شروط في WHERE (مع اقتراح فهرس على أعمدة الشروط)
+- الفهارس المؤقتة التلقائية في الربط (AUTOMATIC INDEX) أي فهرس ربط مفقود
+- الفرز في شجرة مؤقتة (TEMP B-TREE) لترتيب لا يغطيه فهرس
+
+الاستخدام:
+    python index_advisor.py --db drug_database.db --log slow_queries.jsonl
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+from collections import defaultdict
+
+# ===================================================================
+# تحليل نص الاستعلام
+# ===================================================================
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|LEFT\b|INNER\b|JOIN\b|ORDER\b|GROUP\b|LIMIT\b)([A-Za-z_]\w*))?", re.IGNORECASE)
+_WHERE = re.compile(r"\bWHERE\b(.*?)(?:\bORDER\s+BY\b|\bGROUP\s+BY\b|\bLIMIT\b|$)", re.IGNORECASE | re.DOTALL)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\b(.*?)(?:\bLIMIT\b|$)", re.IGNORECASE | re.DOTALL)
+_PREDICATE = re.compile(
+    r"(?:([A-Za-z_]\w*)\.)?([A-Za-z_]\w*)\s*(==|=|<=|>=|<|>|\bIN\b|\bLIKE\b|\bIS\b(?!\s+NOT))\s*(?=\?|\()",
+    re.IGNORECASE,
+)
+_EQUALITY_OPS = {"=", "==", "IN", "IS"}
+
+
+def replayable_sql(fingerprint):
+    """تحويل البصمة إلى أمر قابل للتحضير: IN (...) تصبح IN (?)"""
+    return fingerprint.replace("IN (...)", "IN (?)")
+
+
+def table_aliases(sql):
+    """{الاسم المستعار أو اسم الجدول: اسم الجدول} من عبارات FROM و JOIN"""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def predicate_columns(sql, alias, table, table_columns):
+    """أعمدة الجدول المقارنة بقيمة في WHERE: (أعمدة المساواة، أعمدة المدى)"""
+    match = _WHERE.search(sql)
+    if not match:
+        return [], []
+    equality, ranges = [], []
+    for qualifier, column, op in _PREDICATE.findall(match.group(1)):
+        if qualifier and qualifier not in (alias, table):
+            continue
+        if column not in table_columns:
+            continue
+        target = equality if op.upper() in _EQUALITY_OPS else ranges
+        if column not in equality and column not in ranges:
+            target.append(column)
+    return equality, ranges
+
+
+def order_by_columns(sql, alias, table, table_columns):
+    match = _ORDER_BY.search(sql)
+    if not match:
+        return []
+    columns = []
+    for term in match.group(1).split(","):
+        name = term.strip().split()[0] if term.strip() else ""
+        qualifier, _, column = name.rpartition(".")
+        if (not qualifier or qualifier in (alias, table)) and column in table_columns:
+            columns.append(column)
+    return columns
+
+
+# ===================================================================
+# قراءة قاعدة البيانات
+# ===================================================================
+def explain(conn, sql):
+    """خطة التنفيذ كقائمة نصوص دون تنفيذ الأمر (القيم تُربط كـ NULL)"""
+    params = [None] * sql.count("?")
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+def _table_columns(conn, table, cache):
+    if table not in cache:
+        cache[table] = {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+    return cache[table]
+
+
+def _existing_indexes(conn, table, cache):
+    """قائمة أعمدة كل فهرس على الجدول (المفتاح الأساسي rowid غير مشمول)"""
+    key = ('indexes', table)
+    if key not in cache:
+        indexes = []
+        for row in conn.execute(f"PRAGMA index_list({table})").fetchall():
+            columns = [info[2] for info in conn.execute(f"PRAGMA index_info({row[1]})").fetchall()]
+            indexes.append(columns)
+        cache[key] = indexes
+    return cache[key]
+
+
+def _suggest(table, columns):
+    return f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(columns)} ON {table}({', '.join(columns)});"
+
+
+# ===================================================================
+# التحليل
+# ===================================================================
+def analyze(conn, fingerprints):
+    """تحليل {fingerprint: {'count': n, 'total_ms': t}} وإرجاع قائمة الملاحظات مرتبة حسب الزمن الكلي"""
+    findings = []
+    cache = {}
+    for fingerprint, usage in fingerprints.items():
+        if not fingerprint.lstrip()[:6].upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            continue
+        sql = replayable_sql(fingerprint)
+        try:
+            plan = explain(conn, sql)
+        except sqlite3.Error as e:
+            findings.append(_finding(fingerprint, usage, [], 'error', None, str(e), None))
+            continue
+
+        aliases = table_aliases(sql)
+        for detail in plan:
+            words = detail.split()
+            if words[0] in ("SCAN", "SEARCH") and len(words) > 1 and words[1] in aliases:
+                alias = words[1]
+                table = aliases[alias]
+                columns = _table_columns(conn, table, cache)
+            else:
+                alias = table = None
+                columns = set()
+
+            if detail.startswith("SCAN ") and table:
+                equality, ranges = predicate_columns(sql, alias, table, columns)
+                if not equality and not ranges:
+                    findings.append(_finding(fingerprint, usage, plan, 'full_scan_expected', table,
+                                             "مسح كامل دون شروط على هذا الجدول (متوقع عند قراءة الجدول كله)", None))
+                    continue
+                suggested = equality + ranges[:1]
+                covered = any(index[:len(suggested)] == suggested for index in _existing_indexes(conn, table, cache))
+                note = ("يوجد فهرس مناسب لكن المخطط فضّل المسح (قيم قليلة التنوع أو إحصائيات قديمة - جرّب ANALYZE)"
+                        if covered else f"مسح كامل مع شروط على: {', '.join(suggested)}")
+                findings.append(_finding(fingerprint, usage, plan, 'full_scan', table, note,
+                                         None if covered else _suggest(table, suggested)))
+            elif "AUTOMATIC" in detail and table:
+                join_columns = re.findall(r"\((\w+)=\?", detail)
+                findings.append(_finding(fingerprint, usage, plan, 'automatic_index', table,
+                                         "فهرس مؤقت يُبنى في كل تنفيذ للربط",
+                                         _suggest(table, join_columns) if join_columns else None))
+            elif "TEMP B-TREE" in detail and "ORDER BY" in detail:
+                target_alias = next(iter(aliases), None)
+                target = aliases.get(target_alias)
+                suggestion = None
+                if target:
+                    target_columns = _table_columns(conn, target, cache)
+                    equality, _ = predicate_columns(sql, target_alias, target, target_columns)
+                    ordering = order_by_columns(sql, target_alias, target, target_columns)
+                    if ordering:
+                        suggestion = _suggest(target, equality + [c for c in ordering if c not in equality])
+                findings.append(_finding(fingerprint, usage, plan, 'temp_sort', target,
+                                         "فرز في شجرة مؤقتة لكل تنفيذ", suggestion))
+    return sorted(findings, key=lambda f: f['total_ms'], reverse=True)
+
+
+def _finding(fingerprint, usage, plan, issue, table, note, suggestion):
+    return {
+        'issue': issue,
+        'table': table,
+        'count': usage.get('count', 0),
+        'total_ms': round(usage.get('total_ms', 0.0), 2),
+        'note': note,
+        'suggestion': suggestion,
+        'plan': " | ".join(plan),
+        'fingerprint': fingerprint,
+    }
+
+
+def fingerprints_from_log(path):
+    """تجميع سجل الاستعلامات البطيئة: {fingerprint: {'count', 'total_ms'}}"""
+    usage = defaultdict(lambda: {'count': 0, 'total_ms': 0.0})
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                usage[entry['fingerprint']]['count'] += 1
+                usage[entry['fingerprint']]['total_ms'] += entry.get('ms', 0.0)
+    except FileNotFoundError:
+        pass
+    return dict(usage)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="تحليل خطط الاستعلامات المسجلة واقتراح الفهارس")
+    parser.add_argument('--db', default='drug_database.db')
+    parser.add_argument('--log', default='slow_queries.jsonl', help="سجل الاستعلامات البطيئة (JSON Lines)")
+    args = parser.parse_args()
+
+    fingerprints = fingerprints_from_log(args.log)
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        findings = analyze(conn, fingerprints)
+    finally:
+        conn.close()
+
+    print(f"🧭 {len(fingerprints)} بصمة من {args.log}")
+    for f in findings:
+        if f['issue'] == 'full_scan_expected':
+            continue
+        print(f"\n[{f['issue']}] {f['table']} - {f['count']} مرة، {f['total_ms']} ms")
+        print(f"  {f['fingerprint'][:200]}")
+        print(f"  الخطة: {f['plan']}")
+        print(f"  {f['note']}")
+        if f['suggestion']:
+            print(f"  💡 {f['suggestion']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,498 @@
+"""
+دفتر المخزون - Stock Ledger
+
+حركات المخزون (استلام، صرف، تسوية) لكل دواء ومستودع في جدول إلحاقي
+stock_movements، ومنه كمية متوفرة (stock_on_hand) تُحدَّث بمحفز مع كل حركة.
+عندما تعبر كمية الدواء في كل مستودعاته الصفر يُشتق حقل availability في
+medications ("متوفر" / "غير متوفر")، فلا يتغير صف الدواء (ولا إصدار البيانات)
+مع كل عملية صرف بل عند نفاد المخزون أو توفره فقط.
+
+المستودعات جدول مرجعي بالأسماء الموجودة في warehouse_name، والحركة بلا مستودع
+تُسجل على مستودع الدواء. معرف الحدث (reference) فريد: إعادة إرسال نفس الأحداث
+من نقطة البيع لا تكررها.
+
+الاستلام برقم تشغيلة (lot) وتاريخ انتهاء يُسجل في stock_lots، والصرف دون رقم
+تشغيلة يُوزع على التشغيلات الأقرب انتهاءً أولاً (lots.py).
+
+الأحداث تُكتب على دفعات: record_movements يكتب قائمة أحداث بأمر executemany
+داخل معاملة واحدة، و MovementBuffer يجمع الأحداث الواردة في الذاكرة ويرسلها
+كعملية واحدة لطابور الكتابة كل FLUSH_SECONDS ثانية أو FLUSH_EVENTS حدث.
+
+الاستخدام:
+    python inventory.py ingest pos_events.csv --db drug_database.db
+    tail -f pos_events.jsonl | python inventory.py ingest - --format jsonl
+    python inventory.py on-hand --db drug_database.db --medication 12
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import lots
+import metrics
+
+# ===================================================================
+# الإعدادات
+# ===================================================================
+FLUSH_EVENTS = 2000      # أقصى عدد أحداث في دفعة واحدة
+FLUSH_SECONDS = 1.0      # أقصى مدة يبقى فيها حدث في الذاكرة قبل كتابته
+LOOKUP_CHUNK = 500       # معرفات كل استعلام IN (...) عند مطابقة الأدوية
+
+AVAILABLE = "متوفر"
+UNAVAILABLE = "غير متوفر"
+DEFAULT_WAREHOUSE = "المستودع الرئيسي"
+
+# نوع الحركة: الاسم -> (الرمز المخزن، التسمية، إشارة الكمية؛ None = كما أُدخلت)
+MOVEMENT_KINDS = {
+    'receipt': ('R', "استلام", 1),
+    'dispense': ('D', "صرف", -1),
+    'adjustment': ('A', "تسوية", None),
+}
+_KIND_ALIASES = {alias: name for name, (code, label, _) in MOVEMENT_KINDS.items() for alias in (name, code, label)}
+
+# ===================================================================
+# مخطط قاعدة البيانات
+# ===================================================================
+_AVAILABILITY = f"""
+    UPDATE medications
+    SET availability = CASE WHEN EXISTS (
+            SELECT 1 FROM stock_on_hand WHERE medication_id = NEW.medication_id AND quantity > 0
+        ) THEN '{AVAILABLE}' ELSE '{UNAVAILABLE}' END
+    WHERE id = NEW.medication_id
+      AND availability IS NOT CASE WHEN EXISTS (
+            SELECT 1 FROM stock_on_hand WHERE medication_id = NEW.medication_id AND quantity > 0
+        ) THEN '{AVAILABLE}' ELSE '{UNAVAILABLE}' END;"""
+
+INVENTORY_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS warehouses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(200) NOT NULL UNIQUE
+);
+INSERT OR IGNORE INTO warehouses (name)
+SELECT DISTINCT TRIM(warehouse_name) FROM medications
+WHERE warehouse_name IS NOT NULL AND TRIM(warehouse_name) <> '';
+
+CREATE TABLE IF NOT EXISTS stock_movements (
+    id INTEGER PRIMARY KEY,
+    medication_id INTEGER NOT NULL,
+    warehouse_id INTEGER NOT NULL,
+    kind CHAR(1) NOT NULL,              -- R استلام، D صرف، A تسوية
+    quantity INTEGER NOT NULL,          -- التغير في الكمية (سالب للصرف)
+    occurred_at INTEGER NOT NULL,       -- مللي ثانية منذ 1970 (UTC)
+    reference VARCHAR(100)              -- معرف الحدث في نقطة البيع
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_stock_movements_reference
+    ON stock_movements(reference) WHERE reference IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_stock_movements_medication ON stock_movements(medication_id, occurred_at);
+
+CREATE TABLE IF NOT EXISTS stock_on_hand (
+    medication_id INTEGER NOT NULL,
+    warehouse_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    last_movement_at INTEGER NOT NULL,
+    PRIMARY KEY (medication_id, warehouse_id)
+) WITHOUT ROWID;
+
+-- مطابقة أحداث نقطة البيع بالباركود
+CREATE INDEX IF NOT EXISTS idx_medications_barcode ON medications(barcode);
+
+-- UPDATE ثم INSERT وليس UPSERT: المحفزات التي يطلقها فرع DO UPDATE ترث سياسة
+-- التعارض منه، فيفشل INSERT OR REPLACE في محفز سجل التغييرات عند تحديث التوفر
+CREATE TRIGGER IF NOT EXISTS stock_movements_on_hand
+AFTER INSERT ON stock_movements
+FOR EACH ROW
+BEGIN
+    UPDATE stock_on_hand SET
+        quantity = quantity + NEW.quantity,
+        last_movement_at = MAX(last_movement_at, NEW.occurred_at)
+    WHERE medication_id = NEW.medication_id AND warehouse_id = NEW.warehouse_id;
+    INSERT INTO stock_on_hand (medication_id, warehouse_id, quantity, last_movement_at)
+    SELECT NEW.medication_id, NEW.warehouse_id, NEW.quantity, NEW.occurred_at
+    WHERE NOT EXISTS (
+        SELECT 1 FROM stock_on_hand WHERE medication_id = NEW.medication_id AND warehouse_id = NEW.warehouse_id
+    );
+END;
+
+-- التوفر يُشتق فقط عند عبور الصفر (أو أول حركة للدواء في المستودع)
+CREATE TRIGGER IF NOT EXISTS stock_on_hand_availability_insert
+AFTER INSERT ON stock_on_hand
+FOR EACH ROW
+BEGIN{_AVAILABILITY}
+END;
+
+CREATE TRIGGER IF NOT EXISTS stock_on_hand_availability_update
+AFTER UPDATE OF quantity ON stock_on_hand
+FOR EACH ROW
+WHEN (OLD.quantity > 0) <> (NEW.quantity > 0)
+BEGIN{_AVAILABILITY}
+END;
+
+-- الكمية المتوفرة لدواء محذوف لا معنى لها (سجل الحركات يبقى كما هو)
+CREATE TRIGGER IF NOT EXISTS medications_stock_delete
+AFTER DELETE ON medications
+FOR EACH ROW
+BEGIN
+    DELETE FROM stock_on_hand WHERE medication_id = OLD.id;
+END;
+"""
+
+# يُطبق المخطط أعلاه عبر الترحيل رقم 5 في migrations.py
+
+
+# ===================================================================
+# كتابة الحركات على دفعات
+# ===================================================================
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _timestamp_ms(value):
+    """وقت الحدث: رقم (ثوانٍ أو مللي ثانية) أو نص ISO (بالتوقيت المحلي إن لم تحدد المنطقة)"""
+    if value is None or value == "":
+        return _now_ms()
+    if isinstance(value, (int, float)):
+        return int(value if value > 10**11 else value * 1000)
+    return int(datetime.fromisoformat(str(value).strip()).timestamp() * 1000)
+
+
+def _chunks(values, size=LOOKUP_CHUNK):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _as_id(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _resolve_medications(conn, events):
+    """(معرف -> (مستودع، مدة الصلاحية)، باركود -> (معرف، مستودع، مدة الصلاحية)) للأدوية المذكورة في الأحداث"""
+    ids = {_as_id(e['medication_id']) for e in events if e.get('medication_id') not in (None, "")}
+    ids.discard(None)
+    barcodes = {str(e['barcode']).strip() for e in events
+                if e.get('medication_id') in (None, "") and e.get('barcode') not in (None, "")}
+    by_id, by_barcode = {}, {}
+    for chunk in _chunks(ids):
+        rows = conn.execute(
+            f"SELECT id, warehouse_name, shelf_life FROM medications WHERE id IN ({', '.join('?' for _ in chunk)})",
+            chunk
+        ).fetchall()
+        by_id.update((row[0], row[1:]) for row in rows)
+    for chunk in _chunks(barcodes):
+        rows = conn.execute(
+            f"SELECT barcode, id, warehouse_name, shelf_life FROM medications "
+            f"WHERE barcode IN ({', '.join('?' for _ in chunk)})",
+            chunk
+        ).fetchall()
+        by_barcode.update((row[0], row[1:]) for row in rows)
+    return by_id, by_barcode
+
+
+def _existing_references(conn, references):
+    found = set()
+    for chunk in _chunks(references):
+        rows = conn.execute(
+            f"SELECT reference FROM stock_movements WHERE reference IN ({', '.join('?' for _ in chunk)})", chunk
+        ).fetchall()
+        found.update(row[0] for row in rows)
+    return found
+
+
+def _warehouse_ids(conn, names):
+    """معرفات المستودعات بالاسم (إضافة الأسماء الجديدة)"""
+    names = sorted(set(names))
+    conn.executemany("INSERT OR IGNORE INTO warehouses (name) VALUES (?)", [(name,) for name in names])
+    ids = {}
+    for chunk in _chunks(names):
+        rows = conn.execute(
+            f"SELECT name, id FROM warehouses WHERE name IN ({', '.join('?' for _ in chunk)})", chunk
+        ).fetchall()
+        ids.update((row[0], row[1]) for row in rows)
+    return ids
+
+
+def parse_kind(value):
+    kind = _KIND_ALIASES.get(str(value).strip().lower()) or _KIND_ALIASES.get(str(value).strip())
+    if kind is None:
+        raise ValueError(f"نوع حركة غير معروف: {value}")
+    return kind
+
+
+def record_movements(conn, events):
+    """كتابة دفعة أحداث داخل معاملة المستدعي وإرجاع (المسجلة، المكررة، المرفوضة)
+
+    كل حدث قاموس: medication_id أو barcode، kind (receipt/dispense/adjustment أو
+    R/D/A)، quantity، ومفاتيح اختيارية warehouse و reference و occurred_at، و lot
+    و expiry (أو manufactured) لتتبع التشغيلات (lots.py). الصرف دون lot يُوزع على
+    التشغيلات الأقرب انتهاءً وقد يُسجل في أكثر من حركة.
+    المرفوضة: قائمة (رقم الحدث، السبب) لدواء غير موجود أو قيم غير صالحة.
+    """
+    events = list(events)
+    by_id, by_barcode = _resolve_medications(conn, events)
+    rows, rejected, kinds = [], [], {}
+    for index, event in enumerate(events):
+        try:
+            if event.get('medication_id') not in (None, ""):
+                medication_id = _as_id(event['medication_id'])
+                if medication_id not in by_id:
+                    raise ValueError(f"دواء غير موجود: {medication_id}")
+                home_warehouse, shelf_life = by_id[medication_id]
+            else:
+                barcode = str(event.get('barcode') or "").strip()
+                if barcode not in by_barcode:
+                    raise ValueError(f"باركود غير معروف: {barcode}")
+                medication_id, home_warehouse, shelf_life = by_barcode[barcode]
+            kind = parse_kind(event.get('kind'))
+            code, _, sign = MOVEMENT_KINDS[kind]
+            quantity = int(float(event.get('quantity')))
+            if sign is not None:
+                quantity = sign * abs(quantity)
+            warehouse = str(event.get('warehouse') or home_warehouse or DEFAULT_WAREHOUSE).strip()
+            reference = event.get('reference')
+            reference = str(reference).strip() if reference not in (None, "") else None
+            for field, label in (('expiry', "تاريخ انتهاء"), ('manufactured', "تاريخ تصنيع")):
+                # تاريخ مكتوب لا يُفهم يُرفض بدل تخزين تشغيلة بلا انتهاء لا تظهر في قرب الانتهاء
+                value = event.get(field)
+                if value not in (None, "") and lots.parse_expiry(value) is None:
+                    raise ValueError(f"{label} غير مفهوم: {value}")
+            details = {'lot': event.get('lot'), 'expiry': event.get('expiry'),
+                       'manufactured': event.get('manufactured'), 'shelf_life': shelf_life}
+            rows.append([medication_id, warehouse, code, quantity, _timestamp_ms(event.get('occurred_at')),
+                         reference, details])
+            kinds[kind] = kinds.get(kind, 0) + 1
+        except (TypeError, ValueError) as e:
+            rejected.append((index, str(e)))
+
+    # المكررة تُستبعد قبل ربط التشغيلات: إعادة إرسال استلام لا تنشئ تشغيلة ولا
+    # يُعاد توزيع صرف سبق تسجيله
+    seen = _existing_references(conn, {row[5] for row in rows if row[5] is not None})
+    events_count, unique_rows = len(rows), []
+    for row in rows:
+        if row[5] is not None:
+            if row[5] in seen:
+                continue
+            seen.add(row[5])
+        unique_rows.append(row)
+
+    if unique_rows:
+        warehouse_ids = _warehouse_ids(conn, (row[1] for row in unique_rows))
+        for row in unique_rows:
+            row[1] = warehouse_ids[row[1]]
+        movements = lots.assign_lots(conn, unique_rows)
+        # DO NOTHING وليس INSERT OR IGNORE الذي يفرض سياسة التعارض على أوامر المحفزات
+        # أيضًا، وهو احتياط لكاتب آخر سجل المرجع نفسه. rowcount لا يشمل تغييرات
+        # المحفزات فيعطي عدد الحركات المسجلة فعلًا
+        inserted = conn.executemany(
+            "INSERT INTO stock_movements (medication_id, warehouse_id, kind, quantity, occurred_at, reference, lot_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (reference) WHERE reference IS NOT NULL DO NOTHING", movements
+        ).rowcount
+        recorded = len(unique_rows) - (len(movements) - inserted)
+    else:
+        recorded = 0
+    for kind, count in kinds.items():
+        metrics.STOCK_MOVEMENTS.inc(kind, amount=count)
+    return recorded, events_count - recorded, rejected
+
+
+class MovementBuffer:
+    """تجميع أحداث نقطة البيع في الذاكرة وكتابتها كدفعة واحدة عبر طابور الكتابة
+
+    submit: دالة تستقبل عملية كتابة (fn(conn)) وتعيد Future، مثل WriteQueue.submit.
+    الدفعة تُرسل عند بلوغ max_events حدثًا أو بعد interval ثانية من أول حدث فيها.
+    """
+
+    def __init__(self, submit, max_events=FLUSH_EVENTS, interval=FLUSH_SECONDS):
+        self.submit = submit
+        self.max_events = max_events
+        self.interval = interval
+        self.totals = {'recorded': 0, 'duplicates': 0, 'rejected': 0, 'batches': 0}
+        self.last_error = None
+        self._events = []
+        self._pending = []
+        # RLock: إذا انتهت الكتابة قبل add_done_callback يعمل _done في نفس الخيط
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="stock-buffer", daemon=True)
+        self._thread.start()
+
+    def add(self, event):
+        with self._lock:
+            self._events.append(event)
+            if len(self._events) >= self.max_events:
+                self._send()
+            elif len(self._events) == 1:
+                self._wakeup.notify()
+
+    def flush(self):
+        """إرسال الأحداث الحالية وانتظار كتابة كل الدفعات المرسلة"""
+        with self._lock:
+            self._send()
+            pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join()
+        self.flush()
+
+    def _send(self):
+        # يُستدعى والقفل مأخوذ
+        if not self._events:
+            return
+        batch, self._events = self._events, []
+        future = self.submit(lambda conn: record_movements(conn, batch))
+        future.add_done_callback(self._done)
+        self._pending = [f for f in self._pending if not f.done()] + [future]
+
+    def _done(self, future):
+        error = future.exception()
+        with self._lock:
+            if error is not None:
+                self.last_error = str(error)
+                return
+            recorded, duplicates, rejected = future.result()
+            self.totals['recorded'] += recorded
+            self.totals['duplicates'] += duplicates
+            self.totals['rejected'] += len(rejected)
+            self.totals['batches'] += 1
+
+    def _run(self):
+        with self._lock:
+            while not self._closed:
+                if not self._events:
+                    self._wakeup.wait()
+                    continue
+                # انتظار بقية الدفعة حتى انتهاء المهلة من أول حدث (الدفعة الممتلئة يرسلها add)
+                self._wakeup.wait(self.interval)
+                self._send()
+
+
+# ===================================================================
+# القراءة
+# ===================================================================
+def on_hand(conn, medication_id=None, warehouse_id=None, limit=None):
+    """(الدواء، الاسم التجاري، المستودع، الكمية، آخر حركة) الأقل كمية أولاً"""
+    where, params = [], []
+    if medication_id is not None:
+        where.append("s.medication_id = ?")
+        params.append(int(medication_id))
+    if warehouse_id is not None:
+        where.append("s.warehouse_id = ?")
+        params.append(int(warehouse_id))
+    return conn.execute(
+        "SELECT s.medication_id, m.trade_name, w.name, s.quantity, "
+        "datetime(s.last_movement_at / 1000, 'unixepoch', 'localtime') "
+        "FROM stock_on_hand s JOIN medications m ON m.id = s.medication_id JOIN warehouses w ON w.id = s.warehouse_id"
+        + (f" WHERE {' AND '.join(where)}" if where else "")
+        + " ORDER BY s.quantity, s.medication_id" + (f" LIMIT {int(limit)}" if limit else ""),
+        params
+    ).fetchall()
+
+
+def recent_movements(conn, medication_id=None, limit=100):
+    """آخر الحركات (الأحدث أولاً)، لدواء واحد من فهرس (الدواء، الوقت)"""
+    where = "WHERE sm.medication_id = ? " if medication_id is not None else ""
+    params = [int(medication_id)] if medication_id is not None else []
+    labels = " ".join(f"WHEN '{code}' THEN '{label}'" for code, label, _ in MOVEMENT_KINDS.values())
+    return conn.execute(
+        "SELECT datetime(sm.occurred_at / 1000, 'unixepoch', 'localtime'), sm.medication_id, m.trade_name, "
+        f"w.name, CASE sm.kind {labels} END, sm.quantity, l.lot_number, sm.reference "
+        "FROM stock_movements sm LEFT JOIN medications m ON m.id = sm.medication_id "
+        "JOIN warehouses w ON w.id = sm.warehouse_id LEFT JOIN stock_lots l ON l.id = sm.lot_id "
+        f"{where}ORDER BY sm.occurred_at DESC, sm.id DESC LIMIT ?",
+        params + [limit]
+    ).fetchall()
+
+
+def summary(conn):
+    """إجمالي الكميات وعدد الأدوية المتتبعة والمتوفرة والنافدة وعدد المستودعات"""
+    units, tracked, in_stock = conn.execute(
+        "SELECT COALESCE(SUM(quantity), 0), COUNT(*), COALESCE(SUM(in_stock), 0) "
+        "FROM (SELECT SUM(quantity) AS quantity, MAX(quantity > 0) AS in_stock "
+        "FROM stock_on_hand GROUP BY medication_id)"
+    ).fetchone()
+    warehouses = conn.execute("SELECT COUNT(*) FROM warehouses").fetchone()[0]
+    return {'units': units, 'tracked': tracked, 'in_stock': in_stock,
+            'out_of_stock': tracked - in_stock, 'warehouses': warehouses}
+
+
+# ===================================================================
+# سطر الأوامر
+# ===================================================================
+def read_events(stream, fmt):
+    """قراءة الأحداث من CSV (بعناوين أعمدة) أو JSON Lines"""
+    if fmt == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="دفتر المخزون: إدخال حركات نقطة البيع على دفعات وعرض الكميات")
+    parser.add_argument('--db', default=os.environ.get("DRUG_DB_PATH", "drug_database.db"))
+    sub = parser.add_subparsers(dest='command', required=True)
+    ingest = sub.add_parser('ingest', help="إدخال أحداث من ملف أو من stdin (-)")
+    ingest.add_argument('path')
+    ingest.add_argument('--format', choices=['csv', 'jsonl'])
+    ingest.add_argument('--batch', type=int, default=FLUSH_EVENTS)
+    ingest.add_argument('--interval', type=float, default=FLUSH_SECONDS)
+    show = sub.add_parser('on-hand', help="الكميات المتوفرة")
+    show.add_argument('--medication', type=int)
+    show.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    if args.command == 'on-hand':
+        conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+        try:
+            for medication_id, name, warehouse, quantity, last_at in on_hand(conn, args.medication, limit=args.limit):
+                print(f"{medication_id:>8}  {quantity:>8}  {warehouse}  {name}  ({last_at})")
+        finally:
+            conn.close()
+        return
+
+    from db_writer import WriteQueue
+    from migrations import migrate
+
+    conn = sqlite3.connect(args.db)
+    migrate(conn)
+    conn.close()
+    fmt = args.format or ('jsonl' if args.path.endswith(('.jsonl', '.json')) else 'csv')
+    writer = WriteQueue(args.db)
+    buffer = MovementBuffer(writer.submit, args.batch, args.interval)
+    started = time.perf_counter()
+    count = 0
+    stream = sys.stdin if args.path == '-' else open(args.path, encoding='utf-8-sig', newline='')
+    try:
+        for event in read_events(stream, fmt):
+            buffer.add(event)
+            count += 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        buffer.close()
+        writer.close()
+    totals = buffer.totals
+    print(f"✅ {count:,} حدث في {time.perf_counter() - started:.2f} ث: {totals['recorded']:,} مسجلة، "
+          f"{totals['duplicates']:,} مكررة، {totals['rejected']:,} مرفوضة في {totals['batches']:,} دفعة")
+    if buffer.last_error:
+        print(f"❌ خطأ: {buffer.last_error}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+"""
+التشغيلات وتواريخ الانتهاء - Lots & Expiry
+
+كل استلام برقم تشغيلة (lot) يُسجل في stock_lots مع تاريخ انتهاء محلل من النص
+المطبوع على العبوة (2026-05-31، 31/05/2026، 05/2026، MAY 2026...) أو محسوب من
+تاريخ التصنيع ومدة الصلاحية النصية للدواء (shelf_life: "24 شهر"، "3 سنوات").
+الصرف دون رقم تشغيلة يُوزع على تشغيلات الدواء في المستودع الأقرب انتهاءً أولاً
+(FEFO) مع تخطي المنتهية، فتبقى كمية كل تشغيلة صحيحة.
+
+استعلام "تنتهي خلال N يوم" يُجاب بمسح نطاق من فهرس جزئي على expiry_date يحتوي
+التشغيلات ذات الكمية الموجبة فقط: التشغيلات المستهلكة تخرج من الفهرس، فيبقى
+الاستعلام سريعًا مهما تراكم عدد التشغيلات.
+
+الاستخدام:
+    python lots.py --db drug_database.db --days 90
+    python lots.py --parse "EXP 05/27"
+"""
+
+import argparse
+import calendar
+import os
+import re
+import sqlite3
+from datetime import date, datetime, timedelta
+
+# ===================================================================
+# مخطط قاعدة البيانات
+# ===================================================================
+LOTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stock_lots (
+    id INTEGER PRIMARY KEY,
+    medication_id INTEGER NOT NULL,
+    warehouse_id INTEGER NOT NULL,
+    lot_number VARCHAR(100) NOT NULL,
+    expiry_date DATE,                   -- YYYY-MM-DD (نص ISO قابل للمقارنة والفرز)
+    quantity INTEGER NOT NULL DEFAULT 0,
+    received_at INTEGER NOT NULL,       -- مللي ثانية منذ 1970 (UTC)
+    UNIQUE (medication_id, warehouse_id, lot_number)
+);
+
+-- التشغيلات التي ما زالت فيها كمية فقط: الاستعلام يجب أن يتضمن quantity > 0
+CREATE INDEX IF NOT EXISTS idx_stock_lots_expiry ON stock_lots(expiry_date) WHERE quantity > 0;
+
+ALTER TABLE stock_movements ADD COLUMN lot_id INTEGER;
+
+CREATE TRIGGER IF NOT EXISTS stock_movements_lot
+AFTER INSERT ON stock_movements
+FOR EACH ROW
+WHEN NEW.lot_id IS NOT NULL
+BEGIN
+    UPDATE stock_lots SET quantity = quantity + NEW.quantity WHERE id = NEW.lot_id;
+END;
+
+CREATE VIEW IF NOT EXISTS stock_lots_view AS
+SELECT l.id, l.medication_id, m.trade_name, m.generic_name, l.warehouse_id, w.name AS warehouse,
+       l.lot_number, l.expiry_date, l.quantity,
+       CAST(julianday(l.expiry_date) - julianday('now', 'localtime', 'start of day') AS INTEGER) AS days_left
+FROM stock_lots l
+JOIN medications m ON m.id = l.medication_id
+JOIN warehouses w ON w.id = l.warehouse_id
+WHERE l.quantity > 0 AND l.expiry_date IS NOT NULL;
+"""
+
+# يُطبق المخطط أعلاه عبر الترحيل رقم 6 في migrations.py
+
+
+# ===================================================================
+# تحليل التواريخ النصية
+# ===================================================================
+_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+
+MONTH_NAMES = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+    'يناير': 1, 'فبراير': 2, 'مارس': 3, 'أبريل': 4, 'ابريل': 4, 'مايو': 5, 'يونيو': 6,
+    'يوليو': 7, 'أغسطس': 8, 'اغسطس': 8, 'سبتمبر': 9, 'أكتوبر': 10, 'اكتوبر': 10, 'نوفمبر': 11, 'ديسمبر': 12,
+    'كانون الثاني': 1, 'شباط': 2, 'آذار': 3, 'اذار': 3, 'نيسان': 4, 'أيار': 5, 'ايار': 5, 'حزيران': 6,
+    'تموز': 7, 'آب': 8, 'اب': 8, 'أيلول': 9, 'ايلول': 9, 'تشرين الأول': 10, 'تشرين الاول': 10,
+    'تشرين الثاني': 11, 'كانون الأول': 12, 'كانون الاول': 12,
+}
+
+_YMD = re.compile(r'(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})')
+_DMY = re.compile(r'(?<!\d)(\d{1,2})[-/.](\d{1,2})[-/.](\d{4}|\d{2})(?!\d)')
+_YM = re.compile(r'(\d{4})[-/.](\d{1,2})(?!\d)')
+_MY = re.compile(r'(?<!\d)(\d{1,2})[-/.](\d{4}|\d{2})(?!\d)')
+_NAMED = re.compile(r'([^\W\d_]+(?: [^\W\d_]+)?)[\s\-/.,]*(\d{4}|\d{2})(?!\d)')
+
+
+def _year(value):
+    year = int(value)
+    return year + 2000 if year < 100 else year
+
+
+def _month_end(year, month):
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def parse_expiry(text):
+    """تاريخ الانتهاء من نص العبوة أو None
+
+    الصيغ: 2026-05-31، 31/05/2026، 31/05/26، 2026-05، 05/2026، 05/26، MAY 2026، أيار 2026.
+    الشهر دون يوم يعني آخر يوم فيه (عرف عبوات الأدوية).
+    """
+    if text is None:
+        return None
+    if isinstance(text, datetime):
+        return text.date()
+    if isinstance(text, date):
+        return text
+    text = str(text).translate(_DIGITS).strip().lower()
+    if not text:
+        return None
+    try:
+        match = _YMD.search(text)
+        if match:
+            return date(int(match[1]), int(match[2]), int(match[3]))
+        match = _DMY.search(text)
+        if match:
+            return date(_year(match[3]), int(match[2]), int(match[1]))
+        match = _YM.search(text)
+        if match:
+            return _month_end(int(match[1]), int(match[2]))
+        match = _MY.search(text)
+        if match:
+            return _month_end(_year(match[2]), int(match[1]))
+        for match in _NAMED.finditer(text):
+            words = match[1]
+            month = MONTH_NAMES.get(words) or MONTH_NAMES.get(words.split()[-1]) or MONTH_NAMES.get(words[:3])
+            if month:
+                return _month_end(_year(match[2]), month)
+    except ValueError:
+        return None
+    return None
+
+
+_SHELF_LIFE = re.compile(r'(\d+(?:\.\d+)?)\s*(سنوات|سنين|سنة|عام|أعوام|years?|yrs?|أشهر|اشهر|شهور|شهر|months?|أيام|ايام|يوم|days?)')
+
+
+def shelf_life_months(text):
+    """مدة الصلاحية بالأشهر من نص مثل "24 شهر" أو "3 سنوات" أو "سنتان" (None إذا تعذر)"""
+    if not text:
+        return None
+    text = str(text).translate(_DIGITS).strip().lower()
+    match = _SHELF_LIFE.search(text)
+    if match:
+        value, unit = float(match[1]), match[2]
+        if unit.startswith(('سن', 'عام', 'أعوام', 'year', 'yr')):
+            return value * 12
+        if unit.startswith(('أيام', 'ايام', 'يوم', 'day')):
+            return value / 30
+        return value
+    if 'سنتان' in text or 'سنتين' in text or 'عامان' in text or 'عامين' in text:
+        return 24
+    if 'سنة' in text or 'عام' in text:
+        return 12
+    return None
+
+
+def add_months(start, months):
+    """إضافة عدد أشهر (قد يكون كسريًا) إلى تاريخ، مع حصر اليوم في آخر الشهر"""
+    whole = int(months)
+    month_index = start.month - 1 + whole
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    result = date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+    return result + timedelta(days=round((months - whole) * 30))
+
+
+def lot_expiry(expiry_text=None, manufactured=None, shelf_life=None):
+    """تاريخ انتهاء التشغيلة: المطبوع، وإلا تاريخ التصنيع + مدة صلاحية الدواء"""
+    expiry = parse_expiry(expiry_text)
+    if expiry is None and manufactured:
+        made = parse_expiry(manufactured)
+        months = shelf_life_months(shelf_life)
+        if made is not None and months:
+            expiry = add_months(made, months)
+    return expiry
+
+
+# ===================================================================
+# ربط الحركات بالتشغيلات
+# ===================================================================
+def _lot(conn, medication_id, warehouse_id, lot_number, expiry, received_at):
+    """(المعرف، تاريخ الانتهاء) للتشغيلة، مع إنشائها عند أول استلام"""
+    row = conn.execute(
+        "SELECT id, expiry_date FROM stock_lots WHERE medication_id = ? AND warehouse_id = ? AND lot_number = ?",
+        (medication_id, warehouse_id, lot_number)
+    ).fetchone()
+    expiry = expiry and expiry.isoformat()
+    if row is None:
+        lot_id = conn.execute(
+            "INSERT INTO stock_lots (medication_id, warehouse_id, lot_number, expiry_date, received_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (medication_id, warehouse_id, lot_number, expiry, received_at)
+        ).lastrowid
+        return lot_id, expiry
+    if row[1] is None and expiry is not None:
+        conn.execute("UPDATE stock_lots SET expiry_date = ? WHERE id = ?", (expiry, row[0]))
+        return row[0], expiry
+    return row
+
+
+def _open_lots(conn, medication_id, warehouse_id):
+    # [المعرف، تاريخ الانتهاء، الكمية] للتشغيلات ذات الكمية
+    return [list(row) for row in conn.execute(
+        "SELECT id, expiry_date, quantity FROM stock_lots "
+        "WHERE medication_id = ? AND warehouse_id = ? AND quantity > 0",
+        (medication_id, warehouse_id)
+    )]
+
+
+def _fefo_order(lot):
+    # الأقرب انتهاءً أولاً، والتشغيلات دون تاريخ في النهاية
+    return (lot[1] is None, lot[1] or "", lot[0])
+
+
+def assign_lots(conn, movements):
+    """ربط كل حركة بتشغيلتها وتقسيم الصرف دون تشغيلة على التشغيلات (FEFO)
+
+    movements: قوائم [الدواء، المستودع، النوع، الكمية، الوقت، المرجع، التفاصيل]
+    والتفاصيل قاموس بالمفاتيح الاختيارية lot و expiry و manufactured و shelf_life.
+    تُعاد قوائم [الدواء، المستودع، النوع، الكمية، الوقت، المرجع، lot_id] بالترتيب
+    نفسه، و lot_id هو None للحركة دون تشغيلة. الصرف يأخذ من التشغيلات غير المنتهية
+    الأقرب انتهاءً أولاً، فإن لم تكفِ سُجل الباقي دون تشغيلة؛ كل جزء بعد الأول
+    يحمل المرجع مع لاحقة #2، #3...
+    """
+    # الكميات المتبقية لكل (دواء، مستودع) تُتابع في الذاكرة خلال الدفعة: المحفز لا
+    # يحدّث stock_lots إلا عند إدراج الحركات بعد التوزيع
+    open_lots = {}
+    result = []
+    for medication_id, warehouse_id, code, quantity, occurred_at, reference, details in movements:
+        lot_number = str(details.get('lot') or "").strip()
+        if not lot_number and quantity >= 0:
+            result.append([medication_id, warehouse_id, code, quantity, occurred_at, reference, None])
+            continue
+        key = (medication_id, warehouse_id)
+        if key not in open_lots:
+            open_lots[key] = _open_lots(conn, medication_id, warehouse_id)
+        lots = open_lots[key]
+
+        if lot_number:
+            expiry = lot_expiry(details.get('expiry'), details.get('manufactured'), details.get('shelf_life'))
+            lot_id, expiry_date = _lot(conn, medication_id, warehouse_id, lot_number, expiry, occurred_at)
+            lot = next((lot for lot in lots if lot[0] == lot_id), None)
+            if lot is None:
+                lot = [lot_id, expiry_date, 0]
+                lots.append(lot)
+            lot[1] = expiry_date
+            lot[2] += quantity
+            result.append([medication_id, warehouse_id, code, quantity, occurred_at, reference, lot_id])
+            continue
+
+        today = datetime.fromtimestamp(occurred_at / 1000).date().isoformat()
+        remaining = -quantity
+        parts = []
+        for lot in sorted(lots, key=_fefo_order):
+            if remaining == 0:
+                break
+            if lot[2] <= 0 or (lot[1] is not None and lot[1] < today):
+                continue
+            taken = min(lot[2], remaining)
+            lot[2] -= taken
+            remaining -= taken
+            parts.append((-taken, lot[0]))
+        if remaining or not parts:
+            parts.append((-remaining, None))
+        for part, (part_quantity, lot_id) in enumerate(parts, 1):
+            part_reference = reference if part == 1 or reference is None else f"{reference}#{part}"
+            result.append([medication_id, warehouse_id, code, part_quantity, occurred_at, part_reference, lot_id])
+    return result
+
+
+# ===================================================================
+# القراءة
+# ===================================================================
+LOT_COLUMNS = ['id', 'medication_id', 'trade_name', 'generic_name', 'warehouse_id', 'warehouse',
+               'lot_number', 'expiry_date', 'quantity', 'days_left']
+
+
+def expiring(conn, days, warehouse_id=None, include_expired=False, limit=None):
+    """التشغيلات ذات الكمية التي تنتهي خلال days يوم، الأقرب انتهاءً أولاً
+
+    مسح نطاق من idx_stock_lots_expiry: [اليوم، اليوم + days] (أو من البداية مع
+    المنتهية إذا كان include_expired).
+    """
+    today = date.today()
+    params = [(today + timedelta(days=int(days))).isoformat()]
+    where = "expiry_date <= ?"
+    if not include_expired:
+        where += " AND expiry_date >= ?"
+        params.append(today.isoformat())
+    if warehouse_id is not None:
+        where += " AND warehouse_id = ?"
+        params.append(int(warehouse_id))
+    return conn.execute(
+        f"SELECT {', '.join(LOT_COLUMNS)} FROM stock_lots_view WHERE {where} ORDER BY expiry_date, id"
+        + (f" LIMIT {int(limit)}" if limit else ""),
+        params
+    ).fetchall()
+
+
+def expiry_summary(conn, days):
+    """(عدد التشغيلات، الكمية) للمنتهية وللتي تنتهي خلال days يوم"""
+    today = date.today()
+    horizon = (today + timedelta(days=int(days))).isoformat()
+    row = conn.execute(
+        "SELECT COUNT(*) FILTER (WHERE expiry_date < ?), COALESCE(SUM(quantity) FILTER (WHERE expiry_date < ?), 0), "
+        "COUNT(*) FILTER (WHERE expiry_date >= ?), COALESCE(SUM(quantity) FILTER (WHERE expiry_date >= ?), 0) "
+        "FROM stock_lots WHERE quantity > 0 AND expiry_date <= ?",
+        (today.isoformat(),) * 4 + (horizon,)
+    ).fetchone()
+    return {'expired_lots': row[0], 'expired_units': row[1], 'expiring_lots': row[2], 'expiring_units': row[3]}
+
+
+def medication_lots(conn, medication_id):
+    """تشغيلات دواء بكمية موجبة (الأقرب انتهاءً أولاً)"""
+    return conn.execute(
+        f"SELECT {', '.join(LOT_COLUMNS)} FROM stock_lots_view WHERE medication_id = ? ORDER BY expiry_date",
+        (int(medication_id),)
+    ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="التشغيلات التي تنتهي صلاحيتها قريبًا")
+    parser.add_argument('--db', default=os.environ.get("DRUG_DB_PATH", "drug_database.db"))
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--expired', action='store_true', help="تضمين التشغيلات المنتهية")
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--parse', help="تحليل نص تاريخ انتهاء فقط")
+    args = parser.parse_args()
+
+    if args.parse:
+        print(parse_expiry(args.parse))
+        return
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        rows = expiring(conn, args.days, include_expired=args.expired, limit=args.limit)
+        print(f"⏳ {len(rows):,} تشغيلة تنتهي خلال {args.days} يوم")
+        for row in rows:
+            lot = dict(zip(LOT_COLUMNS, row))
+            print(f"  {lot['expiry_date']}  ({lot['days_left']:>4} يوم)  {lot['quantity']:>6}  "
+                  f"{lot['lot_number']}  {lot['trade_name'] or lot['generic_name']}  - {lot['warehouse']}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""
+مقاييس التشغيل - Prometheus Metrics
+
+عدادات (Counter) ومدرجات تكرارية (Histogram) تُجمع داخل العملية بكلفة قفل
+وزيادة رقم فقط، ومقاييس لحظية (Gauge) تُحسب عند القراءة. التصدير بصيغة
+Prometheus النصية يتم من خيط خلفي: إما خادم HTTP محلي (/metrics) أو ملف نصي
+يُعاد كتابته دوريًا لـ node_exporter textfile collector، فلا يضيف أي زمن إلى
+خيط تشغيل صفحات Streamlit.
+"""
+
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ===================================================================
+# الإعدادات
+# ===================================================================
+PREFIX = "drug_app_"
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TEXTFILE_INTERVAL_SECONDS = 15
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ===================================================================
+# أنواع المقاييس
+# ===================================================================
+class Counter:
+    """عداد يزداد فقط"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = PREFIX + name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name + "_total", _format_labels(self.labels, key), value) for key, value in items]
+
+
+class Histogram:
+    """مدرج تكراري بحدود ثابتة (buckets) ومجموع وعدد"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = PREFIX + name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}   # label_values -> [counts per bucket..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                entry[index] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(entry)) for key, entry in self._values.items()]
+        lines = []
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                lines.append((self.name + "_bucket", _format_labels(self.labels, key, [("le", _format_value(float(bound)))]), cumulative))
+            lines.append((self.name + "_bucket", _format_labels(self.labels, key, [("le", "+Inf")]), entry[-1]))
+            lines.append((self.name + "_sum", _format_labels(self.labels, key), entry[-2]))
+            lines.append((self.name + "_count", _format_labels(self.labels, key), entry[-1]))
+        return lines
+
+
+class Gauge:
+    """قيمة لحظية تُحسب عند التصدير عبر دالة تعيد {label_values: value}"""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), callback=None):
+        self.name = PREFIX + name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.callback = callback
+
+    def samples(self):
+        try:
+            values = self.callback() if self.callback else {}
+        except Exception:
+            return []
+        return [(self.name, _format_labels(self.labels, key), value) for key, value in values.items()]
+
+
+class CallbackCounter(Gauge):
+    """عداد تُقرأ قيمته عند التصدير من إحصائيات موجودة (مثل stats في الذاكرة المؤقتة)"""
+
+    kind = "counter"
+
+    def samples(self):
+        return [(name + "_total", labels, value) for name, labels, value in super().samples()]
+
+
+# ===================================================================
+# السجل
+# ===================================================================
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """تسجيل مقياس مرة واحدة (إعادة التسجيل بنفس الاسم تعيد المقياس الموجود)"""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        """كل المقاييس بصيغة Prometheus النصية"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help_text, labels=()):
+    return REGISTRY.register(Counter(name, help_text, labels))
+
+
+def histogram(name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, help_text, labels, buckets))
+
+
+def gauge(name, help_text, labels=(), callback=None):
+    return REGISTRY.register(Gauge(name, help_text, labels, callback))
+
+
+def callback_counter(name, help_text, labels=(), callback=None):
+    return REGISTRY.register(CallbackCounter(name, help_text, labels, callback))
+
+
+# ===================================================================
+# المقاييس المعرفة
+# ===================================================================
+PAGE_RERUNS = counter("page_reruns", "عدد مرات تشغيل كل صفحة", ["page"])
+PAGE_RENDER_SECONDS = histogram("page_render_seconds", "زمن تشغيل دالة الصفحة", ["page"])
+ROWS_PER_REQUEST = histogram(
+    "rows_loaded_per_request", "عدد الصفوف المقروءة من قاعدة البيانات في تشغيل صفحة واحد", ["page"],
+    buckets=(0, 10, 100, 1000, 10000, 100000, 1000000),
+)
+DB_QUERY_SECONDS = histogram("db_query_seconds", "زمن أوامر SQL (تنفيذ وجلب)", ["statement"])
+IMPORT_ROWS = counter("import_rows", "عدد الصفوف المستوردة", ["source"])
+IMPORT_SECONDS = counter("import_seconds", "الزمن المستغرق في الاستيراد", ["source"])
+EXPORT_ROWS = counter("export_rows", "عدد الصفوف المصدرة", ["format"])
+EXPORT_SECONDS = counter("export_seconds", "الزمن المستغرق في التصدير", ["format"])
+STOCK_MOVEMENTS = counter("stock_movements", "حركات المخزون المسجلة حسب النوع", ["kind"])
+CACHE_REQUESTS = callback_counter(
+    "medication_cache_requests", "طلبات كتالوج الأدوية حسب المصدر والنتيجة", ["cache", "result"]
+)
+CACHE_HIT_RATIO = gauge("medication_cache_hit_ratio", "نسبة الطلبات التي لم تحتج قراءة أي صف", ["cache"])
+DB_FILE_BYTES = gauge("database_file_bytes", "حجم ملفات قاعدة البيانات", ["file"])
+WRITER_JOBS = callback_counter("writer_jobs", "عمليات ودفعات طابور الكتابة", ["kind"])
+BACKUP_SECONDS = histogram(
+    "backup_seconds", "زمن إنشاء لقطة قاعدة البيانات (نسخ وفحص)", ["label"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+BACKUP_RUNS = counter("backup_runs", "عدد اللقطات حسب النوع والنتيجة", ["label", "result"])
+BACKUP_LAST_SUCCESS = gauge("backup_last_success_timestamp_seconds", "وقت آخر لقطة ناجحة")
+
+
+def statement_kind(sql):
+    """نوع الأمر كتسمية قليلة القيم: select/insert/update/delete/other"""
+    keyword = sql.lstrip()[:6].lower()
+    return keyword if keyword in ("select", "insert", "update", "delete") else "other"
+
+
+# ===================================================================
+# التصدير من خيط خلفي
+# ===================================================================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_http(port, host="127.0.0.1"):
+    """تشغيل خادم /metrics في خيط خلفي وإرجاع الخادم"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def write_textfile(path):
+    """كتابة المقاييس إلى ملف بشكل ذري (لا يقرأ الجامع ملفًا نصف مكتوب)"""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render())
+    os.replace(tmp_path, path)
+
+
+def start_textfile_writer(path, interval=TEXTFILE_INTERVAL_SECONDS):
+    """إعادة كتابة ملف المقاييس كل interval ثانية من خيط خلفي"""
+    def run():
+        while True:
+            try:
+                write_textfile(path)
+            except OSError:
+                pass
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="metrics-textfile", daemon=True)
+    thread.start()
+    return thread
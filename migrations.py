@@ -0,0 +1,172 @@
+"""
+ترحيلات مخطط قاعدة البيانات - Schema Migrations
+
+رقم إصدار المخطط محفوظ في PRAGMA user_version داخل ملف قاعدة البيانات.
+عند بدء التشغيل تُقرأ هذه القيمة فقط، وإذا كانت أقل من آخر ترحيل تُطبق
+الترحيلات المعلقة بالترتيب داخل معاملة واحدة مع تحديث الرقم، فلا يرى أي
+اتصال آخر مخططًا نصف مُرحّل.
+
+لإضافة تغيير على المخطط: أضف ترحيلاً جديدًا برقم تالٍ في نهاية MIGRATIONS
+(نص SQL أو دالة تستقبل الاتصال) ولا تعدّل الترحيلات السابقة.
+
+الاستخدام من سطر الأوامر:
+    python migrations.py drug_database.db
+"""
+
+import os
+import sqlite3
+import sys
+
+from audit import create_audit_log, install_triggers
+from change_feed import CHANGE_FEED_SCHEMA, CHANGE_UPDATE_TRIGGER, LOOKUP_TRIGGERS
+from clinical_text import CLINICAL_TEXT_SCHEMA, CLINICAL_TEXT_TRIGGERS
+from dedup import DEDUP_SCHEMA
+from inventory import INVENTORY_SCHEMA
+from lots import LOTS_SCHEMA
+from price_history import PRICE_HISTORY_SCHEMA, SEED_PRICE_HISTORY
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database_schema.sql')
+BUSY_TIMEOUT_MS = 10000
+
+
+def split_statements(script):
+    """تقسيم نص SQL إلى أوامر مستقلة (مع مراعاة BEGIN ... END في المحفزات)"""
+    statements = []
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statement = buffer.strip()
+            if statement:
+                statements.append(statement)
+            buffer = ""
+    # بقية بلا فاصلة منقوطة (مثل تعليقات الخاتمة) تُضاف فقط إن احتوت أمرًا
+    rest = "\n".join(l for l in buffer.splitlines() if not l.strip().startswith('--')).strip()
+    if rest:
+        statements.append(rest)
+    return statements
+
+
+def _run_script(conn, script):
+    # executescript ينهي المعاملة الحالية، لذلك تنفذ الأوامر واحدًا واحدًا
+    for statement in split_statements(script):
+        conn.execute(statement)
+
+
+def _table_exists(conn, name):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+
+# ===================================================================
+# الترحيلات
+# ===================================================================
+def _baseline(conn):
+    """المخطط الأساسي من database_schema.sql
+
+    قواعد البيانات التي أنشئت قبل نظام الترحيلات (user_version = 0) تحتوي هذا
+    المخطط وبياناته الأولية مسبقًا، فيُكتفى بتسجيلها على هذا الإصدار.
+    """
+    if _table_exists(conn, 'medications'):
+        return
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        _run_script(conn, f.read())
+
+
+COMPOSITE_INDEXES = """
+-- الفئة + التوفر معًا (ترتيب id DESC يأتي من rowid داخل الفهرس دون فرز إضافي)،
+-- ويخدم أيضًا ON DELETE SET NULL عند حذف فئة، لذلك يغني عن فهرس الفئة المنفرد
+CREATE INDEX IF NOT EXISTS idx_medications_category_availability ON medications(category_id, availability);
+DROP INDEX IF EXISTS idx_medications_category;
+CREATE INDEX IF NOT EXISTS idx_medications_availability ON medications(availability);
+
+-- البحث بالبادئة دون تمييز حالة الأحرف: LIKE 'abc%' يستخدم فهارس NOCASE فقط
+CREATE INDEX IF NOT EXISTS idx_medications_generic_name_nocase ON medications(generic_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_medications_trade_name_nocase ON medications(trade_name COLLATE NOCASE);
+
+-- قراءة التغييرات (version > ? AND op ...) من الفهرس وحده: medication_id هو rowid
+CREATE INDEX IF NOT EXISTS idx_medication_changes_version_op ON medication_changes(version, op);
+DROP INDEX IF EXISTS idx_medication_changes_version;
+
+-- إحصائيات الجداول لمخطط الاستعلامات (محدودة العينة على الجداول الكبيرة)
+PRAGMA analysis_limit = 1000;
+ANALYZE;
+"""
+
+
+MIGRATIONS = [
+    (1, "المخطط الأساسي", _baseline),
+    (2, "سجل التغييرات (data_version و medication_changes والمحفزات)", CHANGE_FEED_SCHEMA + LOOKUP_TRIGGERS),
+    (3, "فهارس مركبة للتصفية والبحث وقراءة التغييرات + ANALYZE", COMPOSITE_INDEXES),
+    (4, "سجل الأسعار وتجميعاته اليومية والشهرية", PRICE_HISTORY_SCHEMA + SEED_PRICE_HISTORY),
+    (5, "دفتر المخزون (المستودعات والحركات والكميات المتوفرة)", INVENTORY_SCHEMA),
+    (6, "تشغيلات المخزون وتواريخ انتهائها", LOTS_SCHEMA),
+    (7, "سجل التدقيق (محفزات الإضافة والتعديل والحذف وجدول الأشهر المختومة)", create_audit_log),
+    (8, "ضغط النصوص السريرية (medication_texts والقواميس ومحفزات الإلغاء)", CLINICAL_TEXT_SCHEMA),
+    (9, "الأدوية المكررة (الأزواج المؤكد أنها ليست مكررة)", DEDUP_SCHEMA),
+    (10, "محفزات التدقيق: النصوص السريرية بطولها فقط في الإضافة والحذف", install_triggers),
+    (11, "محفز لكل حقل سريري يلغي نسخته المضغوطة عند أي كتابة عليه (حتى NULL)", CLINICAL_TEXT_TRIGGERS),
+    (12, "سجل التغييرات: إصدار واحد لكل تعديل دواء (دون UPDATE محفز الوقت المتداخل)",
+     "DROP TRIGGER IF EXISTS medications_change_update;" + CHANGE_UPDATE_TRIGGER),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ===================================================================
+# التشغيل
+# ===================================================================
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """تطبيق الترحيلات المعلقة وإرجاع قائمة (version, name) بما طُبق
+
+    إذا كان المخطط محدثًا تكلف هذه الدالة قراءة PRAGMA واحدة فقط.
+    """
+    if get_schema_version(conn) >= LATEST_VERSION:
+        return []
+
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    applied = []
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # إعادة القراءة بعد أخذ القفل: قد تكون عملية أخرى أنهت الترحيل للتو
+            current = get_schema_version(conn)
+            for version, name, migration in MIGRATIONS:
+                if version <= current:
+                    continue
+                if callable(migration):
+                    migration(conn)
+                else:
+                    _run_script(conn, migration)
+                applied.append((version, name))
+            if applied:
+                conn.execute(f"PRAGMA user_version = {applied[-1][0]}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.isolation_level = isolation_level
+    return applied
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else os.environ.get("DRUG_DB_PATH", "drug_database.db")
+    conn = sqlite3.connect(db_path)
+    try:
+        print(f"📄 {db_path}: الإصدار الحالي {get_schema_version(conn)} / آخر إصدار {LATEST_VERSION}")
+        for version, name in migrate(conn):
+            print(f"  ✅ {version}: {name}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""
+قياس أداء الصفحات - Page Render Profiler
+
+وضع اختياري يقيس زمن دالة الصفحة ومراحلها الفرعية (جلب البيانات، المعالجة،
+عرض العناصر) كشجرة مراحل، ويمكنه التقاط cProfile أو عينات من مكدس الاستدعاءات
+(sampling) لتشغيل واحد. عندما يكون الوضع متوقفًا تكلف phase() قراءة متغير سياق فقط.
+"""
+
+import contextvars
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+# ===================================================================
+# الإعدادات
+# ===================================================================
+SAMPLE_INTERVAL_SECONDS = 0.005   # الفاصل بين عينات مكدس الاستدعاءات
+CAPTURE_MODES = ('cprofile', 'sampling')
+
+_active = contextvars.ContextVar('active_profile', default=None)
+
+
+class _Node:
+    """مرحلة في الشجرة: الزمن الكلي وعدد المرات والمراحل الفرعية"""
+
+    __slots__ = ('name', 'seconds', 'calls', 'children')
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.calls = 0
+        self.children = {}
+
+    def child(self, name):
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = _Node(name)
+        return node
+
+    @property
+    def self_seconds(self):
+        return max(self.seconds - sum(c.seconds for c in self.children.values()), 0.0)
+
+
+class PageProfile:
+    """نتيجة قياس تشغيل واحد لصفحة"""
+
+    def __init__(self, page, capture=None):
+        self.page = page
+        self.capture = capture
+        self.root = _Node(page)
+        self.started_at = time.time()
+        self.cprofile = None      # cProfile.Profile بعد انتهاء التشغيل
+        self.samples = Counter()  # المكدس المطوي -> عدد العينات
+        self.note = None
+        self._stack = [self.root]
+
+    @property
+    def total_ms(self):
+        return self.root.seconds * 1000
+
+    # ---------------------------------------------------------------
+    # الملخص على شكل Flame Graph نصي
+    # ---------------------------------------------------------------
+    def flame_lines(self, width=24, min_ms=0.5):
+        """سطر لكل مرحلة: مسافة بادئة حسب العمق وشريط بطول نسبتها من الزمن الكلي"""
+        total = self.root.seconds or 1e-9
+        lines = []
+
+        def walk(node, depth):
+            ms = node.seconds * 1000
+            if depth and ms < min_ms:
+                return
+            bar = "█" * max(1, round(node.seconds / total * width))
+            calls = f" ×{node.calls}" if node.calls > 1 else ""
+            lines.append(f"{'  ' * depth}{node.name:<{max(28 - 2 * depth, 8)}} {ms:>9.1f} ms {bar}{calls}")
+            for child in sorted(node.children.values(), key=lambda n: n.seconds, reverse=True):
+                walk(child, depth + 1)
+
+        walk(self.root, 0)
+        return lines
+
+    def collapsed_stacks(self):
+        """الصيغة المطوية (a;b;c قيمة) التي تقرأها أدوات flamegraph.pl و speedscope
+
+        في وضع العينات تكون القيمة عدد العينات، وإلا فهي الزمن الذاتي لكل مرحلة بالميكروثانية.
+        """
+        if self.samples:
+            return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+        lines = []
+
+        def walk(node, path):
+            path = f"{path};{node.name}" if path else node.name
+            micros = round(node.self_seconds * 1e6)
+            if micros:
+                lines.append(f"{path} {micros}")
+            for child in node.children.values():
+                walk(child, path)
+
+        walk(self.root, "")
+        return "\n".join(lines)
+
+    def cprofile_text(self, limit=30, sort='cumulative'):
+        if self.cprofile is None:
+            return ""
+        stream = io.StringIO()
+        pstats.Stats(self.cprofile, stream=stream).strip_dirs().sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def cprofile_bytes(self):
+        """ملف .prof (نفس صيغة Profile.dump_stats) لفتحه في snakeviz أو pstats"""
+        if self.cprofile is None:
+            return b""
+        self.cprofile.create_stats()
+        return marshal.dumps(self.cprofile.stats)
+
+
+# ===================================================================
+# المراحل
+# ===================================================================
+@contextmanager
+def phase(name):
+    """قياس مرحلة فرعية داخل الصفحة (لا تفعل شيئًا إذا لم يكن القياس مفعلاً)"""
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    node = profile._stack[-1].child(name)
+    profile._stack.append(node)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        node.seconds += time.perf_counter() - started
+        node.calls += 1
+        profile._stack.pop()
+
+
+def profiled(fn):
+    """تسجيل كل استدعاء للدالة كمرحلة باسمها"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _active.get() is None:
+            return fn(*args, **kwargs)
+        with phase(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+# ===================================================================
+# التقاط عينات مكدس الاستدعاءات
+# ===================================================================
+class _Sampler(threading.Thread):
+    """خيط يقرأ مكدس خيط الصفحة كل SAMPLE_INTERVAL_SECONDS ويعد المكدسات المطوية"""
+
+    def __init__(self, target_thread_id, samples):
+        super().__init__(name="page-profiler-sampler", daemon=True)
+        self.target_thread_id = target_thread_id
+        self.samples = samples
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(SAMPLE_INTERVAL_SECONDS):
+            frame = sys._current_frames().get(self.target_thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# ===================================================================
+# قياس تشغيل كامل
+# ===================================================================
+@contextmanager
+def profile_run(page, capture=None):
+    """قياس تشغيل الصفحة page؛ capture: None أو 'cprofile' أو 'sampling'"""
+    profile = PageProfile(page, capture)
+    token = _active.set(profile)
+
+    profiler = sampler = None
+    if capture == 'cprofile':
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # أداة قياس أخرى تعمل (مثلاً جلسة أخرى تلتقط cProfile الآن)
+            profiler = None
+            profile.note = "تعذر تشغيل cProfile: أداة قياس أخرى تعمل في هذه العملية"
+    elif capture == 'sampling':
+        sampler = _Sampler(threading.get_ident(), profile.samples)
+        sampler.start()
+
+    started = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.root.seconds = time.perf_counter() - started
+        profile.root.calls = 1
+        if profiler is not None:
+            profiler.disable()
+            profile.cprofile = profiler
+        if sampler is not None:
+            sampler.stop()
+        _active.reset(token)
@@ -0,0 +1,243 @@
+"""
+سجل الأسعار - Price History
+
+سجل إلحاقي (append-only) لأسعار الأدوية: كل إضافة دواء أو تغيير فعلي في
+price أو price_with_tax يضيف صفًا عبر محفز، فلا يضيع السعر القديم عند
+الكتابة فوقه في جدول medications.
+
+التخزين مضغوط ومجمّع حسب الدواء:
+- الأسعار أعداد صحيحة بالفلس (1 دينار = 1000 فلس) والوقت بالمللي ثانية منذ 1970
+- جداول WITHOUT ROWID مفتاحها (الدواء، الوقت): صفوف كل دواء متجاورة على القرص
+  فيُقرأ سجل دواء واحد بمسح نطاق من المفتاح الأساسي
+
+التجميعات اليومية والشهرية (العدد، المجموع، الأدنى، الأعلى، آخر سعر) لكل فئة
+وشركة مصنعة تُحدَّث تدريجيًا بمحفز على كل نقطة سعر جديدة (UPSERT)، فيقرأ رسم
+الاتجاه صفًا واحدًا لكل يوم أو شهر مهما بلغ عدد نقاط السعر. الفئة والشركة تُحسبان
+وقت تسجيل النقطة: نقل دواء إلى فئة أخرى لا يغير تجميعات الماضي. اتجاه الدواء
+الواحد يُجمّع من نطاقه في السجل مباشرة: نقاطه قليلة ومتجاورة، وتجميعات لكل دواء
+كانت ستنسخ السجل تقريبًا صفًا بصف.
+
+الاستخدام:
+    python price_history.py --db drug_database.db
+    python price_history.py --db drug_database.db --category 3 --period day
+"""
+
+import argparse
+import os
+import sqlite3
+from datetime import date, timedelta
+
+# ===================================================================
+# مخطط قاعدة البيانات
+# ===================================================================
+FILS_PER_DINAR = 1000
+MS_PER_DAY = 86400000
+
+# أبعاد التجميع: الاسم -> (الرمز المخزن، عمود medications)
+DIMENSIONS = {
+    'category': ('C', 'category_id'),
+    'manufacturer': ('M', 'manufacturer_id'),
+}
+
+# فترات التجميع: الاسم -> (الجدول، مفتاح الفترة من changed_at)
+# اليوم: رقم اليوم منذ 1970، الشهر: YYYYMM كعدد صحيح
+PERIODS = {
+    'day': ('price_daily', f"NEW.changed_at / {MS_PER_DAY}"),
+    'month': ('price_monthly', "CAST(strftime('%Y%m', NEW.changed_at / 1000, 'unixepoch') AS INTEGER)"),
+}
+
+NOW_MS = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+
+
+def _fils(value):
+    # القيم النصية غير الرقمية (SQLite لا يفرض النوع) تُسجل NULL بدل 0
+    return (f"CASE WHEN typeof({value}) IN ('integer', 'real') "
+            f"THEN CAST(ROUND({value} * {FILS_PER_DINAR}) AS INTEGER) END")
+
+
+# الوقت يزيد تمامًا لكل دواء: تغييران في نفس المللي ثانية (أو ساعة رجعت للخلف)
+# لا يتعارضان على المفتاح الأساسي. آخر نقطة للدواء قراءة واحدة من نهاية نطاقه
+_NEXT_CHANGED_AT = (f"MAX({NOW_MS}, COALESCE((SELECT MAX(changed_at) FROM price_history "
+                    f"WHERE medication_id = NEW.id), 0) + 1)")
+
+_AGGREGATE_TABLE = """
+CREATE TABLE IF NOT EXISTS {table} (
+    dimension CHAR(1) NOT NULL,     -- C فئة، M شركة مصنعة
+    key_id INTEGER NOT NULL,
+    period INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    sum_fils INTEGER NOT NULL,
+    min_fils INTEGER NOT NULL,
+    max_fils INTEGER NOT NULL,
+    close_fils INTEGER NOT NULL,    -- آخر سعر في الفترة
+    close_at INTEGER NOT NULL,
+    PRIMARY KEY (dimension, key_id, period)
+) WITHOUT ROWID;
+"""
+
+_AGGREGATE_UPSERT = """
+    INSERT INTO {table} (dimension, key_id, period, points, sum_fils, min_fils, max_fils, close_fils, close_at)
+    SELECT '{code}', {column}, {period}, 1, NEW.price_fils, NEW.price_fils, NEW.price_fils, NEW.price_fils, NEW.changed_at
+    FROM medications WHERE id = NEW.medication_id AND {column} IS NOT NULL
+    ON CONFLICT (dimension, key_id, period) DO UPDATE SET
+        points = points + 1,
+        sum_fils = sum_fils + excluded.sum_fils,
+        min_fils = MIN(min_fils, excluded.min_fils),
+        max_fils = MAX(max_fils, excluded.max_fils),
+        close_fils = CASE WHEN excluded.close_at >= close_at THEN excluded.close_fils ELSE close_fils END,
+        close_at = MAX(close_at, excluded.close_at);"""
+
+PRICE_HISTORY_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS price_history (
+    medication_id INTEGER NOT NULL,
+    changed_at INTEGER NOT NULL,        -- مللي ثانية منذ 1970 (UTC)
+    price_fils INTEGER,
+    price_with_tax_fils INTEGER,
+    PRIMARY KEY (medication_id, changed_at)
+) WITHOUT ROWID;
+""" + "".join(_AGGREGATE_TABLE.format(table=table) for table, _ in PERIODS.values()) + f"""
+CREATE TRIGGER IF NOT EXISTS medications_price_insert
+AFTER INSERT ON medications
+FOR EACH ROW
+WHEN NEW.price IS NOT NULL OR NEW.price_with_tax IS NOT NULL
+BEGIN
+    INSERT INTO price_history (medication_id, changed_at, price_fils, price_with_tax_fils)
+    VALUES (NEW.id, {_NEXT_CHANGED_AT}, {_fils('NEW.price')}, {_fils('NEW.price_with_tax')});
+END;
+
+-- تغيير فعلي فقط (بدقة الفلس): حفظ الصف بنفس السعر لا يضيف نقطة
+CREATE TRIGGER IF NOT EXISTS medications_price_update
+AFTER UPDATE OF price, price_with_tax ON medications
+FOR EACH ROW
+WHEN {_fils('NEW.price')} IS NOT {_fils('OLD.price')}
+  OR {_fils('NEW.price_with_tax')} IS NOT {_fils('OLD.price_with_tax')}
+BEGIN
+    INSERT INTO price_history (medication_id, changed_at, price_fils, price_with_tax_fils)
+    VALUES (NEW.id, {_NEXT_CHANGED_AT}, {_fils('NEW.price')}, {_fils('NEW.price_with_tax')});
+END;
+
+CREATE TRIGGER IF NOT EXISTS price_history_aggregate
+AFTER INSERT ON price_history
+FOR EACH ROW
+WHEN NEW.price_fils IS NOT NULL
+BEGIN""" + "".join(
+    _AGGREGATE_UPSERT.format(table=table, code=code, column=column, period=period)
+    for table, period in PERIODS.values()
+    for code, column in DIMENSIONS.values()
+) + """
+END;
+"""
+
+# نقطة أولى لكل دواء مسعّر عند الترحيل، بتاريخ آخر تعديل معروف
+SEED_PRICE_HISTORY = f"""
+INSERT INTO price_history (medication_id, changed_at, price_fils, price_with_tax_fils)
+SELECT id,
+       COALESCE(CAST((julianday(COALESCE(updated_at, created_at)) - 2440587.5) * 86400000 AS INTEGER), {NOW_MS}),
+       {_fils('price')}, {_fils('price_with_tax')}
+FROM medications
+WHERE price IS NOT NULL OR price_with_tax IS NOT NULL;
+"""
+
+# يُطبق المخطط أعلاه عبر الترحيل رقم 4 في migrations.py
+
+
+# ===================================================================
+# القراءة
+# ===================================================================
+def _dinar(fils):
+    return None if fils is None else fils / FILS_PER_DINAR
+
+
+def period_label(period, value):
+    """مفتاح الفترة المخزن كنص للعرض: YYYY-MM-DD لليوم و YYYY-MM للشهر"""
+    if period == 'day':
+        return (date(1970, 1, 1) + timedelta(days=value)).isoformat()
+    return f"{value // 100:04d}-{value % 100:02d}"
+
+
+def _period_key(period, label):
+    if period == 'day':
+        return (date.fromisoformat(label) - date(1970, 1, 1)).days
+    return int(label[:4]) * 100 + int(label[5:7])
+
+
+def _medication_periods(conn, medication_id, period, start):
+    # نفس أعمدة جداول التجميع، من نطاق الدواء في السجل (مرتب حسب الوقت)
+    key = PERIODS[period][1].replace("NEW.", "")
+    rows = conn.execute(
+        f"SELECT {key}, price_fils FROM price_history "
+        f"WHERE medication_id = ? AND price_fils IS NOT NULL ORDER BY changed_at",
+        (int(medication_id),)
+    ).fetchall()
+    periods = []
+    for p, fils in rows:
+        if p < start:
+            continue
+        if periods and periods[-1][0] == p:
+            _, n, total, low, high, _ = periods[-1]
+            periods[-1] = (p, n + 1, total + fils, min(low, fils), max(high, fils), fils)
+        else:
+            periods.append((p, 1, fils, fils, fils, fils))
+    return periods
+
+
+def trend(conn, dimension, key_id, period='month', since=None):
+    """(الفترة، عدد النقاط، المتوسط، الأدنى، الأعلى، آخر سعر) بالدينار مرتبة زمنيًا
+
+    dimension: medication أو category أو manufacturer. قراءة نطاق واحد من المفتاح
+    الأساسي (السجل للدواء، وجدول التجميع للفئة والشركة). since نص الفترة الأولى
+    (YYYY-MM-DD أو YYYY-MM) اختياري.
+    """
+    start = _period_key(period, since) if since else 0
+    if dimension == 'medication':
+        rows = _medication_periods(conn, key_id, period, start)
+    else:
+        rows = conn.execute(
+            f"SELECT period, points, sum_fils, min_fils, max_fils, close_fils FROM {PERIODS[period][0]} "
+            f"WHERE dimension = ? AND key_id = ? AND period >= ? ORDER BY period",
+            (DIMENSIONS[dimension][0], int(key_id), start)
+        ).fetchall()
+    return [
+        (period_label(period, p), n, _dinar(total) / n, _dinar(low), _dinar(high), _dinar(close))
+        for p, n, total, low, high, close in rows
+    ]
+
+
+def medication_history(conn, medication_id, limit=100):
+    """آخر limit نقطة سعر لدواء: (الوقت UTC، السعر، السعر مع الضريبة) الأحدث أولاً"""
+    rows = conn.execute(
+        "SELECT strftime('%Y-%m-%d %H:%M:%S', changed_at / 1000, 'unixepoch'), price_fils, price_with_tax_fils "
+        "FROM price_history WHERE medication_id = ? ORDER BY changed_at DESC LIMIT ?",
+        (int(medication_id), limit)
+    ).fetchall()
+    return [(changed_at, _dinar(price), _dinar(with_tax)) for changed_at, price, with_tax in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="اتجاه الأسعار من التجميعات اليومية والشهرية")
+    parser.add_argument('--db', default=os.environ.get("DRUG_DB_PATH", "drug_database.db"))
+    parser.add_argument('--period', choices=list(PERIODS), default='month')
+    group = parser.add_mutually_exclusive_group()
+    for dimension in ('medication', *DIMENSIONS):
+        group.add_argument(f'--{dimension}', type=int, metavar="ID")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        points, medications = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT medication_id) FROM price_history"
+        ).fetchone()
+        print(f"📄 {args.db}: {points:,} نقطة سعر لـ {medications:,} دواء")
+        for dimension in ('medication', *DIMENSIONS):
+            key_id = getattr(args, dimension)
+            if key_id is None:
+                continue
+            for label, n, mean, low, high, close in trend(conn, dimension, key_id, args.period):
+                print(f"  {label}  {n:>6} نقطة  متوسط {mean:>10.3f}  أدنى {low:>10.3f}  "
+                      f"أعلى {high:>10.3f}  آخر {close:>10.3f}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
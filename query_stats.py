@@ -0,0 +1,353 @@
+"""
+مراقبة استعلامات SQL - Query Instrumentation
+
+اتصال sqlite3 مخصص (InstrumentedConnection) يسجل لكل أمر: البصمة (نص الأمر
+بعد استبدال القيم الثابتة بـ ?)، زمن التنفيذ بما فيه جلب الصفوف، عدد الصفوف
+والصفحة التي نفذته. الأوامر الأبطأ من الحد تُكتب في سجل الاستعلامات البطيئة
+(JSON Lines) مع خطة التنفيذ EXPLAIN QUERY PLAN.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+import metrics
+
+# ===================================================================
+# الإعدادات
+# ===================================================================
+SLOW_QUERY_MS = float(os.environ.get("DRUG_SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG = os.environ.get("DRUG_SLOW_QUERY_LOG", "slow_queries.jsonl")
+SLOW_LOG_MAX_BYTES = 5 * 1024 * 1024   # عند تجاوزه يُنقل السجل إلى .1 ويبدأ سجل جديد
+NO_PAGE = "(بدون صفحة)"
+
+# الصفحة الحالية وإجماليات التشغيل الحالي: تُضبط في موجه main() وتنتقل إلى
+# خيط الكتابة مع كل عملية
+_current_page = contextvars.ContextVar('current_page', default=NO_PAGE)
+_current_request = contextvars.ContextVar('current_request', default=None)
+
+
+class RequestStats:
+    """إجمالي الأوامر والصفوف والزمن في تشغيل صفحة واحد"""
+
+    __slots__ = ('queries', 'rows', 'seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.seconds = 0.0
+
+
+@contextmanager
+def page_context(name):
+    """نسب جميع الاستعلامات المنفذة داخل هذا السياق إلى الصفحة name"""
+    request = RequestStats()
+    page_token = _current_page.set(name)
+    request_token = _current_request.set(request)
+    try:
+        yield request
+    finally:
+        _current_request.reset(request_token)
+        _current_page.reset(page_token)
+
+
+@contextmanager
+def page_run(name, started=None):
+    """page_context مع مقاييس تشغيل الصفحة name (عدد التشغيلات، الزمن، الصفوف)"""
+    started = time.perf_counter() if started is None else started
+    with page_context(name) as request:
+        try:
+            yield request
+        finally:
+            metrics.PAGE_RERUNS.inc(name)
+            metrics.PAGE_RENDER_SECONDS.observe(time.perf_counter() - started, name)
+            metrics.ROWS_PER_REQUEST.observe(request.rows, name)
+
+
+def page_fragment(name):
+    """مزخرف لدوال st.fragment (يوضع تحت @st.fragment): إعادة تشغيل الجزء وحده
+    لا تمر بموجه main()، فتُنسب استعلاماتها ومقاييسها إلى الصفحة name هنا
+
+    داخل تشغيل الصفحة كاملة (أو جزء آخر) السياق مضبوط مسبقًا فلا يُحسب مرتين.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_page.get() != NO_PAGE:
+                return fn(*args, **kwargs)
+            with page_run(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current_page():
+    return _current_page.get()
+
+
+# ===================================================================
+# بصمة الاستعلام
+# ===================================================================
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """توحيد نص الأمر: القيم الثابتة تصبح ? وقوائم IN تصبح (...)"""
+    text = _STRING_LITERAL.sub("?", sql)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _IN_LIST.sub("IN (...)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+# ===================================================================
+# الإحصائيات المجمعة
+# ===================================================================
+class QueryStats:
+    """إحصائيات مجمعة لكل بصمة ولكل صفحة (مشتركة بين جميع الجلسات في العملية)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.queries = {}
+            self.pages = {}
+            self.slow_count = 0
+            self.since = datetime.now()
+
+    def record(self, sql, seconds, rows, page):
+        fp = fingerprint(sql)
+        ms = seconds * 1000
+        with self._lock:
+            entry = self.queries.get(fp)
+            if entry is None:
+                entry = self.queries[fp] = {
+                    'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'slow': 0, 'pages': set(),
+                }
+            entry['count'] += 1
+            entry['total_ms'] += ms
+            entry['max_ms'] = max(entry['max_ms'], ms)
+            entry['rows'] += rows
+            entry['pages'].add(page)
+
+            page_entry = self.pages.setdefault(page, {'count': 0, 'total_ms': 0.0, 'rows': 0})
+            page_entry['count'] += 1
+            page_entry['total_ms'] += ms
+            page_entry['rows'] += rows
+
+            slow = ms >= SLOW_QUERY_MS
+            if slow:
+                entry['slow'] += 1
+                self.slow_count += 1
+        return fp, slow
+
+    def query_rows(self):
+        """صفوف جاهزة للعرض في جدول، مرتبة حسب الزمن الكلي"""
+        with self._lock:
+            rows = [
+                {
+                    'fingerprint': fp,
+                    'count': e['count'],
+                    'total_ms': round(e['total_ms'], 2),
+                    'avg_ms': round(e['total_ms'] / e['count'], 3),
+                    'max_ms': round(e['max_ms'], 2),
+                    'rows': e['rows'],
+                    'slow': e['slow'],
+                    'pages': ", ".join(sorted(e['pages'])),
+                }
+                for fp, e in self.queries.items()
+            ]
+        return sorted(rows, key=lambda r: r['total_ms'], reverse=True)
+
+    def page_rows(self):
+        with self._lock:
+            rows = [
+                {'page': page, 'queries': e['count'], 'total_ms': round(e['total_ms'], 2), 'rows': e['rows']}
+                for page, e in self.pages.items()
+            ]
+        return sorted(rows, key=lambda r: r['total_ms'], reverse=True)
+
+
+STATS = QueryStats()
+
+
+# ===================================================================
+# سجل الاستعلامات البطيئة
+# ===================================================================
+_log_lock = threading.Lock()
+
+
+def _explain(conn, sql, params):
+    """خطة التنفيذ كنص (سطر لكل خطوة) أو None إذا تعذر الحصول عليها"""
+    if sql.lstrip()[:6].upper().rstrip() not in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE"):
+        return None
+    try:
+        # عبر التنفيذ الأصلي حتى لا يُسجل أمر EXPLAIN نفسه
+        plan = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except Exception:
+        return None
+    return [row[-1] for row in plan]
+
+
+def log_slow_query(conn, sql, params, seconds, rows, page):
+    entry = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'ms': round(seconds * 1000, 2),
+        'rows': rows,
+        'page': page,
+        'fingerprint': fingerprint(sql),
+        'plan': _explain(conn, sql, params) if params is not None else None,
+    }
+    with _log_lock:
+        try:
+            if os.path.getsize(SLOW_QUERY_LOG) > SLOW_LOG_MAX_BYTES:
+                os.replace(SLOW_QUERY_LOG, SLOW_QUERY_LOG + ".1")
+        except OSError:
+            pass
+        with open(SLOW_QUERY_LOG, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def read_slow_queries(limit=100):
+    """آخر limit سجلات من سجل الاستعلامات البطيئة (الأحدث أولاً)"""
+    try:
+        with open(SLOW_QUERY_LOG, 'r', encoding='utf-8') as f:
+            lines = f.readlines()[-limit:]
+    except FileNotFoundError:
+        return []
+    entries = []
+    for line in reversed(lines):
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
+
+
+# ===================================================================
+# الاتصال والمؤشر المراقبان
+# ===================================================================
+class InstrumentedCursor(sqlite3.Cursor):
+    """مؤشر يقيس زمن الأمر من التنفيذ حتى جلب آخر صف
+
+    يُجمع زمن التنفيذ وزمن كل عملية جلب فقط (دون وقت المستدعي بينها)،
+    ويُغلق قياس الأمر عند نفاد الصفوف أو تنفيذ أمر جديد أو إغلاق المؤشر.
+    """
+
+    _pending = None   # [sql, params, seconds, rows, page, request]
+
+    def _begin(self, sql, params):
+        self._finish()
+        self._pending = [sql, params, 0.0, 0, current_page(), _current_request.get()]
+
+    def _finish(self):
+        pending = self._pending
+        if pending is None:
+            return
+        self._pending = None
+        sql, params, seconds, rows, page, request = pending
+        if request is not None:
+            request.queries += 1
+            request.rows += rows
+            request.seconds += seconds
+        metrics.DB_QUERY_SECONDS.observe(seconds, metrics.statement_kind(sql))
+        _, slow = STATS.record(sql, seconds, rows, page)
+        if slow:
+            try:
+                log_slow_query(self.connection, sql, params, seconds, rows, page)
+            except Exception:
+                pass
+
+    def _timed(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            if self._pending is not None:
+                self._pending[2] += time.perf_counter() - started
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters)
+        self._timed(super().execute, sql, parameters)
+        if self.description is None:
+            # أمر تعديل أو أمر تحكم: لا صفوف لجلبها
+            self._pending[3] = max(self.rowcount, 0)
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._begin(sql, None)
+        self._timed(super().executemany, sql, seq_of_parameters)
+        self._pending[3] = max(self.rowcount, 0)
+        self._finish()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if self._pending is not None:
+            if row is None:
+                self._finish()
+            else:
+                self._pending[3] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            if not rows:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._pending is not None:
+            self._pending[3] += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """اتصال sqlite3 تمر جميع أوامره عبر InstrumentedCursor
+
+    الاستخدام: sqlite3.connect(path, factory=InstrumentedConnection)
+    """
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
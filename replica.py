@@ -0,0 +1,82 @@
+"""
+نسخة القراءة لأجهزة الاستعلام - Read-Only Replica
+
+أجهزة الاستعلام في الصيدليات (kiosk) تعمل بـ DRUG_READ_ONLY=1 وتفتح ملف
+قاعدة البيانات بـ mode=ro&immutable=1: لا أقفال ولا ملف WAL ولا فحص تغييرات،
+فتتوسع القراءة بحرية بين العمليات. لأن SQLite يفترض عندها أن الملف لا يتغير،
+يجب أن تشير هذه الأجهزة إلى نسخة منشورة وليس إلى الملف الذي يكتب فيه تطبيق
+الإدارة.
+
+النشر ينسخ قاعدة البيانات عبر Backup API (نسخة متسقة دون إيقاف الكتابة) إلى
+ملف مؤقت بجانب الهدف، يحوله إلى journal_mode=DELETE، ثم يستبدل الهدف ذريًا
+(os.replace): الاتصالات المفتوحة تكمل على الملف القديم والاتصالات الجديدة
+تفتح النسخة الجديدة كاملة.
+
+الاستخدام:
+    python replica.py drug_database.db replica/drug_database.db
+    DRUG_READ_ONLY=1 DRUG_DB_PATH=replica/drug_database.db streamlit run app.py
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+BACKUP_PAGES_PER_STEP = 1024   # صفحات تُنسخ في كل خطوة قبل إتاحة القفل للكاتب
+
+
+def copy_database(source_path, target_path, pages=BACKUP_PAGES_PER_STEP):
+    """نسخة متسقة من source_path إلى target_path عبر Backup API"""
+    source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=pages)
+    finally:
+        target.close()
+        source.close()
+
+
+def publish(source_path, target_path):
+    """نشر نسخة قراءة فقط من source_path إلى target_path واستبدالها ذريًا"""
+    started = time.perf_counter()
+    directory = os.path.dirname(os.path.abspath(target_path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{target_path}.tmp-{os.getpid()}"
+    try:
+        copy_database(source_path, tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        try:
+            # immutable=1 يتجاهل ملف WAL، لذلك يجب أن تكون كل الصفحات في الملف الرئيسي
+            conn.execute("PRAGMA journal_mode = DELETE")
+            check = conn.execute("PRAGMA quick_check").fetchone()[0]
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            conn.close()
+        if check != "ok":
+            raise sqlite3.DatabaseError(f"فشل فحص النسخة المنشورة: {check}")
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return {
+        'path': target_path,
+        'bytes': os.path.getsize(target_path),
+        'schema_version': version,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="نشر نسخة قراءة فقط من قاعدة البيانات لأجهزة الاستعلام")
+    parser.add_argument('source', nargs='?', default=os.environ.get("DRUG_DB_PATH", "drug_database.db"))
+    parser.add_argument('target', nargs='?', default=os.path.join('replica', 'drug_database.db'))
+    args = parser.parse_args()
+
+    result = publish(args.source, args.target)
+    print(f"✅ {result['path']} ({result['bytes'] / 1024 / 1024:.1f} MB، إصدار المخطط "
+          f"{result['schema_version']}) في {result['seconds']:.2f} ث")
+
+
+if __name__ == '__main__':
+    main()
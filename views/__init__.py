@@ -0,0 +1,16 @@
+"""
+وحدات الصفحات - Page Modules
+
+كل صفحة في وحدة مستقلة يستوردها موجه main() في app.py عند أول انتقال إليها
+فقط (ثم تبقى في sys.modules)، فلا يدفع أول تشغيل للتطبيق كلفة استيراد جميع
+الصفحات ومكتباتها الثقيلة مثل pandas. الاسم views وليس pages لأن Streamlit
+يعامل المجلد pages/ كتطبيق متعدد الصفحات.
+"""
+
+import importlib
+
+
+def load_page(module_name, function_name):
+    """دالة عرض الصفحة من views.<module_name> (الاستيراد يتم عند أول طلب فقط)"""
+    module = importlib.import_module(f"{__name__}.{module_name}")
+    return getattr(module, function_name)
@@ -0,0 +1,286 @@
+"""
+صفحة إضافة دواء جديد - Add Medication
+
+قبل الحفظ يُبحث عن أدوية مشابهة في الكتالوج (dedup.py): إذا وُجدت تُعرض
+ويلزم النقر على الحفظ مرة أخرى لإضافة الدواء رغم ذلك.
+"""
+
+import pandas as pd
+import streamlit as st
+
+from database import (
+    SimilarMedicationError,
+    add_medication,
+    get_categories,
+    get_drug_types,
+    get_manufacturers,
+)
+from views.duplicates import similar_frame
+
+# ===================================================================
+# صفحة إضافة دواء جديد
+# ===================================================================
+def show_add_medication_page():
+    st.header("➕ إضافة دواء جديد - Add New Medication")
+    
+    st.info("📝 املأ الحقول المطلوبة (*) والحقول الاختيارية حسب الحاجة")
+    
+    with st.form("add_medication_form"):
+        # ===== المعلومات الأساسية =====
+        st.subheader("📌 المعلومات الأساسية - Basic Information")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            generic_name = st.text_input("الاسم العلمي * (generic_name)", placeholder="مثال: paracetamol")
+            trade_name = st.text_input("الاسم التجاري (trade_name)", placeholder="مثال: Adol")
+            
+            categories = get_categories()
+            category_id = st.selectbox(
+                "الفئة (category_id)",
+                options=categories['id'].tolist(),
+                format_func=lambda x: f"{categories[categories['id']==x]['name'].values[0]} ({categories[categories['id']==x]['name_ar'].values[0]})" if pd.notna(categories[categories['id']==x]['name_ar'].values[0]) else categories[categories['id']==x]['name'].values[0]
+            )
+            
+            drug_types = get_drug_types()
+            if len(drug_types) > 0:
+                drug_type_id = st.selectbox(
+                    "نوع الدواء (drug_type_id)",
+                    options=[None] + drug_types['id'].tolist(),
+                    format_func=lambda x: "غير محدد" if x is None else (
+                        f"{drug_types[drug_types['id']==x]['name'].values[0]} ({drug_types[drug_types['id']==x]['name_ar'].values[0]})"
+                        if pd.notna(drug_types[drug_types['id']==x]['name_ar'].values[0]) 
+                        else drug_types[drug_types['id']==x]['name'].values[0]
+                    )
+                )
+            else:
+                drug_type_id = None
+        
+        with col2:
+            concentration = st.text_input("التركيز (concentration)", placeholder="مثال: 100mg/1ml")
+            form = st.selectbox(
+                "الشكل الصيدلاني (form)",
+                ["oral drops", "suspension", "suppository", "tablet", "capsule", "syrup", "injection", "cream", "ointment", "gel", "powder"]
+            )
+            
+            manufacturers = get_manufacturers()
+            if len(manufacturers) > 0:
+                manufacturer_id = st.selectbox(
+                    "الشركة المصنعة (manufacturer_id)",
+                    options=[None] + manufacturers['id'].tolist(),
+                    format_func=lambda x: "غير محدد" if x is None else (
+                        f"{manufacturers[manufacturers['id']==x]['name'].values[0]} ({manufacturers[manufacturers['id']==x]['name_ar'].values[0]})"
+                        if pd.notna(manufacturers[manufacturers['id']==x]['name_ar'].values[0]) 
+                        else manufacturers[manufacturers['id']==x]['name'].values[0]
+                    )
+                )
+            else:
+                manufacturer_id = None
+                st.warning("لا توجد شركات مصنعة. يرجى إضافة شركة أولاً.")
+            
+            active_ingredient = st.text_input("المادة الفعالة (active_ingredient)", placeholder="مثال: Paracetamol")
+        
+        composition = st.text_area("التركيب الكامل (composition)", placeholder="مثال: Each 1ml contains: Paracetamol 100mg", height=80)
+        
+        # ===== الحدود العمرية والوزنية =====
+        st.markdown("---")
+        st.subheader("👶 الحدود العمرية والوزنية - Age & Weight Limits")
+        
+        col3, col4 = st.columns(2)
+        with col3:
+            age_limit_text = st.text_input("الحد العمري نص (age_limit_text)", placeholder="مثال: من شهر إلى 3 سنوات")
+            col3a, col3b = st.columns(2)
+            with col3a:
+                min_age_months = st.number_input("الحد الأدنى للعمر شهور (min_age_months)", min_value=0, value=0, step=1)
+            with col3b:
+                max_age_months = st.number_input("الحد الأقصى للعمر شهور (max_age_months)", min_value=0, value=0, step=1)
+        
+        with col4:
+            weight_limit_text = st.text_input("الحد الوزني نص (weight_limit_text)", placeholder="مثال: من 4.4 إلى 14.1 كجم")
+            col4a, col4b = st.columns(2)
+            with col4a:
+                min_weight_kg = st.number_input("الحد الأدنى للوزن كجم (min_weight_kg)", min_value=0.0, value=0.0, step=0.1)
+            with col4b:
+                max_weight_kg = st.number_input("الحد الأقصى للوزن كجم (max_weight_kg)", min_value=0.0, value=0.0, step=0.1)
+        
+        # ===== معلومات الجرعة =====
+        st.markdown("---")
+        st.subheader("💊 معلومات الجرعة - Dosage Information")
+        
+        col5, col6 = st.columns(2)
+        with col5:
+            max_single_dose = st.text_input("الجرعة القصوى للجرعة الواحدة (max_single_dose)", placeholder="مثال: 2 ml")
+            max_daily_dose = st.text_input("الجرعة القصوى اليومية (max_daily_dose)", placeholder="مثال: 60mg/kg/day")
+            frequency = st.text_input("التكرار (frequency)", placeholder="مثال: every 6 hours")
+        
+        with col6:
+            duration = st.text_input("المدة (duration)", placeholder="مثال: 5-7 days")
+            administration_route = st.selectbox(
+                "طريقة الإعطاء (administration_route)",
+                ["oral", "IV", "IM", "SC", "topical", "rectal", "inhalation", "other"]
+            )
+        
+        dose_calculation = st.text_area("معادلة حساب الجرعة (dose_calculation)", placeholder="مثال: 10-15 mg/kg/dose every 6 hours", height=80)
+        
+        # ===== المعلومات الطبية =====
+        st.markdown("---")
+        st.subheader("⚕️ المعلومات الطبية والصيدلانية - Medical & Pharmaceutical Information")
+        
+        indications = st.text_area("دواعي الاستعمال (indications)", placeholder="مثال: خافض للحرارة ومسكن للألم", height=80)
+        contraindications = st.text_area("محاذير الاستخدام (contraindications)", placeholder="مثال: فرط الحساسية للمادة الفعالة", height=80)
+        side_effects = st.text_area("الآثار الجانبية (side_effects)", placeholder="مثال: غثيان، طفح جلدي", height=80)
+        drug_interactions = st.text_area("التفاعلات الدوائية (drug_interactions)", placeholder="مثال: لا يستخدم مع...", height=80)
+        warnings = st.text_area("تحذيرات (warnings)", placeholder="مثال: يستخدم بحذر في حالات...", height=80)
+        precautions = st.text_area("احتياطات (precautions)", placeholder="مثال: يجب مراقبة...", height=80)
+        overdose_management = st.text_area("إدارة الجرعة الزائدة (overdose_management)", placeholder="مثال: في حالة الجرعة الزائدة...", height=80)
+        
+        # ===== الحمل والرضاعة =====
+        st.markdown("---")
+        st.subheader("🤰 الحمل والرضاعة - Pregnancy & Lactation")
+        
+        col7, col8, col9 = st.columns(3)
+        with col7:
+            pregnancy_category = st.selectbox(
+                "فئة الحمل (pregnancy_category)",
+                ["", "A", "B", "C", "D", "X"]
+            )
+        with col8:
+            pregnancy_safety = st.text_input("الأمان أثناء الحمل (pregnancy_safety)", placeholder="مثال: آمن / غير آمن")
+        with col9:
+            lactation_safety = st.text_input("الأمان أثناء الرضاعة (lactation_safety)", placeholder="مثال: آمن / غير آمن")
+        
+        # ===== ظروف التخزين =====
+        st.markdown("---")
+        st.subheader("📦 ظروف التخزين - Storage Conditions")
+        
+        col10, col11, col12 = st.columns(3)
+        with col10:
+            storage_conditions = st.text_input("ظروف التخزين (storage_conditions)", placeholder="مثال: يحفظ في درجة حرارة الغرفة")
+        with col11:
+            shelf_life = st.text_input("مدة الصلاحية (shelf_life)", placeholder="مثال: 3 سنوات")
+        with col12:
+            storage_after_opening = st.text_input("التخزين بعد الفتح (storage_after_opening)", placeholder="مثال: يستخدم خلال شهر")
+        
+        # ===== المعلومات التجارية =====
+        st.markdown("---")
+        st.subheader("💰 المعلومات التجارية - Commercial Information")
+        
+        col13, col14 = st.columns(2)
+        with col13:
+            price = st.number_input("السعر دينار (price)", min_value=0.0, step=0.1)
+            price_with_tax = st.number_input("السعر مع الضريبة دينار (price_with_tax)", min_value=0.0, step=0.1)
+            availability = st.selectbox("التوفر (availability)", ["متوفر", "غير متوفر", "نادر"])
+        
+        with col14:
+            package_info = st.text_input("التعبئة (package_info)", placeholder="مثال: 15ml bottle")
+            package_size = st.text_input("حجم العبوة (package_size)", placeholder="مثال: 15ml")
+            barcode = st.text_input("الباركود (barcode)", placeholder="مثال: 1234567890123")
+        
+        warehouse_name = st.text_input("اسم المستودع (warehouse_name)", placeholder="مثال: المستودع الرئيسي")
+        
+        # ===== معلومات المنشأ =====
+        st.markdown("---")
+        st.subheader("🌍 معلومات المنشأ - Origin Information")
+        
+        col15, col16, col17 = st.columns(3)
+        with col15:
+            manufacturing_country = st.text_input("بلد التصنيع (manufacturing_country)", placeholder="مثال: Jordan")
+        with col16:
+            marketing_country = st.text_input("بلد التسويق (marketing_country)", placeholder="مثال: Jordan")
+        with col17:
+            license_number = st.text_input("رقم الترخيص (license_number)", placeholder="مثال: 12345/2023")
+        
+        # ===== الصور والمستندات =====
+        st.markdown("---")
+        st.subheader("🖼️ الصور والمستندات - Images & Documents")
+        
+        col18, col19 = st.columns(2)
+        with col18:
+            image_path = st.text_input("مسار صورة الدواء (image_path)", placeholder="مثال: images/drug1.jpg")
+            leaflet_path = st.text_input("مسار النشرة الطبية (leaflet_path)", placeholder="مثال: leaflets/drug1.pdf")
+        with col19:
+            box_image_path = st.text_input("مسار صورة العلبة (box_image_path)", placeholder="مثال: images/box1.jpg")
+            additional_images = st.text_area("صور إضافية (additional_images)", placeholder="مثال: img1.jpg, img2.jpg", height=60)
+        
+        # ===== ملاحظات =====
+        st.markdown("---")
+        st.subheader("📝 ملاحظات - Notes")
+        
+        notes = st.text_area("ملاحظات عامة (notes)", placeholder="أي ملاحظات إضافية", height=80)
+        pharmacist_notes = st.text_area("ملاحظات الصيدلي (pharmacist_notes)", placeholder="ملاحظات خاصة بالصيدلي", height=80)
+        
+        # ===== زر الحفظ =====
+        st.markdown("---")
+        submitted = st.form_submit_button("💾 حفظ الدواء", use_container_width=True, type="primary")
+        
+        if submitted:
+            if not generic_name:
+                st.error("❌ الرجاء إدخال الاسم العلمي على الأقل")
+            else:
+                medication_data = {
+                    'generic_name': generic_name,
+                    'trade_name': trade_name if trade_name else None,
+                    'category_id': category_id,
+                    'drug_type_id': drug_type_id,
+                    'manufacturer_id': manufacturer_id,
+                    'concentration': concentration if concentration else None,
+                    'form': form,
+                    'active_ingredient': active_ingredient if active_ingredient else None,
+                    'composition': composition if composition else None,
+                    'min_age_months': min_age_months if min_age_months > 0 else None,
+                    'max_age_months': max_age_months if max_age_months > 0 else None,
+                    'age_limit_text': age_limit_text if age_limit_text else None,
+                    'min_weight_kg': min_weight_kg if min_weight_kg > 0 else None,
+                    'max_weight_kg': max_weight_kg if max_weight_kg > 0 else None,
+                    'weight_limit_text': weight_limit_text if weight_limit_text else None,
+                    'max_single_dose': max_single_dose if max_single_dose else None,
+                    'dose_calculation': dose_calculation if dose_calculation else None,
+                    'max_daily_dose': max_daily_dose if max_daily_dose else None,
+                    'frequency': frequency if frequency else None,
+                    'duration': duration if duration else None,
+                    'administration_route': administration_route if administration_route else None,
+                    'indications': indications if indications else None,
+                    'contraindications': contraindications if contraindications else None,
+                    'side_effects': side_effects if side_effects else None,
+                    'drug_interactions': drug_interactions if drug_interactions else None,
+                    'warnings': warnings if warnings else None,
+                    'precautions': precautions if precautions else None,
+                    'overdose_management': overdose_management if overdose_management else None,
+                    'pregnancy_category': pregnancy_category if pregnancy_category else None,
+                    'pregnancy_safety': pregnancy_safety if pregnancy_safety else None,
+                    'lactation_safety': lactation_safety if lactation_safety else None,
+                    'storage_conditions': storage_conditions if storage_conditions else None,
+                    'shelf_life': shelf_life if shelf_life else None,
+                    'storage_after_opening': storage_after_opening if storage_after_opening else None,
+                    'warehouse_name': warehouse_name if warehouse_name else None,
+                    'package_info': package_info if package_info else None,
+                    'package_size': package_size if package_size else None,
+                    'price': price if price > 0 else None,
+                    'price_with_tax': price_with_tax if price_with_tax > 0 else None,
+                    'availability': availability,
+                    'barcode': barcode if barcode else None,
+                    'image_path': image_path if image_path else None,
+                    'leaflet_path': leaflet_path if leaflet_path else None,
+                    'box_image_path': box_image_path if box_image_path else None,
+                    'additional_images': additional_images if additional_images else None,
+                    'manufacturing_country': manufacturing_country if manufacturing_country else None,
+                    'marketing_country': marketing_country if marketing_country else None,
+                    'license_number': license_number if license_number else None,
+                    'notes': notes if notes else None,
+                    'pharmacist_notes': pharmacist_notes if pharmacist_notes else None,
+                }
+                
+                # الحفظ الثاني لنفس البيانات يضيف الدواء رغم وجود أدوية مشابهة
+                signature = (generic_name, trade_name, concentration, form, active_ingredient)
+                try:
+                    add_medication(medication_data,
+                                   allow_similar=st.session_state.get('confirm_add_similar') == signature)
+                    st.session_state['confirm_add_similar'] = None
+                    st.success("✅ تم إضافة الدواء بنجاح!")
+                    st.balloons()
+                except SimilarMedicationError as e:
+                    st.session_state['confirm_add_similar'] = signature
+                    st.warning("⚠️ يوجد دواء مشابه في الكتالوج. تأكد أنه ليس مكررًا، "
+                               "أو انقر حفظ مرة أخرى لإضافته رغم ذلك")
+                    st.dataframe(similar_frame(e.matches, [medication_data]), use_container_width=True, hide_index=True)
+                except Exception as e:
+                    st.error(f"❌ حدث خطأ: {str(e)}")
@@ -0,0 +1,100 @@
+"""
+صفحة التعديل الجماعي للأدوية - Bulk Editor
+"""
+
+import streamlit as st
+
+from database import (
+    MEDICATION_GRID_COLUMNS,
+    SimilarMedicationError,
+    StaleMedicationError,
+    diff_medications,
+    get_all_medications,
+    grid_originals,
+    save_medications_bulk,
+)
+from views.duplicates import similar_frame
+
+# ===================================================================
+# صفحة التعديل الجماعي للأدوية
+# ===================================================================
+def show_medications_bulk_edit_page():
+    st.header("✏️ التعديل الجماعي للأدوية - Bulk Editor")
+
+    st.info("📝 عدّل الخلايا مباشرة أو أضف/احذف صفوفًا، ثم احفظ جميع التغييرات مرة واحدة. "
+            "يتم حفظ الأعمدة المعدلة فقط في معاملة واحدة.")
+
+    # اللقطة المحملة تبقى ثابتة في الجلسة حتى يتم الحفظ أو إعادة التحميل
+    if 'bulk_editor_snapshot' not in st.session_state or st.button("🔄 إعادة تحميل البيانات"):
+        meds = get_all_medications()
+        st.session_state['bulk_editor_snapshot'] = meds[['id'] + MEDICATION_GRID_COLUMNS].reset_index(drop=True)
+        st.session_state['bulk_editor_generation'] = st.session_state.get('bulk_editor_generation', 0) + 1
+
+    snapshot = st.session_state['bulk_editor_snapshot']
+
+    edited_df = st.data_editor(
+        snapshot,
+        column_config={
+            'id': st.column_config.NumberColumn("المعرف", disabled=True),
+            'generic_name': st.column_config.TextColumn("الاسم العلمي", required=True),
+            'trade_name': st.column_config.TextColumn("الاسم التجاري"),
+            'concentration': st.column_config.TextColumn("التركيز"),
+            'form': st.column_config.TextColumn("الشكل"),
+            'active_ingredient': st.column_config.TextColumn("المادة الفعالة"),
+            'package_size': st.column_config.TextColumn("حجم العبوة"),
+            'price': st.column_config.NumberColumn("السعر", min_value=0.0, format="%.3f"),
+            'price_with_tax': st.column_config.NumberColumn("السعر مع الضريبة", min_value=0.0, format="%.3f"),
+            # يُشتق من دفتر المخزون: أي قيمة يدوية تستبدلها أول حركة تعبر الصفر
+            'availability': st.column_config.SelectboxColumn(
+                "التوفر", options=["متوفر", "غير متوفر", "نادر"], disabled=True,
+                help="يُحدَّث تلقائيًا من حركات المخزون عند نفاد الكمية أو توفرها"
+            ),
+            'barcode': st.column_config.TextColumn("الباركود"),
+            'warehouse_name': st.column_config.TextColumn("المستودع"),
+        },
+        hide_index=True,
+        num_rows="dynamic",
+        use_container_width=True,
+        height=500,
+        key=f"bulk_editor_{st.session_state['bulk_editor_generation']}",
+    )
+
+    updates, inserts, deletes = diff_medications(snapshot, edited_df)
+    changed_cells = sum(len(values) for values in updates.values())
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("صفوف معدلة", len(updates))
+    with col2:
+        st.metric("خلايا معدلة", changed_cells)
+    with col3:
+        st.metric("صفوف جديدة", len(inserts))
+    with col4:
+        st.metric("صفوف محذوفة", len(deletes))
+
+    if st.button("💾 حفظ جميع التغييرات", type="primary", use_container_width=True,
+                 disabled=not (updates or inserts or deletes)):
+        if any(not row.get('generic_name') for row in inserts):
+            st.error("❌ الرجاء إدخال الاسم العلمي لكل صف جديد")
+            return
+        originals = grid_originals(snapshot, sorted(set(updates) | set(deletes)))
+        # الحفظ الثاني لنفس الصفوف الجديدة يضيفها رغم وجود أدوية مشابهة (كنموذج الإضافة)
+        signature = tuple(tuple(row.get(column) for column in MEDICATION_GRID_COLUMNS) for row in inserts)
+        try:
+            updated, inserted, deleted = save_medications_bulk(
+                updates, inserts, deletes, originals,
+                allow_similar=st.session_state.get('confirm_bulk_similar') == signature
+            )
+            del st.session_state['bulk_editor_snapshot']
+            st.session_state['confirm_bulk_similar'] = None
+            st.success(f"✅ تم الحفظ: {updated} معدل، {inserted} جديد، {deleted} محذوف")
+            st.rerun()
+        except SimilarMedicationError as e:
+            st.session_state['confirm_bulk_similar'] = signature
+            st.warning(f"⚠️ {len(e.matches)} من الصفوف الجديدة تشبه أدوية موجودة في الكتالوج. "
+                       "تأكد أنها ليست مكررة، أو انقر حفظ مرة أخرى لإضافتها رغم ذلك")
+            st.dataframe(similar_frame(e.matches, inserts), use_container_width=True, hide_index=True)
+        except StaleMedicationError as e:
+            st.error(f"❌ {str(e)}")
+        except Exception as e:
+            st.error(f"❌ حدث خطأ: {str(e)}")
@@ -0,0 +1,55 @@
+"""
+صفحة إدارة الفئات - Categories
+"""
+
+import streamlit as st
+
+from database import add_category, get_categories
+from views.components import show_bulk_edit_grid
+
+# ===================================================================
+# صفحة إدارة الفئات
+# ===================================================================
+def show_categories_page():
+    st.header("📂 إدارة الفئات")
+    
+    # عرض الفئات الحالية
+    categories = get_categories()
+    st.subheader("📋 الفئات الحالية")
+    
+    if len(categories) > 0:
+        # جدول مقسم إلى صفحات مع حذف وتعديل جماعي
+        show_bulk_edit_grid(
+            categories, 'categories', key='categories_page',
+            column_labels={'name': 'الاسم (إنجليزي)', 'name_ar': 'الاسم (عربي)', 'description': 'الوصف'}
+        )
+    else:
+        st.info("لا توجد فئات")
+    
+    st.markdown("---")
+    
+    # إضافة فئة جديدة
+    st.subheader("➕ إضافة فئة جديدة")
+    
+    with st.form("add_category_form"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            name = st.text_input("اسم الفئة (إنجليزي) *", placeholder="مثال: pediatric")
+            name_ar = st.text_input("اسم الفئة (عربي)", placeholder="مثال: أطفال")
+        
+        with col2:
+            description = st.text_area("الوصف (اختياري)", placeholder="وصف الفئة")
+        
+        submitted = st.form_submit_button("إضافة الفئة", use_container_width=True, type="primary")
+        
+        if submitted:
+            if not name:
+                st.error("❌ الرجاء إدخال اسم الفئة")
+            else:
+                try:
+                    add_category(name, name_ar, description)
+                    st.success(f"✅ تم إضافة فئة {name} بنجاح!")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ حدث خطأ: {str(e)}")
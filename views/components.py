@@ -0,0 +1,118 @@
+"""
+مكونات واجهة مشتركة - Shared UI Components
+
+جدول التعديل والحذف الجماعي المستخدم في صفحات الجداول المرجعية.
+"""
+
+import pandas as pd
+import streamlit as st
+
+from database import BULK_EDITABLE_COLUMNS, delete_rows_bulk, update_rows_bulk
+
+# ===================================================================
+# مكونات واجهة مشتركة
+# ===================================================================
+
+def _cell_changed(old, new):
+    """مقارنة قيمتين مع اعتبار القيم الفارغة متساوية"""
+    if pd.isna(old) and pd.isna(new):
+        return False
+    if pd.isna(old) or pd.isna(new):
+        return True
+    return old != new
+
+def show_bulk_edit_grid(df, table, key, column_labels, page_size_options=(25, 50, 100, 250)):
+    """جدول مقسم إلى صفحات مع تحديد متعدد وحذف/تعديل جماعي في معاملة واحدة
+
+    يعرض صفحة واحدة فقط من السجلات داخل st.data_editor بدلاً من إنشاء
+    أزرار وأعمدة لكل صف، وتنفذ جميع التغييرات بعملية واحدة.
+    """
+    editable = BULK_EDITABLE_COLUMNS[table]
+    # يتغير بعد كل عملية ناجحة لإعادة تهيئة حالة المحرر على البيانات الجديدة
+    generation_key = f"{key}_generation"
+
+    # التنقل بين الصفحات
+    col_size, col_page, col_info = st.columns([1, 1, 2])
+    with col_size:
+        page_size = st.selectbox("عدد الصفوف في الصفحة", page_size_options, key=f"{key}_page_size")
+    total_pages = max(1, -(-len(df) // page_size))
+    with col_page:
+        page_number = st.number_input(
+            "الصفحة", min_value=1, max_value=total_pages, value=1, step=1, key=f"{key}_page"
+        )
+    with col_info:
+        st.write("")
+        st.write("")
+        st.caption(f"إجمالي السجلات: {len(df)} | عدد الصفحات: {total_pages}")
+
+    start = (int(page_number) - 1) * page_size
+    page_df = df.iloc[start:start + page_size][['id'] + editable].reset_index(drop=True)
+    page_df.insert(0, 'selected', False)
+
+    column_config = {
+        'selected': st.column_config.CheckboxColumn("تحديد", default=False),
+        'id': st.column_config.NumberColumn("المعرف", disabled=True),
+    }
+    for column in editable:
+        column_config[column] = st.column_config.TextColumn(column_labels.get(column, column))
+
+    edited_df = st.data_editor(
+        page_df,
+        column_config=column_config,
+        hide_index=True,
+        use_container_width=True,
+        num_rows="fixed",
+        key=f"{key}_editor_{st.session_state.get(generation_key, 0)}_{page_number}_{page_size}",
+    )
+
+    selected_ids = edited_df.loc[edited_df['selected'], 'id'].astype(int).tolist()
+
+    # حساب التعديلات على مستوى الخلية مقارنة بالبيانات المحملة
+    changes = {}
+    for (_, old_row), (_, new_row) in zip(page_df.iterrows(), edited_df.iterrows()):
+        row_changes = {
+            column: (None if pd.isna(new_row[column]) else new_row[column])
+            for column in editable
+            if _cell_changed(old_row[column], new_row[column])
+        }
+        if row_changes:
+            changes[int(old_row['id'])] = row_changes
+
+    col_delete, col_save = st.columns(2)
+
+    with col_delete:
+        confirm_key = f"confirm_bulk_delete_{key}"
+        if st.button(
+            f"🗑️ حذف المحدد ({len(selected_ids)})",
+            key=f"{key}_delete_btn",
+            disabled=not selected_ids,
+            use_container_width=True,
+        ):
+            if st.session_state.get(confirm_key) == selected_ids:
+                try:
+                    deleted = delete_rows_bulk(table, selected_ids)
+                    st.session_state[confirm_key] = None
+                    st.session_state[generation_key] = st.session_state.get(generation_key, 0) + 1
+                    st.success(f"✅ تم حذف {deleted} سجل")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ خطأ: {str(e)}")
+            else:
+                st.session_state[confirm_key] = selected_ids
+                st.warning(f"⚠️ سيتم حذف {len(selected_ids)} سجل - انقر مرة أخرى للتأكيد")
+
+    with col_save:
+        if st.button(
+            f"💾 حفظ التعديلات ({len(changes)})",
+            key=f"{key}_save_btn",
+            type="primary",
+            disabled=not changes,
+            use_container_width=True,
+        ):
+            try:
+                updated = update_rows_bulk(table, changes)
+                st.session_state[generation_key] = st.session_state.get(generation_key, 0) + 1
+                st.success(f"✅ تم تحديث {updated} سجل")
+                st.rerun()
+            except Exception as e:
+                st.error(f"❌ خطأ: {str(e)}")
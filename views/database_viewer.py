@@ -0,0 +1,623 @@
+"""
+صفحة عرض قاعدة البيانات الكاملة - Database Viewer
+
+تشمل تصدير الكتالوج، لوحة مراقبة استعلامات SQL ومستشار الفهارس، اللقطات
+الاحتياطية والاستعادة، سجل التدقيق، وضغط النصوص السريرية.
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from functools import partial
+
+import pandas as pd
+import streamlit as st
+
+import audit
+import backups
+import clinical_text
+import database
+import exports
+import index_advisor
+import query_stats
+from database import (
+    archive_audit_month,
+    compress_clinical_text,
+    delete_all_medications,
+    get_backup_manager,
+    delete_medication,
+    expand_clinical_text,
+    get_age_weight_estimates,
+    get_all_medications,
+    get_audit_history,
+    get_audit_partitions,
+    get_audit_recent,
+    get_catalog_version,
+    get_categories,
+    get_clinical_text_report,
+    get_db_connection,
+    get_drug_types,
+    get_export_cache,
+    get_manufacturers,
+    prune_audit_before,
+    restore_backup,
+)
+from views.components import show_bulk_edit_grid
+
+# ===================================================================
+# صفحة عرض قاعدة البيانات الكاملة
+# ===================================================================
+def show_database_viewer_page():
+    st.header("🗄️ عرض قاعدة البيانات الكاملة")
+    
+    st.info("📊 هذه الصفحة تعرض جميع البيانات في قاعدة البيانات مع إمكانية الحذف")
+    
+    # شرح هيكل قاعدة البيانات
+    with st.expander("📚 فهم هيكل قاعدة البيانات - Understanding Database Structure"):
+        st.markdown("""
+        ### الجداول الرئيسية في قاعدة البيانات:
+        
+        1. **medications (الأدوية)** 💊
+           - الجدول الرئيسي الذي يحتوي على جميع معلومات الأدوية
+           - يحتوي على: الاسم العلمي، الاسم التجاري، التركيز، الجرعات، الأسعار، إلخ
+        
+        2. **categories (الفئات)** 📂
+           - تصنيفات الأدوية حسب الفئة المستهدفة
+           - أمثلة: أطفال (pediatric)، بالغين (adult)، حوامل (pregnant)
+        
+        3. **drug_types (أنواع الأدوية)** 🔢
+           - تصنيفات الأدوية حسب النوع الدوائي
+           - أمثلة: مضاد حيوي (antibiotic)، خافض حرارة (antipyretics)
+        
+        4. **manufacturers (الشركات المصنعة)** 🏭
+           - معلومات الشركات المصنعة للأدوية
+           - يحتوي على: اسم الشركة، البلد، الموقع الإلكتروني
+        
+        5. **age_weight_estimates (تقديرات الأوزان)** 📊
+           - جدول مرجعي لتقدير وزن الطفل حسب العمر
+           - يستخدم لحساب الجرعات المناسبة
+        
+        ---
+        
+        ### العلاقات بين الجداول:
+        - كل دواء (medication) مرتبط بـ:
+          - فئة واحدة (category)
+          - نوع دواء واحد (drug_type)
+          - شركة مصنعة واحدة (manufacturer)
+        """)
+    
+    # إحصائيات سريعة
+    meds_df = get_all_medications()
+    cats_df = get_categories()
+    types_df = get_drug_types()
+    manufacturers_df = get_manufacturers()
+    weights_df = get_age_weight_estimates()
+    
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("💊 الأدوية", len(meds_df))
+    with col2:
+        st.metric("📂 الفئات", len(cats_df))
+    with col3:
+        st.metric("🔢 الأنواع", len(types_df))
+    with col4:
+        st.metric("🏭 الشركات", len(manufacturers_df))
+    with col5:
+        st.metric("📊 الأوزان", len(weights_df))
+    
+    st.markdown("---")
+    
+    # عرض الجداول في تبويبات
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+        "💊 الأدوية (Medications)", 
+        "📂 الفئات (Categories)", 
+        "🔢 أنواع الأدوية (Drug Types)", 
+        "🏭 الشركات المصنعة (Manufacturers)",
+        "📊 تقديرات الأوزان (Age Weight Estimates)"
+    ])
+    
+    # تبويب الأدوية
+    with tab1:
+        st.subheader("💊 جميع الأدوية (Medications Table)")
+        st.caption("📋 الجدول: medications | يحتوي على معلومات الأدوية الكاملة")
+        if len(meds_df) > 0:
+            st.dataframe(meds_df, use_container_width=True, height=400)
+            
+            st.markdown("---")
+            st.subheader("🗑️ حذف دواء")
+            
+            col_select, col_delete = st.columns([3, 1])
+            with col_select:
+                med_to_delete = st.selectbox(
+                    "اختر دواء للحذف",
+                    meds_df['id'].tolist(),
+                    format_func=lambda x: f"ID:{x} - {meds_df[meds_df['id']==x]['generic_name'].values[0]} ({meds_df[meds_df['id']==x]['trade_name'].values[0]})",
+                    key="delete_med_select"
+                )
+            
+            with col_delete:
+                st.write("")
+                st.write("")
+                if st.button("🗑️ حذف", key="delete_med_btn", type="secondary"):
+                    try:
+                        delete_medication(med_to_delete)
+                        st.success(f"✅ تم حذف الدواء ID:{med_to_delete}")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ خطأ: {str(e)}")
+        else:
+            st.info("لا توجد أدوية في قاعدة البيانات")
+    
+    # تبويب الفئات
+    with tab2:
+        st.subheader("📂 جميع الفئات (Categories Table)")
+        st.caption("📋 الجدول: categories | يحتوي على تصنيفات الأدوية (أطفال، بالغين، حوامل، إلخ)")
+        if len(cats_df) > 0:
+            st.caption("🗑️ حذف فئة: حدد الصفوف ثم اضغط حذف، أو عدّل الخلايا ثم احفظ")
+            show_bulk_edit_grid(
+                cats_df, 'categories', key='db_categories',
+                column_labels={'name': 'الاسم (إنجليزي)', 'name_ar': 'الاسم (عربي)', 'description': 'الوصف'}
+            )
+        else:
+            st.info("لا توجد فئات في قاعدة البيانات")
+    
+    # تبويب أنواع الأدوية
+    with tab3:
+        st.subheader("🔢 جميع أنواع الأدوية (Drug Types Table)")
+        st.caption("📋 الجدول: drug_types | يحتوي على أنواع الأدوية (مضاد حيوي، خافض حرارة، إلخ)")
+        if len(types_df) > 0:
+            st.caption("🗑️ حذف نوع دواء: حدد الصفوف ثم اضغط حذف، أو عدّل الخلايا ثم احفظ")
+            show_bulk_edit_grid(
+                types_df, 'drug_types', key='db_drug_types',
+                column_labels={'name': 'الاسم (إنجليزي)', 'name_ar': 'الاسم (عربي)', 'description': 'الوصف'}
+            )
+        else:
+            st.info("لا توجد أنواع أدوية في قاعدة البيانات")
+    
+    # تبويب الشركات المصنعة
+    with tab4:
+        st.subheader("🏭 جميع الشركات المصنعة (Manufacturers Table)")
+        st.caption("📋 الجدول: manufacturers | يحتوي على معلومات الشركات المصنعة للأدوية")
+        if len(manufacturers_df) > 0:
+            st.caption("🗑️ حذف شركة مصنعة: حدد الصفوف ثم اضغط حذف، أو عدّل الخلايا ثم احفظ")
+            show_bulk_edit_grid(
+                manufacturers_df, 'manufacturers', key='db_manufacturers',
+                column_labels={'name': 'الاسم (إنجليزي)', 'name_ar': 'الاسم (عربي)', 'country': 'البلد'}
+            )
+        else:
+            st.info("لا توجد شركات مصنعة في قاعدة البيانات")
+    
+    # تبويب تقديرات الأوزان
+    with tab5:
+        st.subheader("📊 تقديرات الأوزان حسب العمر (Age Weight Estimates Table)")
+        st.caption("📋 الجدول: age_weight_estimates | يحتوي على تقديرات الأوزان المتوقعة حسب عمر الطفل")
+        if len(weights_df) > 0:
+            st.dataframe(weights_df, use_container_width=True, height=400)
+            st.info("ℹ️ هذا الجدول للقراءة فقط - لا يمكن حذف البيانات")
+        else:
+            st.info("لا توجد بيانات تقديرات الأوزان")
+    
+    st.markdown("---")
+    
+    # خيارات متقدمة
+    with st.expander("⚙️ خيارات متقدمة"):
+        st.warning("⚠️ تحذير: هذه العمليات لا يمكن التراجع عنها إلا بالاستعادة من لقطة احتياطية!")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if st.button("🗑️ حذف جميع الأدوية", type="secondary"):
+                if st.session_state.get('confirm_delete_all_meds', False):
+                    try:
+                        with st.spinner("جاري أخذ لقطة احتياطية قبل الحذف..."):
+                            snapshot = get_backup_manager().request("pre-delete").result()
+                        delete_all_medications()
+                        st.success(f"✅ تم حذف جميع الأدوية (لقطة قبل الحذف: {snapshot['file']})")
+                        st.session_state['confirm_delete_all_meds'] = False
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ خطأ: {str(e)}")
+                else:
+                    st.session_state['confirm_delete_all_meds'] = True
+                    st.warning("⚠️ انقر مرة أخرى للتأكيد")
+        
+        with col2:
+            if st.button("📊 عرض معلومات قاعدة البيانات", type="primary"):
+                conn = get_db_connection()
+                cursor = conn.cursor()
+                
+                # الحصول على حجم قاعدة البيانات
+                db_size = os.path.getsize(database.DB_PATH) / 1024  # KB
+                st.metric("حجم قاعدة البيانات", f"{db_size:.2f} KB")
+                
+                # الحصول على قائمة الجداول مع الترجمة العربية
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+                tables = cursor.fetchall()
+                
+                # قاموس الترجمة للجداول
+                table_translations = {
+                    'medications': 'الأدوية',
+                    'categories': 'الفئات',
+                    'drug_types': 'أنواع الأدوية',
+                    'manufacturers': 'الشركات المصنعة',
+                    'age_weight_estimates': 'تقديرات الأوزان حسب العمر',
+                    'search_history': 'سجل البحث'
+                }
+                
+                st.write("**الجداول المتوفرة في قاعدة البيانات:**")
+                for table in tables:
+                    table_name = table[0]
+                    arabic_name = table_translations.get(table_name, table_name)
+                    
+                    # عد السجلات في كل جدول
+                    try:
+                        cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+                        count = cursor.fetchone()[0]
+                        st.write(f"- **{table_name}** ({arabic_name}) - {count} سجل")
+                    except:
+                        st.write(f"- **{table_name}** ({arabic_name})")
+                
+                conn.close()
+    
+    # تصدير الكتالوج
+    with st.expander("📤 تصدير الكتالوج (CSV / Excel / Parquet)"):
+        show_export_panel(len(meds_df))
+    
+    # اللقطات الاحتياطية
+    with st.expander("💾 النسخ الاحتياطي والاستعادة"):
+        show_backup_panel()
+    
+    # سجل التدقيق
+    with st.expander("🕵️ سجل التدقيق (الإضافة والتعديل والحذف)"):
+        show_audit_panel()
+    
+    # ضغط النصوص السريرية
+    with st.expander("🗜️ ضغط النصوص السريرية"):
+        show_clinical_text_panel(meds_df)
+    
+    # مراقبة استعلامات SQL
+    with st.expander("⏱️ مراقبة استعلامات SQL"):
+        show_query_stats_panel()
+
+def show_export_panel(row_count):
+    """تنزيل الكتالوج من ملف محفوظ لإصدار البيانات الحالي أو تجهيزه"""
+    cache = get_export_cache()
+    version = cache.current_version()
+    formats = exports.available_formats()
+    background = row_count > exports.BACKGROUND_EXPORT_ROWS
+    stamp = datetime.now().strftime('%Y%m%d')
+    st.caption(f"📋 medications_full_view - {row_count:,} دواء - إصدار البيانات {version}")
+    
+    for fmt in formats:
+        info = exports.FORMATS[fmt]
+        file_name = f"medications-{stamp}.{info['extension']}"
+        path = cache.cached_path(fmt, version)
+        col_button, col_status = st.columns([1, 2])
+        with col_button:
+            if path is not None:
+                st.download_button(
+                    f"📥 {info['label']}", partial(exports.read_file, path), file_name=file_name,
+                    mime=info['mime'], on_click="ignore", key=f"export_{fmt}", use_container_width=True
+                )
+            elif not background:
+                # الملف يُبنى عند الضغط فقط ويُحفظ لهذا الإصدار
+                st.download_button(
+                    f"📥 {info['label']}", lambda fmt=fmt: exports.read_file(cache.build(fmt)),
+                    file_name=file_name, mime=info['mime'], on_click="ignore", key=f"export_{fmt}",
+                    use_container_width=True
+                )
+            elif not cache.is_building(fmt):
+                if st.button(f"⚙️ تجهيز {info['label']}", key=f"prepare_export_{fmt}", use_container_width=True):
+                    cache.start(fmt)
+                    st.rerun()
+        with col_status:
+            if path is not None:
+                st.caption(f"✅ جاهز - {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+            elif cache.is_building(fmt):
+                done = cache.progress.get(fmt, 0)
+                st.progress(min(done / row_count, 1.0) if row_count else 0.0,
+                            text=f"جاري التصدير... {done:,} / {row_count:,}")
+            elif fmt in cache.last_error:
+                st.error(f"❌ خطأ: {cache.last_error[fmt]}")
+    
+    if any(cache.is_building(fmt) for fmt in formats):
+        _wait_for_exports(cache, formats)
+
+@st.fragment(run_every=2)
+@query_stats.page_fragment("show_database_viewer_page")
+def _wait_for_exports(cache, formats):
+    """إعادة عرض الصفحة عند انتهاء التصدير الخلفي"""
+    if not any(cache.is_building(fmt) for fmt in formats):
+        st.rerun()
+
+def show_backup_panel():
+    """إنشاء لقطة، قائمة اللقطات مع فحصها، والاستعادة بتأكيد مزدوج"""
+    manager = get_backup_manager()
+    entries = manager.list()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("عدد اللقطات", len(entries))
+    with col2:
+        st.metric("آخر لقطة", entries[0]['created_at'][:19].replace('T', ' ') if entries else "-")
+    with col3:
+        st.metric("الحجم الكلي", f"{sum(e['bytes'] for e in entries) / 1024 / 1024:.1f} MB")
+    schedule = (f"كل {database.BACKUP_INTERVAL_HOURS:g} ساعة" if manager.interval
+                else "غير مفعلة (DRUG_BACKUP_INTERVAL_HOURS)")
+    st.caption(f"📁 `{manager.backup_dir}` - اللقطات الدورية: {schedule} - الاحتفاظ: آخر "
+               f"{manager.keep_last} لقطة + لقطة يومية لآخر {manager.keep_daily} يوم، "
+               f"ولقطات الأمان (قبل الاستعادة أو الحذف) لآخر {manager.keep_safety_days} يوم")
+    
+    if manager.progress is not None and manager.progress['total']:
+        progress = manager.progress
+        st.progress(1 - progress['remaining'] / progress['total'],
+                    text=f"جاري إنشاء لقطة ({progress['label']})...")
+    if manager.last_error:
+        st.error(f"❌ فشلت آخر لقطة: {manager.last_error}")
+    
+    if st.button("📸 إنشاء لقطة الآن", key="create_backup_btn", type="primary"):
+        try:
+            # النسخ في خيط اللقطات على خطوات صغيرة: باقي الجلسات تعمل أثناءه
+            with st.spinner("جاري إنشاء اللقطة وفحصها..."):
+                result = manager.request("manual").result()
+            st.success(f"✅ {result['file']} - {result['bytes'] / 1024:.0f} KB في {result['seconds']:.2f} ث "
+                       f"(integrity_check: {result['integrity']})")
+            entries = manager.list()
+        except Exception as e:
+            st.error(f"❌ خطأ: {str(e)}")
+    
+    if not entries:
+        st.info("لا توجد لقطات بعد")
+        return
+    
+    st.dataframe(
+        pd.DataFrame([{
+            'الوقت': e['created_at'][:19].replace('T', ' '),
+            'النوع': e['label'],
+            'الحجم (KB)': round(e['bytes'] / 1024),
+            'الأدوية': e['medications'],
+            'إصدار المخطط': e['schema_version'],
+            'الفحص': e['integrity'],
+            'الزمن (ث)': e['seconds'],
+            'الملف': e['file'],
+        } for e in entries]),
+        use_container_width=True, hide_index=True
+    )
+    
+    by_file = {e['file']: e for e in entries}
+    selected = st.selectbox(
+        "اختر لقطة",
+        list(by_file),
+        format_func=lambda f: f"{by_file[f]['created_at'][:19].replace('T', ' ')} - {by_file[f]['label']} "
+                              f"({by_file[f]['medications']} دواء)",
+        key="backup_select"
+    )
+    col_verify, col_restore = st.columns(2)
+    with col_verify:
+        if st.button("🔍 فحص اللقطة", key="verify_backup_btn", use_container_width=True):
+            check = backups.verify_backup(by_file[selected]['path'])
+            if check['ok']:
+                st.success("✅ اللقطة سليمة (SHA-256 و integrity_check)")
+            else:
+                st.error(f"❌ {check['error']}")
+    with col_restore:
+        if st.button("♻️ استعادة هذه اللقطة", key="restore_backup_btn", use_container_width=True):
+            if st.session_state.get('confirm_restore_backup') == selected:
+                try:
+                    with st.spinner("جاري أخذ لقطة للحالة الحالية ثم الاستعادة..."):
+                        safety, _ = restore_backup(by_file[selected]['path'])
+                    st.session_state['confirm_restore_backup'] = None
+                    st.success(f"✅ تمت الاستعادة (الحالة السابقة محفوظة في {safety['file']})")
+                except Exception as e:
+                    st.error(f"❌ خطأ: {str(e)}")
+            else:
+                st.session_state['confirm_restore_backup'] = selected
+                st.warning("⚠️ سيتم استبدال جميع البيانات الحالية بمحتوى اللقطة. انقر مرة أخرى للتأكيد")
+
+def audit_frame(entries):
+    """تغييرات سجل التدقيق كجدول للعرض"""
+    return pd.DataFrame([{
+        'الوقت': e['changed_at'],
+        'الكيان': audit.ENTITY_LABELS.get(e['entity'], e['entity']),
+        'المعرف': e['row_id'],
+        'العملية': audit.OPERATIONS[e['op']],
+        'التفاصيل': audit.describe(e),
+    } for e in entries])
+
+def show_audit_panel():
+    """آخر التغييرات، سجل كيان واحد، والأشهر المختومة مع الأرشفة والحذف"""
+    summary, months = get_audit_partitions()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("تغييرات الشهر الحالي", f"{summary['hot_entries']:,}")
+    with col2:
+        st.metric("أشهر مختومة", summary['months'])
+    with col3:
+        st.metric("تغييرات مختومة", f"{summary['sealed_entries']:,}")
+    with col4:
+        ratio = summary['sealed_raw_bytes'] / summary['sealed_bytes'] if summary['sealed_bytes'] else 0
+        st.metric("نسبة الضغط", f"{ratio:.1f}x" if ratio else "-")
+    retention = (f"حذف الأقدم من {database.AUDIT_KEEP_MONTHS} شهر" if database.AUDIT_KEEP_MONTHS > 0
+                 else "دون حذف تلقائي (DRUG_AUDIT_KEEP_MONTHS)")
+    st.caption(f"الأشهر المكتملة تُختم مضغوطة عند بدء التشغيل - {retention} - الأرشيف: `{database.AUDIT_ARCHIVE_DIR}`")
+    
+    col_entity, col_id, col_archived = st.columns([2, 1, 1])
+    with col_entity:
+        entity = st.selectbox("الكيان", list(audit.AUDITED_TABLES),
+                              format_func=lambda t: audit.AUDITED_TABLES[t][1], key="audit_entity")
+    with col_id:
+        row_id = st.number_input("المعرف (id)", min_value=0, step=1, key="audit_row_id")
+    with col_archived:
+        st.write("")
+        include_archived = st.checkbox("مع المؤرشف", key="audit_include_archived")
+    
+    if row_id:
+        entries = get_audit_history(entity, int(row_id), include_archived)
+        if entries:
+            st.dataframe(audit_frame(entries), use_container_width=True, hide_index=True)
+        else:
+            st.info("لا توجد تغييرات مسجلة لهذا المعرف")
+    else:
+        only_deletes = st.checkbox("الحذف فقط", key="audit_only_deletes")
+        entries = get_audit_recent(200, op='D' if only_deletes else None)
+        if entries:
+            st.write("**آخر التغييرات في الشهر الحالي:**")
+            st.dataframe(audit_frame(entries), use_container_width=True, hide_index=True)
+        else:
+            st.info("لا توجد تغييرات في الشهر الحالي")
+    
+    if not months:
+        return
+    st.write("**الأشهر المختومة:**")
+    st.dataframe(pd.DataFrame([{
+        'الشهر': m['month'],
+        'السجلات': m['records'],
+        'التغييرات': m['entries'],
+        'قبل الضغط (KB)': round(m['raw_bytes'] / 1024, 1),
+        'بعد الضغط (KB)': round(m['stored_bytes'] / 1024, 1),
+        'الأرشيف': m['archive_path'] or "",
+    } for m in months]), use_container_width=True, hide_index=True)
+    
+    month = st.selectbox("اختر شهرًا", [m['month'] for m in months], key="audit_month")
+    col_archive, col_prune = st.columns(2)
+    with col_archive:
+        if st.button("📦 أرشفة الشهر إلى ملف", key="archive_audit_btn", use_container_width=True):
+            try:
+                path = archive_audit_month(month)
+                st.success(f"✅ {path}")
+            except Exception as e:
+                st.error(f"❌ خطأ: {str(e)}")
+    with col_prune:
+        if st.button("🗑️ حذف الأشهر السابقة لهذا الشهر", key="prune_audit_btn", use_container_width=True):
+            if st.session_state.get('confirm_prune_audit') == month:
+                try:
+                    pruned = prune_audit_before(month)
+                    st.session_state['confirm_prune_audit'] = None
+                    st.success(f"✅ تم حذف {len(pruned)} شهر")
+                except Exception as e:
+                    st.error(f"❌ خطأ: {str(e)}")
+            else:
+                st.session_state['confirm_prune_audit'] = month
+                st.warning("⚠️ سيتم حذف سجل التدقيق لهذه الأشهر نهائيًا (ملفات الأرشيف تبقى). انقر مرة أخرى للتأكيد")
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def clinical_text_report(version):
+    """تقرير الضغط لإصدار البيانات (يمسح أعمدة النصوص غير المضغوطة)"""
+    return get_clinical_text_report()
+
+def show_clinical_text_panel(meds_df):
+    """التوفير في الملف والذاكرة من ضغط النصوص السريرية مع الضغط وفكه"""
+    report = clinical_text_report(get_catalog_version())
+    mb = 1024 * 1024
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("حقول مضغوطة", f"{report['fields']:,}")
+    with col2:
+        ratio = report['raw_bytes'] / report['stored_bytes'] if report['stored_bytes'] else 0
+        st.metric("نسبة الضغط", f"{ratio:.1f}x" if ratio else "-")
+    with col3:
+        st.metric("توفير الملف", f"{report['disk_saved_bytes'] / mb:,.1f} MB")
+    with col4:
+        st.metric("توفير الذاكرة", f"{report['memory_saved_bytes'] / mb:,.1f} MB")
+    columns = [c for c in clinical_text.CLINICAL_COLUMNS if c in meds_df.columns]
+    in_memory = meds_df[columns].memory_usage(deep=True, index=False).sum()
+    st.caption(
+        f"نصوص غير مضغوطة في الجدول: {report['inline_bytes'] / mb:,.1f} MB - "
+        f"أعمدة النصوص في الكتالوج بالذاكرة الآن: {in_memory / mb:,.1f} MB - "
+        f"القاموس: {report['dictionary_bytes'] / 1024:,.0f} KB - "
+        f"صفحات حرة تعود للملف بعد VACUUM: {report['free_bytes'] / mb:,.1f} MB"
+    )
+    st.caption("الضغط التلقائي عند بدء التشغيل: " + ("مفعل" if database.COMPRESS_TEXT else "غير مفعل (DRUG_COMPRESS_TEXT)"))
+    
+    if report['by_field']:
+        st.dataframe(pd.DataFrame([{
+            'الحقل': f['field'],
+            'العدد': f['count'],
+            'قبل الضغط (KB)': round(f['raw_bytes'] / 1024, 1),
+            'بعد الضغط (KB)': round(f['stored_bytes'] / 1024, 1),
+            'في الذاكرة (KB)': round(f['memory_bytes'] / 1024, 1),
+        } for f in report['by_field']]), use_container_width=True, hide_index=True)
+    
+    col_compress, col_retrain, col_expand = st.columns(3)
+    with col_compress:
+        if st.button("🗜️ ضغط النصوص الآن", key="compress_text_btn", use_container_width=True):
+            try:
+                stats = compress_clinical_text()
+                st.success(f"✅ تم ضغط {stats['fields']:,} حقل")
+            except Exception as e:
+                st.error(f"❌ خطأ: {str(e)}")
+    with col_retrain:
+        if st.button("🔁 قاموس جديد وإعادة الضغط", key="retrain_text_btn", use_container_width=True):
+            try:
+                stats = compress_clinical_text(retrain=True)
+                st.success(f"✅ تم ضغط {stats['fields']:,} حقل وإعادة ضغط {stats['recompressed']:,}")
+            except Exception as e:
+                st.error(f"❌ خطأ: {str(e)}")
+    with col_expand:
+        if st.button("📖 فك ضغط جميع النصوص", key="expand_text_btn", use_container_width=True):
+            try:
+                st.success(f"✅ تمت إعادة {expand_clinical_text():,} حقل إلى أعمدتها")
+            except Exception as e:
+                st.error(f"❌ خطأ: {str(e)}")
+
+def show_query_stats_panel():
+    """عرض إحصائيات الاستعلامات المجمعة وسجل الاستعلامات البطيئة"""
+    stats = query_stats.STATS
+    query_rows = stats.query_rows()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("عدد الأوامر", sum(r['count'] for r in query_rows))
+    with col2:
+        st.metric("الزمن الكلي", f"{sum(r['total_ms'] for r in query_rows):,.0f} ms")
+    with col3:
+        st.metric("أوامر مختلفة", len(query_rows))
+    with col4:
+        st.metric(f"بطيئة (≥ {query_stats.SLOW_QUERY_MS:g} ms)", stats.slow_count)
+    st.caption(f"منذ {stats.since.strftime('%Y-%m-%d %H:%M:%S')} - مشتركة بين جميع الجلسات في هذه العملية")
+    
+    st.write("**حسب الأمر (Fingerprint):**")
+    if query_rows:
+        st.dataframe(pd.DataFrame(query_rows), use_container_width=True, height=300, hide_index=True)
+    else:
+        st.info("لم يتم تسجيل أي استعلام بعد")
+    
+    st.write("**حسب الصفحة:**")
+    page_rows = stats.page_rows()
+    if page_rows:
+        st.dataframe(pd.DataFrame(page_rows), use_container_width=True, hide_index=True)
+    
+    st.write(f"**سجل الاستعلامات البطيئة** (`{query_stats.SLOW_QUERY_LOG}`):")
+    slow_queries = query_stats.read_slow_queries(limit=50)
+    if slow_queries:
+        for entry in slow_queries:
+            st.markdown(f"`{entry['time']}` **{entry['ms']} ms** - {entry['rows']} صف - {entry['page']}")
+            st.code(entry['fingerprint'] + (
+                "\n\n-- EXPLAIN QUERY PLAN\n-- " + "\n-- ".join(entry['plan']) if entry.get('plan') else ""
+            ), language="sql")
+    else:
+        st.info("لا توجد استعلامات بطيئة")
+    
+    st.write("**🧭 مستشار الفهارس:** إعادة تحليل خطط الاستعلامات المسجلة والبطيئة")
+    if st.button("🧭 تحليل الفهارس", key="run_index_advisor"):
+        fingerprints = index_advisor.fingerprints_from_log(query_stats.SLOW_QUERY_LOG)
+        for row in query_rows:
+            fingerprints[row['fingerprint']] = {'count': row['count'], 'total_ms': row['total_ms']}
+        # اتصال عادي حتى لا تظهر أوامر EXPLAIN نفسها في الإحصائيات
+        conn = sqlite3.connect(database.DB_PATH)
+        try:
+            findings = index_advisor.analyze(conn, fingerprints)
+        finally:
+            conn.close()
+        findings = [f for f in findings if f['issue'] != 'full_scan_expected']
+        if findings:
+            st.dataframe(pd.DataFrame(findings), use_container_width=True, hide_index=True)
+            suggestions = sorted({f['suggestion'] for f in findings if f['suggestion']})
+            if suggestions:
+                st.code("\n".join(suggestions), language="sql")
+        else:
+            st.success("✅ لا توجد عمليات مسح كامل أو فرز مؤقت في الاستعلامات المسجلة")
+    
+    if st.button("🔄 تصفير الإحصائيات", key="reset_query_stats"):
+        stats.reset()
+        st.rerun()
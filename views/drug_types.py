@@ -0,0 +1,55 @@
+"""
+صفحة إدارة أنواع الأدوية - Drug Types
+"""
+
+import streamlit as st
+
+from database import add_drug_type, get_drug_types
+from views.components import show_bulk_edit_grid
+
+# ===================================================================
+# صفحة إدارة أنواع الأدوية
+# ===================================================================
+def show_drug_types_page():
+    st.header("🔢 إدارة أنواع الأدوية")
+    
+    # عرض الأنواع الحالية
+    drug_types = get_drug_types()
+    st.subheader("📋 أنواع الأدوية الحالية")
+    
+    if len(drug_types) > 0:
+        # جدول مقسم إلى صفحات مع حذف وتعديل جماعي
+        show_bulk_edit_grid(
+            drug_types, 'drug_types', key='drug_types_page',
+            column_labels={'name': 'الاسم (إنجليزي)', 'name_ar': 'الاسم (عربي)', 'description': 'الوصف'}
+        )
+    else:
+        st.info("لا توجد أنواع أدوية")
+    
+    st.markdown("---")
+    
+    # إضافة نوع جديد
+    st.subheader("➕ إضافة نوع دواء جديد")
+    
+    with st.form("add_drug_type_form"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            name = st.text_input("اسم النوع (إنجليزي) *", placeholder="مثال: antibiotic")
+            name_ar = st.text_input("اسم النوع (عربي)", placeholder="مثال: مضاد حيوي")
+        
+        with col2:
+            description = st.text_area("الوصف (اختياري)", placeholder="وصف النوع")
+        
+        submitted = st.form_submit_button("إضافة النوع", use_container_width=True, type="primary")
+        
+        if submitted:
+            if not name:
+                st.error("❌ الرجاء إدخال اسم النوع")
+            else:
+                try:
+                    add_drug_type(name, name_ar, description)
+                    st.success(f"✅ تم إضافة نوع {name} بنجاح!")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ حدث خطأ: {str(e)}")
@@ -0,0 +1,130 @@
+"""
+صفحة الأدوية المكررة - Duplicate Medications
+
+مجموعات الأدوية التي يُرجح أنها الدواء نفسه بأسماء أو تركيز مكتوب بصيغ مختلفة
+(dedup.py). لكل مجموعة يختار المراجع الدواء الذي يبقى ويدمج فيه الباقي، أو يؤكد
+أنها ليست مكررة فلا تظهر مجددًا.
+"""
+
+import time
+
+import pandas as pd
+import streamlit as st
+
+import dedup
+from database import dismiss_duplicates, find_duplicate_groups, get_all_medications, merge_medications
+
+GROUPS_PER_PAGE = 20
+DUPLICATE_COLUMNS = {
+    'trade_name': 'الاسم التجاري',
+    'generic_name': 'الاسم العلمي',
+    'active_ingredient': 'المادة الفعالة',
+    'concentration': 'التركيز',
+    'form': 'الشكل',
+    'manufacturer_name': 'الشركة المصنعة',
+    'price': 'السعر',
+    'availability': 'التوفر',
+    'barcode': 'الباركود',
+}
+
+def medication_name(medication_id, medications):
+    row = medications.loc[medication_id]
+    return row['trade_name'] if pd.notna(row['trade_name']) else row['generic_name']
+
+def duplicates_frame(ids, medications, scores=None):
+    """جدول الأدوية ids بأعمدة المقارنة (و'التشابه' إذا أُعطيت scores)"""
+    df = medications.loc[ids, list(DUPLICATE_COLUMNS)].rename(columns=DUPLICATE_COLUMNS)
+    df.insert(0, 'المعرف', ids)
+    if scores is not None:
+        df.insert(1, 'التشابه', [f"{score:.0%}" for score in scores])
+    return df
+
+def similar_frame(matches, rows):
+    """الأدوية المشابهة لكل صف جديد (matches من SimilarMedicationError) مع اسم الصف"""
+    medications = get_all_medications().set_index('id')
+    frames = []
+    for index, similar in matches.items():
+        similar = [(i, score) for i, score in similar if i in medications.index]
+        if not similar:
+            continue
+        df = duplicates_frame([i for i, _ in similar], medications, [score for _, score in similar])
+        df.insert(0, 'الدواء الجديد', rows[index].get('trade_name') or rows[index].get('generic_name'))
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+# ===================================================================
+# صفحة الأدوية المكررة
+# ===================================================================
+def show_duplicates_page():
+    st.header("🧬 الأدوية المكررة - Duplicate Medications")
+    st.info("📝 أدوية متشابهة في الاسم والمادة الفعالة بنفس التركيز والشكل: اختر الدواء الذي يبقى "
+            "وادمج فيه الباقي (ينتقل المخزون وتُكمل الحقول الفارغة)، أو أكد أنها ليست مكررة")
+
+    threshold = st.slider("حد التشابه", min_value=0.6, max_value=1.0, value=dedup.DEFAULT_THRESHOLD, step=0.05,
+                          help="تشابه ثلاثيات أحرف الاسم التجاري (70%) والمادة الفعالة (30%) بعد التطبيع")
+    try:
+        started = time.perf_counter()
+        groups = find_duplicate_groups(threshold)
+        elapsed = time.perf_counter() - started
+    except Exception as e:
+        st.error(f"❌ خطأ: {str(e)}")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("مجموعات مرشحة", f"{len(groups):,}")
+    col2.metric("أدوية في المجموعات", f"{sum(len(group['ids']) for group in groups):,}")
+    col3.metric("زمن الكشف", f"{elapsed * 1000:,.0f} ms")
+
+    if not groups:
+        st.success("✅ لا توجد أدوية مكررة بهذا الحد")
+        return
+
+    start = 0
+    if len(groups) > GROUPS_PER_PAGE:
+        pages = (len(groups) + GROUPS_PER_PAGE - 1) // GROUPS_PER_PAGE
+        page = st.number_input(f"الصفحة (من {pages})", min_value=1, max_value=pages, value=1, step=1)
+        start = (page - 1) * GROUPS_PER_PAGE
+
+    medications = get_all_medications().set_index('id')
+    for group in groups[start:start + GROUPS_PER_PAGE]:
+        ids = [i for i in group['ids'] if i in medications.index]
+        if len(ids) > 1:
+            show_duplicate_group(ids, group['score'], medications)
+
+def show_duplicate_group(ids, score, medications):
+    """مجموعة واحدة: جدول المقارنة، اختيار الدواء الباقي، الدمج أو الاستبعاد"""
+    key = "-".join(str(i) for i in ids)
+    names = dict.fromkeys(medication_name(i, medications) for i in ids)
+    with st.expander(f"{score:.0%} - " + " / ".join(names)):
+        df = duplicates_frame(ids, medications)
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+        # الافتراضي: الأكثر اكتمالاً ثم الأقدم
+        filled = medications.loc[ids].notna().sum(axis=1)
+        keep_id = st.radio("الدواء الذي يبقى", ids, index=ids.index(int(filled.idxmax())), horizontal=True,
+                           format_func=lambda i: f"{i}: {medication_name(i, medications)}", key=f"keep_duplicate_{key}")
+        others = [i for i in ids if i != keep_id]
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("🔗 دمج المجموعة", key=f"merge_duplicates_{key}", type="primary", use_container_width=True):
+                if st.session_state.get('confirm_merge_duplicates') == (key, keep_id):
+                    try:
+                        result = merge_medications(keep_id, others)
+                        st.success(f"✅ تم دمج {result['merged']} دواء في {keep_id} "
+                                   f"({result['filled']} حقل مكمل، {result['movements']} حركة مخزون)")
+                        st.session_state['confirm_merge_duplicates'] = None
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ خطأ: {str(e)}")
+                else:
+                    st.session_state['confirm_merge_duplicates'] = (key, keep_id)
+                    st.warning(f"⚠️ سيُحذف {len(others)} دواء بعد نقل مخزونها إلى {keep_id}. انقر مرة أخرى للتأكيد")
+        with col2:
+            if st.button("🚫 ليست مكررة", key=f"dismiss_duplicates_{key}", use_container_width=True):
+                try:
+                    dismiss_duplicates(ids)
+                    st.success("✅ لن تظهر هذه المجموعة مجددًا")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ خطأ: {str(e)}")
@@ -0,0 +1,62 @@
+"""
+صفحة انتهاء الصلاحية - Expiry
+
+التشغيلات التي تنتهي صلاحيتها خلال عدد أيام يحدده المستخدم، والتشغيلات
+المنتهية التي ما زالت فيها كمية. الاستعلام مسح نطاق من فهرس تاريخ الانتهاء
+(lots.py).
+"""
+
+import pandas as pd
+import streamlit as st
+
+from database import get_expiring_lots, get_expiry_summary, get_warehouses
+
+EXPIRY_ROWS = 1000
+LOT_COLUMNS = ['id', 'رقم الدواء', 'الاسم التجاري', 'الاسم العلمي', 'warehouse_id', 'المستودع',
+               'رقم التشغيلة', 'تاريخ الانتهاء', 'الكمية', 'الأيام المتبقية']
+
+def _lots_frame(rows):
+    df = pd.DataFrame(rows, columns=LOT_COLUMNS)
+    return df[['تاريخ الانتهاء', 'الأيام المتبقية', 'الاسم التجاري', 'الاسم العلمي',
+               'رقم الدواء', 'المستودع', 'رقم التشغيلة', 'الكمية']]
+
+# ===================================================================
+# صفحة انتهاء الصلاحية
+# ===================================================================
+def show_expiry_page():
+    st.header("⏳ انتهاء الصلاحية")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        days = st.slider("تنتهي خلال (يوم)", min_value=7, max_value=365, value=90, step=1)
+    with col2:
+        warehouses = get_warehouses()
+        names = dict(zip(warehouses['id'], warehouses['name']))
+        warehouse_id = st.selectbox("المستودع", [None] + warehouses['id'].tolist(),
+                                    format_func=lambda x: "الكل" if x is None else names[x])
+
+    summary = get_expiry_summary(days)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("تشغيلات تنتهي قريبًا", f"{summary['expiring_lots']:,}")
+    col2.metric("وحدات تنتهي قريبًا", f"{summary['expiring_units']:,}")
+    col3.metric("تشغيلات منتهية", f"{summary['expired_lots']:,}")
+    col4.metric("وحدات منتهية", f"{summary['expired_units']:,}")
+
+    tab1, tab2 = st.tabs([f"⏳ تنتهي خلال {days} يوم", "⛔ منتهية وما زالت في المخزون"])
+
+    with tab1:
+        rows = get_expiring_lots(days, warehouse_id, limit=EXPIRY_ROWS)
+        if rows:
+            st.dataframe(_lots_frame(rows), use_container_width=True, hide_index=True)
+            if len(rows) == EXPIRY_ROWS:
+                st.caption(f"أول {EXPIRY_ROWS} تشغيلة (الأقرب انتهاءً)")
+        else:
+            st.success("✅ لا توجد تشغيلات تنتهي خلال هذه الفترة")
+
+    with tab2:
+        rows = get_expiring_lots(-1, warehouse_id, include_expired=True, limit=EXPIRY_ROWS)
+        if rows:
+            st.warning("⚠️ هذه التشغيلات منتهية الصلاحية: لا تُصرف، وتُشطب بحركة تسوية برقم التشغيلة")
+            st.dataframe(_lots_frame(rows), use_container_width=True, hide_index=True)
+        else:
+            st.success("✅ لا توجد تشغيلات منتهية في المخزون")
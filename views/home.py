@@ -0,0 +1,45 @@
+"""
+صفحة الرئيسية - Home Page
+"""
+
+import streamlit as st
+
+from database import get_categories, get_drug_types, get_manufacturers, get_table_counts
+
+# ===================================================================
+# صفحة الرئيسية
+# ===================================================================
+def show_home_page():
+    st.header("🏠 الصفحة الرئيسية")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    # الأعداد باستعلام COUNT واحد: أول ما يظهر في الصفحة لا ينتظر تحميل الكتالوج
+    counts = get_table_counts()
+    
+    with col1:
+        st.metric("💊 إجمالي الأدوية", counts['medications'])
+    with col2:
+        st.metric("📂 الفئات", counts['categories'])
+    with col3:
+        st.metric("🏭 الشركات المصنعة", counts['manufacturers'])
+    with col4:
+        st.metric("🔢 أنواع الأدوية", counts['drug_types'])
+    
+    st.markdown("---")
+    
+    st.subheader("📋 نظرة عامة على قاعدة البيانات")
+    
+    tab1, tab2, tab3 = st.tabs(["الفئات", "أنواع الأدوية", "الشركات المصنعة"])
+    cats_df = get_categories()
+    types_df = get_drug_types()
+    manufacturers_df = get_manufacturers()
+    
+    with tab1:
+        st.dataframe(cats_df, use_container_width=True)
+    
+    with tab2:
+        st.dataframe(types_df, use_container_width=True)
+    
+    with tab3:
+        st.dataframe(manufacturers_df, use_container_width=True)
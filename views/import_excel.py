@@ -0,0 +1,92 @@
+"""
+صفحة استيراد من Excel - Excel Import
+
+pandas و openpyxl (الذي يستورده pd.read_excel عند قراءة ملف) يُحمّلان فقط
+عند فتح هذه الصفحة.
+"""
+
+import os
+import time
+
+import pandas as pd
+import streamlit as st
+
+import metrics
+
+# ===================================================================
+# صفحة استيراد من Excel
+# ===================================================================
+def show_import_page():
+    st.header("📥 استيراد البيانات من Excel")
+    
+    st.info("""
+    **ملاحظة:** هذه الميزة تسمح باستيراد البيانات من ملف Excel.
+    
+    يمكنك استيراد:
+    - الأدوية
+    - الشركات المصنعة
+    - الفئات
+    - أنواع الأدوية
+    """)
+    
+    tab1, tab2 = st.tabs(["📤 رفع ملف", "📂 استيراد من الملف الموجود"])
+    
+    with tab1:
+        st.subheader("رفع ملف Excel جديد")
+        uploaded_file = st.file_uploader("اختر ملف Excel", type=['xlsx', 'xls'])
+        
+        if uploaded_file is not None:
+            try:
+                started = time.perf_counter()
+                df = pd.read_excel(uploaded_file)
+                metrics.IMPORT_ROWS.inc('upload', amount=len(df))
+                metrics.IMPORT_SECONDS.inc('upload', amount=time.perf_counter() - started)
+                st.success(f"✅ تم قراءة الملف بنجاح! عدد الصفوف: {len(df)}")
+                
+                st.subheader("معاينة البيانات")
+                st.dataframe(df.head(10))
+                
+                st.subheader("الأعمدة المتوفرة")
+                st.write(df.columns.tolist())
+                
+                if st.button("استيراد البيانات", type="primary"):
+                    st.warning("⚠️ هذه الميزة قيد التطوير...")
+            except Exception as e:
+                st.error(f"❌ خطأ في قراءة الملف: {str(e)}")
+    
+    with tab2:
+        st.subheader("استيراد من ملف بيانات الأدوية الموجود")
+        
+        if os.path.exists('بيانات الادوية.xlsx'):
+            if st.button("📥 استيراد من 'بيانات الادوية.xlsx'", type="primary"):
+                with st.spinner("جاري الاستيراد..."):
+                    try:
+                        import_from_existing_excel()
+                        st.success("✅ تم الاستيراد بنجاح!")
+                        st.balloons()
+                    except Exception as e:
+                        st.error(f"❌ خطأ: {str(e)}")
+        else:
+            st.warning("⚠️ الملف 'بيانات الادوية.xlsx' غير موجود")
+            
+        st.markdown("---")
+        st.subheader("إحصائيات سريعة")
+        
+        if os.path.exists('drug_data.csv'):
+            df_csv = pd.read_csv('drug_data.csv', encoding='utf-8-sig')
+            st.metric("عدد الصفوف في CSV", len(df_csv))
+            
+            if st.checkbox("عرض أول 20 صف"):
+                st.dataframe(df_csv.head(20))
+
+def import_from_existing_excel():
+    """استيراد البيانات من ملف Excel الموجود"""
+    # هذه دالة مبدئية - يمكن توسيعها لاحقًا
+    st.info("🚧 هذه الميزة قيد التطوير...")
+    st.write("""
+    لاستيراد البيانات بشكل صحيح، يجب:
+    1. تنظيف البيانات في Excel
+    2. تحديد الأعمدة المقابلة لكل حقل
+    3. معالجة القيم الفارغة
+    4. التحقق من صحة البيانات
+    """)
@@ -0,0 +1,169 @@
+"""
+صفحة المخزون - Inventory
+
+الكميات المتوفرة لكل دواء ومستودع من دفتر المخزون (inventory.py)، تسجيل حركة
+واحدة (مع رقم التشغيلة وتاريخ الانتهاء)، واستيراد ملف أحداث من نقطة البيع على
+دفعات.
+"""
+
+import csv
+import io
+import time
+
+import pandas as pd
+import streamlit as st
+
+import metrics
+from database import (
+    get_stock_movements,
+    get_stock_on_hand,
+    get_stock_summary,
+    get_warehouses,
+    record_stock_movements,
+)
+from inventory import FLUSH_EVENTS, MOVEMENT_KINDS
+from lots import parse_expiry
+
+ON_HAND_ROWS = 500
+
+# ===================================================================
+# صفحة المخزون
+# ===================================================================
+def show_inventory_page():
+    st.header("📦 المخزون")
+
+    summary = get_stock_summary()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("إجمالي الوحدات", f"{summary['units']:,}")
+    col2.metric("أدوية متوفرة", f"{summary['in_stock']:,}")
+    col3.metric("أدوية نافدة", f"{summary['out_of_stock']:,}")
+    col4.metric("المستودعات", summary['warehouses'])
+
+    tab1, tab2, tab3, tab4 = st.tabs(["📋 الكميات المتوفرة", "➕ تسجيل حركة", "📤 استيراد من نقطة البيع", "🕘 آخر الحركات"])
+
+    with tab1:
+        show_on_hand()
+
+    with tab2:
+        show_movement_form()
+
+    with tab3:
+        show_pos_import()
+
+    with tab4:
+        movements = get_stock_movements(limit=200)
+        if movements:
+            st.dataframe(
+                pd.DataFrame(movements, columns=['الوقت', 'رقم الدواء', 'الاسم التجاري', 'المستودع', 'النوع', 'الكمية',
+                                            'التشغيلة', 'المرجع']),
+                use_container_width=True, hide_index=True
+            )
+        else:
+            st.info("لا توجد حركات مسجلة")
+
+def show_on_hand():
+    """الكميات حسب المستودع، الأقل كمية أولاً"""
+    warehouses = get_warehouses()
+    options = [None] + warehouses['id'].tolist()
+    names = dict(zip(warehouses['id'], warehouses['name']))
+    warehouse_id = st.selectbox("المستودع", options, format_func=lambda x: "الكل" if x is None else names[x])
+
+    rows = get_stock_on_hand(warehouse_id=warehouse_id, limit=ON_HAND_ROWS)
+    if rows:
+        st.dataframe(
+            pd.DataFrame(rows, columns=['رقم الدواء', 'الاسم التجاري', 'المستودع', 'الكمية', 'آخر حركة']),
+            use_container_width=True, hide_index=True
+        )
+        if len(rows) == ON_HAND_ROWS:
+            st.caption(f"أول {ON_HAND_ROWS} صف (الأقل كمية)")
+    else:
+        st.info("لا توجد كميات مسجلة")
+
+def show_movement_form():
+    with st.form("stock_movement_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            barcode = st.text_input("الباركود", placeholder="أو أدخل رقم الدواء")
+            medication_id = st.number_input("رقم الدواء (id)", min_value=0, step=1)
+            kind = st.selectbox("نوع الحركة", list(MOVEMENT_KINDS), format_func=lambda k: MOVEMENT_KINDS[k][1])
+        with col2:
+            quantity = st.number_input("الكمية (سالبة للتسوية بالنقص)", value=1, step=1)
+            warehouses = get_warehouses()
+            warehouse = st.selectbox("المستودع", [None] + warehouses['name'].tolist(),
+                                     format_func=lambda x: "مستودع الدواء" if x is None else x)
+            reference = st.text_input("المرجع (رقم الفاتورة أو الحدث)")
+        col1, col2 = st.columns(2)
+        with col1:
+            lot = st.text_input("رقم التشغيلة (lot)", placeholder="اتركه فارغًا للصرف من الأقرب انتهاءً")
+        with col2:
+            expiry = st.text_input("تاريخ الانتهاء", placeholder="2027-05-31 أو 05/2027")
+
+        submitted = st.form_submit_button("تسجيل الحركة", use_container_width=True, type="primary")
+
+        if submitted:
+            if not barcode and not medication_id:
+                st.error("❌ الرجاء إدخال الباركود أو رقم الدواء")
+                return
+            if expiry and parse_expiry(expiry) is None:
+                st.error("❌ تاريخ انتهاء غير مفهوم")
+                return
+            event = {
+                'medication_id': int(medication_id) if medication_id else None,
+                'barcode': barcode.strip() if barcode else None,
+                'kind': kind,
+                'quantity': int(quantity),
+                'warehouse': warehouse,
+                'reference': reference if reference else None,
+                'lot': lot.strip() if lot else None,
+                'expiry': expiry.strip() if expiry else None,
+            }
+            try:
+                recorded, duplicates, rejected = record_stock_movements([event])
+                if rejected:
+                    st.error(f"❌ {rejected[0][1]}")
+                elif duplicates:
+                    st.warning("⚠️ حركة بنفس المرجع مسجلة مسبقًا")
+                else:
+                    st.success("✅ تم تسجيل الحركة بنجاح!")
+            except Exception as e:
+                st.error(f"❌ خطأ: {str(e)}")
+
+def show_pos_import():
+    st.caption("ملف CSV بالأعمدة: barcode أو medication_id، kind (receipt / dispense / adjustment)، "
+               "quantity، وأعمدة اختيارية warehouse و reference و occurred_at و lot و expiry (أو manufactured). "
+               f"يُكتب كل {FLUSH_EVENTS:,} حدث في معاملة واحدة، والأحداث بمرجع مسجل مسبقًا تُتجاهل.")
+    uploaded_file = st.file_uploader("اختر ملف أحداث نقطة البيع", type=['csv'])
+
+    if uploaded_file is not None and st.button("📥 استيراد الحركات", type="primary"):
+        started = time.perf_counter()
+        totals = {'events': 0, 'recorded': 0, 'duplicates': 0}
+        rejected = []
+        progress = st.progress(0.0)
+        try:
+            reader = csv.DictReader(io.TextIOWrapper(uploaded_file, encoding='utf-8-sig'))
+            batch = []
+            for event in reader:
+                batch.append(event)
+                if len(batch) >= FLUSH_EVENTS:
+                    _import_batch(batch, totals, rejected)
+                    batch = []
+                    progress.progress(min(uploaded_file.tell() / max(uploaded_file.size, 1), 1.0))
+            if batch:
+                _import_batch(batch, totals, rejected)
+            progress.progress(1.0)
+            metrics.IMPORT_ROWS.inc('pos', amount=totals['events'])
+            metrics.IMPORT_SECONDS.inc('pos', amount=time.perf_counter() - started)
+            st.success(f"✅ {totals['events']:,} حدث في {time.perf_counter() - started:.2f} ث: "
+                       f"{totals['recorded']:,} مسجلة، {totals['duplicates']:,} مكررة، {len(rejected):,} مرفوضة")
+            if rejected:
+                st.dataframe(pd.DataFrame(rejected[:100], columns=['السطر', 'السبب']), use_container_width=True, hide_index=True)
+        except Exception as e:
+            st.error(f"❌ خطأ: {str(e)}")
+
+def _import_batch(batch, totals, rejected):
+    recorded, duplicates, batch_rejected = record_stock_movements(batch)
+    # رقم السطر في الملف: السطر الأول للعناوين
+    rejected.extend((totals['events'] + index + 2, reason) for index, reason in batch_rejected)
+    totals['events'] += len(batch)
+    totals['recorded'] += recorded
+    totals['duplicates'] += duplicates
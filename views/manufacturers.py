@@ -0,0 +1,57 @@
+"""
+صفحة إدارة الشركات المصنعة - Manufacturers
+"""
+
+import streamlit as st
+
+from database import add_manufacturer, get_manufacturers
+from views.components import show_bulk_edit_grid
+
+# ===================================================================
+# صفحة إدارة الشركات المصنعة
+# ===================================================================
+def show_manufacturers_page():
+    st.header("🏭 إدارة الشركات المصنعة")
+    
+    # عرض الشركات الحالية
+    manufacturers = get_manufacturers()
+    st.subheader("📋 الشركات المصنعة الحالية")
+    
+    if len(manufacturers) > 0:
+        # جدول مقسم إلى صفحات مع حذف وتعديل جماعي
+        show_bulk_edit_grid(
+            manufacturers, 'manufacturers', key='manufacturers_page',
+            column_labels={'name': 'الاسم (إنجليزي)', 'name_ar': 'الاسم (عربي)', 'country': 'البلد'}
+        )
+    else:
+        st.info("لا توجد شركات مصنعة")
+    
+    st.markdown("---")
+    
+    # إضافة شركة جديدة
+    st.subheader("➕ إضافة شركة مصنعة جديدة")
+    
+    with st.form("add_manufacturer_form"):
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            name = st.text_input("اسم الشركة (إنجليزي) *", placeholder="مثال: HIKMA")
+        
+        with col2:
+            name_ar = st.text_input("اسم الشركة (عربي)", placeholder="مثال: حكمة")
+        
+        with col3:
+            country = st.text_input("البلد", placeholder="مثال: Jordan")
+        
+        submitted = st.form_submit_button("إضافة الشركة", use_container_width=True, type="primary")
+        
+        if submitted:
+            if not name:
+                st.error("❌ الرجاء إدخال اسم الشركة")
+            else:
+                try:
+                    add_manufacturer(name, name_ar, country)
+                    st.success(f"✅ تم إضافة شركة {name} بنجاح!")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ حدث خطأ: {str(e)}")
@@ -0,0 +1,399 @@
+"""
+صفحة عرض الأدوية - Medications Page
+
+البحث والتصفية وجدول الأدوية وتفاصيل الدواء المحدد، كأجزاء (fragments)
+يعاد تشغيل كل منها وحده.
+"""
+
+import pandas as pd
+import streamlit as st
+
+import image_store
+from audit import OPERATIONS, describe
+from database import (
+    READ_ONLY,
+    delete_medication,
+    get_all_medications,
+    get_audit_history,
+    get_catalog_version,
+    get_categories,
+    get_drug_types,
+    get_image_store,
+    get_manufacturers,
+    get_medication_lots,
+    get_medication_texts,
+    get_price_history,
+    get_stock_on_hand,
+)
+from page_profiler import phase
+from query_stats import page_fragment
+
+# ===================================================================
+# صفحة عرض الأدوية
+# ===================================================================
+def show_medications_page():
+    st.header("💊 عرض الأدوية")
+    
+    # كل جزء يعاد تشغيله وحده: تغيير الفلاتر يعيد الجدول ولوحة التفاصيل داخله فقط،
+    # واختيار دواء أو تأكيد الحذف لا يعيد تحميل الأدوية ولا تصفيتها ولا إرسال الجدول
+    show_medications_catalog()
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_medications_display(version):
+    """الأدوية مع عمود الفئة المدمج (يُحسب مرة واحدة لكل إصدار بيانات، ويجب عدم تعديله)"""
+    df = get_all_medications()
+    cats_df = get_categories()
+    category_names = df['category_id'].astype(object).map(cats_df.set_index('id')['name']).astype(object)
+    category_ar = df['category_name'].astype(object)
+    has_both = category_ar.notna() & category_names.notna()
+    df['category_display'] = category_ar.where(category_ar.notna(), '-').where(
+        ~has_both, category_names.astype(str) + " (" + category_ar.astype(str) + ")"
+    )
+    return df
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def filter_medications(version, search_term, selected_category, availability_filter):
+    """نتيجة الفلاتر لإصدار البيانات مع عناوين قائمة التفاصيل (مشتركة بين أجزاء الصفحة)"""
+    df = get_medications_display(version)
+    if search_term:
+        df = df[
+            df['generic_name'].str.contains(search_term, case=False, na=False) | 
+            df['trade_name'].str.contains(search_term, case=False, na=False)
+        ]
+    
+    if selected_category != "الكل":
+        df = df[df['category_name'] == selected_category]
+    
+    if availability_filter != "الكل":
+        df = df[df['availability'] == availability_filter]
+    
+    labels = {
+        medication_id: f"{trade_name} - {generic_name}"
+        for medication_id, trade_name, generic_name in zip(df['id'], df['trade_name'], df['generic_name'])
+    }
+    return df, labels
+
+# عمود الصور في الجدول لأول هذا العدد من الأدوية فقط (data URI لكل مصغرة داخل الصفحة)
+GRID_IMAGE_ROWS = 200
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def grid_thumbnails(version, search_term, selected_category, availability_filter):
+    """مصغرات صورة الدواء (أو العلبة) لأول GRID_IMAGE_ROWS صف من نتيجة الفلاتر"""
+    df, _ = filter_medications(version, search_term, selected_category, availability_filter)
+    head = df.head(GRID_IMAGE_ROWS)
+    paths = head['image_path'].where(head['image_path'].notna(), head['box_image_path'])
+    uris = get_image_store().data_uris([p for p in paths if isinstance(p, str)], image_store.GRID_SIZE)
+    return pd.Series([uris.get(p) if isinstance(p, str) else None for p in paths], index=head.index, dtype=object)
+
+@st.fragment
+@page_fragment("show_medications_page")
+def show_medications_catalog():
+    """شريط البحث والتصفية مع جدول الأدوية ولوحة التفاصيل التي تختار من نتيجته"""
+    # البحث والتصفية
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        search_term = st.text_input("🔍 بحث بالاسم العلمي أو التجاري")
+    
+    with col2:
+        categories = get_categories()
+        selected_category = st.selectbox(
+            "تصفية حسب الفئة",
+            ["الكل"] + categories['name_ar'].tolist()
+        )
+    
+    with col3:
+        availability_filter = st.selectbox(
+            "تصفية حسب التوفر",
+            ["الكل", "متوفر", "غير متوفر"]
+        )
+    
+    filters = (search_term, selected_category, availability_filter)
+    
+    # جلب البيانات وتطبيق الفلاتر (مخزنة حسب إصدار البيانات والفلاتر)
+    with phase("fetch"):
+        version = get_catalog_version()
+    with phase("transform"):
+        df, _ = filter_medications(version, *filters)
+    
+    st.info(f"📊 عدد الأدوية المعروضة: {len(df)}")
+    show_images = st.toggle("🖼️ الصور المصغرة", key="medications_grid_images",
+                            help=f"صورة الدواء أو العلبة لأول {GRID_IMAGE_ROWS} دواء في الجدول")
+    
+    # عرض البيانات
+    if len(df) > 0:
+        # اختيار الأعمدة للعرض
+        display_columns = [
+            'id', 'generic_name', 'trade_name', 'category_display', 
+            'concentration', 'form', 'manufacturer_name', 'price', 'availability'
+        ]
+        
+        column_names = {
+            'id': 'المعرف',
+            'generic_name': 'الاسم العلمي',
+            'trade_name': 'الاسم التجاري',
+            'category_display': 'الفئة',
+            'concentration': 'التركيز',
+            'form': 'الشكل',
+            'manufacturer_name': 'الشركة',
+            'price': 'السعر',
+            'availability': 'التوفر'
+        }
+        
+        with phase("transform"):
+            display_df = df[display_columns].rename(columns=column_names)
+        column_config = None
+        if show_images:
+            with phase("transform"):
+                display_df.insert(0, 'الصورة', grid_thumbnails(version, *filters))
+            column_config = {'الصورة': st.column_config.ImageColumn('الصورة', width="small")}
+        with phase("render"):
+            st.dataframe(display_df, use_container_width=True, height=400, column_config=column_config)
+    else:
+        st.warning("⚠️ لا توجد بيانات للعرض")
+    
+    # جزء داخل هذا الجزء: يتبع الفلاتر دون إعادة تشغيل الصفحة كاملة
+    show_medication_details_panel(filters)
+
+@st.fragment
+@page_fragment("show_medications_page")
+def show_medication_details_panel(filters):
+    """اختيار دواء من نتيجة الفلاتر وعرض تفاصيله"""
+    with phase("transform"):
+        df, labels = filter_medications(get_catalog_version(), *filters)
+    if len(df) == 0:
+        return
+    
+    # عرض تفاصيل دواء محدد
+    st.markdown("---")
+    st.subheader("📋 تفاصيل الدواء")
+    
+    col_select, col_delete = st.columns([4, 1])
+    
+    with col_select:
+        selected_id = st.selectbox(
+            "اختر دواء لعرض التفاصيل",
+            list(labels),
+            format_func=labels.get
+        )
+    
+    if not READ_ONLY:
+        with col_delete:
+            show_medication_delete_button(selected_id)
+    
+    if selected_id:
+        with phase("render"):
+            show_medication_details(df[df['id'] == selected_id].iloc[0])
+
+@st.fragment
+@page_fragment("show_medications_page")
+def show_medication_delete_button(selected_id):
+    """زر الحذف مع التأكيد (النقرة الأولى تعيد تشغيل هذا الزر فقط)"""
+    st.write("")
+    st.write("")
+    if st.button("🗑️ حذف الدواء", type="secondary", use_container_width=True):
+        if st.session_state.get(f'confirm_delete_med_{selected_id}', False):
+            try:
+                delete_medication(selected_id)
+                st.success("✅ تم حذف الدواء بنجاح!")
+                st.session_state[f'confirm_delete_med_{selected_id}'] = False
+                st.rerun()
+            except Exception as e:
+                st.error(f"❌ خطأ: {str(e)}")
+        else:
+            st.session_state[f'confirm_delete_med_{selected_id}'] = True
+            st.warning("⚠️ انقر مرة أخرى للتأكيد")
+
+IMAGE_LABELS = {
+    'image_path': "صورة الدواء",
+    'box_image_path': "صورة العلبة",
+    'leaflet_path': "النشرة الطبية",
+}
+
+def show_medication_images(medication):
+    """مصغرات صور الدواء من مخزن الصور (الصور الأصلية لا تُرسل إلى المتصفح)"""
+    paths = image_store.medication_paths(medication)
+    if not paths:
+        return
+    try:
+        store = get_image_store()
+        photos = store.thumbnails([p for f, p in paths if f != image_store.LIST_FIELD], image_store.DETAIL_SIZE)
+        gallery = store.thumbnails([p for f, p in paths if f == image_store.LIST_FIELD], image_store.GALLERY_SIZE)
+    except Exception as e:
+        st.warning(f"⚠️ تعذر عرض الصور: {str(e)}")
+        return
+    shown = [(IMAGE_LABELS[field], photos[path]) for field, path in paths if photos.get(path)]
+    if shown:
+        for col, (label, thumbnail) in zip(st.columns(len(shown)), shown):
+            with col:
+                st.image(thumbnail, caption=label)
+    extra = [thumbnail for thumbnail in gallery.values() if thumbnail]
+    if extra:
+        st.image(extra, width=image_store.GALLERY_SIZE)
+    missing = [path for field, path in paths if not (photos.get(path) or gallery.get(path))]
+    if missing:
+        st.caption("⚠️ صور غير موجودة أو ليست صورًا: " + "، ".join(missing))
+
+def show_medication_details(medication):
+    """عرض تفاصيل دواء معين"""
+    
+    # النصوص السريرية المضغوطة ليست في الكتالوج: تُفك للدواء المعروض فقط
+    texts = get_medication_texts(medication['id'])
+    if texts:
+        medication = medication.copy()
+        for field, text in texts.items():
+            medication[field] = text
+    
+    # المعلومات الأساسية
+    with st.expander("📌 المعلومات الأساسية - Basic Information", expanded=True):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.write(f"**الاسم العلمي:** {medication['generic_name']}")
+            st.write(f"**الاسم التجاري:** {medication['trade_name']}" if pd.notna(medication['trade_name']) else "**الاسم التجاري:** غير محدد")
+            
+            # عرض الفئة بالاسمين
+            categories = get_categories()
+            if pd.notna(medication.get('category_id')) and len(categories[categories['id']==medication['category_id']]) > 0:
+                cat_row = categories[categories['id']==medication['category_id']].iloc[0]
+                cat_display = f"{cat_row['name']} ({cat_row['name_ar']})" if pd.notna(cat_row['name_ar']) else cat_row['name']
+                st.write(f"**الفئة:** {cat_display}")
+            else:
+                st.write(f"**الفئة:** {medication['category_name']}" if pd.notna(medication.get('category_name')) else "**الفئة:** غير محدد")
+            
+            # عرض نوع الدواء بالاسمين
+            drug_types = get_drug_types()
+            if pd.notna(medication.get('drug_type_id')) and len(drug_types[drug_types['id']==medication['drug_type_id']]) > 0:
+                type_row = drug_types[drug_types['id']==medication['drug_type_id']].iloc[0]
+                type_display = f"{type_row['name']} ({type_row['name_ar']})" if pd.notna(type_row['name_ar']) else type_row['name']
+                st.write(f"**النوع:** {type_display}")
+            elif pd.notna(medication.get('drug_type_name')):
+                st.write(f"**النوع:** {medication['drug_type_name']}")
+        
+        with col2:
+            # عرض الشركة بالاسمين
+            manufacturers = get_manufacturers()
+            if pd.notna(medication.get('manufacturer_id')) and len(manufacturers[manufacturers['id']==medication['manufacturer_id']]) > 0:
+                mfr_row = manufacturers[manufacturers['id']==medication['manufacturer_id']].iloc[0]
+                mfr_display = f"{mfr_row['name']} ({mfr_row['name_ar']})" if pd.notna(mfr_row['name_ar']) else mfr_row['name']
+                st.write(f"**الشركة المصنعة:** {mfr_display}")
+            else:
+                st.write(f"**الشركة المصنعة:** {medication['manufacturer_name']}" if pd.notna(medication.get('manufacturer_name')) else "**الشركة المصنعة:** غير محدد")
+            
+            st.write(f"**التركيز:** {medication['concentration']}" if pd.notna(medication.get('concentration')) else "**التركيز:** غير محدد")
+            st.write(f"**الشكل الصيدلاني:** {medication['form']}" if pd.notna(medication.get('form')) else "**الشكل الصيدلاني:** غير محدد")
+            st.write(f"**المادة الفعالة:** {medication['active_ingredient']}" if pd.notna(medication.get('active_ingredient')) else "**المادة الفعالة:** غير محدد")
+        
+        if pd.notna(medication.get('composition')):
+            st.write(f"**التركيب:** {medication['composition']}")
+    
+    # المعلومات التجارية
+    with st.expander("💰 المعلومات التجارية - Commercial Information"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write(f"**السعر (price):** {medication['price']} دينار" if pd.notna(medication.get('price')) else "**السعر (price):** غير محدد")
+            st.write(f"**السعر مع الضريبة (price_with_tax):** {medication['price_with_tax']} دينار" if pd.notna(medication.get('price_with_tax')) else "**السعر مع الضريبة (price_with_tax):** غير محدد")
+            st.write(f"**التوفر (availability):** {medication['availability']}" if pd.notna(medication.get('availability')) else "**التوفر (availability):** غير محدد")
+            st.write(f"**الباركود (barcode):** {medication['barcode']}" if pd.notna(medication.get('barcode')) else "**الباركود (barcode):** غير محدد")
+        
+        with col2:
+            st.write(f"**التعبئة (package_info):** {medication['package_info']}" if pd.notna(medication.get('package_info')) else "**التعبئة (package_info):** غير محدد")
+            st.write(f"**حجم العبوة (package_size):** {medication['package_size']}" if pd.notna(medication.get('package_size')) else "**حجم العبوة (package_size):** غير محدد")
+            st.write(f"**المستودع (warehouse_name):** {medication['warehouse_name']}" if pd.notna(medication.get('warehouse_name')) else "**المستودع (warehouse_name):** غير محدد")
+            stock = get_stock_on_hand(medication['id'])
+            if stock:
+                st.write("**الكمية المتوفرة:** " + "، ".join(f"{warehouse}: {quantity}" for _, _, warehouse, quantity, _ in stock))
+            medication_lots = get_medication_lots(medication['id'])
+            if medication_lots:
+                st.write("**التشغيلات:** " + "، ".join(
+                    f"{lot[6]} ({lot[8]}) تنتهي {lot[7]}" for lot in medication_lots
+                ))
+        
+        # سجل الأسعار (قراءة نطاق الدواء من price_history)
+        history = get_price_history(medication['id'])
+        if len(history) > 1:
+            st.write("**📈 سجل الأسعار:**")
+            history_df = pd.DataFrame(history, columns=['التاريخ', 'السعر', 'السعر مع الضريبة'])
+            st.line_chart(history_df.iloc[::-1].set_index('التاريخ')[['السعر', 'السعر مع الضريبة']])
+            st.dataframe(history_df, use_container_width=True, hide_index=True)
+    
+    # الحدود العمرية والوزنية
+    with st.expander("👶 الحدود العمرية والوزنية - Age & Weight Limits"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write(f"**الحد العمري نص (age_limit_text):** {medication['age_limit_text']}" if pd.notna(medication.get('age_limit_text')) else "**الحد العمري نص (age_limit_text):** غير محدد")
+            if pd.notna(medication.get('min_age_months')) or pd.notna(medication.get('max_age_months')):
+                min_age = medication.get('min_age_months', 0)
+                max_age = medication.get('max_age_months', 0)
+                st.write(f"**الحد العمري رقمي (min/max_age_months):** من {min_age} إلى {max_age} شهر")
+        
+        with col2:
+            st.write(f"**الحد الوزني نص (weight_limit_text):** {medication['weight_limit_text']}" if pd.notna(medication.get('weight_limit_text')) else "**الحد الوزني نص (weight_limit_text):** غير محدد")
+            if pd.notna(medication.get('min_weight_kg')) or pd.notna(medication.get('max_weight_kg')):
+                min_weight = medication.get('min_weight_kg', 0)
+                max_weight = medication.get('max_weight_kg', 0)
+                st.write(f"**الحد الوزني رقمي (min/max_weight_kg):** من {min_weight} إلى {max_weight} كجم")
+    
+    # معلومات الجرعة
+    with st.expander("💊 معلومات الجرعة - Dosage Information"):
+        st.write(f"**الجرعة القصوى للجرعة الواحدة (max_single_dose):** {medication['max_single_dose']}" if pd.notna(medication.get('max_single_dose')) else "**الجرعة القصوى للجرعة الواحدة (max_single_dose):** غير محدد")
+        st.write(f"**الجرعة القصوى اليومية (max_daily_dose):** {medication['max_daily_dose']}" if pd.notna(medication.get('max_daily_dose')) else "**الجرعة القصوى اليومية (max_daily_dose):** غير محدد")
+        st.write(f"**معادلة حساب الجرعة (dose_calculation):** {medication['dose_calculation']}" if pd.notna(medication.get('dose_calculation')) else "**معادلة حساب الجرعة (dose_calculation):** غير محدد")
+        st.write(f"**التكرار (frequency):** {medication['frequency']}" if pd.notna(medication.get('frequency')) else "**التكرار (frequency):** غير محدد")
+        st.write(f"**المدة (duration):** {medication['duration']}" if pd.notna(medication.get('duration')) else "**المدة (duration):** غير محدد")
+        st.write(f"**طريقة الإعطاء (administration_route):** {medication['administration_route']}" if pd.notna(medication.get('administration_route')) else "**طريقة الإعطاء (administration_route):** غير محدد")
+    
+    # المعلومات الطبية
+    with st.expander("⚕️ المعلومات الطبية والصيدلانية - Medical & Pharmaceutical Information"):
+        st.write(f"**دواعي الاستعمال (indications):** {medication['indications']}" if pd.notna(medication.get('indications')) else "**دواعي الاستعمال (indications):** غير محدد")
+        st.write(f"**محاذير الاستخدام (contraindications):** {medication['contraindications']}" if pd.notna(medication.get('contraindications')) else "**محاذير الاستخدام (contraindications):** غير محدد")
+        st.write(f"**الآثار الجانبية (side_effects):** {medication['side_effects']}" if pd.notna(medication.get('side_effects')) else "**الآثار الجانبية (side_effects):** غير محدد")
+        st.write(f"**التفاعلات الدوائية (drug_interactions):** {medication['drug_interactions']}" if pd.notna(medication.get('drug_interactions')) else "**التفاعلات الدوائية (drug_interactions):** غير محدد")
+        st.write(f"**تحذيرات (warnings):** {medication['warnings']}" if pd.notna(medication.get('warnings')) else "**تحذيرات (warnings):** غير محدد")
+        st.write(f"**احتياطات (precautions):** {medication['precautions']}" if pd.notna(medication.get('precautions')) else "**احتياطات (precautions):** غير محدد")
+        st.write(f"**إدارة الجرعة الزائدة (overdose_management):** {medication['overdose_management']}" if pd.notna(medication.get('overdose_management')) else "**إدارة الجرعة الزائدة (overdose_management):** غير محدد")
+    
+    # الحمل والرضاعة
+    with st.expander("🤰 الحمل والرضاعة - Pregnancy & Lactation"):
+        st.write(f"**فئة الحمل (pregnancy_category):** {medication['pregnancy_category']}" if pd.notna(medication.get('pregnancy_category')) else "**فئة الحمل (pregnancy_category):** غير محدد")
+        st.write(f"**الأمان أثناء الحمل (pregnancy_safety):** {medication['pregnancy_safety']}" if pd.notna(medication.get('pregnancy_safety')) else "**الأمان أثناء الحمل (pregnancy_safety):** غير محدد")
+        st.write(f"**الأمان أثناء الرضاعة (lactation_safety):** {medication['lactation_safety']}" if pd.notna(medication.get('lactation_safety')) else "**الأمان أثناء الرضاعة (lactation_safety):** غير محدد")
+    
+    # التخزين
+    with st.expander("📦 التخزين - Storage Conditions"):
+        st.write(f"**ظروف التخزين (storage_conditions):** {medication['storage_conditions']}" if pd.notna(medication.get('storage_conditions')) else "**ظروف التخزين (storage_conditions):** غير محدد")
+        st.write(f"**مدة الصلاحية (shelf_life):** {medication['shelf_life']}" if pd.notna(medication.get('shelf_life')) else "**مدة الصلاحية (shelf_life):** غير محدد")
+        st.write(f"**التخزين بعد الفتح (storage_after_opening):** {medication['storage_after_opening']}" if pd.notna(medication.get('storage_after_opening')) else "**التخزين بعد الفتح (storage_after_opening):** غير محدد")
+    
+    # معلومات المنشأ
+    with st.expander("🌍 معلومات المنشأ - Origin Information"):
+        st.write(f"**بلد التصنيع (manufacturing_country):** {medication['manufacturing_country']}" if pd.notna(medication.get('manufacturing_country')) else "**بلد التصنيع (manufacturing_country):** غير محدد")
+        st.write(f"**بلد التسويق (marketing_country):** {medication['marketing_country']}" if pd.notna(medication.get('marketing_country')) else "**بلد التسويق (marketing_country):** غير محدد")
+        st.write(f"**رقم الترخيص (license_number):** {medication['license_number']}" if pd.notna(medication.get('license_number')) else "**رقم الترخيص (license_number):** غير محدد")
+    
+    # الصور والمستندات
+    with st.expander("🖼️ الصور والمستندات - Images & Documents"):
+        show_medication_images(medication)
+        st.write(f"**مسار صورة الدواء (image_path):** {medication['image_path']}" if pd.notna(medication.get('image_path')) else "**مسار صورة الدواء (image_path):** غير محدد")
+        st.write(f"**مسار النشرة الطبية (leaflet_path):** {medication['leaflet_path']}" if pd.notna(medication.get('leaflet_path')) else "**مسار النشرة الطبية (leaflet_path):** غير محدد")
+        st.write(f"**مسار صورة العلبة (box_image_path):** {medication['box_image_path']}" if pd.notna(medication.get('box_image_path')) else "**مسار صورة العلبة (box_image_path):** غير محدد")
+        st.write(f"**صور إضافية (additional_images):** {medication['additional_images']}" if pd.notna(medication.get('additional_images')) else "**صور إضافية (additional_images):** غير محدد")
+    
+    # الملاحظات
+    with st.expander("📝 ملاحظات - Notes"):
+        st.write(f"**ملاحظات عامة (notes):** {medication['notes']}" if pd.notna(medication.get('notes')) else "**ملاحظات عامة (notes):** غير محدد")
+        st.write(f"**ملاحظات الصيدلي (pharmacist_notes):** {medication['pharmacist_notes']}" if pd.notna(medication.get('pharmacist_notes')) else "**ملاحظات الصيدلي (pharmacist_notes):** غير محدد")
+    
+    # التواريخ
+    with st.expander("📅 التواريخ - Timestamps"):
+        st.write(f"**تاريخ الإنشاء (created_at):** {medication['created_at']}" if pd.notna(medication.get('created_at')) else "**تاريخ الإنشاء (created_at):** غير محدد")
+        st.write(f"**تاريخ التحديث (updated_at):** {medication['updated_at']}" if pd.notna(medication.get('updated_at')) else "**تاريخ التحديث (updated_at):** غير محدد")
+    
+    # سجل التدقيق (نطاق الدواء من الفهرس + مفتاح واحد من كل شهر مختوم)
+    with st.expander("🕵️ سجل التعديلات - Audit Trail"):
+        entries = get_audit_history('medications', medication['id'])
+        if entries:
+            for entry in entries[:50]:
+                st.write(f"`{entry['changed_at']}` **{OPERATIONS[entry['op']]}** - {describe(entry)}")
+        else:
+            st.info("لا توجد تعديلات مسجلة")
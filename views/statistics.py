@@ -0,0 +1,126 @@
+"""
+صفحة الإحصائيات - Statistics
+
+التجميعات تتم في محرك التحليلات (analytics.py): DuckDB أو Arrow على أعمدة
+الصفحة فقط، أو pandas على الكتالوج الكامل إذا لم تتوفر المكتبات. اتجاه الأسعار
+يُقرأ من التجميعات اليومية/الشهرية في price_history.py.
+"""
+
+import pandas as pd
+import streamlit as st
+
+from database import get_analytics, get_categories, get_manufacturers, get_price_trend
+from page_profiler import phase
+from query_stats import page_fragment
+
+
+def _series(pairs, name):
+    """قائمة (المفتاح، العدد) من المحرك كسلسلة للرسم"""
+    return pd.Series(dict(pairs), name=name, dtype='int64')
+
+# البعد المعروض في قسم اتجاه الأسعار -> (دالة القائمة، بعد التجميع)
+PRICE_TREND_DIMENSIONS = {
+    "الفئة": (get_categories, 'category'),
+    "الشركة المصنعة": (get_manufacturers, 'manufacturer'),
+}
+PRICE_TREND_PERIODS = {"شهري": 'month', "يومي": 'day'}
+
+# ===================================================================
+# صفحة الإحصائيات
+# ===================================================================
+def show_statistics_page():
+    st.header("📈 الإحصائيات")
+    
+    with phase("fetch"):
+        engine = get_analytics()
+    
+    with phase("transform"):
+        category_counts = _series(engine.value_counts('category_name'), "count")
+        form_counts = _series(engine.value_counts('form'), "count")
+        manufacturer_counts = _series(engine.value_counts('manufacturer_name', limit=10), "count")
+        availability_counts = _series(engine.value_counts('availability'), "count")
+        monthly = pd.DataFrame(engine.monthly('created_month', 'price'), columns=['الشهر', 'الأدوية المضافة', 'متوسط السعر'])
+        has_data = engine.count() > 0
+    
+    st.caption(f"⚙️ محرك التحليلات: {engine.name}")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1, phase("render"):
+        st.subheader("توزيع الأدوية حسب الفئة")
+        if has_data:
+            st.bar_chart(category_counts)
+        else:
+            st.info("لا توجد بيانات للعرض")
+    
+    with col2, phase("render"):
+        st.subheader("توزيع الأدوية حسب الشكل الصيدلاني")
+        if has_data:
+            st.bar_chart(form_counts)
+        else:
+            st.info("لا توجد بيانات للعرض")
+    
+    st.markdown("---")
+    
+    col3, col4 = st.columns(2)
+    
+    with col3, phase("render"):
+        st.subheader("توزيع الأدوية حسب الشركة المصنعة")
+        if has_data:
+            st.bar_chart(manufacturer_counts)
+        else:
+            st.info("لا توجد بيانات للعرض")
+    
+    with col4, phase("render"):
+        st.subheader("توزيع الأدوية حسب التوفر")
+        if has_data:
+            st.bar_chart(availability_counts)
+        else:
+            st.info("لا توجد بيانات للعرض")
+    
+    st.markdown("---")
+    
+    with phase("render"):
+        st.subheader("الأدوية المضافة شهريًا")
+        if len(monthly) > 0:
+            st.line_chart(monthly.set_index('الشهر')[['الأدوية المضافة']])
+            st.dataframe(monthly, use_container_width=True, hide_index=True)
+        else:
+            st.info("لا توجد بيانات للعرض")
+    
+    st.markdown("---")
+    show_price_trend()
+
+@st.fragment
+@page_fragment("show_statistics_page")
+def show_price_trend():
+    """اتجاه متوسط السعر لفئة أو شركة (تغيير الاختيار يعيد تشغيل هذا القسم فقط)"""
+    st.subheader("💹 اتجاه الأسعار")
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        dimension_label = st.radio("حسب", list(PRICE_TREND_DIMENSIONS), horizontal=True)
+    load_options, dimension = PRICE_TREND_DIMENSIONS[dimension_label]
+    options = load_options()
+    if len(options) == 0:
+        st.info("لا توجد بيانات للعرض")
+        return
+    labels = {row['id']: row['name_ar'] if pd.notna(row['name_ar']) else row['name'] for _, row in options.iterrows()}
+    with col2:
+        key_id = st.selectbox(dimension_label, list(labels), format_func=labels.get)
+    with col3:
+        period_label = st.radio("الفترة", list(PRICE_TREND_PERIODS), horizontal=True)
+    
+    try:
+        with phase("fetch"):
+            points = get_price_trend(dimension, key_id, PRICE_TREND_PERIODS[period_label])
+    except Exception as e:
+        st.error(f"❌ خطأ: {str(e)}")
+        return
+    
+    with phase("render"):
+        if points:
+            trend = pd.DataFrame(points, columns=['الفترة', 'نقاط السعر', 'متوسط السعر', 'أدنى سعر', 'أعلى سعر', 'آخر سعر'])
+            st.line_chart(trend.set_index('الفترة')[['متوسط السعر', 'أدنى سعر', 'أعلى سعر']])
+            st.dataframe(trend, use_container_width=True, hide_index=True)
+        else:
+            st.info("لا توجد تغييرات أسعار مسجلة")
@@ -0,0 +1,32 @@
+"""
+صفحة تقديرات الأوزان - Weight Estimates
+"""
+
+import streamlit as st
+
+from database import get_age_weight_estimates
+
+# ===================================================================
+# صفحة تقديرات الأوزان
+# ===================================================================
+def show_weight_estimates_page():
+    st.header("📊 تقديرات الأوزان حسب العمر")
+    
+    df = get_age_weight_estimates()
+    
+    tab1, tab2, tab3 = st.tabs(["📅 0-11 شهر", "📅 1-5 سنوات", "📅 6-15 سنة"])
+    
+    with tab1:
+        df_0_11 = df[df['age_group'] == '0-11 months']
+        st.dataframe(df_0_11, use_container_width=True)
+        st.line_chart(df_0_11.set_index('age_text')['estimated_weight_kg'])
+    
+    with tab2:
+        df_1_5 = df[df['age_group'] == '1-5 years']
+        st.dataframe(df_1_5, use_container_width=True)
+        st.line_chart(df_1_5.set_index('age_text')['estimated_weight_kg'])
+    
+    with tab3:
+        df_6_15 = df[df['age_group'] == '6-15 years']
+        st.dataframe(df_6_15, use_container_width=True)
+        st.line_chart(df_6_15.set_index('age_text')['estimated_weight_kg'])